@@ -0,0 +1,85 @@
+"""
+Benchmark: per-row identity/date re-parsing versus fields parsed once at load time.
+
+Compares the way the TUI used to build commit rows (splitting the raw author string
+and calling datetime.fromtimestamp for every row, and again for every sort key) with
+using the Identity/author_time fields that CommitLoader now fills in while loading.
+
+Usage:
+    python benchmarks/bench_identity.py [--commits N] [--authors N] [--repeat N]
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Callable, List
+
+from git_repo_inspector.commit_loader import Commit, CommitLoader
+
+
+def make_commits(count: int, authors: int) -> List[Commit]:
+    """Build synthetic commits through the real parser."""
+    loader = CommitLoader('.')
+    commits: List[Commit] = []
+    for i in range(count):
+        who = f"Author {i % authors} <author{i % authors}@example.com> {1600000000 + i * 37} +0900"
+        raw = (
+            f"tree {'0' * 40}\n"
+            f"author {who}\n"
+            f"committer {who}\n"
+            f"\n"
+            f"Commit number {i}\n"
+        ).encode()
+        commits.append(loader._parse_commit(f"{i:040x}", raw, []))
+    return commits
+
+
+def legacy_rows(commits: List[Commit]) -> None:
+    """Old path: re-split the raw header strings on every row and sort key."""
+    def parse_time(info: str) -> int:
+        return int(info.split(' ')[-2])
+
+    ordered = sorted(commits, key=lambda c: parse_time(c.author), reverse=True)
+    for c in ordered:
+        name = c.author.split('<', 1)[0].strip() if '<' in c.author else "Unknown Author"
+        date = datetime.fromtimestamp(parse_time(c.author)).strftime('%Y-%m-%d %H:%M:%S')
+        (c.sha[:7], name, date)
+
+
+def parsed_rows(commits: List[Commit]) -> None:
+    """New path: sort and display from the fields parsed at load time."""
+    ordered = sorted(commits, key=lambda c: c.author_time, reverse=True)
+    for c in ordered:
+        name = c.author_ident.name if c.author_ident else "Unknown Author"
+        date = datetime.fromtimestamp(c.author_time).strftime('%Y-%m-%d %H:%M:%S')
+        (c.sha[:7], name, date)
+
+
+def best_of(func: Callable[[List[Commit]], None], commits: List[Commit], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(commits)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark identity/date parsing at load time vs per row.')
+    parser.add_argument('--commits', type=int, default=100_000, help='Number of synthetic commits')
+    parser.add_argument('--authors', type=int, default=200, help='Number of distinct authors')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetitions (best time is reported)')
+    args = parser.parse_args()
+
+    commits = make_commits(args.commits, args.authors)
+    distinct = len({id(c.author_ident) for c in commits})
+    print(f"{args.commits} commits, {distinct} interned identities")
+
+    legacy = best_of(legacy_rows, commits, args.repeat)
+    parsed = best_of(parsed_rows, commits, args.repeat)
+    print(f"legacy (re-parse per row): {legacy * 1000:9.1f} ms")
+    print(f"parsed at load time:       {parsed * 1000:9.1f} ms")
+    print(f"speedup:                   {legacy / parsed:9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
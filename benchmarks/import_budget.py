@@ -0,0 +1,123 @@
+"""
+Import-time budget for the git-repo-inspector CLI.
+
+Runs the non-interactive CLI paths in fresh interpreters under `python -X importtime`,
+adds up the cumulative import time of the top-level modules and fails when a path goes
+over the budget or imports Textual, which only the TUI needs.
+
+Usage:
+    python -m benchmarks.import_budget [--budget-ms 150] [--repeat 3] [--repo PATH]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Set, Tuple
+
+# CLI paths that must start without loading the TUI; the repository path is appended
+CLI_PATHS: Dict[str, List[str]] = {
+    'branches': ['branches', '--json'],
+    'commits': ['commits', '--json'],
+    'stats': ['stats', '--json'],
+    'worktrees': ['worktrees', '--json'],
+    'verify': ['verify'],
+    'largest-objects': ['largest-objects', '5'],
+    'backends': ['backends', '--json'],
+    'scan': ['scan', '--json'],
+    'query': ['query', '--socket', os.devnull, 'branches'],  # no daemon there: direct loading
+    'legacy-branches': ['--list-branches', '--json'],
+}
+FORBIDDEN_MODULES: Tuple[str, ...] = ('textual', 'rich')
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Set[str]]:
+    """
+    Parse the output of `python -X importtime`.
+
+    :param stderr: Standard error of the interpreter
+    :return: Tuple (total cumulative import time of the top-level imports in ms, names of all imported modules)
+    """
+    total_us: int = 0
+    modules: Set[str] = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields: List[str] = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # the column header
+        name: str = fields[2].rstrip()
+        module: str = name.lstrip()
+        modules.add(module)
+        if len(name) - len(module) == 1:  # nesting is shown by indentation; one space is top level
+            total_us += int(fields[1])
+    return total_us / 1000, modules
+
+
+def measure(argv: List[str], repo_path: str) -> Tuple[float, Set[str]]:
+    """
+    Run one CLI path in a fresh interpreter and return its import time and modules.
+    """
+    cmd: List[str] = [sys.executable, '-X', 'importtime', '-m', 'git_repo_inspector'] + argv + [repo_path]
+    result: subprocess.CompletedProcess = subprocess.run(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} exited with {result.returncode}")
+    return parse_importtime(result.stderr)
+
+
+def check_budget(repo_path: str, budget_ms: float, repeat: int) -> List[str]:
+    """
+    Measure every CLI path and describe the ones that break the budget.
+
+    :param repo_path: Repository the commands run against
+    :param budget_ms: Allowed median import time per path in milliseconds
+    :param repeat: Runs per path; the median is compared
+    :return: One line per violation; empty when every path is within budget
+    """
+    violations: List[str] = []
+    for name, argv in CLI_PATHS.items():
+        timings: List[float] = []
+        modules: Set[str] = set()
+        for _ in range(repeat):
+            elapsed, modules = measure(argv, repo_path)
+            timings.append(elapsed)
+        median: float = statistics.median(timings)
+        print(f"  {name:<16} imports {median:8.1f} ms", file=sys.stderr)
+        if median > budget_ms:
+            violations.append(f"{name}: {median:.1f} ms > {budget_ms:.1f} ms")
+        loaded: List[str] = sorted(m for m in modules if m.split('.')[0] in FORBIDDEN_MODULES)
+        if loaded:
+            violations.append(f"{name}: imports {', '.join(loaded[:3])}{' ...' if len(loaded) > 3 else ''}")
+    return violations
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Check the cold-start import time of the CLI paths.')
+    parser.add_argument('--budget-ms', type=float, default=150.0,
+                        help='Allowed median import time per CLI path in milliseconds (default: 150)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per CLI path')
+    parser.add_argument('--repo', help='Repository to run against (default: a small temporary one)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo_path: str = args.repo or os.path.join(tmp, 'repo')
+        if not args.repo:
+            subprocess.run(['git', 'init', '-q', repo_path], check=True)
+            subprocess.run(['git', '-C', repo_path, '-c', 'user.name=Bench', '-c', 'user.email=bench@example.com',
+                            'commit', '-q', '--allow-empty', '-m', 'Initial'], check=True)
+        violations: List[str] = check_budget(repo_path, args.budget_ms, args.repeat)
+
+    if violations:
+        print("Over budget:", file=sys.stderr)
+        for line in violations:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    print(f"All CLI paths within {args.budget_ms:.0f} ms.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
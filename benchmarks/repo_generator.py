@@ -0,0 +1,155 @@
+"""
+Synthetic repository generator for benchmarks.
+
+Builds a local repository by streaming commands into `git fast-import`, so even
+1M-commit histories are generated without a working tree or per-commit processes.
+
+Usage:
+    python -m benchmarks.repo_generator PATH [--commits N] [--branches N]
+                                              [--merge-density F] [--message-size N]
+"""
+import argparse
+import os
+import random
+import subprocess
+from typing import BinaryIO, Dict, List, NamedTuple, Optional
+
+
+class RepoSpec(NamedTuple):
+    commits: int = 10_000
+    branches: int = 10
+    merge_density: float = 0.05  # probability that a commit merges another branch tip
+    message_size: int = 80       # approximate commit message size in bytes
+    files: int = 500             # distinct file paths touched by the history
+    seed: int = 1
+
+    def cache_key(self) -> str:
+        """Directory name identifying repositories generated from this spec."""
+        return (f"c{self.commits}-b{self.branches}-m{self.merge_density:g}"
+                f"-s{self.message_size}-f{self.files}-r{self.seed}")
+
+
+_WORDS = (b"fix", b"add", b"update", b"remove", b"refactor", b"parser", b"loader", b"branch",
+          b"commit", b"tree", b"test", b"docs", b"cache", b"index", b"speed", b"cleanup")
+_EPOCH = 1_500_000_000
+
+
+def _message(rng: random.Random, number: int, size: int) -> bytes:
+    words: List[bytes] = [b"Commit %d:" % number]
+    length: int = len(words[0])
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return b" ".join(words) + b"\n"
+
+
+def _data(out: BinaryIO, payload: bytes) -> None:
+    out.write(b"data %d\n" % len(payload))
+    out.write(payload)
+    out.write(b"\n")
+
+
+def write_stream(out: BinaryIO, spec: RepoSpec) -> None:
+    """
+    Write a fast-import stream for `spec` to `out`.
+
+    Branch 0 is "main"; every other branch forks from main's tip at its first commit.
+    Each commit rewrites one file, so trees change gradually like a real project.
+
+    :param out: Binary stream connected to `git fast-import`
+    :param spec: Repository shape
+    """
+    rng = random.Random(spec.seed)
+    names: List[bytes] = [b"main"] + [b"branch-%d" % i for i in range(1, spec.branches)]
+    tips: Dict[int, int] = {}  # branch index -> mark of its tip
+    authors: List[bytes] = [b"Dev %d <dev%d@example.com>" % (i, i) for i in range(20)]
+
+    for number in range(1, spec.commits + 1):
+        # Keep most of the history on main, like a trunk-based project
+        lane: int = 0 if spec.branches == 1 or rng.random() < 0.5 else rng.randrange(1, spec.branches)
+        who: bytes = rng.choice(authors)
+        when: int = _EPOCH + number * 600
+        out.write(b"commit refs/heads/%s\n" % names[lane])
+        out.write(b"mark :%d\n" % number)
+        out.write(b"author %s %d +0000\n" % (who, when))
+        out.write(b"committer %s %d +0000\n" % (who, when))
+        _data(out, _message(rng, number, spec.message_size))
+
+        if lane not in tips and 0 in tips:
+            out.write(b"from :%d\n" % tips[0])
+        others: List[int] = [b for b in tips if b != lane and tips[b] != tips.get(lane)]
+        if others and rng.random() < spec.merge_density:
+            out.write(b"merge :%d\n" % tips[rng.choice(others)])
+
+        file_number: int = rng.randrange(spec.files)
+        path: bytes = b"dir%d/file%d.txt" % (file_number % 50, file_number)
+        out.write(b"M 100644 inline %s\n" % path)
+        _data(out, b"%s revision %d\n" % (path, number))
+        tips[lane] = number
+
+
+def generate_repo(path: str, spec: RepoSpec, bare: bool = True) -> str:
+    """
+    Create a repository at `path` populated according to `spec`.
+
+    :param path: Directory for the new repository (created if missing)
+    :param spec: Repository shape
+    :param bare: Create a bare repository (default), otherwise one with an empty work tree
+    :return: The repository path
+    """
+    os.makedirs(path, exist_ok=True)
+    init: List[str] = ['git', 'init', '-q', '-b', 'main'] + (['--bare'] if bare else []) + [path]
+    subprocess.run(init, check=True)
+    proc = subprocess.Popen(['git', '-C', path, 'fast-import', '--quiet'], stdin=subprocess.PIPE)
+    try:
+        write_stream(proc.stdin, spec)
+    finally:
+        proc.stdin.close()
+        returncode: int = proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"git fast-import failed with exit code {returncode}")
+    return path
+
+
+def cached_repo(cache_dir: str, spec: RepoSpec) -> str:
+    """
+    Return a generated repository for `spec`, reusing one from `cache_dir` when present.
+
+    :param cache_dir: Directory holding previously generated repositories
+    :param spec: Repository shape
+    :return: Path to the repository
+    """
+    path: str = os.path.join(cache_dir, spec.cache_key())
+    marker: str = os.path.join(path, 'generated-by-benchmarks')
+    if not os.path.exists(marker):
+        if os.path.exists(path):
+            raise RuntimeError(f"Incomplete generated repository at {path}; remove it and retry.")
+        generate_repo(path, spec)
+        with open(marker, 'w') as f:
+            f.write(f"{spec!r}\n")
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    defaults = RepoSpec()
+    parser = argparse.ArgumentParser(description='Generate a synthetic Git repository with git fast-import.')
+    parser.add_argument('path', help='Directory for the new repository')
+    parser.add_argument('--commits', type=int, default=defaults.commits, help='Number of commits')
+    parser.add_argument('--branches', type=int, default=defaults.branches, help='Number of branches')
+    parser.add_argument('--merge-density', type=float, default=defaults.merge_density,
+                        help='Probability that a commit is a merge (0..1)')
+    parser.add_argument('--message-size', type=int, default=defaults.message_size,
+                        help='Approximate commit message size in bytes')
+    parser.add_argument('--files', type=int, default=defaults.files, help='Number of distinct file paths')
+    parser.add_argument('--seed', type=int, default=defaults.seed, help='Random seed')
+    parser.add_argument('--non-bare', action='store_true', help='Create a non-bare repository')
+    args = parser.parse_args(argv)
+
+    spec = RepoSpec(args.commits, args.branches, args.merge_density, args.message_size, args.files, args.seed)
+    generate_repo(args.path, spec, bare=not args.non_bare)
+    print(f"Generated {spec.commits} commits on {spec.branches} branches in {args.path}")
+
+
+if __name__ == '__main__':
+    main()
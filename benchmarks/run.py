@@ -0,0 +1,233 @@
+"""
+Benchmark runner for git-repo-inspector.
+
+Generates (or reuses) synthetic repositories with benchmarks.repo_generator, times the
+loading paths against them and stores the results as JSON. A previous results file can
+be given as a baseline; the run fails when any benchmark regresses past the threshold.
+
+Usage:
+    python -m benchmarks.run [--commits 10000 100000] [--branches N] [--repeat N]
+                             [--output results.json] [--baseline old.json] [--threshold 0.2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from git_repo_inspector.branch_loader import BranchLoader
+from git_repo_inspector.commit_loader import CommitLoader
+from git_repo_inspector.object_reader import BatchObjectReader
+from git_repo_inspector.stats import collect_stats
+from git_repo_inspector.tree_diff import TreeDiffer, iter_commit_changes
+
+from .repo_generator import RepoSpec, cached_repo
+
+BENCHMARKS: Dict[str, Callable[[str], Any]] = {}
+PARALLEL_JOBS: int = min(os.cpu_count() or 1, 8)
+
+
+def benchmark(name: str) -> Callable[[Callable[[str], Any]], Callable[[str], Any]]:
+    """Register a benchmark taking the repository path; each call must start from a cold loader."""
+    def register(func: Callable[[str], Any]) -> Callable[[str], Any]:
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+@benchmark('branch_loading')
+def bench_branch_loading(repo_path: str) -> Any:
+    return BranchLoader(repo_path).get_branches()
+
+
+@benchmark('commit_loading')
+def bench_commit_loading(repo_path: str) -> Any:
+    return CommitLoader(repo_path).load_commits()
+
+
+@benchmark('commit_loading_parallel')
+def bench_commit_loading_parallel(repo_path: str) -> Any:
+    return CommitLoader(repo_path, jobs=PARALLEL_JOBS).load_commits()
+
+
+@benchmark('verification')
+def bench_verification(repo_path: str) -> Any:
+    return CommitLoader(repo_path).verify_all_commits()
+
+
+@benchmark('json_branches')
+def bench_json_branches(repo_path: str) -> Any:
+    return BranchLoader(repo_path).to_json()
+
+
+@benchmark('json_commits')
+def bench_json_commits(repo_path: str) -> Any:
+    return CommitLoader(repo_path).list_commits_json()
+
+
+@benchmark('tree_diff')
+def bench_tree_diff(repo_path: str) -> Any:
+    # Includes loading the commits; the diff itself is the bulk of the time
+    commits = CommitLoader(repo_path).load_commits()
+    with BatchObjectReader(repo_path) as reader:
+        return sum(1 for _ in iter_commit_changes(TreeDiffer(reader), commits))
+
+
+@benchmark('stats')
+def bench_stats(repo_path: str) -> Any:
+    return collect_stats(repo_path)
+
+
+def time_tui_tables(repo_path: str, repeat: int) -> List[float]:
+    """
+    Time populating the branch tree and the commit DataTable in a headless app.
+
+    Data is loaded once up front so only the table population is measured.
+    """
+    from git_repo_inspector.tui import GitRepoInspectorTUI
+
+    timings: List[float] = []
+
+    async def run() -> None:
+        app = GitRepoInspectorTUI(repo_path=repo_path)
+        async with app.run_test():
+            for _ in range(repeat):
+                start = time.perf_counter()
+                app._update_branch_tree()
+                app._update_commit_table()
+                timings.append(time.perf_counter() - start)
+
+    asyncio.run(run())
+    return timings
+
+
+def time_call(func: Callable[[str], Any], repo_path: str, repeat: int) -> List[float]:
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(repo_path)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings: List[float]) -> Dict[str, Any]:
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'max': max(timings),
+        'repeat': len(timings),
+    }
+
+
+def run_suite(repo_path: str, repeat: int, selected: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the registered benchmarks (and the TUI table benchmark) against one repository.
+
+    :param repo_path: Repository to benchmark
+    :param repeat: Number of timed runs per benchmark
+    :param selected: Benchmark names to run (default: all)
+    :return: Mapping benchmark name -> timing summary
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, func in BENCHMARKS.items():
+        if selected and name not in selected:
+            continue
+        results[name] = summarize(time_call(func, repo_path, repeat))
+        print(f"  {name:<16} median {results[name]['median'] * 1000:10.1f} ms", file=sys.stderr)
+    if not selected or 'tui_tables' in selected:
+        results['tui_tables'] = summarize(time_tui_tables(repo_path, repeat))
+        print(f"  {'tui_tables':<16} median {results['tui_tables']['median'] * 1000:10.1f} ms", file=sys.stderr)
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare two result documents and describe regressions beyond `threshold`.
+
+    :param current: Results of this run
+    :param baseline: Results of the baseline run
+    :param threshold: Allowed relative slowdown of the median, e.g. 0.2 for 20%
+    :return: One line per regression; empty when there are none
+    """
+    regressions: List[str] = []
+    for repo_key, benchmarks in current['repositories'].items():
+        base_benchmarks: Dict[str, Any] = baseline.get('repositories', {}).get(repo_key, {})
+        for name, result in benchmarks.items():
+            base: Optional[Dict[str, Any]] = base_benchmarks.get(name)
+            if not base or not base['median']:
+                continue
+            ratio: float = result['median'] / base['median']
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"{repo_key} {name}: {base['median'] * 1000:.1f} ms -> {result['median'] * 1000:.1f} ms "
+                    f"({(ratio - 1) * 100:+.0f}%)"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Run git-repo-inspector benchmarks on synthetic repositories.')
+    parser.add_argument('--commits', type=int, nargs='+', default=[10_000],
+                        help='Commit counts of the generated repositories (e.g. 10000 100000 1000000)')
+    parser.add_argument('--branches', type=int, default=RepoSpec().branches, help='Branches per repository')
+    parser.add_argument('--merge-density', type=float, default=RepoSpec().merge_density,
+                        help='Probability that a commit is a merge')
+    parser.add_argument('--message-size', type=int, default=RepoSpec().message_size,
+                        help='Approximate commit message size in bytes')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark')
+    parser.add_argument('--only', nargs='+', metavar='NAME',
+                        help=f"Benchmarks to run: {', '.join(list(BENCHMARKS) + ['tui_tables'])}")
+    parser.add_argument('--repo-cache', default=os.path.join('.benchmarks', 'repos'),
+                        help='Directory where generated repositories are kept between runs')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Results JSON of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative slowdown before a benchmark counts as regressed (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    git_version: str = subprocess.run(['git', '--version'], stdout=subprocess.PIPE, text=True).stdout.strip()
+    document: Dict[str, Any] = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'git': git_version,
+            'repeat': args.repeat,
+        },
+        'repositories': {},
+    }
+
+    for commits in args.commits:
+        spec = RepoSpec(commits=commits, branches=args.branches,
+                        merge_density=args.merge_density, message_size=args.message_size)
+        print(f"Repository {spec.cache_key()}", file=sys.stderr)
+        repo_path: str = cached_repo(args.repo_cache, spec)
+        document['repositories'][spec.cache_key()] = run_suite(repo_path, args.repeat, args.only)
+
+    output: str = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline: Dict[str, Any] = json.load(f)
+        regressions: List[str] = compare(document, baseline, args.threshold)
+        if regressions:
+            print("Regressions:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print("No regressions against baseline.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
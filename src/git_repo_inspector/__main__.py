@@ -1,12 +1,70 @@
 import os
 import argparse
+import json
 import sys
-from .commit_loader import CommitLoader # Corrected import
-from .tui import GitRepoInspectorTUI # Import the TUI application
+import time
+from .profiling import profiler
 
+# Only the standard library and the profiler are imported up front. Each command imports
+# the modules it needs when it runs, so CLI paths never pay for Textual or unused features.
 
-def main():
-    parser = argparse.ArgumentParser(description='Git Repository Inspector Utility. Can show data in CLI or TUI.')
+# Subcommands; the first argument selects one, otherwise the legacy flags are parsed.
+SUBCOMMANDS = ('branches', 'commits', 'path-history', 'largest-objects', 'stats',
+               'worktrees', 'verify', 'show', 'watch', 'changes', 'serve', 'query', 'backends', 'scan', 'tui')
+QUERY_METHODS = ('branches', 'commit', 'commits', 'stats', 'repository')
+SHOW_CANDIDATES = 10  # candidates listed for an ambiguous --show prefix
+BACKEND_NAMES = ('cat-file', 'log', 'disk')  # backends.BACKENDS, listed here to keep the module unimported
+BACKEND_HELP = ('Read objects and refs with this backend only: cat-file (git cat-file/for-each-ref), '
+                'log (git log, commit metadata only) or disk (object database read directly). '
+                'Default: the fastest available backend for each request')
+
+
+def _add_diagnostics(parser):
+    diagnostics_group = parser.add_argument_group(title='Diagnostics')
+    diagnostics_group.add_argument('--profile', action='store_true',
+                                   help='Time each loading phase and print a summary table to stderr on exit')
+    diagnostics_group.add_argument('--profile-trace', metavar='FILE',
+                                   help='Write phase timings as Chrome trace-event JSON to FILE (implies --profile)')
+    diagnostics_group.add_argument('--metrics-file', metavar='FILE',
+                                   help='Write repository counts, phase timings, bytes read and cache hit ratios '
+                                        'as OpenMetrics text to FILE, replaced atomically (for the node-exporter '
+                                        'textfile collector). Commands that do not list all commits themselves '
+                                        'run an extra `git rev-list --all --count` for the commit count')
+
+
+def _add_resource_limits(parser):
+    limits_group = parser.add_argument_group(
+        title='Resource limits', description='Keep scans from starving other workloads on a shared host')
+    limits_group.add_argument('--max-processes', type=int, metavar='N',
+                              help='Run at most N git processes at a time')
+    limits_group.add_argument('--max-workers', type=int, metavar='N',
+                              help='Use at most N worker threads or processes, whatever --jobs asks for')
+    limits_group.add_argument('--max-read-rate', type=float, metavar='MIB',
+                              help='Read at most MIB MiB per second of object data from git')
+    limits_group.add_argument('--max-in-flight', type=int, metavar='KIB',
+                              help='Request at most about KIB KiB of objects from git ahead of parsing')
+    limits_group.add_argument('--nice', type=int, metavar='N',
+                              help='Lower the CPU priority of git processes by N (1-19)')
+    limits_group.add_argument('--idle-io', action='store_true',
+                              help='Give git processes idle I/O priority, so they only use an otherwise idle disk '
+                                   '(Linux)')
+    limits_group.add_argument('--max-load', type=float, metavar='LOAD',
+                              help='Reduce git processes and workers while the 1-minute load average exceeds LOAD, '
+                                   'by the excess, down to one')
+    limits_group.add_argument('--background', action='store_true',
+                              help='Shorthand for --nice 10 --idle-io --max-load <number of CPUs>; explicit '
+                                   'options take precedence')
+
+
+def build_parser():
+    """Build the parser for the original flag-style command line."""
+    parser = argparse.ArgumentParser(
+        description='Git Repository Inspector Utility. Can show data in CLI or TUI.',
+        epilog=f"Subcommands ({', '.join(SUBCOMMANDS)}) are also available; "
+               f"run 'git-repo-inspector COMMAND --help' for details. A first argument naming a subcommand "
+               f"is taken as the repository path if a Git repository of that name exists in the current "
+               f"directory."
+    )
     parser.add_argument('repo_path', nargs='?', default=os.getcwd(),
                         help='Path to the Git repository (default: current directory)')
 
@@ -17,63 +75,752 @@ def main():
                        help='List branch names with their corresponding commit SHAs (CLI output)')
     group.add_argument('--list-commits', action='store_true',
                        help='Load and list commit objects (CLI output)')
+    group.add_argument('--path-history', metavar='PATH',
+                       help='List the commits that changed PATH (a file or directory), newest first, '
+                            'using a persistent per-path index (CLI output)')
+    group.add_argument('--largest-objects', type=int, metavar='N',
+                       help='List the N largest blobs with the path and commit that introduced them (CLI output)')
+    group.add_argument('--stats', action='store_true',
+                       help='Aggregate commits per author (mailmap-normalized), per day/week and per hour of week '
+                            'in one streaming pass (CLI output)')
+    group.add_argument('--show', nargs='+', metavar='PREFIX',
+                       help='Resolve commit SHA prefixes to full SHAs in bulk, listing candidates for ambiguous '
+                            'ones (CLI output; give the repository path before this option)')
+    group.add_argument('--list-worktrees', action='store_true',
+                       help='List the main and linked worktrees with their dirty/clean status (CLI output)')
     cli_action_group.add_argument('--json', action='store_true',
-                                  help='Output in JSON format (for --list-branches or --list-commits)')
+                                  help='Output in JSON format (for --list-branches, --list-commits, --path-history, '
+                                       '--largest-objects, --stats or --list-worktrees)')
+    cli_action_group.add_argument('--with-changes', action='store_true',
+                                  help='With --list-commits, also list the paths each commit changed '
+                                       'relative to its first parent, with added/modified/deleted counts')
+    cli_action_group.add_argument('--sample', type=int, metavar='N',
+                                  help='With --stats or --list-commits, use a uniform random sample of N commits; '
+                                       'statistics become estimates with 95%% error bounds')
+    cli_action_group.add_argument('--seed', type=int,
+                                  help='Random seed for --sample, for reproducible samples')
+    cli_action_group.add_argument('--jobs', type=int, metavar='N',
+                                  help='Number of parallel workers: git status processes for --list-worktrees '
+                                       '(default: twice the CPU count, at most 16), commit parsing processes for '
+                                       '--list-commits and --verify on large histories (default: 1)')
+    cli_action_group.add_argument('--no-cache', action='store_true',
+                                  help='Always reload instead of reusing the output of an earlier --list-branches '
+                                       'or --list-commits run while the refs are unchanged')
+    cli_action_group.add_argument('--time-budget', type=float, metavar='SECONDS',
+                                  help='With --list-branches or --list-commits, stop after SECONDS and print what '
+                                       'was loaded; an incomplete listing is reported on stderr, for commits with '
+                                       'a cursor for --resume')
+    cli_action_group.add_argument('--resume', metavar='CURSOR',
+                                  help='With --list-commits --time-budget, continue an incomplete listing from '
+                                       'the cursor it printed')
     cli_action_group.add_argument('--verify', action='store_true',
                                   help='Verify commit SHAs against raw content (CLI output)')
+    cli_action_group.add_argument('--backend', choices=BACKEND_NAMES, help=BACKEND_HELP)
+    cli_action_group.add_argument('--watch', action='store_true',
+                                  help='Print branches (and commits unless --list-branches) as NDJSON events, '
+                                       'then keep emitting events as refs change')
+    cli_action_group.add_argument('--watch-interval', type=float, default=1.0, metavar='SECONDS',
+                                  help='Seconds between ref checks in --watch mode (default: 1.0)')
 
     # Argument for launching TUI
     parser.add_argument('--tui', action='store_true',
                         help='Launch the Textual TUI for repository inspection. If no other CLI action is specified, this is the default.')
 
-    args = parser.parse_args()
+    _add_diagnostics(parser)
+    _add_resource_limits(parser)
+    return parser
+
+
+def build_subcommand_parser():
+    """Build the parser for the subcommand-style command line."""
+    parser = argparse.ArgumentParser(prog='git-repo-inspector',
+                                     description='Git Repository Inspector Utility. Can show data in CLI or TUI.')
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+
+    def add(name, help_text, **defaults):
+        sub = subparsers.add_parser(name, help=help_text, description=help_text)
+        sub.set_defaults(**defaults)
+        return sub
+
+    def add_repo_path(sub):
+        sub.add_argument('repo_path', nargs='?', default=os.getcwd(),
+                         help='Path to the Git repository (default: current directory)')
+
+    def add_json(sub):
+        sub.add_argument('--json', action='store_true', help='Output in JSON format')
+
+    def add_parse_jobs(sub):
+        sub.add_argument('--jobs', type=int, metavar='N',
+                         help='Parse large histories in N processes, one git cat-file per shard (default: 1)')
+
+    def add_no_cache(sub):
+        sub.add_argument('--no-cache', action='store_true',
+                         help='Always reload instead of reusing earlier output while the refs are unchanged')
+
+    def add_backend(sub):
+        sub.add_argument('--backend', choices=BACKEND_NAMES, help=BACKEND_HELP)
+
+    def add_time_budget(sub):
+        sub.add_argument('--time-budget', type=float, metavar='SECONDS',
+                         help='Stop after SECONDS and print what was loaded; an incomplete listing is '
+                              'reported on stderr, for commits with a cursor for --resume')
+
+    def add_commit_cache(sub):
+        sub.add_argument('--commit-cache', metavar='FILE',
+                         help='Shared commit cache, used by all repositories and processes '
+                              '(default: $XDG_CACHE_HOME/git-repo-inspector/commits.sqlite3)')
+        sub.add_argument('--commit-cache-size', type=int, default=1024, metavar='MIB',
+                         help='Evict the least recently used commits beyond this size (default: 1024)')
+        sub.add_argument('--no-commit-cache', action='store_true',
+                         help='Read every commit from its repository without the shared cache')
+
+    def add_sample(sub):
+        sub.add_argument('--sample', type=int, metavar='N',
+                         help='Use a uniform random sample of N commits')
+        sub.add_argument('--seed', type=int, help='Random seed for --sample, for reproducible samples')
+
+    sub = add('branches', 'List branch names with their corresponding commit SHAs', list_branches=True)
+    add_repo_path(sub)
+    add_json(sub)
+    add_no_cache(sub)
+    add_backend(sub)
+    add_time_budget(sub)
+
+    sub = add('commits', 'Load and list commit objects', list_commits=True)
+    add_repo_path(sub)
+    add_json(sub)
+    sub.add_argument('--with-changes', action='store_true',
+                     help='Also list the paths each commit changed relative to its first parent')
+    add_sample(sub)
+    add_parse_jobs(sub)
+    add_no_cache(sub)
+    add_backend(sub)
+    add_time_budget(sub)
+    sub.add_argument('--resume', metavar='CURSOR',
+                     help='With --time-budget, continue an incomplete listing from the cursor it printed')
+
+    sub = add('path-history', 'List the commits that changed a file or directory, newest first')
+    sub.add_argument('path_history', metavar='PATH', help='File or directory path, relative to the repository')
+    add_repo_path(sub)
+    add_json(sub)
+
+    sub = add('largest-objects', 'List the largest blobs with the path and commit that introduced them')
+    sub.add_argument('largest_objects', type=int, metavar='N', help='Number of blobs to list')
+    add_repo_path(sub)
+    add_json(sub)
+
+    sub = add('stats', 'Aggregate commits per author, per day/week and per hour of week', stats=True)
+    add_repo_path(sub)
+    add_json(sub)
+    add_sample(sub)
+
+    sub = add('worktrees', 'List the main and linked worktrees with their dirty/clean status', list_worktrees=True)
+    add_repo_path(sub)
+    add_json(sub)
+    sub.add_argument('--jobs', type=int, metavar='N',
+                     help='Number of parallel git status processes (default: twice the CPU count, at most 16)')
+
+    sub = add('verify', 'Verify commit SHAs against raw content', verify=True)
+    add_repo_path(sub)
+    add_parse_jobs(sub)
+    add_backend(sub)
+
+    sub = add('show', 'Resolve commit SHA prefixes to full SHAs in bulk')
+    sub.add_argument('show', nargs='+', metavar='PREFIX', help='Commit SHA prefixes')
+    sub.add_argument('-C', dest='repo_path', default=os.getcwd(), metavar='PATH',
+                     help='Path to the Git repository (default: current directory)')
+    add_json(sub)
+
+    sub = add('watch', 'Print branches and commits as NDJSON events, then follow ref changes', watch=True)
+    add_repo_path(sub)
+    sub.add_argument('--interval', dest='watch_interval', type=float, default=1.0, metavar='SECONDS',
+                     help='Seconds between ref checks (default: 1.0)')
+    sub.add_argument('--branches-only', dest='list_branches', action='store_true',
+                     help='Emit branch events only')
+
+    sub = add('changes', 'Print what changed since the previous run as NDJSON events, then record the refs',
+              changes=True)
+    add_repo_path(sub)
+    sub.add_argument('--since-snapshot', required=True, metavar='FILE',
+                     help='Snapshot of the ref tips at the previous run; read if it exists, then replaced')
+
+    sub = add('serve', 'Keep repository state warm in memory and answer queries over a Unix socket', serve=True)
+    sub.add_argument('--socket', metavar='PATH',
+                     help='Socket path (default: $XDG_RUNTIME_DIR/git-repo-inspector.sock)')
+    add_commit_cache(sub)
+
+    sub = add('query', 'Query a running serve daemon, or load the repository directly if none is running')
+    sub.add_argument('query', choices=QUERY_METHODS, metavar='METHOD', help=', '.join(QUERY_METHODS))
+    add_repo_path(sub)
+    sub.add_argument('--sha', help="Commit SHA or unique prefix (for 'commit')")
+    sub.add_argument('--offset', type=int, default=0, help="First matching commit to return (for 'commits')")
+    sub.add_argument('--limit', type=int, default=100, help="Page size (for 'commits', default: 100)")
+    sub.add_argument('--author', help="Only commits whose author contains this text (for 'commits')")
+    sub.add_argument('--grep', help="Only commits whose message contains this text (for 'commits')")
+    sub.add_argument('--branch', help="Only commits at the tip of this branch (for 'commits')")
+    sub.add_argument('--socket', metavar='PATH', help='Socket path of the daemon')
+    sub.add_argument('--no-fallback', action='store_true',
+                     help='Fail instead of loading the repository directly when no daemon is running')
+
+    sub = add('backends', 'List the object and ref backends, or measure their throughput', backends=True)
+    add_repo_path(sub)
+    add_json(sub)
+    sub.add_argument('--benchmark', action='store_true',
+                     help='Time every available backend on every request it serves and report its throughput')
+    sub.add_argument('--repeat', type=int, default=3, metavar='N',
+                     help='Runs per backend and request with --benchmark; the fastest is reported (default: 3)')
+
+    sub = add('scan', 'Load the commits and branches of many repositories, reading commits shared by forks '
+                      'and mirrors once', scan=True)
+    sub.add_argument('scan_paths', nargs='+', metavar='REPO', help='Paths to the Git repositories')
+    add_json(sub)
+    add_commit_cache(sub)
+
+    sub = add('tui', 'Launch the Textual TUI', tui=True)
+    add_repo_path(sub)
 
-    # Determine if any specific CLI action was requested
-    is_cli_action_requested = args.list_branches or args.list_commits or args.verify
+    for sub in subparsers.choices.values():
+        _add_diagnostics(sub)
+        _add_resource_limits(sub)
+    return parser
 
-    if is_cli_action_requested:
-        # Handle existing CLI functionalities
+
+def _is_repository(path):
+    """Return whether a path is a Git repository (worktree or bare), without running git."""
+    if not os.path.isdir(path):
+        return False
+    return os.path.exists(os.path.join(path, '.git')) or os.path.isfile(os.path.join(path, 'HEAD'))
+
+
+def parse_args(argv=None):
+    """
+    Parse either a subcommand command line or the legacy flags into one namespace.
+
+    Subcommand namespaces are completed with the legacy defaults, so both forms are
+    dispatched by run() the same way. Before subcommands existed, the first argument could
+    be a repository named like one, e.g. `git-repo-inspector stats`; such a call keeps its
+    old meaning.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = build_parser()
+    if argv and argv[0] in SUBCOMMANDS:
+        if not _is_repository(argv[0]):
+            args = parser.parse_args([])
+            vars(args).update(vars(build_subcommand_parser().parse_args(argv)))
+            return args
+        print(f"git-repo-inspector: '{argv[0]}' is a Git repository here, so it is used as the repository "
+              f"path, not as the {argv[0]} subcommand; write ./{argv[0]} to make this explicit, or run the "
+              f"subcommand from another directory", file=sys.stderr)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    governed = configure_governor(args)
+
+    if args.profile or args.profile_trace or args.metrics_file:
+        profiler.enable()
+    started = time.perf_counter()
+    succeeded = False
+    try:
+        run(args)
+        succeeded = True
+    finally:
+        if args.metrics_file:
+            write_metrics(args, time.perf_counter() - started, succeeded)
+        if args.profile or args.profile_trace:
+            report_profile(args)
+        profiler.disable()
+        if governed:
+            from .governor import governor
+
+            governor.configure()  # main() may run again in the same process
+
+
+def configure_governor(args):
+    """Apply the resource limit options to the global governor; return whether any was given."""
+    settings = {
+        'max_processes': args.max_processes,
+        'max_workers': args.max_workers,
+        'read_rate': args.max_read_rate * 1024 * 1024 if args.max_read_rate else None,
+        'max_in_flight': args.max_in_flight * 1024 if args.max_in_flight else None,
+        'nice': args.nice,
+        'idle_io': args.idle_io,
+        'max_load': args.max_load,
+    }
+    if args.background:
+        from .governor import BACKGROUND_NICE
+
+        defaults = {'nice': BACKGROUND_NICE, 'idle_io': True, 'max_load': float(os.cpu_count() or 1)}
+        settings.update({name: value for name, value in defaults.items() if not settings[name]})
+    if not any(settings.values()):
+        return False
+    from .governor import governor
+
+    governor.configure(**settings)
+    return True
+
+
+def write_metrics(args, duration, succeeded):
+    """Write the metrics of this run to --metrics-file; failures are reported but do not change the exit status."""
+    import subprocess
+    from .metrics import build_metrics, repository_counts, run_commit_count, write_metrics_file
+
+    command = select_command(args)
+    repo_path = os.path.abspath(args.repo_path)
+    try:
+        counts = repository_counts(repo_path, run_commit_count(profiler))
+    except (OSError, subprocess.CalledProcessError):
+        counts = None  # not a repository; the run's own error says why
+    metrics = build_metrics(repo_path, command.__name__[len('cmd_'):] if command else 'tui', profiler,
+                            duration, succeeded, time.time(), counts)
+    try:
+        write_metrics_file(args.metrics_file, metrics.render())
+    except OSError as e:
+        print(f"Error writing metrics file: {e}", file=sys.stderr)
+
+
+def report_profile(args):
+    """Print the profiling summary and write the Chrome trace if requested."""
+    profiler.disable()
+    print(profiler.format_summary(), file=sys.stderr)
+    if args.profile_trace:
+        try:
+            profiler.write_chrome_trace(args.profile_trace)
+        except OSError as e:
+            print(f"Error writing trace file: {e}", file=sys.stderr)
+
+
+def cached_output(args, options, produce):
+    """
+    Return the output built by produce(), reusing a cached copy while the refs are unchanged.
+
+    The output is stored only if the ref fingerprint was the same before and after it was
+    built, so an entry never describes refs other than the ones it is keyed by.
+    """
+    if args.no_cache:
+        return produce()
+    import subprocess
+    from .output_cache import OutputCache, ref_fingerprint
+
+    try:
+        cache = OutputCache.for_repo(args.repo_path)
+        fingerprint = ref_fingerprint(args.repo_path)
+    except (OSError, subprocess.CalledProcessError):
+        return produce()  # let the loader report the problem
+    key = cache.key(fingerprint, f"{options}\0{args.repo_path}")
+    output = cache.get(key)
+    if output is None:
+        output = produce()
         try:
-            loader = CommitLoader(repo_path=args.repo_path) # Use corrected CommitLoader
-
-            if args.verify:
-                mismatches = loader.verify_all_commits()
-                if mismatches:
-                    print("Mismatched commits:")
-                    for sha, rec in mismatches:
-                        print(f"{sha} != {rec}")
-                else:
-                    print("All commits verified successfully.")
-            elif args.list_branches:
-                if args.json:
-                    print(loader.list_branches_json())
-                else:
-                    branches = loader.get_branches()
-                    # Sort for consistent output, primary branch name first
-                    output_lines = []
-                    for sha, names in branches.items():
-                        for name in sorted(names): # Sort names for consistency
-                             output_lines.append(f"{name}: {sha}")
-                    output_lines.sort() # Sort lines by branch name
-                    for line in output_lines:
-                        print(line)
-
-            elif args.list_commits: # This is also the default if no exclusive group member is chosen
-                if args.json:
-                    print(loader.list_commits_json())
-                else:
-                    commits = loader.load_commits()
-                    print(f"Loaded {len(commits)} commits from {args.repo_path}")
-                    for c in commits: # Consider a more summarized output or limit
-                        print(f"SHA: {c.sha}, Author: {c.author}, Message: {c.message.splitlines()[0] if c.message else ''}")
+            if ref_fingerprint(args.repo_path) == fingerprint:
+                cache.put(key, output)
+        except OSError:
+            pass  # read-only repository: still print the output
+    return output
+
+
+def commit_line(commit):
+    """Format one commit for the plain-text --list-commits output."""
+    return f"SHA: {commit.sha}, Author: {commit.author}, Message: {commit.message.splitlines()[0] if commit.message else ''}"
+
+
+def print_commits(args, commits, summary):
+    """Print loaded or sampled commits for --list-commits, with their changes if requested."""
+    from .commit_loader import commit_to_dict
+
+    if args.json:
+        if args.sample is not None:
+            print(summary, file=sys.stderr)  # keep stdout a plain commit array
+        output = [commit_to_dict(c) for c in commits]
+    else:
+        print(summary)
+    if args.with_changes:
+        from .object_reader import BatchObjectReader
+        from .tree_diff import TreeDiffer, changes_to_dict, format_changes, iter_commit_changes
+
+        with BatchObjectReader(args.repo_path) as reader:
+            # One cat-file process and one tree cache serve the whole history
+            changes = iter_commit_changes(TreeDiffer(reader), commits)
+            if args.json:
+                print(json.dumps([dict(d, changes=changes_to_dict(ch)) for d, ch in zip(output, changes)], indent=2))
+            else:
+                for c, ch in zip(commits, changes):
+                    print(commit_line(c))
+                    for line in format_changes(ch):
+                        print(f"    {line}")
+    elif args.json:
+        print(json.dumps(output, indent=2))
+    else:
+        for c in commits: # Consider a more summarized output or limit
+            print(commit_line(c))
+
+
+def cmd_watch(args):
+    from .ref_watcher import watch_events
+
+    try:
+        for event in watch_events(args.repo_path, interval=args.watch_interval,
+                                  include_commits=not args.list_branches):
+            print(json.dumps(event), flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_changes(args):
+    from .change_feed import iter_changes, read_snapshot, take_snapshot, write_snapshot
+    from .commit_loader import CommitLoader
+
+    previous = read_snapshot(args.since_snapshot)
+    loader = CommitLoader(repo_path=args.repo_path)
+    current = take_snapshot(loader)
+    for event in iter_changes(loader, previous, current):
+        print(json.dumps(event))
+    sys.stdout.flush()
+    # Only after every event is out: an interrupted run is repeated in full by the next one
+    write_snapshot(args.since_snapshot, current)
+
+
+def cmd_path_history(args):
+    from .commit_loader import CommitLoader, commit_to_dict
+    from .path_index import PathIndex
+
+    index = PathIndex(args.repo_path)
+    index.update()
+    commits = CommitLoader(repo_path=args.repo_path).load_commits_for(index.history(args.path_history))
+    if args.json:
+        print(json.dumps([commit_to_dict(c) for c in commits], indent=2))
+    else:
+        for c in commits:
+            print(f"{c.sha} {c.message.splitlines()[0] if c.message else ''}")
+
+
+def cmd_largest_objects(args):
+    from .large_objects import find_largest_objects, format_large_object, large_objects_to_json
+
+    objects = find_largest_objects(args.repo_path, args.largest_objects)
+    if args.json:
+        print(large_objects_to_json(objects))
+    else:
+        for obj in objects:
+            print(format_large_object(obj))
+
+
+def cmd_stats(args):
+    if args.sample is not None:
+        from .sampling import collect_sampled_stats, estimates_to_json, format_estimates
+
+        estimates = collect_sampled_stats(args.repo_path, args.sample, args.seed)
+        print(estimates_to_json(estimates) if args.json else format_estimates(estimates))
+    else:
+        from .stats import collect_stats, format_stats, stats_to_json
+
+        stats = collect_stats(args.repo_path)
+        print(stats_to_json(stats) if args.json else format_stats(stats))
+
+
+def cmd_worktrees(args):
+    from .repo_dir import RepoDir
+    from .worktrees import DEFAULT_STATUS_WORKERS, collect_worktree_status, format_worktree, worktrees_to_json
+
+    repo_dir = RepoDir(args.repo_path)
+    if repo_dir.absolute_git_dir_error is not None:
+        raise RuntimeError(f"Not a Git repository: {args.repo_path}")
+    worktrees = collect_worktree_status(repo_dir.list_worktrees(), max_workers=args.jobs or DEFAULT_STATUS_WORKERS)
+    if args.json:
+        print(worktrees_to_json(worktrees))
+    else:
+        for worktree in worktrees:
+            print(format_worktree(worktree))
+
+
+def cmd_verify(args):
+    from .commit_loader import CommitLoader
+
+    mismatches = CommitLoader(repo_path=args.repo_path, jobs=args.jobs, backend=args.backend).verify_all_commits()
+    if mismatches:
+        print("Mismatched commits:")
+        for sha, rec in mismatches:
+            print(f"{sha} != {rec}")
+    else:
+        print("All commits verified successfully.")
+
+
+def cmd_show(args):
+    from .commit_loader import CommitLoader
+    from .sha_index import ShaIndex
+
+    index = ShaIndex(CommitLoader(repo_path=args.repo_path).get_commit_shas())
+    results = []
+    truncated = set()  # prefixes with more candidates than listed
+    for prefix in args.show:
+        matches = index.lookup(prefix, limit=SHOW_CANDIDATES + 1) if prefix else []
+        if len(matches) > SHOW_CANDIDATES:
+            truncated.add(prefix)
+        results.append({'prefix': prefix, 'sha': matches[0] if len(matches) == 1 else None,
+                        'candidates': matches[:SHOW_CANDIDATES] if len(matches) > 1 else []})
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            if result['sha']:
+                print(f"{result['prefix']} {result['sha']}")
+            elif result['candidates']:
+                more = ', ...' if result['prefix'] in truncated else ''
+                print(f"{result['prefix']} ambiguous: {', '.join(index.abbreviate(c) for c in result['candidates'])}{more}")
             else:
-                # This part of the 'else' might be unreachable if --list-commits is the default
-                # for the mutually exclusive group.
-                # However, if no action from the group is specified, and --verify isn't either,
-                # it implies we might want to default to TUI or print help.
-                # Given the new --tui flag, if no CLI action is specified, we'll default to TUI later.
-                pass # Let TUI logic handle it
+                print(f"{result['prefix']} not found")
+    if any(result['sha'] is None for result in results):
+        sys.exit(1)
+
+
+def cmd_branches(args):
+    from .commit_loader import CommitLoader
+
+    def produce():
+        loader = CommitLoader(repo_path=args.repo_path, backend=args.backend)
+        if args.time_budget is not None:
+            from .deadline import Deadline
+
+            branches, complete, _ = loader.get_branches_until(Deadline(args.time_budget))
+            if not complete:
+                count = sum(len(names) for names in branches.values())
+                print(f"Time budget of {args.time_budget}s reached after {count} branches; "
+                      f"the listing is incomplete", file=sys.stderr)
+            if args.json:
+                return json.dumps([{'branch': name, 'sha': sha} for sha, names in branches.items() for name in names],
+                                  indent=2)
+        elif args.json:
+            return loader.list_branches_json()
+        else:
+            branches = loader.get_branches()
+        # Sort for consistent output, primary branch name first
+        output_lines = []
+        for sha, names in branches.items():
+            for name in sorted(names): # Sort names for consistency
+                 output_lines.append(f"{name}: {sha}")
+        output_lines.sort() # Sort lines by branch name
+        return "\n".join(output_lines)
+
+    # A listing cut short by the time budget must not be cached, and a cached one needs no budget
+    output = (produce() if args.time_budget is not None else
+              cached_output(args, 'branches:json' if args.json else 'branches:text', produce))
+    if output:
+        print(output)
+
+
+def cmd_commits(args):
+    from .commit_loader import CommitLoader
+
+    loader = CommitLoader(repo_path=args.repo_path, jobs=args.jobs, backend=args.backend)
+    if args.sample is not None:
+        from .sampling import sample_commits
+
+        commits, population = sample_commits(args.repo_path, args.sample, args.seed)
+        summary = f"Sampled {len(commits)} of {population} commits from {args.repo_path}"
+    elif args.time_budget is not None:
+        commits, summary = load_within_budget(args, loader)
+    elif not args.with_changes:
+        def produce():
+            if args.json:
+                return loader.list_commits_json()
+            commits = loader.load_commits(with_raw=False)  # the text lines never show raw objects
+            return "\n".join([f"Loaded {len(commits)} commits from {args.repo_path}"] +
+                             [commit_line(c) for c in commits])
 
+        print(cached_output(args, 'commits:json' if args.json else 'commits:text', produce))
+        return
+    else:
+        commits = loader.load_commits()
+        summary = f"Loaded {len(commits)} commits from {args.repo_path}"
+    print_commits(args, commits, summary)
+
+
+def load_within_budget(args, loader):
+    """
+    Load commits for --list-commits within --time-budget, continuing from --resume.
+
+    The commits loaded are printed as usual; if the budget ran out, the cursor to continue
+    from is printed to stderr so stdout stays a plain commit listing.
+    """
+    from .deadline import Deadline
+
+    commits, complete, cursor = loader.load_commits_until(Deadline(args.time_budget),
+                                                          with_raw=args.json or args.with_changes,
+                                                          cursor=args.resume)
+    if complete:
+        return commits, f"Loaded {len(commits)} commits from {args.repo_path}"
+    print(f"Time budget of {args.time_budget}s reached after {len(commits)} commits; "
+          f"continue with --resume {cursor}", file=sys.stderr)
+    return commits, f"Loaded {len(commits)} commits from {args.repo_path} (incomplete)"
+
+
+def open_commit_cache(args):
+    """Return the shared commit cache selected by --commit-cache and --commit-cache-size, or None."""
+    if args.no_commit_cache:
+        return None
+    from .commit_cache import CommitCache
+
+    return CommitCache(args.commit_cache, max(args.commit_cache_size, 1) * 1024 * 1024)
+
+
+def cmd_serve(args):
+    from .daemon import QueryDaemon
+
+    daemon = QueryDaemon(args.socket, open_commit_cache(args))
+    print(f"Listening on {daemon.socket_path}", file=sys.stderr)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if daemon.commit_cache is not None:
+            daemon.commit_cache.close()
+
+
+def cmd_scan(args):
+    import subprocess
+    from .commit_loader import CommitLoader
+
+    cache = open_commit_cache(args)
+    rows = []
+    try:
+        for repo_path in args.scan_paths:
+            hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+            try:
+                loader = CommitLoader(repo_path, cache=cache)
+                commits = loader.load_commits(with_raw=False)
+                branches = sum(len(names) for names in loader.get_branches().values())
+            except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+                rows.append({'repo': repo_path, 'error': str(e)})
+                continue
+            cached = cache.hits - hits if cache is not None else 0
+            rows.append({'repo': repo_path, 'commits': len(commits), 'branches': branches,
+                         'read': len(commits) - cached, 'cached': cached})
+        cache_info = ({'path': cache.path, 'records': len(cache), 'bytes': cache.total_bytes()}
+                      if cache is not None else None)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    scanned = [row for row in rows if 'error' not in row]
+    totals = {name: sum(row[name] for row in scanned) for name in ('commits', 'branches', 'read', 'cached')}
+    if args.json:
+        print(json.dumps({'repositories': rows, 'totals': totals, 'cache': cache_info}, indent=2))
+    else:
+        for row in rows:
+            if 'error' in row:
+                print(f"{row['repo']}: failed: {row['error']}")
+            else:
+                print(f"{row['repo']}: {row['commits']} commits, {row['branches']} branches, "
+                      f"{row['read']} read, {row['cached']} from cache")
+        print(f"Total: {totals['commits']} commits, {totals['branches']} branches, "
+              f"{totals['read']} read, {totals['cached']} from cache")
+    if len(scanned) < len(rows):
+        raise RuntimeError(f"{len(rows) - len(scanned)} of {len(rows)} repositories could not be scanned")
+
+
+def cmd_query(args):
+    from .daemon import DaemonUnavailable, QueryError, query, query_or_load
+
+    params = {'sha': args.sha, 'offset': args.offset, 'limit': args.limit,
+              'author': args.author, 'grep': args.grep, 'branch': args.branch}
+    params = {name: value for name, value in params.items() if value is not None}
+    try:
+        if args.no_fallback:
+            result = query(args.query, dict(params, repo=os.path.abspath(args.repo_path)), args.socket)
+        else:
+            result, _ = query_or_load(args.repo_path, args.query, params, args.socket)
+    except (DaemonUnavailable, QueryError) as e:
+        raise RuntimeError(str(e)) from e
+    print(json.dumps(result, indent=2))
+
+
+def cmd_backends(args):
+    from .backends import BACKENDS, PREFERENCE, select_backends
+
+    selected = {}
+    for request in PREFERENCE:
+        try:
+            selected[request] = select_backends(args.repo_path, request)[0].name
+        except RuntimeError:
+            selected[request] = None
+    if args.benchmark:
+        from .commit_loader import benchmark_backends
+
+        rows = []
+        for result in benchmark_backends(args.repo_path, max(args.repeat, 1)):
+            seconds = result.seconds
+            rows.append({'backend': result.backend, 'request': result.request, 'items': result.items,
+                         'seconds': seconds, 'items_per_second': result.items / seconds if seconds else None,
+                         'mb_per_second': result.bytes / seconds / 1e6 if seconds and result.bytes else None,
+                         'selected': selected.get(result.request) == result.backend, 'error': result.error})
+        if args.json:
+            print(json.dumps(rows, indent=2))
+            return
+        print(f"{'backend':<10} {'request':<12} {'items':>8} {'seconds':>9} {'items/s':>10} {'MB/s':>8}")
+        for row in rows:
+            if row['error']:
+                print(f"{row['backend']:<10} {row['request']:<12} failed: {row['error']}")
+                continue
+            mb = f"{row['mb_per_second']:.1f}" if row['mb_per_second'] is not None else '-'
+            rate = f"{row['items_per_second']:.0f}" if row['items_per_second'] is not None else '-'
+            print(f"{row['backend']:<10} {row['request']:<12} {row['items']:>8} {row['seconds']:>9.3f} "
+                  f"{rate:>10} {mb:>8}{'  (selected)' if row['selected'] else ''}")
+        return
+
+    backends = [{'name': name, 'capabilities': sorted(backend.capabilities),
+                 'available': backend.available(args.repo_path)} for name, backend in BACKENDS.items()]
+    if args.json:
+        print(json.dumps({'backends': backends, 'selected': selected}, indent=2))
+        return
+    for backend in backends:
+        print(f"{backend['name']:<10} {', '.join(backend['capabilities']):<28} "
+              f"{'available' if backend['available'] else 'unavailable'}")
+    print("Selected: " + ", ".join(f"{request} -> {name or 'none'}" for request, name in selected.items()))
+
+
+def select_command(args):
+    """Return the CLI command handler selected by the parsed arguments, or None for the TUI."""
+    if getattr(args, 'serve', False):
+        return cmd_serve
+    if getattr(args, 'query', None):
+        return cmd_query
+    if getattr(args, 'backends', False):
+        return cmd_backends
+    if getattr(args, 'scan', False):
+        return cmd_scan
+    if getattr(args, 'changes', False):
+        return cmd_changes
+    if args.watch:
+        return cmd_watch
+    if args.path_history is not None:
+        return cmd_path_history
+    if args.largest_objects is not None:
+        return cmd_largest_objects
+    if args.stats:
+        return cmd_stats
+    if args.list_worktrees:
+        return cmd_worktrees
+    if args.verify:
+        return cmd_verify
+    if args.show:
+        return cmd_show
+    if args.list_branches:
+        return cmd_branches
+    if args.list_commits:
+        return cmd_commits
+    return None
+
+
+def run(args):
+    """Dispatch the parsed command-line arguments to the CLI output or the TUI."""
+    command = select_command(args)
+
+    if command is not None:
+        # Handle CLI functionalities
+        try:
+            command(args)
         except FileNotFoundError as e:
             print(f"Error: {e}", file=sys.stderr)
             sys.exit(1)
@@ -87,6 +834,8 @@ def main():
     else: # No specific CLI action requested, or --tui was explicitly passed
         # Launch the TUI application
         try:
+            from .tui import GitRepoInspectorTUI # Textual is only loaded for the TUI
+
             app = GitRepoInspectorTUI(repo_path=args.repo_path)
             app.run()
         except Exception as e:
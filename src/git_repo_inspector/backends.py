@@ -0,0 +1,785 @@
+# File: backends.py
+# Object and ref access backends (git cat-file, git log, direct on-disk reads) and selection by capability
+
+import mmap
+import os
+import shutil
+import struct
+import subprocess
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple, Type
+
+from .deadline import Deadline, DeadlineExceeded
+from .governor import RequestWindow, governor
+from .output_cache import locate_git_dirs
+from .profiling import profiler
+
+# Requests a backend can serve
+REQUEST_RAW: str = 'raw-commits'   # complete commit objects, as needed to verify or print them raw
+REQUEST_COMMITS: str = 'commits'   # parsed commit metadata only
+REQUEST_REFS: str = 'refs'         # branch names and the commits they point to
+
+# Backends per request, fastest first (measured on a 10,000-commit repository with
+# `git-repo-inspector backends --benchmark`); unavailable ones are skipped.
+PREFERENCE: Dict[str, Tuple[str, ...]] = {
+    REQUEST_RAW: ('cat-file', 'disk'),
+    REQUEST_COMMITS: ('log', 'cat-file', 'disk'),
+    REQUEST_REFS: ('disk', 'cat-file'),
+}
+
+# git log format of the log backend: sha, tree, parents, author, committer and message,
+# NUL-separated, with -z terminating each commit with another NUL. --date=raw makes the
+# identities read exactly like the author/committer headers of the commit object.
+LOG_FORMAT: str = '%H%x00%T%x00%P%x00%an <%ae> %ad%x00%cn <%ce> %cd%x00%B'
+LOG_FIELDS: int = 6
+LOG_CHUNK_SIZE: int = 1 << 16
+
+# Environment variables that redirect object or ref lookup in ways the disk backend does not follow
+_REDIRECTING_ENV: Tuple[str, ...] = ('GIT_DIR', 'GIT_OBJECT_DIRECTORY', 'GIT_ALTERNATE_OBJECT_DIRECTORIES',
+                                     'GIT_REPLACE_REF_BASE')
+
+# Pack object types
+OBJ_COMMIT, OBJ_TREE, OBJ_BLOB, OBJ_TAG, OBJ_OFS_DELTA, OBJ_REF_DELTA = 1, 2, 3, 4, 6, 7
+TYPE_NAMES: Dict[int, str] = {OBJ_COMMIT: 'commit', OBJ_TREE: 'tree', OBJ_BLOB: 'blob', OBJ_TAG: 'tag'}
+DELTA_BASE_CACHE: int = 256  # delta bases kept per pack
+
+
+class BackendError(RuntimeError):
+    """
+    A backend cannot serve a request: it lacks the capability, is not available for the
+    repository, or found something it does not handle (a missing object, an unknown format).
+    The loaders fall back to the next backend, unless one was chosen explicitly.
+    """
+
+
+def write_lines(stream, lines: List[str], window: Optional[RequestWindow] = None) -> None:
+    """
+    Write one line per item to a subprocess stdin and close it.
+
+    With a request window, each line waits for the window first; the lines must then be
+    requests the reader reports with window.received(), as for cat-file --batch.
+    """
+    try:
+        if window is None:
+            for line in lines:
+                stream.write(f"{line}\n".encode())
+        else:
+            for line in lines:
+                if not window.request():
+                    break
+                stream.write(f"{line}\n".encode())
+                stream.flush()  # git must see the request before the window can move on
+        stream.close()
+    except (BrokenPipeError, ValueError):
+        pass  # the process exited or the pipe was closed; nothing left to feed
+
+
+def iter_batch_output(stdout, window: Optional[RequestWindow] = None) -> Iterator[Tuple[str, bytes]]:
+    """
+    Split the output of a git cat-file --batch process into objects.
+
+    :param stdout: The process's stdout
+    :param window: Request window of the writer, told about each object read
+    :return: Iterator of (sha, raw content) tuples
+    :raises BackendError: If cat-file reports a missing object
+    """
+    throttled: bool = governor.read_rate is not None
+    while True:
+        header_line: bytes = stdout.readline()
+        if not header_line:
+            return
+        parts: List[str] = header_line.decode().split()
+        if len(parts) != 3:
+            raise BackendError(f"git cat-file: {' '.join(parts)}")  # "<sha> missing"
+        size: int = int(parts[2])
+        content: bytes = stdout.read(size + 1)
+        if len(content) != size + 1:
+            raise BackendError("git cat-file: output ended within an object")  # the process was killed
+        content = content[:-1]  # drop trailing newline
+        if window is not None:
+            window.received(size)
+        if throttled:
+            governor.throttle(len(header_line) + size + 1)
+        yield parts[0], content
+
+
+class Backend:
+    """
+    Access to the objects and refs of one repository.
+
+    Subclasses declare the requests they can serve in `capabilities` and implement the
+    matching methods: iter_raw_commits() for REQUEST_RAW (which also serves
+    REQUEST_COMMITS, by parsing), iter_commit_fields() for a REQUEST_COMMITS-only backend
+    and list_branches() for REQUEST_REFS.
+    """
+
+    name: str = ''
+    capabilities: FrozenSet[str] = frozenset()
+    __slots__ = ("repo_path",)
+
+    def __init__(self, repo_path: str) -> None:
+        """
+        :param repo_path: Path to the Git repository
+        """
+        self.repo_path: str = repo_path
+
+    @classmethod
+    def available(cls, repo_path: str) -> bool:
+        """
+        Return whether the backend can be used for the repository at all.
+        """
+        return True
+
+    def iter_raw_commits(self, shas: List[str], deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, bytes]]:
+        """
+        Read commit objects.
+
+        :param shas: Commit SHAs, in output order
+        :param deadline: Kill the git process if it is still running at this deadline; the
+                         caller checks the deadline between objects and stops consuming
+        :return: Iterator of (sha, raw content) tuples
+        :raises BackendError: If an object cannot be read
+        """
+        raise BackendError(f"backend {self.name} cannot serve {REQUEST_RAW}")
+
+    def iter_commit_fields(self, shas: List[str],
+                           deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, str, List[str], bytes, bytes, bytes]]:
+        """
+        Read commit metadata without the raw objects.
+
+        :param shas: Commit SHAs, in output order
+        :param deadline: As for iter_raw_commits()
+        :return: Iterator of (sha, tree, parents, author, committer, message) tuples; author and
+                 committer are header values such as b"Name <email> 1234567890 +0900"
+        :raises BackendError: If a commit cannot be read
+        """
+        raise BackendError(f"backend {self.name} cannot serve {REQUEST_COMMITS}")
+
+    def list_branches(self, deadline: Optional[Deadline] = None) -> Dict[str, List[str]]:
+        """
+        Read the local branches.
+
+        :param deadline: Give up at this deadline
+        :return: Dict mapping SHA -> branch names, in refname order
+        :raises BackendError: If the refs cannot be read
+        :raises DeadlineExceeded: If the deadline passed first
+        """
+        raise BackendError(f"backend {self.name} cannot serve {REQUEST_REFS}")
+
+
+class CatFileBackend(Backend):
+    """
+    The git CLI: commit objects through one `git cat-file --batch` process, branches
+    through `git for-each-ref`. Handles every repository git does.
+    """
+
+    name: str = 'cat-file'
+    capabilities: FrozenSet[str] = frozenset((REQUEST_RAW, REQUEST_COMMITS, REQUEST_REFS))
+    __slots__ = ()
+
+    @classmethod
+    def available(cls, repo_path: str) -> bool:
+        return shutil.which('git') is not None
+
+    def iter_raw_commits(self, shas: List[str], deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, bytes]]:
+        cmd_cat: List[str] = ['git', '-C', self.repo_path, 'cat-file', '--batch']
+        with profiler.span('commit_loader.spawn_cat_file', objects=len(shas)):
+            p_cat: subprocess.Popen = governor.popen(cmd_cat, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            window: Optional[RequestWindow] = governor.window()
+            # Feed SHAs from a separate thread: writing them all before reading would deadlock
+            # once both pipe buffers fill up on large repositories.
+            writer: threading.Thread = threading.Thread(target=write_lines, args=(p_cat.stdin, shas, window),
+                                                        daemon=True)
+            writer.start()
+        timer: Optional[threading.Timer] = deadline.watch(p_cat) if deadline is not None else None
+        finished: bool = False
+        bytes_read: int = 0
+        try:
+            for sha, content in iter_batch_output(p_cat.stdout, window):
+                bytes_read += len(content)
+                yield sha, content
+            finished = True
+        finally:
+            profiler.count('backends.cat_file.bytes', bytes_read)
+            if timer is not None:
+                timer.cancel()
+            if window is not None:
+                window.close()
+            if not finished and p_cat.poll() is None:
+                p_cat.kill()  # stopped early; unblock the writer, or git blocked on a full stdout pipe
+            writer.join()
+            p_cat.wait()
+
+    def list_branches(self, deadline: Optional[Deadline] = None) -> Dict[str, List[str]]:
+        cmd: List[str] = [
+            'git', '-C', self.repo_path,
+            'for-each-ref',
+            '--format=%(refname:short) %(objectname)',
+            'refs/heads/'
+        ]
+        if deadline is not None:
+            return self._list_branches_until(cmd, deadline)
+        with profiler.span('branch_loader.for_each_ref'):
+            result: subprocess.CompletedProcess = governor.run(cmd, stdout=subprocess.PIPE, text=True, check=True)
+        profiler.count('branch_loader.bytes', len(result.stdout))
+        branch_map: Dict[str, List[str]] = {}
+        with profiler.span('branch_loader.parse'):
+            for line in result.stdout.splitlines():
+                name, sha = line.split(None, 1)
+                branch_map.setdefault(sha, []).append(name)
+        return branch_map
+
+    def _list_branches_until(self, cmd: List[str], deadline: Deadline) -> Dict[str, List[str]]:
+        # Parse for-each-ref output as it streams, so the branches read before the deadline are kept
+        branch_map: Dict[str, List[str]] = {}
+        bytes_read: int = 0
+        with profiler.span('branch_loader.for_each_ref'):
+            proc: subprocess.Popen = governor.popen(cmd, stdout=subprocess.PIPE, text=True)
+            timer: threading.Timer = deadline.watch(proc)
+            try:
+                for line in proc.stdout:
+                    if not line.endswith('\n') or deadline.expired():
+                        break  # cut off by the kill, or out of time
+                    bytes_read += len(line)
+                    name, sha = line.split(None, 1)
+                    branch_map.setdefault(sha.rstrip('\n'), []).append(name)
+                else:
+                    if proc.wait() == 0:
+                        return branch_map
+                    if not deadline.expired():
+                        raise subprocess.CalledProcessError(proc.returncode, cmd)
+            finally:
+                timer.cancel()
+                if proc.poll() is None:
+                    proc.kill()
+                proc.stdout.close()
+                proc.wait()
+                profiler.count('branch_loader.bytes', bytes_read)
+        raise DeadlineExceeded("git for-each-ref did not finish in time", partial=branch_map)
+
+
+class LogBackend(Backend):
+    """
+    Commit metadata formatted by git itself: `git log --no-walk=unsorted --stdin` prints
+    the fields of every given commit NUL-delimited, so no object header is parsed in
+    Python. The raw objects are not available this way.
+    """
+
+    name: str = 'log'
+    capabilities: FrozenSet[str] = frozenset((REQUEST_COMMITS,))
+    __slots__ = ()
+
+    @classmethod
+    def available(cls, repo_path: str) -> bool:
+        return shutil.which('git') is not None
+
+    def iter_commit_fields(self, shas: List[str],
+                           deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, str, List[str], bytes, bytes, bytes]]:
+        cmd: List[str] = ['git', '-C', self.repo_path, 'log', '--no-walk=unsorted', '--stdin', '-z',
+                          '--no-use-mailmap', '--no-show-signature', '--date=raw', f'--format={LOG_FORMAT}']
+        with profiler.span('backends.log.spawn', objects=len(shas)):
+            proc: subprocess.Popen = governor.popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                                    stderr=subprocess.PIPE)
+            writer: threading.Thread = threading.Thread(target=write_lines, args=(proc.stdin, shas), daemon=True)
+            writer.start()
+        timer: Optional[threading.Timer] = deadline.watch(proc) if deadline is not None else None
+        bytes_read: int = 0
+        remainder: bytes = b''
+        fields: List[bytes] = []
+        finished: bool = False
+        # git log reads every SHA before it prints anything, so in-flight bytes are bounded
+        # by the read size rather than a request window
+        chunk_size: int = governor.read_size(LOG_CHUNK_SIZE)
+        throttled: bool = governor.read_rate is not None
+        try:
+            # Parse as the output arrives, so git formats the next commits meanwhile
+            while True:
+                chunk: bytes = proc.stdout.read1(chunk_size)
+                if not chunk:
+                    break
+                bytes_read += len(chunk)
+                if throttled:
+                    governor.throttle(len(chunk))
+                parts: List[bytes] = (remainder + chunk).split(b'\0')
+                remainder = parts.pop()
+                fields.extend(parts)
+                complete: int = len(fields) - len(fields) % LOG_FIELDS
+                for i in range(0, complete, LOG_FIELDS):
+                    sha, tree, parents, author, committer, message = fields[i:i + LOG_FIELDS]
+                    yield (sha.decode('ascii'), tree.decode('ascii'), parents.decode('ascii').split(),
+                           author, committer, message)
+                del fields[:complete]
+            finished = True
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if not finished and proc.poll() is None:
+                proc.kill()  # the consumer stopped early
+            writer.join()
+            stderr: bytes = proc.stderr.read()
+            proc.stdout.close()
+            proc.stderr.close()
+            returncode: int = proc.wait()
+            profiler.count('backends.log.bytes', bytes_read)
+        if returncode != 0:
+            raise BackendError(f"git log: {stderr.decode('utf-8', errors='replace').strip()}")
+
+
+def read_git_config(path: str) -> Dict[str, str]:
+    """
+    Read the plain `section.key = value` entries of a git config file.
+
+    Subsections, includes and quoting are not interpreted; this is enough to check the
+    repository format extensions.
+
+    :param path: Config file
+    :return: Dict mapping lowercase "section.key" -> value; empty if the file cannot be read
+    """
+    entries: Dict[str, str] = {}
+    section: str = ''
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    section = line[1:line.find(']')].split()[0].lower() if ']' in line else ''
+                elif line and line[0] not in '#;':
+                    key, _, value = line.partition('=')
+                    entries[f"{section}.{key.strip().lower()}"] = value.strip()
+    except OSError:
+        pass
+    return entries
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Read a little-endian base-128 size of a delta header. Return (value, next position)."""
+    value: int = 0
+    shift: int = 0
+    while True:
+        byte: int = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """
+    Rebuild an object from its delta base and a git delta.
+
+    :param base: Content of the base object
+    :param delta: Delta instructions (copy from the base, insert literal bytes)
+    :return: Content of the object
+    :raises BackendError: If the delta is malformed or does not match the base
+    """
+    base_size, pos = _read_varint(delta, 0)
+    result_size, pos = _read_varint(delta, pos)
+    if base_size != len(base):
+        raise BackendError("delta base size mismatch")
+    out: bytearray = bytearray()
+    end: int = len(delta)
+    while pos < end:
+        op: int = delta[pos]
+        pos += 1
+        if op & 0x80:  # copy from the base
+            offset: int = 0
+            size: int = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:  # insert the next op bytes
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise BackendError("invalid delta opcode 0")
+    if len(out) != result_size:
+        raise BackendError("delta result size mismatch")
+    return bytes(out)
+
+
+class PackFile:
+    """
+    One pack (.idx version 2 and .pack), with objects looked up by binary search in the
+    index and read from a memory map of the pack.
+    """
+
+    __slots__ = ("pack_path", "_fanout", "_names", "_offsets", "_large_offsets", "_file", "_map", "_bases")
+
+    def __init__(self, idx_path: str) -> None:
+        """
+        :param idx_path: Path to the .idx file; the .pack file next to it is opened on first read
+        :raises BackendError: If the index is not a version 2 pack index
+        :raises OSError: If the index cannot be read
+        """
+        with open(idx_path, 'rb') as f:
+            data: bytes = f.read()
+        if data[:8] != b'\377tOc\0\0\0\2':
+            raise BackendError(f"unsupported pack index {idx_path}")
+        self.pack_path: str = idx_path[:-len('.idx')] + '.pack'
+        self._fanout: Tuple[int, ...] = struct.unpack_from('>256I', data, 8)
+        count: int = self._fanout[255]
+        names_start: int = 8 + 256 * 4
+        offsets_start: int = names_start + count * 24  # 20-byte names, then 4-byte CRCs
+        self._names: bytes = data[names_start:names_start + count * 20]
+        self._offsets: bytes = data[offsets_start:offsets_start + count * 4]
+        self._large_offsets: bytes = data[offsets_start + count * 4:-40]  # before the two trailing checksums
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._bases: 'OrderedDict[int, Tuple[int, bytes]]' = OrderedDict()  # offset -> (type, content)
+
+    def __len__(self) -> int:
+        return self._fanout[255]
+
+    def find(self, binsha: bytes) -> Optional[int]:
+        """
+        Return the pack offset of an object, or None if the pack does not contain it.
+
+        :param binsha: 20-byte object name
+        """
+        first: int = binsha[0]
+        lo: int = self._fanout[first - 1] if first else 0
+        hi: int = self._fanout[first]
+        names: bytes = self._names
+        while lo < hi:
+            mid: int = (lo + hi) // 2
+            name: bytes = names[mid * 20:mid * 20 + 20]
+            if name < binsha:
+                lo = mid + 1
+            elif name > binsha:
+                hi = mid
+            else:
+                offset: int = struct.unpack_from('>I', self._offsets, mid * 4)[0]
+                if offset & 0x80000000:
+                    offset = struct.unpack_from('>Q', self._large_offsets, (offset & 0x7fffffff) * 8)[0]
+                return offset
+        return None
+
+    def _data(self) -> mmap.mmap:
+        if self._map is None:
+            self._file = open(self.pack_path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def read_at(self, offset: int, resolve_ref) -> Tuple[int, bytes]:
+        """
+        Read the object stored at a pack offset, applying deltas.
+
+        :param offset: Offset of the object entry
+        :param resolve_ref: Callable binsha -> (type, content) for bases of REF_DELTA entries
+        :return: Tuple (object type number, content)
+        :raises BackendError: If the entry is corrupt or of an unknown type
+        """
+        cached: Optional[Tuple[int, bytes]] = self._bases.get(offset)
+        if cached is not None:
+            self._bases.move_to_end(offset)
+            return cached
+        data: mmap.mmap = self._data()
+        byte: int = data[offset]
+        pos: int = offset + 1
+        obj_type: int = (byte >> 4) & 7
+        size: int = byte & 0x0f
+        shift: int = 4
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+
+        if obj_type == OBJ_OFS_DELTA:
+            byte = data[pos]
+            pos += 1
+            distance: int = byte & 0x7f
+            while byte & 0x80:
+                byte = data[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7f)
+            base_type, base = self.read_at(offset - distance, resolve_ref)
+            result: Tuple[int, bytes] = (base_type, apply_delta(base, self._inflate(pos, size)))
+        elif obj_type == OBJ_REF_DELTA:
+            base_type, base = resolve_ref(data[pos:pos + 20])
+            result = (base_type, apply_delta(base, self._inflate(pos + 20, size)))
+        elif obj_type in TYPE_NAMES:
+            result = (obj_type, self._inflate(pos, size))
+        else:
+            raise BackendError(f"unknown object type {obj_type} in {self.pack_path}")
+
+        self._bases[offset] = result
+        if len(self._bases) > DELTA_BASE_CACHE:
+            self._bases.popitem(last=False)
+        return result
+
+    def _inflate(self, pos: int, size: int) -> bytes:
+        # zlib never grows data by more than 5 bytes per 16 KiB block plus its header and trailer
+        window: memoryview = memoryview(self._data())[pos:pos + size + size // 1000 + 64]
+        try:
+            content: bytes = zlib.decompressobj().decompress(window)
+        except zlib.error as e:
+            raise BackendError(f"corrupt object in {self.pack_path}: {e}") from e
+        finally:
+            window.release()
+        if len(content) != size:
+            raise BackendError(f"corrupt object in {self.pack_path}")
+        return content
+
+    def close(self) -> None:
+        """
+        Unmap the pack and close its file.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
+        self._bases.clear()
+
+
+class DiskBackend(Backend):
+    """
+    Reads the object database and the refs straight from the git directory: loose objects,
+    version 2 packs (with delta resolution) and packed-refs plus loose refs. No process is
+    spawned at all.
+
+    Repositories using features it does not follow (alternates, replace refs, SHA-256
+    object names, the reftable ref storage, object lookups redirected through the
+    environment) report it unavailable. Objects it cannot find, e.g. in a partial clone,
+    raise BackendError so the loader falls back to git. Branch names are always the path
+    below refs/heads/, where for-each-ref would disambiguate a name that is also a tag.
+    """
+
+    name: str = 'disk'
+    capabilities: FrozenSet[str] = frozenset((REQUEST_RAW, REQUEST_COMMITS, REQUEST_REFS))
+    __slots__ = ("objects_dir", "common_dir", "_packs")
+
+    def __init__(self, repo_path: str) -> None:
+        """
+        :param repo_path: Path to the Git repository
+        :raises BackendError: If no git directory is found
+        """
+        super().__init__(repo_path)
+        dirs: Optional[Tuple[str, str]] = locate_git_dirs(repo_path)
+        if dirs is None:
+            raise BackendError(f"no git directory found for {repo_path}")
+        self.common_dir: str = dirs[1]
+        self.objects_dir: str = os.path.join(self.common_dir, 'objects')
+        self._packs: Optional[List[PackFile]] = None
+
+    @classmethod
+    def available(cls, repo_path: str) -> bool:
+        if any(name in os.environ for name in _REDIRECTING_ENV):
+            return False
+        dirs: Optional[Tuple[str, str]] = locate_git_dirs(repo_path)
+        if dirs is None:
+            return False
+        common_dir: str = dirs[1]
+        if not os.path.isdir(os.path.join(common_dir, 'objects')):
+            return False
+        if os.path.exists(os.path.join(common_dir, 'objects', 'info', 'alternates')):
+            return False
+        config: Dict[str, str] = read_git_config(os.path.join(common_dir, 'config'))
+        if config.get('extensions.objectformat', 'sha1').lower() != 'sha1':
+            return False
+        if config.get('extensions.refstorage', 'files').lower() != 'files':
+            return False
+        return not _has_replace_refs(common_dir)
+
+    def _load_packs(self) -> List[PackFile]:
+        """
+        Load the indexes of all packs, newest first.
+
+        :raises BackendError: If a pack cannot be read, e.g. because a concurrent repack
+                              removed it after the directory was listed
+        """
+        pack_dir: str = os.path.join(self.objects_dir, 'pack')
+        try:
+            names: List[str] = [name for name in os.listdir(pack_dir) if name.endswith('.idx')]
+        except FileNotFoundError:
+            names = []
+        except OSError as e:
+            raise BackendError(f"cannot list packs: {e}") from e
+        paths: List[str] = [os.path.join(pack_dir, name) for name in names]
+        try:
+            paths.sort(key=lambda path: os.stat(path).st_mtime, reverse=True)  # newest first, as git does
+            with profiler.span('backends.disk.load_indexes', packs=len(paths)):
+                return [PackFile(path) for path in paths]
+        except OSError as e:
+            raise BackendError(f"cannot read pack index: {e}") from e
+
+    def read_object(self, sha: str) -> Tuple[str, bytes]:
+        """
+        Read one object.
+
+        :param sha: Full hexadecimal object name
+        :return: Tuple (object type, content)
+        :raises BackendError: If the object is neither loose nor in a pack
+        """
+        obj_type, content = self._read_binary(bytes.fromhex(sha), rescan=True)
+        return TYPE_NAMES[obj_type], content
+
+    def _read_binary(self, binsha: bytes, rescan: bool = False) -> Tuple[int, bytes]:
+        if self._packs is None:
+            self._packs = self._load_packs()
+        for pack in self._packs:
+            offset: Optional[int] = pack.find(binsha)
+            if offset is not None:
+                try:
+                    return pack.read_at(offset, self._read_binary)
+                except OSError as e:
+                    # The pack was removed by a repack before it was first opened; rescan on the next read
+                    self.close()
+                    if rescan:
+                        return self._read_binary(binsha)
+                    raise BackendError(f"cannot read {pack.pack_path}: {e}") from e
+        sha: str = binsha.hex()
+        try:
+            with open(os.path.join(self.objects_dir, sha[:2], sha[2:]), 'rb') as f:
+                data: bytes = zlib.decompress(f.read())
+        except FileNotFoundError:
+            if rescan:
+                # A repack may have moved the object into a new pack since the indexes were loaded
+                self.close()
+                return self._read_binary(binsha)
+            raise BackendError(f"object {sha} not found") from None
+        except OSError as e:
+            raise BackendError(f"cannot read object {sha}: {e}") from e
+        except zlib.error as e:
+            raise BackendError(f"corrupt loose object {sha}: {e}") from e
+        header_end: int = data.index(b'\0')
+        type_name, _, _ = data[:header_end].partition(b' ')
+        for number, name in TYPE_NAMES.items():
+            if name.encode() == type_name:
+                return number, data[header_end + 1:]
+        raise BackendError(f"unknown object type {type_name!r} of {sha}")
+
+    def iter_raw_commits(self, shas: List[str], deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, bytes]]:
+        # No process to kill: objects are read in this thread and the caller stops between them
+        bytes_read: int = 0
+        throttled: bool = governor.read_rate is not None
+        try:
+            for sha in shas:
+                obj_type, content = self.read_object(sha)
+                if obj_type != 'commit':
+                    raise BackendError(f"{sha} is a {obj_type}, not a commit")
+                bytes_read += len(content)
+                if throttled:
+                    governor.throttle(len(content))
+                yield sha, content
+        finally:
+            profiler.count('backends.disk.bytes', bytes_read)
+
+    def list_branches(self, deadline: Optional[Deadline] = None) -> Dict[str, List[str]]:
+        # Reading the ref files takes milliseconds even for thousands of branches; the deadline is not checked
+        with profiler.span('backends.disk.read_refs'):
+            try:
+                refs: Dict[str, str] = _read_packed_refs(self.common_dir)
+            except OSError as e:
+                raise BackendError(f"cannot read packed-refs: {e}") from e
+            heads_dir: str = os.path.join(self.common_dir, 'refs', 'heads')
+            for directory, _, files in os.walk(heads_dir):
+                for file_name in files:
+                    if file_name.endswith('.lock'):
+                        continue  # a ref update in progress
+                    path: str = os.path.join(directory, file_name)
+                    refname: str = 'refs/' + os.path.relpath(path, os.path.join(self.common_dir, 'refs')).replace(os.sep, '/')
+                    try:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            refs[refname] = f.read().strip()
+                    except OSError as e:
+                        raise BackendError(f"cannot read {refname}: {e}") from e
+
+            branch_map: Dict[str, List[str]] = {}
+            for refname in sorted(name for name in refs if name.startswith('refs/heads/')):
+                sha: str = _resolve_ref(refs, refname, self.common_dir)
+                branch_map.setdefault(sha, []).append(refname[len('refs/heads/'):])
+        return branch_map
+
+    def close(self) -> None:
+        """
+        Unmap all packs; they are reloaded on the next read.
+        """
+        for pack in self._packs or ():
+            pack.close()
+        self._packs = None
+
+
+def _read_packed_refs(common_dir: str) -> Dict[str, str]:
+    """Read packed-refs into a dict refname -> SHA; peeled tag lines are skipped."""
+    refs: Dict[str, str] = {}
+    try:
+        with open(os.path.join(common_dir, 'packed-refs'), 'r', encoding='utf-8') as f:
+            for line in f:
+                if line[:1] in ('#', '^', '\n', ''):
+                    continue
+                sha, _, refname = line.rstrip('\n').partition(' ')
+                refs[refname] = sha
+    except FileNotFoundError:
+        pass
+    return refs
+
+
+def _has_replace_refs(common_dir: str) -> bool:
+    """Return whether refs/replace/ holds any ref, loose or packed."""
+    for _, _, files in os.walk(os.path.join(common_dir, 'refs', 'replace')):
+        if files:
+            return True
+    try:
+        with open(os.path.join(common_dir, 'packed-refs'), 'rb') as f:
+            return b' refs/replace/' in f.read()  # a substring test is enough; no need to parse every line
+    except FileNotFoundError:
+        return False
+
+
+def _resolve_ref(refs: Dict[str, str], refname: str, common_dir: str, depth: int = 0) -> str:
+    """Follow symbolic refs ("ref: refs/heads/other") to a SHA."""
+    value: Optional[str] = refs.get(refname)
+    if value is None:
+        try:
+            with open(os.path.join(common_dir, *refname.split('/')), 'r', encoding='utf-8') as f:
+                value = f.read().strip()
+        except OSError:
+            value = None
+    if value is None or depth > 5:
+        raise BackendError(f"cannot resolve {refname}")
+    if value.startswith('ref:'):
+        return _resolve_ref(refs, value[len('ref:'):].strip(), common_dir, depth + 1)
+    if len(value) != 40:
+        raise BackendError(f"{refname} does not hold an object name")
+    return value
+
+
+BACKENDS: Dict[str, Type[Backend]] = {backend.name: backend for backend in (CatFileBackend, LogBackend, DiskBackend)}
+
+
+def select_backends(repo_path: str, request: str, preferred: Optional[str] = None) -> List[Backend]:
+    """
+    Return the backends to try for a request, fastest first.
+
+    :param repo_path: Path to the Git repository
+    :param request: REQUEST_RAW, REQUEST_COMMITS or REQUEST_REFS
+    :param preferred: Backend name chosen by the user; then only that backend is returned
+    :return: List of backend instances; the loaders fall back along it on BackendError
+    :raises BackendError: If the preferred backend is unknown, cannot serve the request or is
+                          unavailable, or no backend is available
+    """
+    if preferred is not None:
+        backend_class: Optional[Type[Backend]] = BACKENDS.get(preferred)
+        if backend_class is None:
+            raise BackendError(f"unknown backend {preferred} (choose from {', '.join(BACKENDS)})")
+        if request not in backend_class.capabilities:
+            raise BackendError(f"backend {preferred} cannot serve {request}")
+        if not backend_class.available(repo_path):
+            raise BackendError(f"backend {preferred} is not available for {repo_path}")
+        return [backend_class(repo_path)]
+    backends: List[Backend] = [BACKENDS[name](repo_path) for name in PREFERENCE[request]
+                               if BACKENDS[name].available(repo_path)]
+    if not backends:
+        raise BackendError(f"no backend available for {request} in {repo_path}")
+    return backends
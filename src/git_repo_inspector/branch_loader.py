@@ -4,39 +4,69 @@ import os
 import json
 from typing import Dict, List, Optional
 
+from .backends import REQUEST_REFS, Backend, BackendError, select_backends
+from .deadline import Deadline, DeadlineExceeded, PartialLoad
+from .profiling import profiler
+
 class BranchLoader:
     """A loader class to retrieve Git branch information from a repository."""
 
-    __slots__ = ("repo_path", "branch_map")
-    def __init__(self, repo_path: str) -> None:
+    __slots__ = ("repo_path", "branch_map", "backend")
+    def __init__(self, repo_path: str, backend: Optional[str] = None) -> None:
         """
         Initialize the loader with the path to the Git repository.
 
         :param repo_path: Path to the root of a Git repository
+        :param backend: Name of the backend to read the refs with (default: the fastest available one)
         """
         self.repo_path: str = repo_path
         self.branch_map: Optional[Dict[str, List[str]]] = None  # maps commit SHA to list of branch names
+        self.backend: Optional[str] = backend
 
     def get_branches(self) -> Dict[str, List[str]]:
         """
         Retrieve and cache a mapping from commit SHA to branch names.
 
         :return: Dict mapping SHA -> list of branch names
+        :raises BackendError: If no backend could read the refs
         """
         if self.branch_map is None:
-            cmd: List[str] = [
-                'git', '-C', self.repo_path,
-                'for-each-ref',
-                '--format=%(refname:short) %(objectname)',
-                'refs/heads/'
-            ]
-            result: subprocess.CompletedProcess = subprocess.run(cmd, stdout=subprocess.PIPE, text=True, check=True)
-            self.branch_map = {}
-            for line in result.stdout.splitlines():
-                name, sha = line.split(None, 1)
-                self.branch_map.setdefault(sha, []).append(name)
+            self._load_branches()
         return self.branch_map
 
+    def get_branches_until(self, deadline: Deadline) -> PartialLoad:
+        """
+        Like get_branches(), but give up at a deadline.
+
+        An incomplete map holds the branches read before the deadline, in refname order. It
+        is not kept: load_commits_until() needs every branch, as a partial map would
+        mislabel commits.
+
+        :param deadline: When to stop; a running git process is killed
+        :return: PartialLoad of the branch map; complete=False if the deadline passed
+        :raises BackendError: If no backend could read the refs
+        """
+        if self.branch_map is None:
+            try:
+                self._load_branches(deadline)
+            except DeadlineExceeded as e:
+                profiler.count('branch_loader.deadline_exceeded')
+                return PartialLoad(e.partial or {}, False)
+        return PartialLoad(self.branch_map, True)
+
+    def _load_branches(self, deadline: Optional[Deadline] = None) -> None:
+        backends: List[Backend] = select_backends(self.repo_path, REQUEST_REFS, self.backend)
+        for backend in backends:
+            try:
+                self.branch_map = backend.list_branches(deadline)
+                break
+            except BackendError:
+                if backend is backends[-1]:
+                    raise
+                profiler.count('branch_loader.backend_fallbacks')
+        if profiler.enabled:
+            profiler.count('branch_loader.refs', sum(len(names) for names in self.branch_map.values()))
+
     def to_json(self) -> str:
         """
         Return the branch-to-SHA mappings as a JSON string.
@@ -46,7 +76,8 @@ class BranchLoader:
         for sha, names in branches.items():
             for name in names:
                 output.append({'branch': name, 'sha': sha})
-        return json.dumps(output, indent=2)
+        with profiler.span('json.branches', rows=len(output)):
+            return json.dumps(output, indent=2)
 
 def main():
     """Command-line entry point for listing branches."""
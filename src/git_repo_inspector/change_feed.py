@@ -0,0 +1,139 @@
+# File: change_feed.py
+# Change feed: NDJSON change events between persisted snapshots of a repository's ref tips
+
+import json
+import os
+import subprocess
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set
+
+from .commit_loader import Commit, CommitLoader, commit_to_dict
+from .governor import governor
+from .profiling import profiler
+from .ref_watcher import branches_by_name, diff_branches
+
+SNAPSHOT_VERSION: int = 1
+
+
+class RefSnapshot(NamedTuple):
+    """
+    The ref state a change feed run ended at.
+
+    branches: Branch name -> commit SHA
+    tips: Object SHAs of all refs and HEAD (get_ref_tips()); history reachable from these has been reported
+    """
+    branches: Dict[str, str]
+    tips: List[str]
+
+
+def take_snapshot(loader: CommitLoader) -> RefSnapshot:
+    """
+    Record the current ref state. Call this before loading new history: commits that arrive
+    while loading are then reported again by the next run rather than missed.
+    """
+    tips: List[str] = loader.get_ref_tips()
+    return RefSnapshot(branches_by_name(loader.get_branches()), tips)
+
+
+def read_snapshot(path: str) -> Optional[RefSnapshot]:
+    """
+    Read a snapshot written by write_snapshot().
+
+    :param path: Snapshot file
+    :return: The snapshot, or None if the file does not exist yet
+    :raises RuntimeError: If the file cannot be read or is not a snapshot; starting over would
+                          silently report the whole repository again
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f"cannot read snapshot {path}: {e}") from e
+    if not isinstance(data, dict) or data.get('version') != SNAPSHOT_VERSION:
+        raise RuntimeError(f"{path} is not a version {SNAPSHOT_VERSION} snapshot")
+    return RefSnapshot(data['branches'], data['tips'])
+
+
+def write_snapshot(path: str, snapshot: RefSnapshot) -> None:
+    """
+    Write a snapshot atomically, so an interrupted run leaves the previous one in place.
+    """
+    directory: str = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path: str = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': SNAPSHOT_VERSION, 'branches': snapshot.branches, 'tips': snapshot.tips},
+                  f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _names_by_sha(branches: Dict[str, str]) -> Dict[str, List[str]]:
+    """Turn branch name -> SHA back into the BranchLoader mapping SHA -> names."""
+    names: Dict[str, List[str]] = {}
+    for name, sha in branches.items():
+        names.setdefault(sha, []).append(name)
+    return names
+
+
+def _is_ancestor(repo_path: str, old: str, new: str, parents: Dict[str, List[str]]) -> bool:
+    """
+    Return whether `old` is an ancestor of `new`.
+
+    The newly reachable commits usually connect the two directly, so their parents are
+    searched first; git is asked only when that walk leaves the new history.
+    """
+    pending: List[str] = [new]
+    seen: Set[str] = set()
+    left_new_history: bool = False
+    while pending:
+        sha: str = pending.pop()
+        if sha == old:
+            return True
+        if sha in seen:
+            continue
+        seen.add(sha)
+        if sha in parents:
+            pending.extend(parents[sha])
+        else:
+            left_new_history = True  # reachable from an old tip; old may still be behind it
+    if not left_new_history:
+        return False
+    profiler.count('change_feed.ancestry_checks')
+    # Exits 0 if it is an ancestor, 1 if not, and 128 if `old` no longer exists (pruned after a force push)
+    result: subprocess.CompletedProcess = governor.run(
+        ['git', '-C', repo_path, 'merge-base', '--is-ancestor', old, new],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode == 0
+
+
+def iter_changes(loader: CommitLoader, previous: Optional[RefSnapshot],
+                 current: RefSnapshot) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the branch and commit events between two snapshots.
+
+    Branch events are those of `watch` (created, deleted, moved), with a move that drops
+    commits reported as "force-pushed" instead. Commit events cover the commits reachable
+    from the current refs but not from the previous tips, newest first; only those are
+    walked. Without a previous snapshot every branch is created and every commit is new.
+
+    :param loader: Loader of the repository
+    :param previous: Snapshot of the previous run, or None for the first run
+    :param current: Snapshot taken by take_snapshot() before this call
+    :return: Iterator of JSON-serializable event dicts
+    """
+    old_branches: Dict[str, str] = previous.branches if previous is not None else {}
+    commits: List[Commit]
+    with profiler.span('change_feed.new_commits'):
+        if previous is None:
+            commits = loader.load_commits()
+        else:
+            commits = loader.load_commits_since(previous.tips)
+    parents: Dict[str, List[str]] = {c.sha: c.parents for c in commits}
+    for event in diff_branches(_names_by_sha(old_branches), _names_by_sha(current.branches)):
+        if event['action'] == 'moved' and not _is_ancestor(loader.repo_path, event['old_sha'], event['sha'],
+                                                           parents):
+            event['action'] = 'force-pushed'
+        yield event
+    for commit in commits:
+        yield {'event': 'commit', **commit_to_dict(commit)}
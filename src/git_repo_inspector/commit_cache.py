@@ -0,0 +1,276 @@
+# File: commit_cache.py
+# CommitCache: parsed commit records shared by all repositories, keyed by commit SHA, in one SQLite file
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .profiling import profiler
+
+SCHEMA_VERSION: int = 1
+DEFAULT_MAX_BYTES: int = 1024 * 1024 * 1024  # estimated size of the records kept
+EVICT_TO: float = 0.9          # eviction frees space down to this fraction of max_bytes
+RECORD_OVERHEAD: int = 200     # bytes per record besides its text: SHAs, integers, index entries
+TOUCH_INTERVAL: int = 3600     # seconds before a hit refreshes a record's last-use time again
+LOCK_TIMEOUT: float = 30.0     # seconds to wait for another process's write
+LOOKUP_BATCH: int = 500        # SHAs per SELECT ... IN (...)
+FILE_NAME: str = 'commits.sqlite3'
+
+# Cached fields, in the order get_many() returns them; identities are (name, email) tuples or None
+RECORD_FIELDS: Tuple[str, ...] = ('tree', 'parents', 'author', 'committer', 'message', 'raw',
+                                  'author_ident', 'author_time', 'author_tz',
+                                  'committer_ident', 'committer_time', 'committer_tz')
+_COLUMNS: str = ('sha, tree, parents, author, committer, message, raw, author_id, author_time, author_tz, '
+                 'committer_id, committer_time, committer_tz, size, used')
+
+_SCHEMA: Tuple[str, ...] = (
+    # Keyed by SHA without a separate rowid, so a lookup is a single B-tree search
+    """CREATE TABLE commits (
+        sha TEXT PRIMARY KEY, tree TEXT NOT NULL, parents TEXT NOT NULL,
+        author TEXT NOT NULL, committer TEXT NOT NULL, message TEXT NOT NULL, raw TEXT,
+        author_id INTEGER, author_time INTEGER NOT NULL, author_tz INTEGER NOT NULL,
+        committer_id INTEGER, committer_time INTEGER NOT NULL, committer_tz INTEGER NOT NULL,
+        size INTEGER NOT NULL, used INTEGER NOT NULL) WITHOUT ROWID""",
+    "CREATE INDEX commits_used ON commits (used)",
+    # Names and emails are stored once; identity rows are never deleted, so their ids stay valid
+    "CREATE TABLE identities (id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT NOT NULL, UNIQUE (name, email))",
+    "CREATE TABLE totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT INTO totals VALUES ('bytes', 0)",
+    # The size total is kept exact by triggers, so concurrent writers never recount it
+    """CREATE TRIGGER commits_insert AFTER INSERT ON commits
+        BEGIN UPDATE totals SET value = value + NEW.size WHERE name = 'bytes'; END""",
+    """CREATE TRIGGER commits_update AFTER UPDATE OF size ON commits
+        BEGIN UPDATE totals SET value = value + NEW.size - OLD.size WHERE name = 'bytes'; END""",
+    """CREATE TRIGGER commits_delete AFTER DELETE ON commits
+        BEGIN UPDATE totals SET value = value - OLD.size WHERE name = 'bytes'; END""",
+)
+
+
+def default_cache_path() -> str:
+    """
+    Return the per-user cache file: $XDG_CACHE_HOME/git-repo-inspector/commits.sqlite3,
+    or ~/.cache/... when XDG_CACHE_HOME is not set.
+    """
+    cache_home: str = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'git-repo-inspector', FILE_NAME)
+
+
+def record_size(commit: Any) -> int:
+    """
+    Estimate the bytes a commit's record takes in the cache.
+    """
+    return (RECORD_OVERHEAD + len(commit.author) + len(commit.committer) + len(commit.message)
+            + len(commit.raw) + 41 * len(commit.parents))
+
+
+class CommitCache:
+    """
+    Parsed commit records shared by every repository of a user, keyed by commit SHA.
+
+    Commit objects are immutable and named by the hash of their content, so a record read
+    from one fork is valid in every other repository containing the same SHA; scanning a
+    family of forks reads each shared commit once. Branch annotations are per repository
+    and are not stored.
+
+    The records live in one SQLite database in WAL mode: any number of processes read
+    concurrently, writers take turns (waiting up to LOCK_TIMEOUT seconds), and a crashed
+    writer never leaves a partial batch. When the estimated size exceeds max_bytes, the
+    least recently used records are evicted. Instances are safe to share between threads.
+    """
+
+    __slots__ = ("path", "max_bytes", "hits", "misses", "_conn", "_lock", "_identities", "_identity_ids")
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        :param path: Database file (default: default_cache_path()); opened on first use
+        :param max_bytes: Estimated size of the records kept
+        """
+        self.path: str = path or default_cache_path()
+        self.max_bytes: int = max_bytes
+        self.hits: int = 0     # records returned by get_many() over the cache's lifetime
+        self.misses: int = 0   # SHAs get_many() did not find
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock: threading.Lock = threading.Lock()
+        self._identities: Dict[int, Tuple[str, str]] = {}     # identity id -> (name, email)
+        self._identity_ids: Dict[Tuple[str, str], int] = {}   # (name, email) -> identity id
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory: str = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, mode=0o700, exist_ok=True)  # records hold commit messages
+            conn: sqlite3.Connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None,
+                                                       check_same_thread=False)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; a power loss may drop the last batch
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    version: int = conn.execute("PRAGMA user_version").fetchone()[0]
+                    if version != SCHEMA_VERSION:
+                        for table in ('commits', 'identities', 'totals'):
+                            conn.execute(f"DROP TABLE IF EXISTS {table}")
+                        for statement in _SCHEMA:
+                            conn.execute(statement)
+                        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            except BaseException:
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, shas: Iterable[str], with_raw: bool = False) -> Dict[str, Tuple[Any, ...]]:
+        """
+        Look up commit records.
+
+        :param shas: Commit SHAs
+        :param with_raw: Only return records that include the raw commit object
+        :return: Dict mapping each SHA found -> tuple of RECORD_FIELDS; `parents` is space-separated
+        :raises sqlite3.Error: If the database cannot be read
+        """
+        shas = list(shas)
+        found: Dict[str, Tuple[Any, ...]] = {}
+        now: int = int(time.time())
+        with self._lock, profiler.span('commit_cache.get', shas=len(shas)):
+            conn: sqlite3.Connection = self._connect()
+            rows: List[Tuple[Any, ...]] = []
+            for start in range(0, len(shas), LOOKUP_BATCH):
+                batch: List[str] = shas[start:start + LOOKUP_BATCH]
+                rows.extend(conn.execute(f"SELECT {_COLUMNS} FROM commits WHERE sha IN "
+                                         f"({', '.join('?' * len(batch))})", batch))
+            if with_raw:
+                rows = [row for row in rows if row[6] is not None]
+            identities: Dict[int, Tuple[str, str]] = self._identities
+            unknown: List[int] = list({row[i] for row in rows for i in (7, 10)
+                                       if row[i] is not None and row[i] not in identities})
+            for start in range(0, len(unknown), LOOKUP_BATCH):
+                batch_ids: List[int] = unknown[start:start + LOOKUP_BATCH]
+                for identity_id, name, email in conn.execute(
+                        f"SELECT id, name, email FROM identities WHERE id IN ({', '.join('?' * len(batch_ids))})",
+                        batch_ids):
+                    identities[identity_id] = (name, email)
+                    self._identity_ids[(name, email)] = identity_id
+            stale: List[str] = []
+            for (sha, tree, parents, author, committer, message, raw, author_id, author_time, author_tz,
+                 committer_id, committer_time, committer_tz, _, used) in rows:
+                found[sha] = (tree, parents, author, committer, message, raw,
+                              identities.get(author_id), author_time, author_tz,
+                              identities.get(committer_id), committer_time, committer_tz)
+                if used < now - TOUCH_INTERVAL:
+                    stale.append(sha)
+            if stale:
+                # Last-use times are coarse, so repeated scans do not turn every read into a write
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany("UPDATE commits SET used = ? WHERE sha = ?", ((now, sha) for sha in stale))
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        self.hits += len(found)
+        self.misses += len(shas) - len(found)
+        profiler.count('commit_cache.hits', len(found))
+        profiler.count('commit_cache.misses', len(shas) - len(found))
+        return found
+
+    def put_many(self, commits: Iterable[Any]) -> int:
+        """
+        Store commits; a record without its raw object is completed if the commit has one.
+
+        :param commits: Commit namedtuples
+        :return: Number of records evicted to stay within max_bytes
+        :raises sqlite3.Error: If the database cannot be written
+        """
+        commits = list(commits)
+        if not commits:
+            return 0
+        now: int = int(time.time())
+        with self._lock, profiler.span('commit_cache.put', records=len(commits)):
+            conn: sqlite3.Connection = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows: List[Tuple[Any, ...]] = [
+                    (c.sha, c.tree, ' '.join(c.parents), c.author, c.committer, c.message, c.raw or None,
+                     self._identity_id(conn, c.author_ident), c.author_time, c.author_tz,
+                     self._identity_id(conn, c.committer_ident), c.committer_time, c.committer_tz,
+                     record_size(c), now)
+                    for c in commits
+                ]
+                conn.executemany(
+                    f"INSERT INTO commits ({_COLUMNS}) VALUES ({', '.join('?' * 15)}) ON CONFLICT (sha) DO UPDATE "
+                    "SET raw = excluded.raw, size = excluded.size, used = excluded.used "
+                    "WHERE commits.raw IS NULL AND excluded.raw IS NOT NULL", rows)
+                evicted: int = self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                # Identity ids assigned in the failed transaction were rolled back with it
+                self._identities.clear()
+                self._identity_ids.clear()
+                raise
+        profiler.count('commit_cache.stored', len(rows))
+        return evicted
+
+    def _identity_id(self, conn: sqlite3.Connection, identity: Optional[Tuple[str, str]]) -> Optional[int]:
+        # Called inside the write transaction, so a row inserted here is committed with the batch
+        if identity is None:
+            return None
+        key: Tuple[str, str] = (identity[0], identity[1])
+        identity_id: Optional[int] = self._identity_ids.get(key)
+        if identity_id is None:
+            conn.execute("INSERT OR IGNORE INTO identities (name, email) VALUES (?, ?)", key)
+            identity_id = conn.execute("SELECT id FROM identities WHERE name = ? AND email = ?", key).fetchone()[0]
+            self._identity_ids[key] = identity_id
+            self._identities[identity_id] = key
+        return identity_id
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        total: int = self._total(conn)
+        if total <= self.max_bytes:
+            return 0
+        evicted: int = 0
+        target: int = int(self.max_bytes * EVICT_TO)
+        while total > target:
+            cursor: sqlite3.Cursor = conn.execute(
+                "DELETE FROM commits WHERE sha IN (SELECT sha FROM commits ORDER BY used LIMIT ?)", (LOOKUP_BATCH,))
+            if cursor.rowcount <= 0:
+                break
+            evicted += cursor.rowcount
+            total = self._total(conn)
+        profiler.count('commit_cache.evicted', evicted)
+        return evicted
+
+    @staticmethod
+    def _total(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT value FROM totals WHERE name = 'bytes'").fetchone()[0]
+
+    def total_bytes(self) -> int:
+        """
+        Estimated size of all records kept.
+        """
+        with self._lock:
+            return self._total(self._connect())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM commits").fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Close the database connection; it is reopened on the next use.
+        """
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self) -> 'CommitCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
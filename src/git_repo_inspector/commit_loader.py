@@ -1,12 +1,25 @@
 # File: commit_loader.py
-# CommitLoader: Load and parse Git commit objects into memory using git cat-file --batch
+# CommitLoader: Load and parse Git commit objects into memory through the fastest available backend
 
 import subprocess
 import json
 import hashlib
-from typing import List, Dict, Optional, Tuple, NamedTuple, Any
+import time
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, NamedTuple, Any, Iterable, Iterator
 
+from .backends import (REQUEST_COMMITS, REQUEST_RAW, REQUEST_REFS, BACKENDS, Backend, BackendError,
+                       iter_batch_output, select_backends)
 from .branch_loader import BranchLoader
+from .deadline import Deadline, DeadlineExceeded, PartialLoad, make_cursor, resume_index
+from .governor import configure as configure_governor, governor
+from .profiling import profiler
+
+if TYPE_CHECKING:  # sqlite3 is only imported by the commands that use the shared cache
+    from .commit_cache import CommitCache
+
+class Identity(NamedTuple):
+    name: str
+    email: str
 
 class Commit(NamedTuple):
     sha: str
@@ -17,107 +30,586 @@ class Commit(NamedTuple):
     message: str
     branches: List[str]
     raw: str
+    # Parsed from the author/committer headers once, at load time.
+    # Timestamps are seconds since the epoch, tz offsets are minutes east of UTC.
+    author_ident: Optional[Identity] = None
+    author_time: int = 0
+    author_tz: int = 0
+    committer_ident: Optional[Identity] = None
+    committer_time: int = 0
+    committer_tz: int = 0
+
+class BackendBenchmark(NamedTuple):
+    backend: str
+    request: str
+    items: int              # commits or branches read per run
+    bytes: int              # raw commit bytes those commits hold, 0 for refs
+    seconds: Optional[float]  # fastest run, None if the backend failed
+    error: Optional[str] = None
+
+# Parallel loading: histories below PARALLEL_MIN_COMMITS are parsed in-process, and a
+# shard is never smaller than MIN_SHARD_SIZE, so process start-up stays a small fraction.
+PARALLEL_MIN_COMMITS: int = 20_000
+MIN_SHARD_SIZE: int = 5_000
+SHARDS_PER_WORKER: int = 4  # more shards than workers evens out uneven commit sizes
+
+# Fields written by list_commits_json. The parsed identity and timestamp fields
+# are derived from author/committer and are left out to keep the schema stable.
+JSON_FIELDS: Tuple[str, ...] = ('sha', 'tree', 'parents', 'author', 'committer', 'message', 'branches', 'raw')
+
+
+def parse_identity(value: bytes, cache: Optional[Dict[bytes, Identity]] = None) -> Tuple[Optional[Identity], int, int]:
+    """
+    Parse an author/committer header value of the form "Name <email> 1234567890 +0900".
+
+    :param value: Raw header value (without the "author "/"committer " key)
+    :param cache: Optional dict used to intern Identity objects, keyed by the "Name <email>" bytes
+    :return: Tuple (identity, epoch seconds, tz offset in minutes); identity is None if unparseable
+    """
+    gt: int = value.rfind(b'>')
+    lt: int = value.rfind(b'<', 0, gt) if gt >= 0 else -1
+    if lt < 0:
+        return None, 0, 0
+
+    key: bytes = value[:gt + 1]
+    identity: Optional[Identity] = cache.get(key) if cache is not None else None
+    if identity is None:
+        identity = Identity(
+            name=value[:lt].strip().decode('utf-8', errors='replace'),
+            email=value[lt + 1:gt].decode('utf-8', errors='replace'),
+        )
+        if cache is not None:
+            cache[key] = identity
+
+    epoch: int = 0
+    tz: int = 0
+    tail: List[bytes] = value[gt + 1:].split()
+    try:
+        if tail:
+            epoch = int(tail[0])
+        if len(tail) > 1 and len(tail[1]) == 5:
+            offset: bytes = tail[1]
+            tz = int(offset[1:3]) * 60 + int(offset[3:5])
+            if offset[:1] == b'-':
+                tz = -tz
+    except ValueError:
+        pass
+    return identity, epoch, tz
+
+def commit_to_dict(commit: Commit) -> Dict[str, Any]:
+    """
+    Convert a commit to the dict written by the JSON outputs.
+
+    :param commit: Commit namedtuple
+    :return: Dict with the JSON_FIELDS of the commit
+    """
+    return {field: getattr(commit, field) for field in JSON_FIELDS}
+
+
+def _load_shard(repo_path: str, shas: List[str], backend: Optional[str] = None,
+                with_raw: bool = True) -> List[Tuple[Any, ...]]:
+    """
+    Worker entry point of the parallel load: read and parse one shard through its own backend process.
+
+    :return: Compact records, one plain tuple per commit with the Commit fields minus branches
+             and the identities as (name, email) tuples, which pickle much faster than namedtuples
+    """
+    records: List[Tuple[Any, ...]] = []
+    for c in CommitLoader(repo_path, backend=backend)._read_commits(shas, {}, with_raw):
+        records.append((c.sha, c.tree, c.parents, c.author, c.committer, c.message, c.raw,
+                        tuple(c.author_ident) if c.author_ident else None, c.author_time, c.author_tz,
+                        tuple(c.committer_ident) if c.committer_ident else None, c.committer_time, c.committer_tz))
+    return records
+
+
+def split_shards(items: List[str], workers: int, min_size: Optional[int] = None) -> List[List[str]]:
+    """
+    Split a list into contiguous shards for `workers` processes.
+
+    :param items: Items to split, kept in order across the shards
+    :param workers: Number of worker processes
+    :param min_size: Smallest shard worth a separate task (default: MIN_SHARD_SIZE)
+    :return: List of non-empty shards whose concatenation is `items`
+    """
+    min_size = MIN_SHARD_SIZE if min_size is None else min_size
+    count: int = max(1, min(workers * SHARDS_PER_WORKER, len(items) // max(min_size, 1)))
+    size: int = -(-len(items) // count)  # ceiling division
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
 
 class CommitLoader:
     """
     A loader class to retrieve Git commit objects from a repository and parse them into Commit tuples.
     """
-    def __init__(self, repo_path: str) -> None:
+    def __init__(self, repo_path: str, jobs: Optional[int] = None, backend: Optional[str] = None,
+                 cache: Optional['CommitCache'] = None) -> None:
         """
         Initialize the loader with the path to the Git repository.
 
         :param repo_path: Path to the root of a Git repository
+        :param jobs: Worker processes for parsing large histories (default: parse in this process)
+        :param backend: Name of the backend to read objects with (default: the fastest available one
+                        that can serve each request, see backends.PREFERENCE). Branches are read with
+                        it too if it can list refs.
+        :param cache: Shared cache consulted before reading objects and filled with the commits read
+                      (default: no cache)
         """
         self.repo_path: str = repo_path
+        self.jobs: Optional[int] = jobs
+        self.backend: Optional[str] = backend
+        self.cache: Optional['CommitCache'] = cache
         self.commit_shas: Optional[List[str]] = None
-        self.branch_loader: BranchLoader = BranchLoader(repo_path)
+        refs_backend: Optional[str] = None
+        if backend in BACKENDS and REQUEST_REFS in BACKENDS[backend].capabilities:
+            refs_backend = backend
+        self.branch_loader: BranchLoader = BranchLoader(repo_path, backend=refs_backend)
+        self._identities: Dict[bytes, Identity] = {}  # interned "Name <email>" -> Identity
 
-    def get_commit_shas(self) -> List[str]:
+    def get_commit_shas(self, deadline: Optional[Deadline] = None) -> List[str]:
         """
         Retrieve and cache all commit SHAs in the repository.
 
+        :param deadline: Give up at this deadline (default: none)
         :return: List of commit SHA strings
+        :raises DeadlineExceeded: If rev-list did not finish before the deadline
         """
         if self.commit_shas is None:
             cmd: List[str] = ['git', '-C', self.repo_path, 'rev-list', '--all']
-            result: subprocess.CompletedProcess = subprocess.run(cmd, stdout=subprocess.PIPE, text=True, check=True)
-            self.commit_shas = result.stdout.splitlines()
+            with profiler.span('commit_loader.rev_list'):
+                if deadline is None:
+                    result: subprocess.CompletedProcess = governor.run(cmd, stdout=subprocess.PIPE, text=True,
+                                                                       check=True)
+                else:
+                    try:
+                        result = governor.run(cmd, stdout=subprocess.PIPE, text=True, check=True,
+                                              timeout=deadline.remaining())
+                    except subprocess.TimeoutExpired as e:
+                        raise DeadlineExceeded("git rev-list did not finish in time") from e
+                self.commit_shas = result.stdout.splitlines()
+            profiler.count('commit_loader.rev_list_bytes', len(result.stdout))
+            profiler.count('commit_loader.commits', len(self.commit_shas))
         return self.commit_shas
 
     def get_branches(self) -> Dict[str, List[str]]:
         return self.branch_loader.get_branches()
 
-    def load_commits(self) -> List[Commit]:
+    def load_commits(self, with_raw: bool = True) -> List[Commit]:
         """
         Load all commits from the repository into memory, including branch annotations.
 
+        :param with_raw: Whether the raw commit objects are needed; without them a metadata-only
+                         backend may be used and Commit.raw is left empty
         :return: List of Commit namedtuples
         """
         shas: List[str] = self.get_commit_shas()
         branch_map: Dict[str, List[str]] = self.get_branches()
-        cmd_cat: List[str] = ['git', '-C', self.repo_path, 'cat-file', '--batch']
+        return self._read_commits(shas, branch_map, with_raw)
 
-        p_cat: subprocess.Popen = subprocess.Popen(cmd_cat, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
-        for sha in shas:
-            p_cat.stdin.write(f"{sha}\n".encode())
-        p_cat.stdin.close()
+    def get_branches_until(self, deadline: Deadline) -> PartialLoad:
+        return self.branch_loader.get_branches_until(deadline)
 
-        commits: List[Commit] = []
-        while True:
-            header_line: bytes = p_cat.stdout.readline()
-            if not header_line:
-                break
-            sha, obj_type, size_str = header_line.decode().split()
-            size: int = int(size_str)
-
-            # Read raw object data (already uncompressed)
-            raw_data: bytes = p_cat.stdout.read(size + 1)[:-1]  # drop trailing newline
-            text: str = raw_data.decode('utf-8', errors='replace')
-
-            # Store raw content before parsing
-            raw_content: str = text
-
-            # Split header lines and commit message
-            lines: List[str] = text.split('\n')
-            tree: str = ''
-            parents: List[str] = []
-            author: str = ''
-            committer: str = ''
-            idx: int = 0
-
-            # Parse header fields
-            while idx < len(lines) and lines[idx]:
-                key, value = lines[idx].split(' ', 1)
-                if key == 'tree':
-                    tree = value
-                elif key == 'parent':
-                    parents.append(value)
-                elif key == 'author':
-                    author = value
-                elif key == 'committer':
-                    committer = value
-                idx += 1
-
-            # The rest is the commit message
-            message: str = '\n'.join(lines[idx+1:]).strip()
-            # Assign branches for this commit
-            branches: List[str] = branch_map.get(sha, [])
-
-            commits.append(
-                Commit(
-                    sha=sha,
-                    tree=tree,
-                    parents=parents,
-                    author=author,
-                    committer=committer,
-                    message=message,
-                    branches=branches,
-                    raw=raw_content
-                )
+    def load_commits_until(self, deadline: Deadline, with_raw: bool = True,
+                           cursor: Optional[str] = None) -> PartialLoad:
+        """
+        Load commits like load_commits(), stopping at a deadline with what was loaded so far.
+
+        Commits are read serially in rev-list order and checked against the deadline one by
+        one; a git process still running at the deadline is killed. The commits returned are
+        always a prefix of the remaining history, so passing the returned cursor to the next
+        call continues where this one stopped. Commits that became reachable from the refs
+        in between are not picked up by resuming; use load_commits_since() for those.
+
+        :param deadline: When to stop
+        :param with_raw: Whether the raw commit objects are needed
+        :param cursor: Cursor of an earlier partial load to continue from (default: start at the newest commit)
+        :return: PartialLoad of the commits loaded; `cursor` is set when `complete` is False
+        :raises BackendError: If no backend could read the commits before the deadline passed
+        :raises ValueError: If the cursor is malformed
+        """
+        unchanged: str = cursor or make_cursor([], 0)
+        try:
+            shas: List[str] = self.get_commit_shas(deadline)
+        except DeadlineExceeded:
+            return PartialLoad([], False, unchanged)
+        start: int = resume_index(shas, cursor)
+        branches: PartialLoad = self.get_branches_until(deadline)
+        if not branches.complete:
+            return PartialLoad([], False, unchanged)
+        commits: List[Commit] = (self._read_commits(shas[start:], branches.items, with_raw, deadline)
+                                 if start < len(shas) else [])
+        end: int = start + len(commits)
+        if end == len(shas):
+            return PartialLoad(commits, True)
+        profiler.count('commit_loader.deadline_remaining', len(shas) - end)
+        return PartialLoad(commits, False, make_cursor(shas, end))
+
+    def load_commits_for(self, shas: List[str]) -> List[Commit]:
+        """
+        Load only the given commits, in the given order, including branch annotations.
+
+        :param shas: Commit SHAs to load
+        :return: List of Commit namedtuples
+        """
+        if not shas:
+            return []
+        return self._read_commits(shas, self.get_branches())
+
+    def get_ref_tips(self) -> List[str]:
+        """
+        Retrieve the object SHAs that all refs and HEAD currently point to.
+
+        Record these before loading to later fetch only new history with load_commits_since().
+
+        :return: List of unique object SHA strings
+        """
+        cmd: List[str] = ['git', '-C', self.repo_path, 'show-ref', '--head', '--hash']
+        # show-ref exits with status 1 when there are no refs at all
+        result: subprocess.CompletedProcess = governor.run(cmd, stdout=subprocess.PIPE, text=True)
+        return list(dict.fromkeys(result.stdout.split()))
+
+    def load_commits_since(self, known_tips: Iterable[str]) -> List[Commit]:
+        """
+        Load only the commits reachable from the current refs but not from `known_tips`.
+
+        Branch annotations are re-read since refs have moved. The walk is proportional to the
+        new history, not to the size of the repository.
+
+        :param known_tips: Tips recorded by get_ref_tips() when the previous load happened
+        :return: List of newly reachable Commit namedtuples, newest first
+        """
+        exclusions: str = ''.join(f"^{tip}\n" for tip in known_tips)
+        cmd: List[str] = ['git', '-C', self.repo_path, 'rev-list', '--all', '--ignore-missing', '--stdin']
+        with profiler.span('commit_loader.rev_list_since'):
+            result: subprocess.CompletedProcess = governor.run(
+                cmd, input=exclusions, stdout=subprocess.PIPE, text=True, check=True
             )
+        shas: List[str] = result.stdout.splitlines()
+        if self.commit_shas is not None:
+            self.commit_shas = shas + self.commit_shas
+        self.branch_loader.branch_map = None
+        if not shas:
+            return []
+        return self._read_commits(shas, self.get_branches())
+
+    def _read_commits(self, shas: List[str], branch_map: Dict[str, List[str]],
+                      with_raw: bool = True, deadline: Optional[Deadline] = None) -> List[Commit]:
+        """
+        Read and parse the given commits through the fastest backend that can serve the request.
+
+        If a backend fails on something it does not handle, the next one is tried, unless the
+        backend was chosen explicitly. With `jobs` > 1 and a large enough list, the work is
+        sharded across processes instead.
+
+        :param shas: Commit SHAs to read, in output order
+        :param branch_map: Mapping SHA -> branch names used to annotate the commits
+        :param with_raw: Whether the raw commit objects are needed
+        :param deadline: Stop at this deadline; the result is then a prefix of `shas`
+        :return: List of Commit namedtuples
+        :raises BackendError: If no backend could read the commits
+        """
+        if self.cache is not None:
+            return self._read_commits_cached(shas, branch_map, with_raw, deadline)
+        return self._read_objects(shas, branch_map, with_raw, deadline)
 
+    def _read_commits_cached(self, shas: List[str], branch_map: Dict[str, List[str]],
+                             with_raw: bool, deadline: Optional[Deadline] = None) -> List[Commit]:
+        """
+        Take the commits found in the shared cache from there, read the rest through the
+        backends and add them to the cache.
+
+        The cache only saves work, so a database that cannot be read or written (locked
+        for too long, on a full disk) is skipped with a profiler count.
+        """
+        import sqlite3
+
+        try:
+            records: Dict[str, Tuple[Any, ...]] = self.cache.get_many(shas, with_raw)
+        except sqlite3.Error:
+            profiler.count('commit_cache.errors')
+            records = {}
+        missing: List[str] = [sha for sha in shas if sha not in records] if records else shas
+        loaded: Dict[str, Commit] = {}
+        if missing:
+            read: List[Commit] = self._read_objects(missing, branch_map, with_raw, deadline)
+            try:
+                self.cache.put_many(read)
+            except sqlite3.Error:
+                profiler.count('commit_cache.errors')
+            if not records:
+                return read
+            loaded = {commit.sha: commit for commit in read}
+
+        identities: Dict[Tuple[str, str], Identity] = {}
+
+        def intern(pair: Optional[Tuple[str, str]]) -> Optional[Identity]:
+            if pair is None:
+                return None
+            identity: Optional[Identity] = identities.get(pair)
+            if identity is None:
+                identity = identities[pair] = Identity(*pair)
+            return identity
+
+        commits: List[Commit] = []
+        with profiler.span('commit_loader.cached_records', records=len(records)):
+            for sha in shas:
+                commit: Optional[Commit] = loaded.get(sha)
+                if commit is None:
+                    if sha not in records:
+                        break  # the deadline stopped reading here
+                    (tree, parents, author, committer, message, raw, author_ident, author_time, author_tz,
+                     committer_ident, committer_time, committer_tz) = records[sha]
+                    commit = Commit(sha, tree, parents.split(), author, committer, message,
+                                    branch_map.get(sha, []), raw or '', intern(author_ident), author_time,
+                                    author_tz, intern(committer_ident), committer_time, committer_tz)
+                commits.append(commit)
+        return commits
+
+    def _read_objects(self, shas: List[str], branch_map: Dict[str, List[str]], with_raw: bool,
+                      deadline: Optional[Deadline] = None) -> List[Commit]:
+        """
+        Read and parse commits through the backends, falling back along the selection.
+        """
+        if deadline is None and self.jobs and self.jobs > 1 and len(shas) >= PARALLEL_MIN_COMMITS:
+            return self._read_commits_parallel(shas, branch_map, with_raw)
+        backends: List[Backend] = select_backends(self.repo_path, REQUEST_RAW if with_raw else REQUEST_COMMITS,
+                                                  self.backend)
+        for backend in backends:
+            try:
+                return self._read_with(backend, shas, branch_map, deadline)
+            except BackendError:
+                if backend is backends[-1]:
+                    raise
+                profiler.count('commit_loader.backend_fallbacks')
+
+    def _read_with(self, backend: Backend, shas: List[str], branch_map: Dict[str, List[str]],
+                   deadline: Optional[Deadline] = None) -> List[Commit]:
+        """
+        Read and parse commits through one backend.
+
+        :raises BackendError: If the backend cannot read one of the commits
+        """
+        with profiler.span('commit_loader.read_objects', backend=backend.name):
+            if deadline is not None:
+                return self._read_until(backend, shas, branch_map, deadline)
+            if REQUEST_RAW in backend.capabilities:
+                return list(self._iter_records(backend.iter_raw_commits(shas), branch_map))
+            commits: List[Commit] = [
+                self._make_commit(sha, tree, parents, author, committer, message, branch_map.get(sha, []), '')
+                for sha, tree, parents, author, committer, message in backend.iter_commit_fields(shas)
+            ]
+        profiler.count('commit_loader.objects', len(commits))
+        return commits
+
+    def _read_until(self, backend: Backend, shas: List[str], branch_map: Dict[str, List[str]],
+                    deadline: Deadline) -> List[Commit]:
+        # A backend whose git process was killed at the deadline fails on the truncated
+        # output; that is the expected end of the read, not a reason to fall back
+        source: Iterator[Any]
+        commits_iter: Iterator[Commit]
+        if REQUEST_RAW in backend.capabilities:
+            source = backend.iter_raw_commits(shas, deadline)
+            commits_iter = self._iter_records(source, branch_map)
+        else:
+            source = backend.iter_commit_fields(shas, deadline)
+            commits_iter = (self._make_commit(sha, tree, parents, author, committer, message,
+                                              branch_map.get(sha, []), '')
+                            for sha, tree, parents, author, committer, message in source)
+        commits: List[Commit] = []
+        try:
+            for commit in commits_iter:
+                commits.append(commit)
+                if deadline.expired():
+                    break
+        except BackendError:
+            if not deadline.expired():
+                raise
+        finally:
+            commits_iter.close()
+            source.close()  # stops the git process if it is still running
+        if REQUEST_RAW not in backend.capabilities:
+            profiler.count('commit_loader.objects', len(commits))  # _iter_records() counts its own
+        return commits
+
+    def _read_commits_parallel(self, shas: List[str], branch_map: Dict[str, List[str]],
+                               with_raw: bool = True) -> List[Commit]:
+        """
+        Read and parse commits in worker processes, one backend per shard.
+
+        Shards are contiguous slices of `shas` and results are collected in submission
+        order, so the output order is the same as with the serial path.
+        """
+        from concurrent.futures import ProcessPoolExecutor  # only needed for large loads
+
+        shards: List[List[str]] = split_shards(shas, self.jobs)
+        commits: List[Commit] = []
+        identities: Dict[Tuple[str, str], Identity] = {}
+
+        def intern(pair: Optional[Tuple[str, str]]) -> Optional[Identity]:
+            if pair is None:
+                return None
+            identity: Optional[Identity] = identities.get(pair)
+            if identity is None:
+                identity = identities[pair] = Identity(*pair)
+            return identity
+
+        workers: int = governor.workers(min(self.jobs, len(shards)))
+        with profiler.span('commit_loader.parallel_load', objects=len(shas), shards=len(shards), jobs=workers):
+            # Each worker process gets its share of the process and bandwidth limits
+            with ProcessPoolExecutor(max_workers=workers, initializer=configure_governor,
+                                     initargs=(governor.settings(workers),)) as pool:
+                for records in pool.map(_load_shard, [self.repo_path] * len(shards), shards,
+                                        [self.backend] * len(shards), [with_raw] * len(shards)):
+                    for (sha, tree, parents, author, committer, message, raw,
+                         author_pair, author_time, author_tz, committer_pair, committer_time, committer_tz) in records:
+                        commits.append(Commit(sha, tree, parents, author, committer, message,
+                                              branch_map.get(sha, []), raw, intern(author_pair), author_time,
+                                              author_tz, intern(committer_pair), committer_time, committer_tz))
+        profiler.count('commit_loader.objects', len(commits))
         return commits
 
+    def iter_commits(self, branch_map: Optional[Dict[str, List[str]]] = None) -> Iterator[Commit]:
+        """
+        Stream all commits without holding the history in memory.
+
+        rev-list is piped straight into cat-file, so neither the SHA list nor the parsed
+        commits are kept; memory stays constant however long the history is.
+
+        :param branch_map: Mapping SHA -> branch names used to annotate the commits (default: none)
+        :return: Iterator of Commit namedtuples, in rev-list order
+        :raises subprocess.CalledProcessError: If rev-list fails
+        """
+        cmd_rev: List[str] = ['git', '-C', self.repo_path, 'rev-list', '--all']
+        cmd_cat: List[str] = ['git', '-C', self.repo_path, 'cat-file', '--batch']
+        with profiler.span('commit_loader.spawn_cat_file'):
+            p_rev: subprocess.Popen = governor.popen(cmd_rev, stdout=subprocess.PIPE)
+            p_cat: subprocess.Popen = governor.popen(cmd_cat, stdin=p_rev.stdout, stdout=subprocess.PIPE)
+            p_rev.stdout.close()  # cat-file owns the read end now
+        try:
+            yield from self._iter_records(iter_batch_output(p_cat.stdout), branch_map or {})
+            if p_rev.wait() != 0:
+                raise subprocess.CalledProcessError(p_rev.returncode, cmd_rev)
+        finally:
+            if p_cat.poll() is None:
+                p_cat.kill()  # the consumer stopped early
+            p_cat.stdout.close()
+            p_cat.wait()
+            if p_rev.poll() is None:
+                p_rev.kill()
+            p_rev.wait()
+
+    def _iter_records(self, records: Iterator[Tuple[str, bytes]], branch_map: Dict[str, List[str]]) -> Iterator[Commit]:
+        """
+        Parse raw commit objects read by a backend into commits.
+
+        :param records: Iterator of (sha, raw content) tuples
+        :param branch_map: Mapping SHA -> branch names used to annotate the commits
+        :return: Iterator of Commit namedtuples
+        """
+        profiling: bool = profiler.enabled
+        read_time: float = 0.0
+        parse_time: float = 0.0
+        bytes_read: int = 0
+        parsed: int = 0
+        try:
+            while True:
+                if profiling:
+                    started: float = time.perf_counter()
+                record: Optional[Tuple[str, bytes]] = next(records, None)
+                if record is None:
+                    break
+                sha, raw_data = record
+                if profiling:
+                    read_done: float = time.perf_counter()
+                    read_time += read_done - started
+                    bytes_read += len(raw_data)
+                commit: Commit = self._parse_commit(sha, raw_data, branch_map.get(sha, []))
+                parsed += 1
+                if profiling:
+                    parse_time += time.perf_counter() - read_done
+                yield commit
+        finally:
+            if profiling:
+                profiler.add_time('commit_loader.read', read_time, parsed)
+                profiler.add_time('commit_loader.parse', parse_time, parsed)
+                profiler.count('commit_loader.bytes', bytes_read)
+                profiler.count('commit_loader.objects', parsed)
+
+    def _parse_commit(self, sha: str, raw_data: bytes, branches: List[str]) -> Commit:
+        """
+        Parse a raw commit object in a single pass over its header bytes.
+
+        :param sha: SHA of the commit object
+        :param raw_data: Raw (uncompressed) commit object content
+        :param branches: Branch names pointing at this commit
+        :return: Commit namedtuple
+        """
+        header_end: int = raw_data.find(b'\n\n')
+        if header_end < 0:
+            header_end = len(raw_data)
+
+        tree: str = ''
+        parents: List[str] = []
+        author: str = ''
+        committer: str = ''
+        author_ident: Optional[Identity] = None
+        author_time: int = 0
+        author_tz: int = 0
+        committer_ident: Optional[Identity] = None
+        committer_time: int = 0
+        committer_tz: int = 0
+
+        # Parse header fields; continuation lines (e.g. gpgsig) start with a space and are skipped
+        for line in raw_data[:header_end].split(b'\n'):
+            key, _, value = line.partition(b' ')
+            if key == b'tree':
+                tree = value.decode('ascii')
+            elif key == b'parent':
+                parents.append(value.decode('ascii'))
+            elif key == b'author':
+                author = value.decode('utf-8', errors='replace')
+                author_ident, author_time, author_tz = parse_identity(value, self._identities)
+            elif key == b'committer':
+                committer = value.decode('utf-8', errors='replace')
+                committer_ident, committer_time, committer_tz = parse_identity(value, self._identities)
+
+        # The rest is the commit message
+        message: str = raw_data[header_end + 2:].decode('utf-8', errors='replace').strip()
+
+        return Commit(
+            sha=sha,
+            tree=tree,
+            parents=parents,
+            author=author,
+            committer=committer,
+            message=message,
+            branches=branches,
+            raw=raw_data.decode('utf-8', errors='replace'),
+            author_ident=author_ident,
+            author_time=author_time,
+            author_tz=author_tz,
+            committer_ident=committer_ident,
+            committer_time=committer_time,
+            committer_tz=committer_tz,
+        )
+
+    def _make_commit(self, sha: str, tree: str, parents: List[str], author: bytes, committer: bytes,
+                     message: bytes, branches: List[str], raw: str) -> Commit:
+        """
+        Build a commit from fields a metadata-only backend has already split.
+
+        :param author: Author header value, e.g. b"Name <email> 1234567890 +0900"
+        :param committer: Committer header value
+        :param message: Commit message bytes
+        :param raw: Raw object text, or '' if it was not read
+        :return: Commit namedtuple, equal to what _parse_commit() returns apart from `raw`
+        """
+        author_ident, author_time, author_tz = parse_identity(author, self._identities)
+        committer_ident, committer_time, committer_tz = parse_identity(committer, self._identities)
+        return Commit(sha, tree, parents, author.decode('utf-8', errors='replace'),
+                      committer.decode('utf-8', errors='replace'),
+                      message.decode('utf-8', errors='replace').strip(), branches, raw,
+                      author_ident, author_time, author_tz, committer_ident, committer_time, committer_tz)
+
     def verify_commit(self, commit: Commit) -> bool:
         """
         Recompute the SHA-1 of a commit from its raw content and verify against the stored SHA.
@@ -134,16 +626,22 @@ class CommitLoader:
         """
         Verify all loaded commits, returning a list of mismatched SHAs.
 
+        The objects are always read from the repository, never from a shared cache.
+
         :return: List of tuples (commit_sha, recomputed_sha) for mismatches
         """
         mismatches: List[Tuple[str, str]] = []
-        for commit in self.load_commits():
+        commits: List[Commit] = (self.load_commits() if self.cache is None
+                                 else self._read_objects(self.get_commit_shas(), self.get_branches(), True))
+        for commit in commits:
             if not self.verify_commit(commit):
                 # Recompute for reporting
                 body_bytes: bytes = commit.raw.encode('utf-8')
                 header: bytes = f"commit {len(body_bytes)}\0".encode('utf-8')
                 recomputed: str = hashlib.sha1(header + body_bytes).hexdigest()
                 mismatches.append((commit.sha, recomputed))
+        profiler.count('verify.commits', len(commits))
+        profiler.count('verify.mismatches', len(mismatches))
         return mismatches
 
     def list_branches_json(self) -> str:
@@ -157,7 +655,8 @@ class CommitLoader:
         for sha, names in branches.items():
             for name in names:
                 output.append({'branch': name, 'sha': sha})
-        return json.dumps(output, indent=2)
+        with profiler.span('json.branches', rows=len(output)):
+            return json.dumps(output, indent=2)
 
     def list_commits_json(self) -> str:
         """
@@ -166,10 +665,51 @@ class CommitLoader:
         :return: JSON string of commits
         """
         commits: List[Commit] = self.load_commits()
-        output: List[Dict[str, Any]] = []
-        for c in commits:
-            d: Dict[str, Any] = c._asdict()
-            output.append(d)
-        return json.dumps(output, indent=2)
+        output: List[Dict[str, Any]] = [commit_to_dict(c) for c in commits]
+        with profiler.span('json.commits', rows=len(output)):
+            return json.dumps(output, indent=2)
 
 
+def benchmark_backends(repo_path: str, repeat: int = 3) -> List[BackendBenchmark]:
+    """
+    Time every available backend on every request it can serve, through the same loaders
+    the commands use.
+
+    :param repo_path: Path to the Git repository
+    :param repeat: Runs per backend and request; the fastest one is reported
+    :return: One BackendBenchmark per backend and request
+    """
+    shas: List[str] = CommitLoader(repo_path).get_commit_shas()
+    commit_bytes: Optional[int] = None
+    results: List[BackendBenchmark] = []
+    for name, backend_class in BACKENDS.items():
+        if not backend_class.available(repo_path):
+            continue
+        for request in (REQUEST_RAW, REQUEST_COMMITS, REQUEST_REFS):
+            if request not in backend_class.capabilities:
+                continue
+            best: Optional[float] = None
+            items: int = 0
+            error: Optional[str] = None
+            for _ in range(repeat):
+                started: float = time.perf_counter()
+                try:
+                    if request == REQUEST_REFS:
+                        branch_map: Dict[str, List[str]] = BranchLoader(repo_path, backend=name).get_branches()
+                        items = sum(len(names) for names in branch_map.values())
+                    else:
+                        commits: List[Commit] = CommitLoader(repo_path, backend=name)._read_commits(
+                            shas, {}, request == REQUEST_RAW)
+                        items = len(commits)
+                        if commit_bytes is None and request == REQUEST_RAW:
+                            # Bytes, not characters: raw is decoded, and UTF-8 round-trips for valid objects
+                            commit_bytes = sum(len(commit.raw.encode('utf-8')) for commit in commits)
+                except (BackendError, subprocess.CalledProcessError) as e:
+                    error = str(e)
+                    break
+                elapsed: float = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results.append(BackendBenchmark(name, request, items,
+                                            0 if request == REQUEST_REFS else commit_bytes or 0,
+                                            None if error else best, error))
+    return results
@@ -0,0 +1,487 @@
+# File: daemon.py
+# QueryDaemon: keep repository state warm in memory and answer JSON-RPC queries over a Unix socket
+
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import tempfile
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+from .commit_loader import Commit, CommitLoader, commit_to_dict
+from .governor import governor
+from .profiling import profiler
+from .ref_watcher import RefWatcher
+from .repo_dir import RepoDir
+from .sha_index import ShaIndex
+from .stats import CommitStats, load_mailmap
+
+if TYPE_CHECKING:
+    from .commit_cache import CommitCache
+
+SOCKET_NAME: str = 'git-repo-inspector.sock'
+DEFAULT_PAGE_SIZE: int = 100
+MAX_PAGE_SIZE: int = 10_000
+MIN_PREFIX: int = 4  # shortest SHA prefix accepted by the "commit" method
+
+# JSON-RPC 2.0 error codes; -32000 and below are application errors
+PARSE_ERROR: int = -32700
+INVALID_REQUEST: int = -32600
+METHOD_NOT_FOUND: int = -32601
+INVALID_PARAMS: int = -32602
+REPOSITORY_ERROR: int = -32000
+NOT_FOUND: int = -32001
+
+_repo_dir_lock: threading.Lock = threading.Lock()  # RepoDir changes the process working directory
+
+
+def unix_sockets_supported() -> bool:
+    """
+    Return True if this platform has Unix domain sockets.
+    """
+    return hasattr(socket, 'AF_UNIX')
+
+
+def default_socket_path() -> str:
+    """
+    Return the per-user socket path: $XDG_RUNTIME_DIR when set, the temp directory otherwise.
+    """
+    runtime_dir: Optional[str] = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, SOCKET_NAME)
+    uid: int = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), f"git-repo-inspector-{uid}.sock")
+
+
+class QueryError(Exception):
+    """
+    A query failure, reported to the client as a JSON-RPC error object.
+    """
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code: int = code
+
+
+class DaemonUnavailable(Exception):
+    """
+    No daemon is listening on the socket, or this platform has no Unix sockets.
+    """
+
+
+class RepoState:
+    """
+    Warm in-memory state of one repository: its RepoDir, ref tips, branches and commits.
+
+    refresh() compares a RefWatcher stat snapshot first, so an unchanged repository costs no
+    git process at all. When refs only advanced, just the newly reachable commits are read;
+    when history may have become unreachable (a ref was deleted or rewound), the state is
+    reloaded. Commits are loaded on first use, so branch-only queries never read them.
+    Callers hold `lock` around refresh() and the queries.
+    """
+
+    __slots__ = ("repo_path", "repo_dir", "lock", "generation", "commit_cache", "_watcher", "_loader",
+                 "_tips", "_branches", "_commits", "_by_sha", "_sha_index", "_stats")
+
+    def __init__(self, repo_path: str, commit_cache: Optional['CommitCache'] = None) -> None:
+        """
+        Resolve the repository and read its refs.
+
+        :param repo_path: Path to a Git repository or one of its worktrees
+        :param commit_cache: Shared cache consulted before reading commit objects (default: none)
+        :raises QueryError: If repo_path is not a Git repository
+        """
+        with _repo_dir_lock:
+            self.repo_dir: RepoDir = RepoDir(repo_path)
+        if self.repo_dir.absolute_git_dir_error is not None:
+            raise QueryError(REPOSITORY_ERROR, f"Not a Git repository: {repo_path}")
+        self.repo_path: str = repo_path
+        self.lock: threading.Lock = threading.Lock()
+        self.generation: int = 0  # bumped whenever the state changes
+        self.commit_cache: Optional['CommitCache'] = commit_cache
+        self._watcher: RefWatcher = RefWatcher(repo_path)
+        self._load_refs()
+
+    def _load_refs(self) -> None:
+        # Forget everything derived from the old refs; commits are re-read on demand
+        self._loader: CommitLoader = CommitLoader(self.repo_path, cache=self.commit_cache)
+        self._tips: List[str] = self._loader.get_ref_tips()
+        self._branches: Dict[str, List[str]] = self._loader.get_branches()
+        self._commits: Optional[List[Commit]] = None
+        self._by_sha: Dict[str, Commit] = {}
+        self._sha_index: Optional[ShaIndex] = None
+        self._stats: Optional[CommitStats] = None
+        self.generation += 1
+
+    def _history_dropped(self, new_tips: List[str]) -> bool:
+        # True if some commit reachable from the old tips is no longer reachable from the new ones
+        current: Set[str] = set(new_tips)
+        gone: List[str] = [tip for tip in self._tips if tip not in current]
+        if not gone:
+            return False
+        cmd: List[str] = ['git', '-C', self.repo_path, 'rev-list', '--count', '--ignore-missing', '--stdin']
+        result: subprocess.CompletedProcess = governor.run(
+            cmd, input=''.join(f"{tip}\n" for tip in gone) + ''.join(f"^{tip}\n" for tip in new_tips),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        return result.returncode != 0 or int(result.stdout.strip() or 0) > 0
+
+    def refresh(self) -> bool:
+        """
+        Bring the state up to date with the repository's refs.
+
+        :return: True if anything changed since the previous refresh
+        """
+        if not self._watcher.poll():
+            return False
+        with profiler.span('daemon.refresh'):
+            new_tips: List[str] = self._loader.get_ref_tips()
+            if self._commits is None or self._history_dropped(new_tips):
+                self._load_refs()
+                return True
+            # A load racing with a ref update can return commits that are already known
+            new_commits: List[Commit] = [c for c in self._loader.load_commits_since(self._tips)
+                                         if c.sha not in self._by_sha]
+            self._tips = new_tips
+            self._branches = self._loader.get_branches()
+            if new_commits:
+                self._commits = new_commits + self._commits
+                self._by_sha.update((c.sha, c) for c in new_commits)
+                self._sha_index.add(c.sha for c in new_commits)
+                self._stats = None
+            self.generation += 1
+        profiler.count('daemon.new_commits', len(new_commits))
+        return True
+
+    @property
+    def branches(self) -> Dict[str, List[str]]:
+        """
+        Current mapping SHA -> branch names.
+        """
+        return self._branches
+
+    @property
+    def commits(self) -> List[Commit]:
+        """
+        All commits reachable from the refs, newest first; loaded on first access.
+        """
+        self._ensure_commits()
+        return self._commits
+
+    def _ensure_commits(self) -> None:
+        if self._commits is None:
+            self._commits = self._loader.load_commits()
+            self._by_sha = {c.sha: c for c in self._commits}
+            self._sha_index = ShaIndex(self._by_sha)
+
+    def find_commit(self, prefix: str) -> Commit:
+        """
+        Look up a commit by full SHA or unique prefix.
+
+        :raises QueryError: If the prefix is too short, unknown or ambiguous
+        """
+        prefix = prefix.lower()
+        self._ensure_commits()
+        commit: Optional[Commit] = self._by_sha.get(prefix)
+        if commit is not None:
+            return commit
+        if len(prefix) < MIN_PREFIX:
+            raise QueryError(INVALID_PARAMS, f"SHA prefix must be at least {MIN_PREFIX} characters")
+        matches: List[str] = self._sha_index.lookup(prefix, limit=2)
+        if not matches:
+            raise QueryError(NOT_FOUND, f"No commit {prefix}")
+        if len(matches) > 1:
+            raise QueryError(INVALID_PARAMS, f"Ambiguous SHA prefix {prefix}")
+        return self._by_sha[matches[0]]
+
+    def commit_dict(self, commit: Commit) -> Dict[str, Any]:
+        """
+        Convert a commit for output, with branch annotations from the current refs.
+        """
+        return dict(commit_to_dict(commit), branches=self._branches.get(commit.sha, []))
+
+    def stats(self) -> CommitStats:
+        """
+        Statistics over all commits, kept until the commits change.
+        """
+        if self._stats is None:
+            stats: CommitStats = CommitStats(load_mailmap(self.repo_path))
+            for commit in self.commits:
+                stats.add(commit)
+            self._stats = stats
+        return self._stats
+
+
+def _int_param(params: Dict[str, Any], name: str, default: int, maximum: Optional[int] = None) -> int:
+    value: Any = params.get(name, default)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise QueryError(INVALID_PARAMS, f"{name} must be a non-negative integer")
+    return min(value, maximum) if maximum is not None else value
+
+
+def execute(state: RepoState, method: str, params: Dict[str, Any]) -> Any:
+    """
+    Answer one repository query from a RepoState.
+
+    Methods:
+        repository  paths and load state of the repository
+        branches    [{"branch", "sha"}] like --list-branches --json
+        commit      one commit by "sha" (full or a unique prefix)
+        commits     {"total", "offset", "commits"}: a page of the commits matching the optional
+                    "author", "grep" (message substring) and "branch" filters, paged by
+                    "offset" and "limit"
+        stats       the --stats JSON document
+
+    :param state: Repository state, already refreshed; the caller holds its lock
+    :param method: Method name
+    :param params: Method parameters
+    :return: JSON-serializable result
+    :raises QueryError: On unknown methods and invalid parameters
+    """
+    if method == 'repository':
+        repo_dir: RepoDir = state.repo_dir
+        return {
+            'path': state.repo_path,
+            'git_dir': repo_dir.absolute_git_dir,
+            'toplevel': repo_dir.toplevel_dir,
+            'bare': not repo_dir.is_inside_working_tree(),
+            'generation': state.generation,
+        }
+    if method == 'branches':
+        return [{'branch': name, 'sha': sha} for sha, names in state.branches.items() for name in names]
+    if method == 'commit':
+        sha: Any = params.get('sha')
+        if not isinstance(sha, str) or not sha:
+            raise QueryError(INVALID_PARAMS, "commit requires a 'sha' string")
+        return state.commit_dict(state.find_commit(sha))
+    if method == 'commits':
+        offset: int = _int_param(params, 'offset', 0)
+        limit: int = _int_param(params, 'limit', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        author: str = str(params.get('author') or '').lower()
+        grep: str = str(params.get('grep') or '').lower()
+        branch: Optional[str] = params.get('branch')
+        matches: List[Commit] = state.commits
+        if author:
+            matches = [c for c in matches if author in c.author.lower()]
+        if grep:
+            matches = [c for c in matches if grep in c.message.lower()]
+        if branch:
+            matches = [c for c in matches if branch in state.branches.get(c.sha, ())]
+        return {'total': len(matches), 'offset': offset,
+                'commits': [state.commit_dict(c) for c in matches[offset:offset + limit]]}
+    if method == 'stats':
+        return state.stats().to_dict()
+    raise QueryError(METHOD_NOT_FOUND, f"Unknown method: {method}")
+
+
+def query_direct(repo_path: str, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Answer a query by loading the repository in this process, without a daemon.
+    """
+    return execute(RepoState(repo_path), method, params or {})
+
+
+class QueryDaemon:
+    """
+    Serves execute() queries for any number of repositories over a Unix domain socket.
+
+    The protocol is JSON-RPC 2.0, one request or response object per line. Every query names
+    its repository in params["repo"]; a RepoState is created on first use and refreshed before
+    each query. Connections are served by threads; queries on one repository are serialized.
+    Besides the execute() methods, "ping" reports the loaded repositories and "shutdown"
+    stops the daemon. With a shared commit cache, forks and mirrors served by the daemon
+    read each commit they have in common once.
+    """
+
+    __slots__ = ("socket_path", "commit_cache", "_states", "_states_lock", "_server")
+
+    def __init__(self, socket_path: Optional[str] = None, commit_cache: Optional['CommitCache'] = None) -> None:
+        """
+        :param socket_path: Socket to listen on (default: default_socket_path())
+        :param commit_cache: Shared cache the repositories load commits through (default: none)
+        """
+        self.socket_path: str = socket_path or default_socket_path()
+        self.commit_cache: Optional['CommitCache'] = commit_cache
+        self._states: Dict[str, RepoState] = {}
+        self._states_lock: threading.Lock = threading.Lock()
+        self._server: Optional[socketserver.UnixStreamServer] = None
+
+    def state_for(self, repo_path: str) -> RepoState:
+        """
+        Return the warm state of a repository, loading it on first use.
+        """
+        key: str = os.path.realpath(repo_path)
+        with self._states_lock:
+            state: Optional[RepoState] = self._states.get(key)
+            if state is None:
+                state = self._states[key] = RepoState(key, self.commit_cache)
+        return state
+
+    def handle(self, request: Any) -> Optional[Dict[str, Any]]:
+        """
+        Answer one decoded JSON-RPC request.
+
+        :return: Response object, or None for notifications (requests without an id)
+        """
+        request_id: Any = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+                raise QueryError(INVALID_REQUEST, "Invalid request")
+            params: Any = request.get('params') or {}
+            if not isinstance(params, dict):
+                raise QueryError(INVALID_PARAMS, "params must be an object")
+            method: str = request['method']
+            if method == 'ping':
+                result: Any = {'pid': os.getpid(), 'repositories': sorted(self._states)}
+            elif method == 'shutdown':
+                threading.Thread(target=self.shutdown, daemon=True).start()
+                result = True
+            else:
+                repo: Any = params.get('repo')
+                if not isinstance(repo, str):
+                    raise QueryError(INVALID_PARAMS, "params.repo must be a repository path")
+                state: RepoState = self.state_for(repo)
+                with state.lock:
+                    with profiler.span('daemon.query', method=method):
+                        state.refresh()
+                        result = execute(state, method, params)
+        except QueryError as e:
+            response: Dict[str, Any] = {'jsonrpc': '2.0', 'id': request_id,
+                                        'error': {'code': e.code, 'message': str(e)}}
+        except (subprocess.CalledProcessError, OSError) as e:
+            response = {'jsonrpc': '2.0', 'id': request_id,
+                        'error': {'code': REPOSITORY_ERROR, 'message': str(e)}}
+        else:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        if isinstance(request, dict) and 'id' not in request:
+            return None
+        return response
+
+    def handle_line(self, line: bytes) -> Optional[bytes]:
+        """
+        Answer one request line with one response line (None for notifications).
+        """
+        try:
+            request: Any = json.loads(line)
+        except ValueError:
+            response: Optional[Dict[str, Any]] = {'jsonrpc': '2.0', 'id': None,
+                                                  'error': {'code': PARSE_ERROR, 'message': "Parse error"}}
+        else:
+            response = self.handle(request)
+        if response is None:
+            return None
+        return json.dumps(response).encode('utf-8') + b'\n'
+
+    def _bind(self) -> socketserver.UnixStreamServer:
+        if not unix_sockets_supported():
+            raise RuntimeError("Unix domain sockets are not supported on this platform")
+        if os.path.exists(self.socket_path):
+            try:
+                query('ping', socket_path=self.socket_path, timeout=1.0)
+            except DaemonUnavailable:
+                os.unlink(self.socket_path)  # left behind by a daemon that did not exit cleanly
+            else:
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+        daemon: QueryDaemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    response: Optional[bytes] = daemon.handle_line(line)
+                    if response is not None:
+                        self.wfile.write(response)
+                        self.wfile.flush()
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        old_umask: int = os.umask(0o177)  # owner-only socket
+        try:
+            return Server(self.socket_path, Handler)
+        finally:
+            os.umask(old_umask)
+
+    def serve_forever(self) -> None:
+        """
+        Listen on the socket until shutdown() is called; the socket file is removed on exit.
+
+        :raises RuntimeError: If Unix sockets are unsupported or another daemon is listening
+        """
+        self._server = self._bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def shutdown(self) -> None:
+        """
+        Stop serve_forever() from another thread.
+        """
+        server: Optional[socketserver.UnixStreamServer] = self._server
+        if server is not None:
+            server.shutdown()
+
+
+def query(method: str, params: Optional[Dict[str, Any]] = None, socket_path: Optional[str] = None,
+          timeout: float = 60.0) -> Any:
+    """
+    Send one query to a running daemon.
+
+    :param method: Method name
+    :param params: Method parameters, including "repo" for repository queries
+    :param socket_path: Daemon socket (default: default_socket_path())
+    :param timeout: Seconds to wait for the connection and the answer
+    :return: The result of the query
+    :raises DaemonUnavailable: If no daemon is listening
+    :raises QueryError: If the daemon answered with an error
+    """
+    if not unix_sockets_supported():
+        raise DaemonUnavailable("Unix domain sockets are not supported on this platform")
+    path: str = socket_path or default_socket_path()
+    sock: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise DaemonUnavailable(f"No daemon listening on {path}") from e
+        request: Dict[str, Any] = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params or {}}
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as stream:
+            line: bytes = stream.readline()
+    finally:
+        sock.close()
+    if not line:
+        raise DaemonUnavailable(f"Daemon on {path} closed the connection")
+    response: Dict[str, Any] = json.loads(line)
+    if 'error' in response:
+        raise QueryError(response['error']['code'], response['error']['message'])
+    return response['result']
+
+
+def query_or_load(repo_path: str, method: str, params: Optional[Dict[str, Any]] = None,
+                  socket_path: Optional[str] = None) -> Tuple[Any, bool]:
+    """
+    Ask the daemon, and answer the query in-process if none is running.
+
+    :param repo_path: Path to the Git repository
+    :param method: Repository method understood by execute()
+    :param params: Method parameters (without "repo")
+    :param socket_path: Daemon socket (default: default_socket_path())
+    :return: Tuple (result, True if a daemon answered)
+    :raises QueryError: If the query itself failed
+    """
+    params = dict(params or {})
+    try:
+        return query(method, dict(params, repo=os.path.abspath(repo_path)), socket_path), True
+    except DaemonUnavailable:
+        return query_direct(repo_path, method, params), False
@@ -0,0 +1,120 @@
+# File: deadline.py
+# Deadline: time budgets for loads that return partial results, with resume cursors
+
+import subprocess
+import threading
+import time
+from typing import Any, List, NamedTuple, Optional
+
+
+class DeadlineExceeded(RuntimeError):
+    """
+    A step ran out of time (listing the refs, listing the commit SHAs). Its git process has
+    been stopped; `partial` holds what it read before, if the step can return part of its result.
+    """
+
+    def __init__(self, message: str, partial: Any = None) -> None:
+        super().__init__(message)
+        self.partial: Any = partial
+
+
+class PartialLoad(NamedTuple):
+    """
+    Result of a load with a deadline.
+
+    items: What was loaded: commits in rev-list order, or the branch map
+    complete: Whether everything was loaded before the deadline
+    cursor: Where a later load can continue (load_commits_until(..., cursor=...)); None when complete
+    """
+    items: Any
+    complete: bool
+    cursor: Optional[str] = None
+
+
+class Deadline:
+    """
+    A point in time after which a load stops and returns what it has.
+
+    The loaders check expired() between objects; a git process that blocks past the
+    deadline is killed by watch(), so a load never outlives its budget by more than the
+    time to tear the process down.
+    """
+
+    __slots__ = ("expires",)
+
+    def __init__(self, timeout: float) -> None:
+        """
+        :param timeout: Seconds from now
+        """
+        self.expires: float = time.monotonic() + timeout
+
+    @classmethod
+    def at(cls, expires: float) -> 'Deadline':
+        """
+        Return a deadline at a time.monotonic() value.
+        """
+        deadline: Deadline = cls(0.0)
+        deadline.expires = expires
+        return deadline
+
+    def remaining(self) -> float:
+        """
+        Seconds left, never negative.
+        """
+        return max(self.expires - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires
+
+    def watch(self, proc: subprocess.Popen) -> threading.Timer:
+        """
+        Kill a git process when the deadline passes; cancel() the returned timer once the
+        process is done.
+        """
+        timer: threading.Timer = threading.Timer(self.remaining(), _kill, (proc,))
+        timer.daemon = True
+        timer.start()
+        return timer
+
+
+def _kill(proc: subprocess.Popen) -> None:
+    if proc.poll() is None:
+        try:
+            proc.kill()
+        except OSError:
+            pass  # exited meanwhile
+
+
+def make_cursor(shas: List[str], end: int) -> str:
+    """
+    Return the cursor of a load that stopped after shas[:end].
+    """
+    return f"{end}:{shas[end - 1] if end else ''}"
+
+
+def resume_index(shas: List[str], cursor: Optional[str]) -> int:
+    """
+    Return the position in `shas` where a load resumed with `cursor` starts.
+
+    The cursor names the last commit loaded and its position. When the refs have moved
+    since, the commit is looked up again; if it is no longer listed, the load starts over.
+
+    :param shas: Commit SHAs in rev-list order
+    :param cursor: Cursor from an earlier PartialLoad, or None to start at the beginning
+    :return: Index of the first commit to load
+    :raises ValueError: If the cursor is malformed
+    """
+    if not cursor:
+        return 0
+    count_text, _, sha = cursor.partition(':')
+    count: int = int(count_text)
+    if count < 0:
+        raise ValueError(f"invalid cursor: {cursor}")
+    if not sha:
+        return 0
+    if 0 < count <= len(shas) and shas[count - 1] == sha:
+        return count
+    try:
+        return shas.index(sha) + 1
+    except ValueError:
+        return 0
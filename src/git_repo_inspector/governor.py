@@ -0,0 +1,352 @@
+# File: governor.py
+# Governor: caps on git processes, worker threads, read bandwidth and in-flight bytes, child priorities and load backoff
+
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .profiling import profiler
+
+LOAD_CHECK_INTERVAL: float = 1.0   # seconds a load average reading is reused; also the slot re-check period
+BURST_SECONDS: float = 0.25        # reads may run ahead of read_rate by this much
+MIN_SLEEP: float = 0.01            # throttling sleeps once the debt reaches this, not after every read
+INITIAL_OBJECT_ESTIMATE: int = 1024  # bytes per object assumed before a request window has seen any
+BACKGROUND_NICE: int = 10          # niceness of child processes with --background
+
+# ioprio_set(2) system call numbers; I/O priorities are only lowered where the number is known
+_IOPRIO_SET: Dict[str, int] = {'x86_64': 251, 'aarch64': 30, 'i686': 289, 'i386': 289, 'armv7l': 314}
+_IOPRIO_WHO_PROCESS: int = 1
+_IOPRIO_CLASS_IDLE: int = 3
+
+
+class GovernedPopen(subprocess.Popen):
+    """
+    A git process holding one of the governor's process slots; the slot is freed once
+    the process has been reaped.
+    """
+
+    def __init__(self, governor: 'Governor', holder: int, *args: Any, **kwargs: Any) -> None:
+        self._governor: Optional['Governor'] = None
+        super().__init__(*args, **kwargs)
+        self._governor = governor
+        self._holder: int = holder
+
+    def _release(self) -> None:
+        governor: Optional['Governor'] = self._governor
+        if governor is not None and self.returncode is not None:
+            self._governor = None
+            governor.release_slot(self._holder)
+
+    def poll(self) -> Optional[int]:
+        returncode: Optional[int] = super().poll()
+        self._release()
+        return returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        try:
+            return super().wait(timeout)
+        finally:
+            self._release()
+
+    def __del__(self, *args: Any, **kwargs: Any) -> None:
+        governor: Optional['Governor'] = getattr(self, '_governor', None)
+        if governor is not None:
+            self._governor = None
+            governor.release_slot(self._holder)  # never reaped by its owner; do not leak the slot
+        super().__del__(*args, **kwargs)
+
+
+class RequestWindow:
+    """
+    Bounds the bytes a pipelined git process (cat-file --batch) may produce ahead of the reader.
+
+    The writer calls request() before each object it asks for and the reader calls received()
+    with the size of each object read. Object sizes are not known in advance, so the
+    outstanding bytes are estimated from the mean size received so far.
+    """
+
+    __slots__ = ("limit", "_cond", "_outstanding", "_mean", "_closed")
+
+    def __init__(self, limit: int) -> None:
+        """
+        :param limit: Estimated bytes allowed in flight; one request is always allowed
+        """
+        self.limit: int = limit
+        self._cond: threading.Condition = threading.Condition()
+        self._outstanding: int = 0
+        self._mean: float = float(INITIAL_OBJECT_ESTIMATE)
+        self._closed: bool = False
+
+    def request(self) -> bool:
+        """
+        Wait until another object may be requested.
+
+        :return: False if the window was closed and the writer should stop
+        """
+        with self._cond:
+            while not self._closed and self._outstanding and (self._outstanding + 1) * self._mean > self.limit:
+                self._cond.wait()
+            self._outstanding += 1
+            return not self._closed
+
+    def received(self, nbytes: int) -> None:
+        """
+        Record that one requested object of `nbytes` bytes was read.
+        """
+        with self._cond:
+            self._outstanding = max(self._outstanding - 1, 0)
+            self._mean += (nbytes - self._mean) / 16
+            self._cond.notify()
+
+    def close(self) -> None:
+        """
+        Release a writer waiting in request(); it stops writing.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class Governor:
+    """
+    Keeps inspection jobs from starving the other workloads of a busy host.
+
+    The loaders spawn git through popen()/run() and size their worker pools with workers(),
+    so one configured governor limits:
+
+    - concurrent git processes (a thread that already holds a process slot, e.g. for the
+      first half of a rev-list | cat-file pipeline, does not wait for a second one);
+    - worker threads and processes of parallel loads;
+    - the rate at which object data is read from git and the bytes requested ahead of the
+      reader;
+    - the CPU (nice) and I/O (idle class, Linux) priority of the git processes;
+    - concurrency under load: while the 1-minute load average exceeds max_load, the process
+      and worker limits shrink by the excess, down to one, so work slows down instead of
+      stopping.
+
+    An unconfigured governor spawns processes directly and never waits.
+    """
+
+    __slots__ = ("max_processes", "max_workers", "read_rate", "max_in_flight", "nice", "idle_io", "max_load",
+                 "active", "_cond", "_running", "_holders", "_rate_lock", "_tokens", "_refilled", "_load",
+                 "_load_time")
+
+    def __init__(self) -> None:
+        self._cond: threading.Condition = threading.Condition()
+        self._rate_lock: threading.Lock = threading.Lock()
+        self._running: int = 0
+        self._holders: Dict[int, int] = {}  # thread id -> process slots held
+        self.configure()
+
+    def configure(self, max_processes: Optional[int] = None, max_workers: Optional[int] = None,
+                  read_rate: Optional[float] = None, max_in_flight: Optional[int] = None,
+                  nice: Optional[int] = None, idle_io: bool = False, max_load: Optional[float] = None) -> None:
+        """
+        Set the limits; None leaves a resource unlimited.
+
+        :param max_processes: Concurrent git processes
+        :param max_workers: Worker threads or processes of a parallel load
+        :param read_rate: Bytes per second read from git
+        :param max_in_flight: Bytes requested from a git process but not yet read
+        :param nice: Niceness added to each git process
+        :param idle_io: Put git processes in the idle I/O scheduling class (Linux)
+        :param max_load: 1-minute load average above which concurrency is reduced
+        """
+        self.max_processes: Optional[int] = max(max_processes, 1) if max_processes is not None else None
+        self.max_workers: Optional[int] = max(max_workers, 1) if max_workers is not None else None
+        self.read_rate: Optional[float] = read_rate if read_rate and read_rate > 0 else None
+        self.max_in_flight: Optional[int] = max(max_in_flight, 1) if max_in_flight is not None else None
+        self.nice: Optional[int] = nice if nice else None
+        self.idle_io: bool = idle_io
+        self.max_load: Optional[float] = max_load if max_load and max_load > 0 else None
+        self.active: bool = any(value is not None for value in (
+            self.max_processes, self.max_workers, self.read_rate, self.max_in_flight, self.nice, self.max_load
+        )) or idle_io
+        self._tokens: float = self.read_rate * BURST_SECONDS if self.read_rate else 0.0
+        self._refilled: float = time.monotonic()
+        self._load: float = 0.0
+        self._load_time: float = -math.inf
+
+    def settings(self, share: int = 1) -> Dict[str, Any]:
+        """
+        Return configure() arguments for one of `share` worker processes, which split the
+        process and bandwidth budgets between them.
+        """
+        share = max(share, 1)
+        return {
+            'max_processes': max(self.max_processes // share, 1) if self.max_processes else None,
+            'max_workers': 1 if self.max_workers else None,
+            'read_rate': self.read_rate / share if self.read_rate else None,
+            'max_in_flight': max(self.max_in_flight // share, 1) if self.max_in_flight else None,
+            'nice': self.nice, 'idle_io': self.idle_io, 'max_load': self.max_load,
+        }
+
+    def load_average(self) -> float:
+        """
+        Return the 1-minute load average (0.0 where the platform has none), re-read at most
+        every LOAD_CHECK_INTERVAL seconds.
+        """
+        now: float = time.monotonic()
+        if now - self._load_time >= LOAD_CHECK_INTERVAL:
+            try:
+                self._load = os.getloadavg()[0]
+            except (AttributeError, OSError):
+                self._load = 0.0
+            self._load_time = now
+        return self._load
+
+    def _limit(self, configured: Optional[int]) -> Optional[int]:
+        # Shrink a limit by the load above max_load, never below one
+        if self.max_load is None:
+            return configured
+        excess: int = math.ceil(self.load_average() - self.max_load)
+        if excess <= 0:
+            return configured
+        reduced: int = max((configured or os.cpu_count() or 1) - excess, 1)
+        return min(reduced, configured) if configured else reduced
+
+    def workers(self, requested: int) -> int:
+        """
+        Return how many workers a parallel load of `requested` workers may use now.
+        """
+        allowed: int = max(requested, 1)
+        for limit in (self.max_workers, self.max_processes, self._limit(self.max_workers or requested)):
+            if limit is not None:
+                allowed = min(allowed, limit)
+        if allowed < requested:
+            profiler.count('governor.workers_withheld', requested - allowed)
+        return allowed
+
+    def acquire_slot(self) -> int:
+        """
+        Wait for a process slot and take it.
+
+        :return: Holder to pass to release_slot(): the calling thread
+        """
+        thread: int = threading.get_ident()
+        with self._cond:
+            if not self._holders.get(thread):
+                started: float = time.perf_counter()
+                waited: bool = False
+                while True:
+                    limit: Optional[int] = self._limit(self.max_processes)
+                    if limit is None or self._running < limit:
+                        break
+                    waited = True
+                    self._cond.wait(LOAD_CHECK_INTERVAL)  # the load-derived limit may rise meanwhile
+                if waited:
+                    profiler.add_time('governor.process_wait', time.perf_counter() - started)
+            self._running += 1
+            self._holders[thread] = self._holders.get(thread, 0) + 1
+        return thread
+
+    def release_slot(self, holder: int) -> None:
+        """
+        Give back a process slot taken by acquire_slot(), from any thread.
+        """
+        with self._cond:
+            self._running = max(self._running - 1, 0)
+            held: int = self._holders.get(holder, 0) - 1
+            if held > 0:
+                self._holders[holder] = held
+            else:
+                self._holders.pop(holder, None)
+            self._cond.notify()
+
+    def popen(self, cmd: Any, **kwargs: Any) -> subprocess.Popen:
+        """
+        Start a git process within the limits; same arguments as subprocess.Popen.
+        """
+        if not self.active:
+            return subprocess.Popen(cmd, **kwargs)
+        holder: int = self.acquire_slot()
+        try:
+            proc: GovernedPopen = GovernedPopen(self, holder, cmd, **kwargs)
+        except BaseException:
+            self.release_slot(holder)
+            raise
+        self._lower_priority(proc.pid)
+        return proc
+
+    def run(self, cmd: Any, **kwargs: Any) -> subprocess.CompletedProcess:
+        """
+        Run a git process to completion within the limits; same arguments as subprocess.run.
+        """
+        if not self.active:
+            return subprocess.run(cmd, **kwargs)
+        input: Any = kwargs.pop('input', None)
+        check: bool = kwargs.pop('check', False)
+        timeout: Optional[float] = kwargs.pop('timeout', None)
+        if kwargs.pop('capture_output', False):
+            kwargs['stdout'] = kwargs['stderr'] = subprocess.PIPE
+        if input is not None:
+            kwargs['stdin'] = subprocess.PIPE
+        with self.popen(cmd, **kwargs) as proc:
+            try:
+                stdout, stderr = proc.communicate(input, timeout)
+            except BaseException:
+                proc.kill()
+                raise
+        self.throttle(len(stdout or b''))
+        if check and proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, proc.args, output=stdout, stderr=stderr)
+        return subprocess.CompletedProcess(proc.args, proc.returncode, stdout, stderr)
+
+    def _lower_priority(self, pid: int) -> None:
+        # Set right after the process starts; git has barely begun by then
+        try:
+            if self.nice is not None:
+                os.setpriority(os.PRIO_PROCESS, pid, min(os.getpriority(os.PRIO_PROCESS, pid) + self.nice, 19))
+            if self.idle_io:
+                machine: str = os.uname().machine if hasattr(os, 'uname') else ''
+                number: Optional[int] = _IOPRIO_SET.get(machine)
+                if number is not None and sys.platform.startswith('linux'):
+                    import ctypes  # only needed here
+
+                    libc = ctypes.CDLL(None, use_errno=True)
+                    libc.syscall(number, _IOPRIO_WHO_PROCESS, pid, _IOPRIO_CLASS_IDLE << 13)
+        except (AttributeError, OSError):
+            profiler.count('governor.priority_errors')  # the process may already have exited
+
+    def throttle(self, nbytes: int) -> None:
+        """
+        Account for `nbytes` read from git, sleeping as needed to stay within read_rate.
+        """
+        rate: Optional[float] = self.read_rate
+        if rate is None:
+            return
+        with self._rate_lock:
+            now: float = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._refilled) * rate, rate * BURST_SECONDS) - nbytes
+            self._refilled = now
+            delay: float = -self._tokens / rate if self._tokens < 0 else 0.0
+        if delay >= MIN_SLEEP:
+            time.sleep(delay)
+            profiler.add_time('governor.throttled', delay)
+
+    def window(self) -> Optional[RequestWindow]:
+        """
+        Return a request window bounded by max_in_flight, or None if unbounded.
+        """
+        return RequestWindow(self.max_in_flight) if self.max_in_flight is not None else None
+
+    def read_size(self, size: int) -> int:
+        """
+        Return the chunk size for streaming reads: `size`, capped by max_in_flight.
+        """
+        return min(size, self.max_in_flight) if self.max_in_flight is not None else size
+
+
+def configure(settings: Dict[str, Any]) -> None:
+    """
+    Configure the global governor; used as the initializer of worker processes.
+    """
+    governor.configure(**settings)
+
+
+# Global governor shared by all modules; unconfigured by default
+governor: Governor = Governor()
@@ -0,0 +1,153 @@
+# File: large_objects.py
+# Find the largest blobs in a repository with a bounded heap and attribute them to a path and commit
+
+import heapq
+import json
+import subprocess
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .governor import governor
+from .object_reader import BatchObjectReader
+from .profiling import profiler
+from .tree_diff import TreeDiffer
+
+
+class LargeObject(NamedTuple):
+    sha: str
+    size: int                      # uncompressed size in bytes
+    disk_size: int                 # bytes taken in the object store (compressed, possibly a delta)
+    path: Optional[str] = None     # path the blob was introduced at; None if unreachable
+    commit: Optional[str] = None   # oldest commit that introduced the blob at that path
+
+
+def find_largest_blobs(repo_path: str, count: int) -> List[LargeObject]:
+    """
+    Return the `count` largest blobs in the object store, largest first.
+
+    All objects (loose and packed, reachable or not) are streamed from a single
+    `git cat-file --batch-check --batch-all-objects` process into a heap that never holds
+    more than `count` entries, so memory does not grow with the repository.
+
+    :param repo_path: Path to the Git repository
+    :param count: Number of blobs to report
+    :return: List of LargeObject tuples without attribution
+    """
+    if count <= 0:
+        return []
+    cmd: List[str] = ['git', '-C', repo_path, 'cat-file', '--batch-all-objects', '--unordered',
+                      '--batch-check=%(objecttype) %(objectsize) %(objectsize:disk) %(objectname)']
+    heap: List[Tuple[int, str, int]] = []
+    scanned: int = 0
+    with profiler.span('large_objects.scan'):
+        proc: subprocess.Popen = governor.popen(cmd, stdout=subprocess.PIPE)
+        for line in proc.stdout:
+            scanned += 1
+            if not line.startswith(b'blob '):
+                continue
+            _, size_str, disk_str, sha = line.split()
+            size: int = int(size_str)
+            if len(heap) < count:
+                heapq.heappush(heap, (size, sha.decode('ascii'), int(disk_str)))
+            elif size > heap[0][0]:
+                heapq.heapreplace(heap, (size, sha.decode('ascii'), int(disk_str)))
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+    profiler.count('large_objects.objects', scanned)
+    return [LargeObject(sha, size, disk_size) for size, sha, disk_size in sorted(heap, reverse=True)]
+
+
+def _read_commit_header(reader: BatchObjectReader, sha: str) -> Tuple[str, Optional[str]]:
+    # Returns (tree SHA, first parent SHA or None) from the commit's header lines
+    _, data = reader.read(sha)
+    tree: str = data[5:45].decode('ascii')
+    parent_pos: int = data.find(b'\nparent ')
+    header_end: int = data.find(b'\n\n')
+    if parent_pos == -1 or (header_end != -1 and parent_pos > header_end):
+        return tree, None
+    return tree, data[parent_pos + 8:parent_pos + 48].decode('ascii')
+
+
+def attribute_blobs(repo_path: str, objects: List[LargeObject]) -> List[LargeObject]:
+    """
+    Fill in the path and introducing commit of each blob.
+
+    History is walked oldest first (parents before children), diffing each commit against
+    its first parent with a TreeDiffer, and stops as soon as every blob has been seen.
+    Only the trees along changed paths are read, and only the given blobs are tracked.
+
+    :param repo_path: Path to the Git repository
+    :param objects: Blobs from find_largest_blobs()
+    :return: The same blobs, with path and commit set where they are reachable
+    """
+    pending: Set[str] = {obj.sha for obj in objects}
+    found: Dict[str, Tuple[str, str]] = {}  # blob SHA -> (path, commit)
+    if not pending:
+        return objects
+    cmd: List[str] = ['git', '-C', repo_path, 'rev-list', '--all', '--reverse', '--topo-order']
+    walked: int = 0
+    with profiler.span('large_objects.attribute', blobs=len(pending)):
+        with BatchObjectReader(repo_path) as reader:
+            differ: TreeDiffer = TreeDiffer(reader)
+            trees: Dict[str, str] = {}  # small window of recent commit -> tree, for parent lookups
+            proc: subprocess.Popen = governor.popen(cmd, stdout=subprocess.PIPE, text=True)
+            try:
+                for line in proc.stdout:
+                    commit: str = line.strip()
+                    walked += 1
+                    tree, parent = _read_commit_header(reader, commit)
+                    parent_tree: Optional[str] = None
+                    if parent is not None:
+                        parent_tree = trees.get(parent) or _read_commit_header(reader, parent)[0]
+                    if len(trees) >= 1024:
+                        trees.clear()
+                    trees[commit] = tree
+                    for change in differ.diff_trees(parent_tree, tree):
+                        if change.new_sha in pending:
+                            pending.discard(change.new_sha)
+                            found[change.new_sha] = (change.path, commit)
+                    if not pending:
+                        break
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                proc.stdout.close()
+                proc.wait()
+    profiler.count('large_objects.commits_walked', walked)
+    return [obj._replace(path=found[obj.sha][0], commit=found[obj.sha][1]) if obj.sha in found else obj
+            for obj in objects]
+
+
+def find_largest_objects(repo_path: str, count: int) -> List[LargeObject]:
+    """
+    Return the `count` largest blobs, largest first, attributed to a path and commit.
+    """
+    return attribute_blobs(repo_path, find_largest_blobs(repo_path, count))
+
+
+def format_size(size: int) -> str:
+    """
+    Format a byte count with a binary unit, e.g. "1.5 MiB".
+    """
+    value: float = float(size)
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if value < 1024 or unit == 'GiB':
+            return f"{size} B" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{size} B"
+
+
+def format_large_object(obj: LargeObject) -> str:
+    """
+    Format one blob as a single line for the CLI.
+    """
+    where: str = f"{obj.path} (introduced in {obj.commit[:7]})" if obj.path else "(unreachable)"
+    return f"{format_size(obj.size):>10}  {format_size(obj.disk_size):>10} on disk  {obj.sha}  {where}"
+
+
+def large_objects_to_json(objects: List[LargeObject]) -> str:
+    """
+    Return the blobs as a JSON string.
+    """
+    output: List[Dict[str, Any]] = [obj._asdict() for obj in objects]
+    with profiler.span('json.large_objects', rows=len(output)):
+        return json.dumps(output, indent=2)
@@ -0,0 +1,219 @@
+# File: metrics.py
+# OpenMetrics text output of a run: repository counts, phase timings, bytes read and cache ratios
+
+import os
+import subprocess
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from .profiling import Profiler
+
+PREFIX: str = 'git_repo_inspector'
+# Caches reporting hit/miss counters to the profiler: cache label -> (hits counter, misses counter)
+CACHE_COUNTERS: Dict[str, Tuple[str, str]] = {
+    'output_cache': ('output_cache.hits', 'output_cache.misses'),
+    'commit_cache': ('commit_cache.hits', 'commit_cache.misses'),
+    'tree_diff': ('tree_diff.cache_hits', 'tree_diff.cache_misses'),
+}
+# Profiler counters of bytes read from the stdout of git processes
+GIT_READ_COUNTERS: Tuple[str, ...] = (
+    'backends.cat_file.bytes',
+    'backends.log.bytes',
+    'branch_loader.bytes',
+    'commit_loader.rev_list_bytes',
+    'object_reader.prefix_bytes',
+    'path_index.bytes',
+)
+# Profiler counters of bytes read from the object database directly, without git
+DISK_READ_COUNTERS: Tuple[str, ...] = (
+    'backends.disk.bytes',
+)
+
+
+def escape_label(value: str) -> str:
+    """
+    Escape a label value for the text exposition format.
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value: float) -> str:
+    """
+    Format a sample value; integral values are written without a fractional part.
+    """
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricSet:
+    """
+    Metric families in the OpenMetrics text format, which Prometheus and the node-exporter
+    textfile collector also read.
+
+    Every sample carries the common labels given at construction, so files written for
+    different repositories can be collected side by side.
+    """
+
+    __slots__ = ("labels", "_families")
+
+    def __init__(self, **labels: str) -> None:
+        """
+        :param labels: Labels added to every sample, e.g. repo="/srv/git/app.git"
+        """
+        self.labels: Dict[str, str] = labels
+        self._families: Dict[str, Tuple[str, str, List[Tuple[Dict[str, str], float]]]] = {}
+
+    def add(self, name: str, help_text: str, value: float, kind: str = 'gauge', **labels: str) -> None:
+        """
+        Add one sample.
+
+        :param name: Metric name without the common prefix
+        :param help_text: Description of the family (the first one given is kept)
+        :param value: Sample value
+        :param kind: OpenMetrics type of the family
+        :param labels: Labels of this sample
+        """
+        family = self._families.setdefault(f"{PREFIX}_{name}", (kind, help_text, []))
+        family[2].append((labels, value))
+
+    def render(self) -> str:
+        """
+        Return the exposition text, terminated by "# EOF".
+        """
+        lines: List[str] = []
+        for name, (kind, help_text, samples) in self._families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                merged: Dict[str, str] = dict(self.labels, **labels)
+                label_text: str = ",".join(f'{key}="{escape_label(str(val))}"' for key, val in merged.items())
+                lines.append(f"{name}{{{label_text}}} {format_value(value)}" if label_text
+                             else f"{name} {format_value(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _git(repo_path: str, *args: str) -> str:
+    return subprocess.run(['git', '-C', repo_path, *args], capture_output=True, text=True, check=True).stdout
+
+
+def run_commit_count(profile: Profiler) -> Optional[int]:
+    """
+    Return the number of commits the run listed with `git rev-list --all`, if it did so exactly once.
+
+    :param profile: Profiler that recorded the run
+    :return: Commit count, or None if the run did not list the repository's commits (or listed several)
+    """
+    if profile.timings.get('commit_loader.rev_list', [0])[0] != 1:
+        return None
+    return profile.counters.get('commit_loader.commits')
+
+
+def repository_counts(repo_path: str, commits: Optional[int] = None) -> Dict[str, int]:
+    """
+    Count the commits, branches and objects of a repository.
+
+    Counting the commits walks the whole history; pass the count when the run already knows it.
+
+    :param repo_path: Path to the Git repository
+    :param commits: Number of commits reachable from any ref, or None to count them
+    :return: Dict with commits, branches, loose_objects, loose_bytes, packed_objects, packed_bytes and packs
+    :raises subprocess.CalledProcessError: If a git command fails
+    """
+    if commits is None:
+        commits = int(_git(repo_path, 'rev-list', '--all', '--count').strip() or 0)
+    counts: Dict[str, int] = {
+        'commits': commits,
+        'branches': len(_git(repo_path, 'for-each-ref', '--format=%(refname)', 'refs/heads').splitlines()),
+    }
+    objects: Dict[str, str] = dict(line.split(': ', 1) for line in _git(repo_path, 'count-objects', '-v').splitlines()
+                                   if ': ' in line)
+    counts['loose_objects'] = int(objects.get('count', 0))
+    counts['loose_bytes'] = int(objects.get('size', 0)) * 1024  # count-objects reports KiB
+    counts['packed_objects'] = int(objects.get('in-pack', 0))
+    counts['packed_bytes'] = int(objects.get('size-pack', 0)) * 1024
+    counts['packs'] = int(objects.get('packs', 0))
+    return counts
+
+
+def build_metrics(repo_path: str, command: str, profile: Profiler, duration: float, succeeded: bool,
+                  timestamp: float, counts: Optional[Dict[str, int]] = None) -> MetricSet:
+    """
+    Collect the metrics of one run.
+
+    :param repo_path: Repository the run inspected (the "repo" label)
+    :param command: Command that ran (the "command" label)
+    :param profile: Profiler that recorded the run's phases and counters
+    :param duration: Wall-clock duration of the run in seconds
+    :param succeeded: Whether the command finished without an error
+    :param timestamp: Unix time at the end of the run
+    :param counts: Result of repository_counts(), or None if it could not be collected
+    :return: MetricSet ready to render
+    """
+    metrics: MetricSet = MetricSet(repo=repo_path, command=command)
+    metrics.add('last_run_timestamp_seconds', 'Unix time the run finished', timestamp)
+    metrics.add('run_duration_seconds', 'Wall-clock duration of the run', duration)
+    metrics.add('run_success', '1 if the command finished without an error', int(succeeded))
+
+    if counts is not None:
+        metrics.add('commits', 'Commits reachable from any ref', counts['commits'])
+        metrics.add('branches', 'Local branches', counts['branches'])
+        metrics.add('objects', 'Objects in the object database', counts['loose_objects'], state='loose')
+        metrics.add('objects', 'Objects in the object database', counts['packed_objects'], state='packed')
+        metrics.add('object_bytes', 'Disk space used by objects', counts['loose_bytes'], state='loose')
+        metrics.add('object_bytes', 'Disk space used by objects', counts['packed_bytes'], state='packed')
+        metrics.add('packs', 'Pack files', counts['packs'])
+
+    for phase, (calls, total, longest) in sorted(profile.timings.items()):
+        metrics.add('phase_duration_seconds', 'Total time spent in a loading phase', total, phase=phase)
+        metrics.add('phase_calls', 'Times a loading phase ran', int(calls), phase=phase)
+        metrics.add('phase_max_seconds', 'Longest single run of a loading phase', longest, phase=phase)
+
+    counters: Dict[str, int] = dict(profile.counters)
+    for name in GIT_READ_COUNTERS:
+        if name in counters:
+            metrics.add('git_read_bytes', 'Bytes read from git processes', counters[name], source=name)
+    for name in DISK_READ_COUNTERS:
+        if name in counters:
+            metrics.add('disk_read_bytes', 'Object bytes read from the object database without git',
+                        counters[name], source=name)
+    if 'verify.mismatches' in counters:
+        metrics.add('verify_commits', 'Commits whose object ID was recomputed', counters.get('verify.commits', 0))
+        metrics.add('verify_mismatches', 'Commits whose recomputed object ID differs', counters['verify.mismatches'])
+    for cache, (hits_name, misses_name) in CACHE_COUNTERS.items():
+        hits: int = counters.get(hits_name, 0)
+        misses: int = counters.get(misses_name, 0)
+        if hits + misses:
+            metrics.add('cache_hits', 'Cache lookups answered from the cache', hits, cache=cache)
+            metrics.add('cache_misses', 'Cache lookups that had to load', misses, cache=cache)
+            metrics.add('cache_hit_ratio', 'Share of cache lookups answered from the cache',
+                        hits / (hits + misses), cache=cache)
+    return metrics
+
+
+def write_metrics_file(path: str, text: str) -> None:
+    """
+    Replace a metrics file atomically, so a collector never reads a partial file.
+
+    The text is written to a hidden temporary file in the same directory (which the
+    textfile collector ignores, as it lacks the .prom suffix) and renamed over `path`.
+
+    :param path: Output file, e.g. /var/lib/node_exporter/textfile/git_repo_inspector.prom
+    :param text: Exposition text
+    """
+    directory: str = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # readable by a collector running as another user
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
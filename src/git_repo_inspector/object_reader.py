@@ -0,0 +1,126 @@
+# File: object_reader.py
+# BatchObjectReader: read individual objects on demand through one long-lived git cat-file --batch process
+
+import subprocess
+import threading
+from typing import List, Optional, Tuple
+
+from .governor import governor
+from .profiling import profiler
+
+
+class BatchObjectReader:
+    """
+    Reads Git objects on demand through a single `git cat-file --batch` process.
+
+    The process is started on the first read and kept open, so reading thousands of
+    objects costs one pipe round trip each instead of one subprocess each. Reads are
+    serialized with a lock so the reader can be shared with worker threads.
+    """
+
+    __slots__ = ("repo_path", "_proc", "_lock")
+
+    def __init__(self, repo_path: str) -> None:
+        """
+        Initialize the reader. No process is spawned until the first read.
+
+        :param repo_path: Path to the Git repository
+        """
+        self.repo_path: str = repo_path
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        cmd: List[str] = ['git', '-C', self.repo_path, 'cat-file', '--batch']
+        with profiler.span('object_reader.spawn'):
+            self._proc = governor.popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        return self._proc
+
+    def read(self, sha: str) -> Tuple[str, bytes]:
+        """
+        Read one object.
+
+        :param sha: Object name (full SHA or anything cat-file accepts)
+        :return: Tuple (object type, raw content)
+        :raises KeyError: If the object does not exist
+        :raises RuntimeError: If the cat-file process exited unexpectedly
+        """
+        with self._lock:
+            proc: subprocess.Popen = self._proc if self._proc is not None else self._start()
+            try:
+                proc.stdin.write(sha.encode('ascii') + b'\n')
+                proc.stdin.flush()
+            except (BrokenPipeError, ValueError) as e:
+                self._proc = None
+                raise RuntimeError(f"git cat-file exited while reading {sha}") from e
+            header: bytes = proc.stdout.readline()
+            if not header:
+                self._proc = None
+                raise RuntimeError(f"git cat-file exited while reading {sha}")
+            parts: List[bytes] = header.split()
+            if len(parts) != 3:
+                raise KeyError(sha)  # "<sha> missing" or "<sha> ambiguous"
+            size: int = int(parts[2])
+            data: bytes = proc.stdout.read(size + 1)[:-1]  # drop trailing newline
+        governor.throttle(len(header) + size + 1)
+        profiler.count('object_reader.objects')
+        return parts[1].decode('ascii'), data
+
+    def close(self) -> None:
+        """
+        Stop the cat-file process, if it is running.
+        """
+        with self._lock:
+            proc: Optional[subprocess.Popen] = self._proc
+            self._proc = None
+        if proc is not None:
+            proc.stdin.close()
+            proc.stdout.close()
+            proc.wait()
+
+    def __enter__(self) -> 'BatchObjectReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_object_prefix(repo_path: str, sha: str, limit: int, chunk_size: int = 1 << 16) -> Tuple[str, int, bytes]:
+    """
+    Read at most `limit` bytes of an object without loading the rest.
+
+    A dedicated cat-file process is used and killed once enough has been read, so a
+    multi-gigabyte blob is neither held in memory nor drained through the pipe.
+
+    :param repo_path: Path to the Git repository
+    :param sha: Object name
+    :param limit: Maximum number of content bytes to return
+    :param chunk_size: Read size per pipe read
+    :return: Tuple (object type, full object size, first bytes of the content)
+    :raises KeyError: If the object does not exist
+    """
+    cmd: List[str] = ['git', '-C', repo_path, 'cat-file', '--batch']
+    proc: subprocess.Popen = governor.popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        proc.stdin.write(sha.encode('ascii') + b'\n')
+        proc.stdin.close()
+        parts: List[bytes] = proc.stdout.readline().split()
+        if len(parts) != 3:
+            raise KeyError(sha)
+        size: int = int(parts[2])
+        wanted: int = min(size, limit)
+        chunks: List[bytes] = []
+        received: int = 0
+        while received < wanted:
+            chunk: bytes = proc.stdout.read1(min(chunk_size, wanted - received))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+        profiler.count('object_reader.prefix_bytes', received)
+        return parts[1].decode('ascii'), size, b''.join(chunks)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
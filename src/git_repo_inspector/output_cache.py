@@ -0,0 +1,227 @@
+# File: output_cache.py
+# OutputCache: serve repeated CLI output from disk while a stat fingerprint of the refs is unchanged
+
+import hashlib
+import os
+import time
+from typing import List, Optional, Tuple
+
+from .profiling import profiler
+from .repo_dir import resolve_git_dirs
+
+CACHE_VERSION: int = 1                      # bump when any cached output format changes
+DEFAULT_MAX_BYTES: int = 512 * 1024 * 1024  # total size of the entries kept
+DEFAULT_MAX_AGE: float = 7 * 86400.0        # seconds an entry is kept after its last use
+_SUFFIX: str = '.out'
+
+
+def locate_git_dirs(repo_path: str) -> Optional[Tuple[str, str]]:
+    """
+    Locate the per-worktree and the common Git directory from the file system alone.
+
+    Handles .git directories, .git files of linked worktrees and submodules, and bare
+    repositories.
+
+    :param repo_path: Path to a Git repository, one of its worktrees or a subdirectory
+    :return: Tuple (absolute git dir, absolute common dir), or None if GIT_DIR is set in the
+             environment or no repository layout was recognized
+    """
+    if 'GIT_DIR' in os.environ:
+        return None
+    path: str = os.path.abspath(repo_path)
+    while True:
+        dot_git: str = os.path.join(path, '.git')
+        git_dir: Optional[str] = None
+        if os.path.isdir(dot_git):
+            git_dir = dot_git
+        elif os.path.isfile(dot_git):
+            try:
+                with open(dot_git, 'r', encoding='utf-8') as f:
+                    line: str = f.readline().strip()
+            except OSError:
+                line = ''
+            if line.startswith('gitdir:'):
+                git_dir = os.path.join(path, line[len('gitdir:'):].strip())
+        elif all(os.path.exists(os.path.join(path, name)) for name in ('HEAD', 'objects', 'refs')):
+            git_dir = path  # bare repository
+        if git_dir is not None:
+            git_dir = os.path.normpath(git_dir)
+            try:
+                with open(os.path.join(git_dir, 'commondir'), 'r', encoding='utf-8') as f:
+                    common_dir: str = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+            except OSError:
+                common_dir = git_dir
+            return git_dir, common_dir
+        parent: str = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def find_git_dirs(repo_path: str) -> Tuple[str, str]:
+    """
+    Locate the per-worktree and the common Git directory without spawning git.
+
+    Layouts that locate_git_dirs() does not recognize (GIT_DIR in the environment, unusual
+    layouts) fall back to resolve_git_dirs().
+
+    :param repo_path: Path to a Git repository, one of its worktrees or a subdirectory
+    :return: Tuple (absolute git dir, absolute common dir)
+    :raises subprocess.CalledProcessError: If repo_path is not inside a Git repository
+    """
+    dirs: Optional[Tuple[str, str]] = locate_git_dirs(repo_path)
+    return dirs if dirs is not None else resolve_git_dirs(repo_path)  # let git report any error
+
+
+def _stat_entry(path: str) -> str:
+    try:
+        st: os.stat_result = os.stat(path)
+    except OSError:
+        return '-'
+    return f"{st.st_mtime_ns}:{st.st_size}:{st.st_ino}"
+
+
+def _read_head(path: str) -> str:
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read().strip()
+    except OSError:
+        return '-'
+
+
+def ref_fingerprint(repo_path: str) -> str:
+    """
+    Compute a fingerprint of the ref state from file metadata alone.
+
+    Covers the contents of HEAD (and of the other worktrees' HEADs, which `rev-list --all`
+    includes), the stat data of packed-refs and of every loose ref file. Git replaces
+    loose refs by renaming a lock file, so an update always changes the inode or mtime.
+
+    :param repo_path: Path to the Git repository
+    :return: Hex digest that changes whenever a ref or HEAD changes
+    """
+    with profiler.span('output_cache.fingerprint'):
+        git_dir, common_dir = find_git_dirs(repo_path)
+        parts: List[str] = [os.path.realpath(common_dir), _read_head(os.path.join(git_dir, 'HEAD')),
+                            _stat_entry(os.path.join(common_dir, 'packed-refs'))]
+        worktrees_dir: str = os.path.join(common_dir, 'worktrees')
+        if os.path.isdir(worktrees_dir):
+            for name in sorted(os.listdir(worktrees_dir)):
+                parts.append(f"{name}={_read_head(os.path.join(worktrees_dir, name, 'HEAD'))}")
+        refs_dir: str = os.path.join(common_dir, 'refs')
+        for dirpath, dirnames, filenames in os.walk(refs_dir):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path: str = os.path.join(dirpath, name)
+                parts.append(f"{os.path.relpath(path, refs_dir)}={_stat_entry(path)}")
+        profiler.count('output_cache.fingerprint_entries', len(parts))
+        return hashlib.sha1("\n".join(parts).encode('utf-8', errors='surrogateescape')).hexdigest()
+
+
+class OutputCache:
+    """
+    Stores serialized command output keyed by ref fingerprint and output options.
+
+    Each entry is one file, written atomically. Reading an entry refreshes its mtime, and
+    eviction after every store drops entries unused for longer than max_age, then the
+    least recently used ones until the total size is within max_bytes.
+    """
+
+    __slots__ = ("cache_dir", "max_bytes", "max_age")
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age: float = DEFAULT_MAX_AGE) -> None:
+        """
+        :param cache_dir: Directory holding the entries; created on the first store
+        :param max_bytes: Total size of the entries kept
+        :param max_age: Seconds an entry is kept after its last use
+        """
+        self.cache_dir: str = cache_dir
+        self.max_bytes: int = max_bytes
+        self.max_age: float = max_age
+
+    @classmethod
+    def for_repo(cls, repo_path: str, **limits) -> 'OutputCache':
+        """
+        Return the cache under <common dir>/git-repo-inspector/output-cache.
+        """
+        _, common_dir = find_git_dirs(repo_path)
+        return cls(os.path.join(common_dir, 'git-repo-inspector', 'output-cache'), **limits)
+
+    @staticmethod
+    def key(fingerprint: str, options: str) -> str:
+        """
+        Build the entry key for a fingerprint and a description of the output options.
+        """
+        return hashlib.sha1(f"{CACHE_VERSION}\0{fingerprint}\0{options}".encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + _SUFFIX)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return the cached output for a key, or None if there is no fresh entry.
+        """
+        path: str = self._path(key)
+        try:
+            if time.time() - os.stat(path).st_mtime > self.max_age:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                output: str = f.read()
+            os.utime(path)
+        except OSError:
+            profiler.count('output_cache.misses')
+            return None
+        profiler.count('output_cache.hits')
+        return output
+
+    def put(self, key: str, output: str) -> None:
+        """
+        Store an output and evict old entries. Outputs larger than max_bytes are not stored.
+        """
+        data: bytes = output.encode('utf-8')
+        if len(data) > self.max_bytes:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path: str = self._path(key)
+        tmp_path: str = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then the least recently used ones until within max_bytes.
+
+        :return: Number of entries removed
+        """
+        entries: List[Tuple[float, int, str]] = []  # (mtime, size, path)
+        try:
+            names: List[str] = os.listdir(self.cache_dir)
+        except OSError:
+            return 0
+        for name in names:
+            if not name.endswith(_SUFFIX):
+                continue
+            path: str = os.path.join(self.cache_dir, name)
+            try:
+                st: os.stat_result = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort(reverse=True)  # most recently used first
+        now: float = time.time()
+        total: int = 0
+        removed: int = 0
+        for mtime, size, path in entries:
+            total += size
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                continue
+            try:
+                os.unlink(path)
+                removed += 1
+            except OSError:
+                pass
+            total -= size
+        return removed
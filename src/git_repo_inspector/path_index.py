@@ -0,0 +1,195 @@
+# File: path_index.py
+# PathIndex: persistent, incrementally updated path -> commit postings for fast per-path history
+
+import bisect
+import json
+import os
+import subprocess
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .backends import write_lines
+from .commit_loader import CommitLoader
+from .governor import governor
+from .profiling import profiler
+from .repo_dir import resolve_git_dirs
+
+INDEX_VERSION: int = 1
+
+
+def _split_nul(stream, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    """Yield the non-empty NUL-terminated tokens of a binary stream without reading it whole."""
+    pending: bytes = b''
+    while True:
+        chunk: bytes = stream.read(chunk_size)
+        if not chunk:
+            break
+        profiler.count('path_index.bytes', len(chunk))
+        tokens: List[bytes] = (pending + chunk).split(b'\0')
+        pending = tokens.pop()
+        for token in tokens:
+            if token:
+                yield token
+    if pending:
+        yield pending
+
+
+class PathIndex:
+    """
+    Maps every path to the commits whose tree changed it.
+
+    Each commit is diffed against its parents (merges count a path only when it differs
+    from every parent, like `git log -c`) through one streaming `git diff-tree --stdin`
+    process. Commits are numbered oldest first and postings store those numbers, so the
+    index stays compact and lookups return history newest first. The index is saved under
+    the repository's common dir and updated with only the commits reachable from new tips.
+    """
+
+    __slots__ = ("repo_path", "index_path", "commits", "postings", "tips", "_positions", "_sorted_paths")
+
+    def __init__(self, repo_path: str, index_path: Optional[str] = None) -> None:
+        """
+        Initialize the index and load it from disk if it was saved before.
+
+        :param repo_path: Path to the Git repository
+        :param index_path: Index file (default: <common dir>/git-repo-inspector/path-index.json)
+        """
+        self.repo_path: str = repo_path
+        if index_path is None:
+            _, common_dir = resolve_git_dirs(repo_path)
+            index_path = os.path.join(common_dir, 'git-repo-inspector', 'path-index.json')
+        self.index_path: str = index_path
+        self.commits: List[str] = []             # commit number -> SHA, oldest first
+        self.postings: Dict[str, List[int]] = {}  # path -> ascending commit numbers
+        self.tips: List[str] = []                # ref tips covered by the index
+        self._positions: Optional[Dict[str, int]] = None
+        self._sorted_paths: Optional[List[str]] = None
+        self.load()
+
+    def load(self) -> bool:
+        """
+        Load the saved index, if any. An unreadable or outdated file is ignored.
+
+        :return: True if an index was loaded
+        """
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != INDEX_VERSION:
+            return False
+        self.commits = data['commits']
+        self.postings = data['postings']
+        self.tips = data['tips']
+        self._positions = None
+        self._sorted_paths = None
+        return True
+
+    def save(self) -> None:
+        """
+        Write the index atomically next to its final location.
+        """
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path: str = f"{self.index_path}.{os.getpid()}.tmp"
+        with profiler.span('path_index.save', paths=len(self.postings)):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION, 'commits': self.commits,
+                           'postings': self.postings, 'tips': self.tips}, f, separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+
+    def update(self, save: bool = True) -> int:
+        """
+        Index the commits that became reachable since the last update.
+
+        :param save: Write the index to disk when anything was added
+        :return: Number of newly indexed commits
+        """
+        loader: CommitLoader = CommitLoader(self.repo_path)
+        tips: List[str] = loader.get_ref_tips()
+        cmd: List[str] = ['git', '-C', self.repo_path, 'rev-list', '--all', '--reverse', '--ignore-missing', '--stdin']
+        with profiler.span('path_index.rev_list'):
+            result: subprocess.CompletedProcess = governor.run(
+                cmd, input=''.join(f"^{tip}\n" for tip in self.tips), stdout=subprocess.PIPE, text=True, check=True
+            )
+        positions: Dict[str, int] = self._get_positions()
+        shas: List[str] = [sha for sha in result.stdout.splitlines() if sha not in positions]
+        self.add_commits(shas)
+        self.tips = tips
+        if shas and save:
+            self.save()
+        return len(shas)
+
+    def add_commits(self, shas: Iterable[str]) -> None:
+        """
+        Diff the given commits against their parents and add their paths to the postings.
+
+        :param shas: Commit SHAs, oldest first
+        """
+        shas = list(shas)
+        if not shas:
+            return
+        cmd: List[str] = ['git', '-C', self.repo_path, 'diff-tree', '--stdin', '-r', '-c', '--root',
+                          '--name-only', '-z', '--always']
+        positions: Dict[str, int] = self._get_positions()
+        with profiler.span('path_index.diff_tree', commits=len(shas)):
+            proc: subprocess.Popen = governor.popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            writer: threading.Thread = threading.Thread(target=write_lines, args=(proc.stdin, shas), daemon=True)
+            writer.start()
+
+            # Output is "<sha>\0" followed by "<path>\0" entries; --always prints every sha,
+            # so the next expected sha marks the start of the next commit.
+            expected: int = 0
+            number: int = -1
+            for token in _split_nul(proc.stdout):
+                if expected < len(shas) and len(token) == 40 and token.decode('ascii', 'replace') == shas[expected]:
+                    number = len(self.commits)
+                    self.commits.append(shas[expected])
+                    positions[shas[expected]] = number
+                    expected += 1
+                    continue
+                path: str = token.decode('utf-8', errors='surrogateescape')
+                posting: Optional[List[int]] = self.postings.get(path)
+                if posting is None:
+                    self.postings[path] = [number]
+                    self._sorted_paths = None
+                elif posting[-1] != number:
+                    posting.append(number)
+
+            writer.join()
+            if proc.wait() != 0:
+                raise subprocess.CalledProcessError(proc.returncode, cmd)
+        profiler.count('path_index.commits', expected)
+
+    def history(self, path: str) -> List[str]:
+        """
+        Return the commits that changed `path`, newest first.
+
+        A directory (or a path ending in "/") matches every file below it.
+
+        :param path: Repository-relative path
+        :return: List of commit SHAs
+        """
+        path = path.strip('/')
+        numbers: List[int] = list(self.postings.get(path, []))
+        prefix: str = path + '/'
+        paths: List[str] = self._get_sorted_paths()
+        matched_dir: bool = False
+        for i in range(bisect.bisect_left(paths, prefix), len(paths)):
+            if not paths[i].startswith(prefix):
+                break
+            numbers.extend(self.postings[paths[i]])
+            matched_dir = True
+        if matched_dir:
+            numbers = sorted(set(numbers))
+        return [self.commits[n] for n in reversed(numbers)]
+
+    def _get_positions(self) -> Dict[str, int]:
+        if self._positions is None:
+            self._positions = {sha: n for n, sha in enumerate(self.commits)}
+        return self._positions
+
+    def _get_sorted_paths(self) -> List[str]:
+        if self._sorted_paths is None:
+            self._sorted_paths = sorted(self.postings)
+        return self._sorted_paths
@@ -0,0 +1,208 @@
+# File: profiling.py
+# Profiler: phase-level timing spans and counters, with summary tables and Chrome trace output
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class _NullSpan:
+    """Context manager returned while profiling is disabled; does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Context manager timing one phase and reporting it to its Profiler."""
+
+    __slots__ = ("profiler", "name", "args", "start")
+
+    def __init__(self, profiler: "Profiler", name: str, args: Optional[Dict[str, Any]]) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start, self.args)
+
+
+class Profiler:
+    """
+    Collects timing spans and counters for the loading phases.
+
+    While disabled, span() returns a shared no-op context manager and count()/add_time()
+    return immediately, so instrumented code pays only a method call.
+    """
+
+    __slots__ = ("enabled", "timings", "counters", "events", "_origin", "_lock")
+
+    def __init__(self, enabled: bool = False) -> None:
+        """
+        Initialize the profiler.
+
+        :param enabled: Whether spans and counters are recorded
+        """
+        self.enabled: bool = enabled
+        self.timings: Dict[str, List[float]] = {}  # name -> [calls, total seconds, max seconds]
+        self.counters: Dict[str, int] = {}
+        self.events: List[Dict[str, Any]] = []  # Chrome trace events
+        self._origin: float = time.perf_counter()
+        self._lock: threading.Lock = threading.Lock()
+
+    def enable(self) -> None:
+        """Start recording, discarding anything recorded before."""
+        self.reset()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording; collected data is kept."""
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Discard all recorded spans and counters."""
+        with self._lock:
+            self.timings = {}
+            self.counters = {}
+            self.events = []
+            self._origin = time.perf_counter()
+
+    def span(self, name: str, **args: Any):
+        """
+        Return a context manager timing the enclosed block as phase `name`.
+
+        :param name: Phase name, e.g. "commit_loader.rev_list"
+        :param args: Extra values attached to the trace event
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args or None)
+
+    def record(self, name: str, start: float, duration: float, args: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record a finished span.
+
+        :param name: Phase name
+        :param start: time.perf_counter() value at the start of the span
+        :param duration: Span duration in seconds
+        :param args: Extra values attached to the trace event
+        """
+        if not self.enabled:
+            return
+        event: Dict[str, Any] = {
+            'name': name,
+            'ph': 'X',
+            'ts': (start - self._origin) * 1e6,
+            'dur': duration * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._add_timing(name, duration, 1)
+            self.events.append(event)
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        """
+        Add time accumulated over many small steps (e.g. per-object parsing) without a trace event.
+
+        :param name: Phase name
+        :param seconds: Total time spent
+        :param calls: Number of steps the time covers
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._add_timing(name, seconds, calls)
+
+    def _add_timing(self, name: str, seconds: float, calls: int) -> None:
+        entry: Optional[List[float]] = self.timings.get(name)
+        if entry is None:
+            self.timings[name] = [calls, seconds, seconds / calls if calls else seconds]
+        else:
+            entry[0] += calls
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds / calls if calls else seconds)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Increase counter `name` (bytes, objects, rows...) by `value`.
+
+        :param name: Counter name, e.g. "commit_loader.bytes"
+        :param value: Amount to add
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def format_summary(self) -> str:
+        """
+        Format the recorded phases and counters as a plain-text table.
+
+        :return: Summary table, phases sorted by total time
+        """
+        lines: List[str] = []
+        if self.timings:
+            width: int = max(len(name) for name in self.timings)
+            lines.append(f"{'Phase':<{width}}  {'Calls':>8}  {'Total ms':>10}  {'Mean ms':>10}  {'Max ms':>10}")
+            for name, (calls, total, longest) in sorted(self.timings.items(), key=lambda item: -item[1][1]):
+                mean: float = total / calls if calls else 0.0
+                lines.append(
+                    f"{name:<{width}}  {int(calls):>8}  {total * 1000:>10.2f}  {mean * 1000:>10.3f}  {longest * 1000:>10.3f}"
+                )
+        if self.counters:
+            if lines:
+                lines.append("")
+            width = max(len(name) for name in self.counters)
+            lines.append(f"{'Counter':<{width}}  {'Value':>12}")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<{width}}  {value:>12}")
+        if not lines:
+            return "No profiling data recorded."
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Return the recorded spans in Chrome trace-event format (chrome://tracing, Perfetto).
+
+        :return: Trace dict with "traceEvents"; counters are added as a final "C" event
+        """
+        events: List[Dict[str, Any]] = list(self.events)
+        if self.counters:
+            end: float = max((e['ts'] + e['dur'] for e in events), default=0.0)
+            events.append({
+                'name': 'counters', 'ph': 'C', 'ts': end,
+                'pid': os.getpid(), 'tid': threading.get_ident(),
+                'args': dict(self.counters),
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: str) -> None:
+        """
+        Write the Chrome trace-event JSON to a file.
+
+        :param path: Output file path
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+# Process-wide profiler used by the loaders, the JSON writers and the TUI.
+profiler: Profiler = Profiler()
@@ -0,0 +1,171 @@
+# File: ref_trie.py
+# RefTrie: branch names in a trie of "/"-separated segments with precomputed subtree counts
+
+import bisect
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class RefTrieNode:
+    """
+    One "/"-separated segment of a ref name.
+
+    `sha` is set when a ref ends at this node, and `count` is the number of refs in the
+    subtree (including this one), kept up to date by RefTrie.insert() and remove().
+    """
+
+    __slots__ = ("children", "sha", "count", "_names")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, 'RefTrieNode'] = {}
+        self.sha: Optional[str] = None
+        self.count: int = 0
+        self._names: Optional[List[str]] = None  # sorted child names, rebuilt after changes
+
+    def sorted_names(self) -> List[str]:
+        """
+        Return the child segment names in sorted order (cached until the children change).
+        """
+        if self._names is None:
+            self._names = sorted(self.children)
+        return self._names
+
+
+class RefTrie:
+    """
+    Ref names organized by "/" segments, for grouped display and prefix filtering.
+
+    Every node knows how many refs lie below it, so a collapsed group can show its size
+    without visiting its subtree, and a prefix is matched by walking its full segments and
+    binary-searching the last, partial one among the sorted child names.
+    """
+
+    __slots__ = ("root",)
+
+    def __init__(self, refs: Optional[Dict[str, str]] = None) -> None:
+        """
+        :param refs: Initial mapping ref name -> SHA
+        """
+        self.root: RefTrieNode = RefTrieNode()
+        for name, sha in (refs or {}).items():
+            self.insert(name, sha)
+
+    @classmethod
+    def from_branch_map(cls, branch_map: Dict[str, List[str]]) -> 'RefTrie':
+        """
+        Build a trie from a BranchLoader mapping (SHA -> branch names).
+        """
+        trie: RefTrie = cls()
+        for sha, names in branch_map.items():
+            for name in names:
+                trie.insert(name, sha)
+        return trie
+
+    def __len__(self) -> int:
+        return self.root.count
+
+    def _walk(self, segments: List[str]) -> Optional[RefTrieNode]:
+        node: RefTrieNode = self.root
+        for segment in segments:
+            child: Optional[RefTrieNode] = node.children.get(segment)
+            if child is None:
+                return None
+            node = child
+        return node
+
+    def node(self, path: str) -> Optional[RefTrieNode]:
+        """
+        Return the node of a ref or group path such as "feature/login", or None.
+        """
+        return self._walk(path.split('/')) if path else self.root
+
+    def get(self, name: str) -> Optional[str]:
+        """
+        Return the SHA of a ref, or None if there is no such ref.
+        """
+        node: Optional[RefTrieNode] = self.node(name)
+        return node.sha if node is not None else None
+
+    def insert(self, name: str, sha: str) -> bool:
+        """
+        Add a ref or move an existing one.
+
+        :return: True if the ref is new, False if it existed and only its SHA was updated
+        """
+        segments: List[str] = name.split('/')
+        existing: Optional[RefTrieNode] = self._walk(segments)
+        if existing is not None and existing.sha is not None:
+            existing.sha = sha
+            return False
+        node: RefTrieNode = self.root
+        node.count += 1
+        for segment in segments:
+            child: Optional[RefTrieNode] = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = RefTrieNode()
+                node._names = None
+            child.count += 1
+            node = child
+        node.sha = sha
+        return True
+
+    def remove(self, name: str) -> bool:
+        """
+        Delete a ref and prune the groups it leaves empty.
+
+        :return: True if the ref existed
+        """
+        segments: List[str] = name.split('/')
+        path: List[RefTrieNode] = [self.root]
+        for segment in segments:
+            child: Optional[RefTrieNode] = path[-1].children.get(segment)
+            if child is None:
+                return False
+            path.append(child)
+        if path[-1].sha is None:
+            return False
+        path[-1].sha = None
+        for node in path:
+            node.count -= 1
+        for parent, segment, node in zip(reversed(path[:-1]), reversed(segments), reversed(path[1:])):
+            if node.count or node.children:
+                break
+            del parent.children[segment]
+            parent._names = None
+        return True
+
+    def match(self, prefix: str) -> List[Tuple[str, RefTrieNode]]:
+        """
+        Find the outermost nodes whose path starts with `prefix`.
+
+        Together, their subtrees hold exactly the refs whose names start with `prefix`.
+
+        :param prefix: Ref name prefix; "" matches every top-level node
+        :return: List of (node path, node) in sorted order
+        """
+        segments: List[str] = prefix.split('/')
+        parent_segments: List[str] = segments[:-1]
+        parent: Optional[RefTrieNode] = self._walk(parent_segments)
+        if parent is None:
+            return []
+        partial: str = segments[-1]
+        base: str = '/'.join(parent_segments + [''])
+        names: List[str] = parent.sorted_names()
+        matches: List[Tuple[str, RefTrieNode]] = []
+        for i in range(bisect.bisect_left(names, partial), len(names)):
+            if not names[i].startswith(partial):
+                break
+            matches.append((base + names[i], parent.children[names[i]]))
+        return matches
+
+    def iter_refs(self, node: Optional[RefTrieNode] = None, path: str = '') -> Iterator[Tuple[str, str]]:
+        """
+        Yield (ref name, SHA) for every ref below a node, in sorted order.
+
+        :param node: Subtree to list (default: the whole trie)
+        :param path: Path of `node`
+        """
+        node = node or self.root
+        if node.sha is not None:
+            yield path, node.sha
+        for name in node.sorted_names():
+            yield from self.iter_refs(node.children[name], f"{path}/{name}" if path else name)
@@ -0,0 +1,152 @@
+# File: ref_watcher.py
+# RefWatcher: detect ref changes by polling stat data, and stream incremental updates as events
+
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .commit_loader import CommitLoader, commit_to_dict
+from .repo_dir import resolve_git_dirs
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st: os.stat_result = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class RefWatcher:
+    """
+    Detects changes to a repository's refs by comparing cheap stat snapshots.
+
+    A snapshot covers the contents of HEAD, the stat data of packed-refs, of every directory
+    under refs/ (loose ref updates are atomic renames, which bump the parent directory's
+    mtime) and of the objects and objects/pack directories. No git process is spawned per poll.
+    """
+
+    __slots__ = ("repo_path", "git_dir", "common_dir", "_state")
+
+    def __init__(self, repo_path: str) -> None:
+        """
+        Initialize the watcher and take the initial snapshot.
+
+        :param repo_path: Path to a Git repository or one of its worktrees
+        :raises subprocess.CalledProcessError: If repo_path is not inside a Git repository
+        """
+        self.repo_path: str = repo_path
+        self.git_dir: str
+        self.common_dir: str
+        self.git_dir, self.common_dir = resolve_git_dirs(repo_path)
+        self._state: Tuple[Any, ...] = self.snapshot()
+
+    def snapshot(self) -> Tuple[Any, ...]:
+        """
+        Take a stat snapshot of the ref state.
+
+        :return: Hashable tuple that changes whenever a ref, HEAD or the object store changes
+        """
+        entries: List[Any] = []
+        try:
+            with open(os.path.join(self.git_dir, 'HEAD'), 'rb') as f:
+                entries.append(f.read())
+        except OSError:
+            entries.append(None)
+        for name in ('packed-refs', 'objects', os.path.join('objects', 'pack')):
+            entries.append(_stat_key(os.path.join(self.common_dir, name)))
+        for dirpath, dirnames, _ in os.walk(os.path.join(self.common_dir, 'refs')):
+            dirnames.sort()
+            entries.append((dirpath, _stat_key(dirpath)))
+        return tuple(entries)
+
+    def poll(self) -> bool:
+        """
+        Check whether the ref state changed since the previous poll (or construction).
+
+        :return: True if anything changed
+        """
+        state: Tuple[Any, ...] = self.snapshot()
+        if state == self._state:
+            return False
+        self._state = state
+        return True
+
+    def invalidate(self) -> None:
+        """
+        Make the next poll() report a change, e.g. because the changes it reported were not applied.
+        """
+        self._state = ()
+
+
+def branches_by_name(branch_map: Dict[str, List[str]]) -> Dict[str, str]:
+    """
+    Invert a BranchLoader mapping (SHA -> names) into branch name -> SHA.
+    """
+    return {name: sha for sha, names in branch_map.items() for name in names}
+
+
+def diff_branches(old: Dict[str, List[str]], new: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """
+    Compare two BranchLoader mappings.
+
+    :param old: Previous mapping SHA -> branch names
+    :param new: Current mapping SHA -> branch names
+    :return: Branch events sorted by name, each with "action" created, deleted or moved
+    """
+    old_names: Dict[str, str] = branches_by_name(old)
+    new_names: Dict[str, str] = branches_by_name(new)
+    events: List[Dict[str, Any]] = []
+    for name in sorted(old_names.keys() | new_names.keys()):
+        before: Optional[str] = old_names.get(name)
+        after: Optional[str] = new_names.get(name)
+        if before == after:
+            continue
+        if before is None:
+            events.append({'event': 'branch', 'action': 'created', 'branch': name, 'sha': after})
+        elif after is None:
+            events.append({'event': 'branch', 'action': 'deleted', 'branch': name, 'old_sha': before})
+        else:
+            events.append({'event': 'branch', 'action': 'moved', 'branch': name, 'sha': after, 'old_sha': before})
+    return events
+
+
+def watch_events(repo_path: str, interval: float = 1.0, include_commits: bool = True,
+                 stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the current branches (and commits), then incremental events whenever refs change.
+
+    Only commits made reachable by the new ref tips are loaded on each change. If refs move
+    while a load is in progress a commit can be reported twice, but never missed.
+
+    :param repo_path: Path to the Git repository
+    :param interval: Seconds between polls
+    :param include_commits: Also emit "commit" events for the history
+    :param stop: Event that ends the watch when set (default: watch until interrupted)
+    :return: Iterator of JSON-serializable event dicts
+    """
+    watcher: RefWatcher = RefWatcher(repo_path)
+    loader: CommitLoader = CommitLoader(repo_path)
+    tips: List[str] = loader.get_ref_tips()
+    branches: Dict[str, List[str]] = loader.get_branches()
+    for name, sha in sorted(branches_by_name(branches).items()):
+        yield {'event': 'branch', 'action': 'existing', 'branch': name, 'sha': sha}
+    if include_commits:
+        for commit in loader.load_commits():
+            yield {'event': 'commit', **commit_to_dict(commit)}
+
+    stop = stop or threading.Event()
+    while not stop.wait(interval):
+        if not watcher.poll():
+            continue
+        new_tips: List[str] = loader.get_ref_tips()
+        if include_commits:
+            new_commits = loader.load_commits_since(tips)
+        else:
+            new_commits = []
+            loader.branch_loader.branch_map = None
+        new_branches: Dict[str, List[str]] = loader.get_branches()
+        yield from diff_branches(branches, new_branches)
+        for commit in new_commits:
+            yield {'event': 'commit', **commit_to_dict(commit)}
+        tips, branches = new_tips, new_branches
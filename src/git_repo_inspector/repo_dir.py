@@ -1,6 +1,26 @@
 import subprocess
 import os
-from typing import Optional
+from typing import List, Optional, Tuple
+
+from .profiling import profiler
+from .worktrees import Worktree, get_common_dir, list_worktrees
+
+def resolve_git_dirs(repo_path: str) -> Tuple[str, str]:
+    """
+    Resolves the per-worktree and the common Git directory of a repository with a single git call.
+
+    :param repo_path: Path to a Git repository or one of its worktrees.
+    :return: Tuple (absolute git dir, absolute common dir).
+    :raises subprocess.CalledProcessError: If repo_path is not inside a Git repository.
+    """
+    result = subprocess.run(
+        ['git', '-C', repo_path, 'rev-parse', '--absolute-git-dir', '--git-common-dir'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True
+    )
+    git_dir, common_dir = result.stdout.splitlines()[:2]
+    # --git-common-dir may be relative to the directory git ran in
+    return git_dir, os.path.abspath(os.path.join(repo_path, common_dir))
+
 
 class RepoDir:
     __slots__ = (
@@ -37,30 +57,33 @@ class RepoDir:
         self.toplevel_dir_error: Optional[Exception] = None
 
         try:
-            result_git_dir = subprocess.run(
-                ['git', 'rev-parse', '--absolute-git-dir'],
-                capture_output=True, text=True, check=True
-            )
+            with profiler.span('repo_dir.absolute_git_dir'):
+                result_git_dir = subprocess.run(
+                    ['git', 'rev-parse', '--absolute-git-dir'],
+                    capture_output=True, text=True, check=True
+                )
             self.absolute_git_dir = result_git_dir.stdout.strip()
         except (subprocess.CalledProcessError, FileNotFoundError) as e:
             self.absolute_git_dir_error = e
 
         try:
-            result_is_bare = subprocess.run(
-                ['git', 'rev-parse', '--is-bare-repository'],
-                capture_output=True, text=True, check=True,
-                cwd=target_path
-            )
+            with profiler.span('repo_dir.is_bare'):
+                result_is_bare = subprocess.run(
+                    ['git', 'rev-parse', '--is-bare-repository'],
+                    capture_output=True, text=True, check=True,
+                    cwd=target_path
+                )
             self._is_bare = result_is_bare.stdout.strip() == 'true'
         except (subprocess.CalledProcessError, FileNotFoundError) as e:
             self.is_bare_error = e
 
         if self._is_bare is False or self._is_bare is None:
             try:
-                result_toplevel = subprocess.run(
-                    ['git', 'rev-parse', '--show-toplevel'],
-                    capture_output=True, text=True, check=True
-                )
+                with profiler.span('repo_dir.toplevel'):
+                    result_toplevel = subprocess.run(
+                        ['git', 'rev-parse', '--show-toplevel'],
+                        capture_output=True, text=True, check=True
+                    )
                 self.toplevel_dir = result_toplevel.stdout.strip()
             except (subprocess.CalledProcessError, FileNotFoundError) as e:
                 self.toplevel_dir_error = e
@@ -89,6 +112,30 @@ class RepoDir:
             raise RuntimeError("Cannot get top-level directory for a bare repository.")
         return self.toplevel_dir
 
+    def get_common_dir(self) -> str:
+        """
+        Returns the common Git directory shared by all worktrees of the repository.
+
+        :return: The absolute path of the common dir (the git dir itself unless this is a linked worktree).
+        :raises RuntimeError: If the Git directory could not be determined.
+        """
+        if self.absolute_git_dir is None:
+            raise RuntimeError("Cannot get common directory: Git directory is unknown.")
+        return get_common_dir(self.absolute_git_dir)
+
+    def list_worktrees(self) -> List[Worktree]:
+        """
+        Enumerates the main and linked worktrees from the common directory's worktrees/* entries.
+
+        Worktrees whose recorded path no longer exists are flagged as prunable; if this RepoDir
+        was opened from inside such a moved worktree, its new location is reported as moved_to.
+
+        :return: List of Worktree tuples, main worktree first.
+        :raises RuntimeError: If the Git directory could not be determined.
+        """
+        return list_worktrees(self.get_common_dir(), current_git_dir=self.absolute_git_dir,
+                              current_toplevel=self.toplevel_dir)
+
 
 def main():
     """Command-line entry point for RepoDir."""
@@ -0,0 +1,190 @@
+# File: sampling.py
+# Uniform commit sampling from the rev-list stream, and population estimates with error bounds
+
+import json
+import math
+import random
+import subprocess
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .commit_loader import Commit, CommitLoader
+from .governor import governor
+from .profiling import profiler
+from .stats import CommitStats, TOP_AUTHORS, load_mailmap
+
+Z_95: float = 1.959964  # two-sided 95% normal quantile
+
+
+def _uniform(rng: random.Random) -> float:
+    # Uniform in (0, 1): Algorithm L takes logarithms of it
+    value: float = rng.random()
+    while value == 0.0:
+        value = rng.random()
+    return value
+
+
+def reservoir_sample(items: Iterable[Any], size: int, rng: Optional[random.Random] = None) -> Tuple[List[Any], int]:
+    """
+    Draw a uniform sample without replacement from a stream of unknown length.
+
+    Uses Li's Algorithm L, which draws random numbers only for the items that enter the
+    reservoir (about size * log(n / size) of them) instead of once per item.
+
+    :param items: Stream to sample from; consumed once
+    :param size: Sample size
+    :param rng: Random generator (default: a fresh unseeded one)
+    :return: Tuple (sample in stream order, number of items seen)
+    """
+    rng = rng or random.Random()
+    reservoir: List[Tuple[int, Any]] = []  # (stream position, item)
+    if size <= 0:
+        return [], sum(1 for _ in items)
+    weight: float = 0.0
+    next_index: int = size
+    seen: int = 0
+    for index, item in enumerate(items):
+        seen = index + 1
+        if index < size:
+            reservoir.append((index, item))
+            if index == size - 1:
+                weight = math.exp(math.log(_uniform(rng)) / size)
+                next_index = size + int(math.log(_uniform(rng)) / math.log(1 - weight))
+            continue
+        if index == next_index:
+            reservoir[rng.randrange(size)] = (index, item)
+            weight *= math.exp(math.log(_uniform(rng)) / size)
+            next_index += 1 + int(math.log(_uniform(rng)) / math.log(1 - weight))
+    reservoir.sort()
+    return [item for _, item in reservoir], seen
+
+
+def sample_commit_shas(repo_path: str, size: int, seed: Optional[int] = None) -> Tuple[List[str], int]:
+    """
+    Sample commit SHAs uniformly from `git rev-list --all` without keeping the full list.
+
+    :param repo_path: Path to the Git repository
+    :param size: Sample size
+    :param seed: Random seed for reproducible samples
+    :return: Tuple (sampled SHAs in rev-list order, total number of commits)
+    """
+    cmd: List[str] = ['git', '-C', repo_path, 'rev-list', '--all']
+    with profiler.span('sampling.rev_list'):
+        proc: subprocess.Popen = governor.popen(cmd, stdout=subprocess.PIPE, text=True)
+        try:
+            shas, population = reservoir_sample((line.rstrip('\n') for line in proc.stdout), size, random.Random(seed))
+        finally:
+            proc.stdout.close()
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+    profiler.count('sampling.population', population)
+    return shas, population
+
+
+def sample_commits(repo_path: str, size: int, seed: Optional[int] = None) -> Tuple[List[Commit], int]:
+    """
+    Load full objects only for a uniform sample of the commits.
+
+    :return: Tuple (sampled commits in rev-list order, total number of commits)
+    """
+    shas, population = sample_commit_shas(repo_path, size, seed)
+    return CommitLoader(repo_path).load_commits_for(shas), population
+
+
+def estimate(count: int, sample_size: int, population: int, z: float = Z_95) -> Tuple[float, float]:
+    """
+    Estimate a population total from a count in a simple random sample.
+
+    The margin is z standard errors of the scaled sample proportion, with the finite
+    population correction, so it shrinks to zero when the whole population was sampled.
+
+    :param count: Sampled items in the category
+    :param sample_size: Number of sampled items
+    :param population: Number of items in the population
+    :param z: Normal quantile of the confidence level
+    :return: Tuple (estimated total, margin of error)
+    """
+    if sample_size <= 0:
+        return 0.0, 0.0
+    proportion: float = count / sample_size
+    correction: float = (population - sample_size) / (population - 1) if population > 1 else 0.0
+    margin: float = z * population * math.sqrt(proportion * (1 - proportion) / sample_size * max(correction, 0.0))
+    return population * proportion, margin
+
+
+def estimate_stats(stats: CommitStats, population: int) -> Dict[str, Any]:
+    """
+    Scale statistics computed over a sample up to the full history.
+
+    :param stats: CommitStats filled with the sampled commits only
+    :param population: Total number of commits
+    :return: JSON-serializable dict; every count is an {"estimate", "margin"} pair at 95% confidence
+    """
+    data: Dict[str, Any] = stats.to_dict()
+    size: int = stats.commits
+
+    def scaled(count: int) -> Dict[str, float]:
+        value, margin = estimate(count, size, population)
+        return {'estimate': round(value, 1), 'margin': round(margin, 1)}
+
+    return {
+        'population': population,
+        'sample_size': size,
+        'confidence': 0.95,
+        'authors': [dict(name=a['name'], email=a['email'], sample_commits=a['commits'], **scaled(a['commits']))
+                    for a in data['authors']],
+        'weeks': {monday: scaled(count) for monday, count in data['weeks'].items()},
+        'hour_of_week': {name: [scaled(count) for count in counts] for name, counts in data['hour_of_week'].items()},
+    }
+
+
+def collect_sampled_stats(repo_path: str, size: int, seed: Optional[int] = None,
+                          use_mailmap: bool = True) -> Dict[str, Any]:
+    """
+    Estimate the --stats figures from a uniform sample of `size` commits.
+
+    Only the sample's commit objects are read, so the cost beyond one rev-list pass is fixed.
+
+    :param repo_path: Path to the Git repository
+    :param size: Sample size
+    :param seed: Random seed for reproducible samples
+    :param use_mailmap: Merge identities with the repository's mailmap
+    :return: Estimates from estimate_stats()
+    """
+    commits, population = sample_commits(repo_path, size, seed)
+    stats: CommitStats = CommitStats(load_mailmap(repo_path) if use_mailmap else None)
+    with profiler.span('stats.aggregate', sampled=len(commits)):
+        for commit in commits:
+            stats.add(commit)
+    return estimate_stats(stats, population)
+
+
+def format_estimates(estimates: Dict[str, Any], top: int = TOP_AUTHORS) -> str:
+    """
+    Format sampled estimates as a text report with margins of error.
+    """
+    if not estimates['sample_size']:
+        return "No commits."
+    lines: List[str] = [
+        f"Estimated from a uniform sample of {estimates['sample_size']} of {estimates['population']} commits "
+        f"(95% confidence).",
+        "",
+        "Top authors:",
+    ]
+    for author in estimates['authors'][:top]:
+        lines.append(f"  {author['estimate']:>10.0f} +/- {author['margin']:<8.0f} {author['name']} <{author['email']}>")
+    if len(estimates['authors']) > top:
+        lines.append(f"  ... and {len(estimates['authors']) - top} more seen in the sample")
+    widest: float = max((cell['margin'] for cells in estimates['hour_of_week'].values() for cell in cells), default=0.0)
+    lines += ["", f"Commits by hour of week (author local time, each +/- up to {widest:.0f}):",
+              "     " + "".join(f"{hour:>6}" for hour in range(24))]
+    for name, cells in estimates['hour_of_week'].items():
+        lines.append(f"  {name}" + "".join(f"{cell['estimate']:>6.0f}" for cell in cells))
+    return "\n".join(lines)
+
+
+def estimates_to_json(estimates: Dict[str, Any]) -> str:
+    """
+    Return the estimates as a JSON string.
+    """
+    with profiler.span('json.stats'):
+        return json.dumps(estimates, indent=2)
@@ -0,0 +1,94 @@
+# File: session_cache.py
+# SessionCache: most recently used repository sessions, bounded by their estimated memory use
+
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional, Tuple
+
+COMMIT_OVERHEAD: int = 600                # bytes per loaded commit besides its text: tuples, lists, index entries
+TABLE_ROW_OVERHEAD: int = 1000            # bytes per row of a kept commit table: row key, cells and their strings
+DEFAULT_MAX_BYTES: int = 256 * 1024 * 1024  # estimated size of the sessions kept
+
+
+def estimate_commit_bytes(commits: Iterable[Any]) -> int:
+    """
+    Estimate the memory held by loaded commits and the indexes built over them.
+
+    :param commits: Commit namedtuples
+    :return: Estimated size in bytes
+    """
+    return sum(COMMIT_OVERHEAD + len(commit.raw) + len(commit.message) for commit in commits)
+
+
+def estimate_table_bytes(rows: int) -> int:
+    """
+    Estimate the memory held by a commit table kept with its session (measured with Textual's DataTable).
+
+    :param rows: Number of rows in the table
+    :return: Estimated size in bytes
+    """
+    return rows * TABLE_ROW_OVERHEAD
+
+
+class SessionCache:
+    """
+    Keeps the state of recently used repositories, keyed by path, in LRU order.
+
+    A session is taken out with pop() while it is in use and put back when the user
+    moves on, so the cache holds the inactive sessions only. Storing a session evicts
+    the least recently used ones until their estimated total size fits max_bytes; the
+    session just stored is always kept.
+    """
+
+    __slots__ = ("max_bytes", "_sessions")
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        :param max_bytes: Estimated total size of the sessions kept
+        """
+        self.max_bytes: int = max_bytes
+        self._sessions: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()  # key -> (session, size), oldest first
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sessions
+
+    @property
+    def total_bytes(self) -> int:
+        """
+        Estimated size of all sessions kept.
+        """
+        return sum(size for _, size in self._sessions.values())
+
+    def keys(self) -> List[str]:
+        """
+        Return the keys of the kept sessions, most recently used first.
+        """
+        return list(reversed(self._sessions))
+
+    def put(self, key: str, session: Any, size: int) -> List[Any]:
+        """
+        Store a session as the most recently used one.
+
+        :param key: Repository path
+        :param session: Session state; opaque to the cache
+        :param size: Estimated size of the session in bytes
+        :return: Sessions evicted to make room, oldest first
+        """
+        self._sessions.pop(key, None)
+        self._sessions[key] = (session, size)
+        evicted: List[Any] = []
+        total: int = self.total_bytes
+        while total > self.max_bytes and len(self._sessions) > 1:
+            _, (old_session, old_size) = self._sessions.popitem(last=False)
+            evicted.append(old_session)
+            total -= old_size
+        return evicted
+
+    def pop(self, key: str) -> Optional[Any]:
+        """
+        Remove a session from the cache and return it, or None if it is not kept.
+        """
+        entry: Optional[Tuple[Any, int]] = self._sessions.pop(key, None)
+        return entry[0] if entry is not None else None
@@ -0,0 +1,143 @@
+# File: sha_index.py
+# ShaIndex: sorted commit SHAs with shortest unique abbreviations and binary-search prefix lookup
+
+import bisect
+from array import array
+from typing import Iterable, List, Set
+
+DEFAULT_MIN_LENGTH: int = 7  # never abbreviate below git's default display length
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """
+    Return the number of leading characters two strings share.
+    """
+    if len(a) == len(b) and len(a) in (40, 64):
+        try:
+            # Full SHA-1/SHA-256 names: the highest differing bit gives the first differing digit
+            diff: int = int(a, 16) ^ int(b, 16)
+            return len(a) - (diff.bit_length() + 3) // 4
+        except ValueError:
+            pass
+    limit: int = min(len(a), len(b))
+    i: int = 0
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _shared_prefix_lengths(names: List[str]) -> List[int]:
+    # common_prefix_length() of each pair of sorted neighbours, converting every name only once
+    width: int = len(names[0]) if names else 0
+    if width in (40, 64) and all(len(name) == width for name in names):
+        try:
+            values: List[int] = [int(name, 16) for name in names]
+        except ValueError:
+            pass
+        else:
+            return [width - ((a ^ b).bit_length() + 3) // 4 for a, b in zip(values, values[1:])]
+    return [common_prefix_length(a, b) for a, b in zip(names, names[1:])]
+
+
+class ShaIndex:
+    """
+    Sorted index of object names for abbreviation and prefix lookup.
+
+    Two names that share a prefix of length k are neighbours in sorted order, so the
+    shortest unique abbreviation of each name is one more than the longest prefix it
+    shares with either neighbour. All abbreviations are computed in one linear pass, and
+    prefixes are resolved by binary search without running git.
+    """
+
+    __slots__ = ("shas", "lengths", "min_length")
+
+    def __init__(self, shas: Iterable[str] = (), min_length: int = DEFAULT_MIN_LENGTH) -> None:
+        """
+        Build the index.
+
+        :param shas: Object names (lowercase hex); duplicates are ignored
+        :param min_length: Shortest abbreviation handed out by abbreviate()
+        """
+        self.shas: List[str] = sorted(set(shas))
+        self.min_length: int = min_length
+        shared: List[int] = _shared_prefix_lengths(self.shas)
+        # Unique length of shas[i] = 1 + max(shared with shas[i-1], shared with shas[i+1])
+        self.lengths: array = array('B', (max(left, right) + 1 for left, right in zip([0] + shared, shared + [0])))
+
+    def __len__(self) -> int:
+        return len(self.shas)
+
+    def __contains__(self, sha: str) -> bool:
+        i: int = bisect.bisect_left(self.shas, sha)
+        return i < len(self.shas) and self.shas[i] == sha
+
+    def unique_length(self, sha: str) -> int:
+        """
+        Return the length of the shortest prefix that identifies `sha` among the indexed names.
+
+        :raises KeyError: If `sha` is not indexed
+        """
+        i: int = bisect.bisect_left(self.shas, sha)
+        if i == len(self.shas) or self.shas[i] != sha:
+            raise KeyError(sha)
+        return self.lengths[i]
+
+    def abbreviate(self, sha: str) -> str:
+        """
+        Return the shortest unique abbreviation of `sha`, at least min_length characters.
+
+        Names that are not indexed are cut to min_length.
+        """
+        i: int = bisect.bisect_left(self.shas, sha)
+        if i < len(self.shas) and self.shas[i] == sha:
+            return sha[:max(self.min_length, self.lengths[i])]
+        return sha[:self.min_length]
+
+    def lookup(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Return the indexed names starting with `prefix`, in sorted order.
+
+        :param prefix: Full name or abbreviation, case-insensitive
+        :param limit: Maximum number of names returned; 2 is enough to tell unique from ambiguous
+        :return: Matching names; empty if none
+        """
+        prefix = prefix.lower()
+        matches: List[str] = []
+        i: int = bisect.bisect_left(self.shas, prefix)
+        while i < len(self.shas) and len(matches) < limit and self.shas[i].startswith(prefix):
+            matches.append(self.shas[i])
+            i += 1
+        return matches
+
+    def add(self, shas: Iterable[str]) -> List[str]:
+        """
+        Insert names and update the abbreviations around them.
+
+        :param shas: Names to insert; already indexed ones are skipped
+        :return: Previously indexed names whose abbreviate() result got longer
+        """
+        inserted: List[str] = []
+        for sha in shas:
+            i: int = bisect.bisect_left(self.shas, sha)
+            if i < len(self.shas) and self.shas[i] == sha:
+                continue
+            self.shas.insert(i, sha)
+            self.lengths.insert(i, 0)
+            inserted.append(sha)
+        fresh: Set[str] = set(inserted)
+        positions: Set[int] = set()
+        for sha in inserted:
+            i = bisect.bisect_left(self.shas, sha)
+            positions.update((i - 1, i, i + 1))
+        changed: List[str] = []
+        for j in sorted(positions):
+            if not 0 <= j < len(self.shas):
+                continue
+            sha = self.shas[j]
+            left: int = common_prefix_length(self.shas[j - 1], sha) if j > 0 else 0
+            right: int = common_prefix_length(sha, self.shas[j + 1]) if j + 1 < len(self.shas) else 0
+            old: str = self.abbreviate(sha)
+            self.lengths[j] = max(left, right) + 1
+            if sha not in fresh and self.abbreviate(sha) != old:
+                changed.append(sha)
+        return changed
@@ -0,0 +1,93 @@
+# File: sort_index.py
+# SortIndex: sort keys extracted once into compact arrays, each ordering cached as an index permutation
+
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def compact_keys(values: Sequence) -> array:
+    """
+    Store sort key values in an array that sorts the same way.
+
+    Integers are kept as they are; any other values are replaced by their rank among the
+    distinct values, so comparisons during sorting are between machine integers.
+
+    :param values: One key per item
+    :return: array('q') of the integers, or array('I') of ranks
+    """
+    if all(isinstance(value, int) for value in values):
+        return array('q', values)
+    ranks: Dict[object, int] = {value: rank for rank, value in enumerate(sorted(set(values)))}
+    return array('I', (ranks[value] for value in values))
+
+
+def topological_ranks(shas: Sequence[str], parents: Sequence[Sequence[str]]) -> array:
+    """
+    Rank commits in topological order, children before their parents.
+
+    Like `git log --topo-order`, one line of history is followed down to where it joins
+    another before the next line starts, so lines are not interleaved.
+
+    :param shas: Commit names; tips are visited in this order
+    :param parents: Parent names of each commit; parents that are not in `shas` are ignored
+    :return: array('I') where element i is the position of shas[i] in topological order
+    """
+    position: Dict[str, int] = {sha: i for i, sha in enumerate(shas)}
+    parent_positions: List[List[int]] = [[position[p] for p in ps if p in position] for ps in parents]
+    pending_children: List[int] = [0] * len(shas)
+    for ps in parent_positions:
+        for p in ps:
+            pending_children[p] += 1
+    ranks: array = array('I', [0]) * len(shas)
+    stack: List[int] = [i for i in reversed(range(len(shas))) if not pending_children[i]]
+    rank: int = 0
+    while stack:
+        i: int = stack.pop()
+        ranks[i] = rank
+        rank += 1
+        for p in reversed(parent_positions[i]):  # the first parent ends up on top
+            pending_children[p] -= 1
+            if not pending_children[p]:
+                stack.append(p)
+    return ranks
+
+
+class SortIndex:
+    """
+    Orderings of a fixed list of items by several keys.
+
+    Each key column is converted once by compact_keys(). An ordering is computed on first
+    use as a permutation (the item positions in sorted order) and cached, so switching
+    between orderings afterwards costs nothing but applying the permutation.
+    """
+
+    __slots__ = ("keys", "_orders")
+
+    def __init__(self, keys: Dict[str, Sequence]) -> None:
+        """
+        :param keys: Mapping column name -> one key per item; all columns must have the same length
+        :raises ValueError: If the columns differ in length
+        """
+        if len({len(values) for values in keys.values()}) > 1:
+            raise ValueError("sort key columns differ in length")
+        self.keys: Dict[str, array] = {name: compact_keys(values) for name, values in keys.items()}
+        self._orders: Dict[Tuple[str, bool], array] = {}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.keys.values()), ()))
+
+    def order(self, column: str, reverse: bool = False) -> array:
+        """
+        Return the item positions sorted by one column. Ties keep their original order.
+
+        :param column: Column name
+        :param reverse: Sort in descending order
+        :return: array('I') permutation of range(len(self))
+        :raises KeyError: If there is no such column
+        """
+        cached: Optional[array] = self._orders.get((column, reverse))
+        if cached is None:
+            keys: array = self.keys[column]
+            cached = array('I', sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse))
+            self._orders[(column, reverse)] = cached
+        return cached
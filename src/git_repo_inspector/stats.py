@@ -0,0 +1,309 @@
+# File: stats.py
+# CommitStats: per-author, per-day/week and hour-of-week activity aggregated in one streaming pass
+
+import json
+import os
+import subprocess
+from array import array
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from .commit_loader import Commit, CommitLoader, Identity
+from .profiling import profiler
+
+try:  # optional: vectorizes the bucketing of timestamp chunks
+    import numpy as _np
+except ImportError:  # pragma: no cover - depends on the environment
+    _np = None
+
+CHUNK_SIZE: int = 1 << 16  # timestamps buffered before they are folded into the buckets
+TOP_AUTHORS: int = 20      # authors listed by format_stats()
+_DAY: int = 86400
+_EPOCH_DATE: date = date(1970, 1, 1)
+_WEEKDAYS: Tuple[str, ...] = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+class Mailmap:
+    """
+    Maps commit identities to canonical ones, following git's .mailmap rules.
+
+    Supported line forms:
+        Proper Name <commit@email>
+        <proper@email> <commit@email>
+        Proper Name <proper@email> <commit@email>
+        Proper Name <proper@email> Commit Name <commit@email>
+    Emails and names are matched case-insensitively.
+    """
+
+    __slots__ = ("_by_email", "_by_name")
+
+    def __init__(self, text: str = "") -> None:
+        """
+        :param text: Contents of one or more mailmap files
+        """
+        self._by_email: Dict[str, List[Optional[str]]] = {}             # commit email -> [name, email]
+        self._by_name: Dict[Tuple[str, str], List[Optional[str]]] = {}  # (commit email, name) -> [name, email]
+        for line in text.splitlines():
+            self.add_line(line)
+
+    def __bool__(self) -> bool:
+        return bool(self._by_email or self._by_name)
+
+    def add_line(self, line: str) -> None:
+        """
+        Add one mailmap line; blank, comment and malformed lines are ignored.
+        """
+        line = line.strip()
+        if not line or line.startswith('#'):
+            return
+        parts: List[Tuple[Optional[str], str]] = []  # (name before the <, email)
+        rest: str = line
+        while len(parts) < 2:
+            lt: int = rest.find('<')
+            gt: int = rest.find('>', lt + 1)
+            if lt < 0 or gt < 0:
+                break
+            parts.append((rest[:lt].strip() or None, rest[lt + 1:gt].strip()))
+            rest = rest[gt + 1:]
+        if not parts:
+            return
+        proper_name: Optional[str] = parts[0][0]
+        if len(parts) == 1:
+            proper_email: Optional[str] = None
+            commit_name: Optional[str] = None
+            commit_email: str = parts[0][1]
+        else:
+            proper_email = parts[0][1]
+            commit_name, commit_email = parts[1]
+        if commit_name:
+            entry: List[Optional[str]] = self._by_name.setdefault((commit_email.lower(), commit_name.lower()), [None, None])
+        else:
+            entry = self._by_email.setdefault(commit_email.lower(), [None, None])
+        if proper_name:
+            entry[0] = proper_name
+        if proper_email:
+            entry[1] = proper_email
+
+    def resolve(self, identity: Identity) -> Identity:
+        """
+        Return the canonical identity for a commit identity (itself if not mapped).
+        """
+        email_key: str = identity.email.lower()
+        entry: Optional[List[Optional[str]]] = self._by_name.get((email_key, identity.name.lower()))
+        if entry is None:
+            entry = self._by_email.get(email_key)
+        if entry is None:
+            return identity
+        return Identity(entry[0] or identity.name, entry[1] or identity.email)
+
+
+def load_mailmap(repo_path: str) -> Mailmap:
+    """
+    Read the repository's mailmap the way git does by default.
+
+    Uses .mailmap at the top of the work tree (HEAD:.mailmap in a bare repository) plus the
+    file named by the mailmap.file setting, if any.
+
+    :param repo_path: Path to the Git repository
+    :return: Mailmap, empty if the repository has none
+    """
+    texts: List[str] = []
+    toplevel: subprocess.CompletedProcess = subprocess.run(
+        ['git', '-C', repo_path, 'rev-parse', '--show-toplevel'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    if toplevel.returncode == 0:
+        paths: List[str] = [os.path.join(toplevel.stdout.strip(), '.mailmap')]
+    else:
+        paths = []
+        blob: subprocess.CompletedProcess = subprocess.run(
+            ['git', '-C', repo_path, 'cat-file', 'blob', 'HEAD:.mailmap'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        if blob.returncode == 0:
+            texts.append(blob.stdout.decode('utf-8', errors='replace'))
+    configured: subprocess.CompletedProcess = subprocess.run(
+        ['git', '-C', repo_path, 'config', '--get', 'mailmap.file'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    if configured.returncode == 0 and configured.stdout.strip():
+        paths.append(os.path.expanduser(configured.stdout.strip()))
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                texts.append(f.read())
+        except OSError:
+            pass
+    return Mailmap("\n".join(texts))
+
+
+class CommitStats:
+    """
+    Aggregates commit activity without keeping the commits.
+
+    Per-identity counters are updated as commits arrive. Author timestamps, shifted to the
+    author's local time, are buffered in a fixed-size array('q') chunk and folded into the
+    per-day and hour-of-week buckets whenever it fills, using NumPy when it is installed.
+    Memory therefore depends on the number of identities and days, not on history length.
+    """
+
+    __slots__ = ("mailmap", "commits", "first_time", "last_time", "authors", "days", "hour_of_week",
+                 "_resolved", "_chunk")
+
+    def __init__(self, mailmap: Optional[Mailmap] = None) -> None:
+        """
+        :param mailmap: Mailmap used to merge identities (default: none)
+        """
+        self.mailmap: Optional[Mailmap] = mailmap
+        self.commits: int = 0
+        self.first_time: Optional[int] = None
+        self.last_time: Optional[int] = None
+        self.authors: Dict[Identity, List[int]] = {}  # identity -> [commits, first time, last time]
+        self.days: Dict[int, int] = {}                # local days since the epoch -> commits
+        self.hour_of_week: List[int] = [0] * (7 * 24)  # Monday 00h first, author local time
+        self._resolved: Dict[Identity, Identity] = {}
+        self._chunk: array = array('q')
+
+    def add(self, commit: Commit) -> None:
+        """
+        Count one commit.
+        """
+        when: int = commit.author_time
+        self.commits += 1
+        if self.first_time is None or when < self.first_time:
+            self.first_time = when
+        if self.last_time is None or when > self.last_time:
+            self.last_time = when
+
+        identity: Identity = commit.author_ident or Identity('Unknown', '')
+        canonical: Optional[Identity] = self._resolved.get(identity)
+        if canonical is None:
+            canonical = self.mailmap.resolve(identity) if self.mailmap else identity
+            self._resolved[identity] = canonical
+        counters: Optional[List[int]] = self.authors.get(canonical)
+        if counters is None:
+            self.authors[canonical] = [1, when, when]
+        else:
+            counters[0] += 1
+            if when < counters[1]:
+                counters[1] = when
+            if when > counters[2]:
+                counters[2] = when
+
+        self._chunk.append(when + commit.author_tz * 60)
+        if len(self._chunk) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Fold the buffered timestamps into the day and hour-of-week buckets.
+        """
+        chunk: array = self._chunk
+        if not chunk:
+            return
+        days: Dict[int, int] = self.days
+        hours: List[int] = self.hour_of_week
+        if _np is not None:
+            local = _np.frombuffer(chunk, dtype=_np.int64)
+            day_numbers = local // _DAY
+            unique_days, counts = _np.unique(day_numbers, return_counts=True)
+            for day, count in zip(unique_days.tolist(), counts.tolist()):
+                days[day] = days.get(day, 0) + count
+            slots = ((day_numbers + 3) % 7) * 24 + (local % _DAY) // 3600
+            for slot, count in enumerate(_np.bincount(slots, minlength=7 * 24).tolist()):
+                hours[slot] += count
+        else:
+            for local in chunk:
+                day: int = local // _DAY
+                days[day] = days.get(day, 0) + 1
+                # 1970-01-01 was a Thursday, so (day + 3) % 7 is 0 on Mondays
+                hours[((day + 3) % 7) * 24 + (local % _DAY) // 3600] += 1
+        self._chunk = array('q')
+
+    def weeks(self) -> Dict[int, int]:
+        """
+        Return commits per week, keyed by the week's Monday as local days since the epoch.
+        """
+        self.flush()
+        weeks: Dict[int, int] = {}
+        for day, count in self.days.items():
+            monday: int = day - (day + 3) % 7
+            weeks[monday] = weeks.get(monday, 0) + count
+        return weeks
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the statistics as a JSON-serializable dictionary.
+        """
+        self.flush()
+        authors: List[Dict[str, Any]] = [
+            {'name': identity.name, 'email': identity.email, 'commits': counters[0],
+             'first': counters[1], 'last': counters[2]}
+            for identity, counters in sorted(self.authors.items(), key=lambda item: (-item[1][0], item[0]))
+        ]
+        return {
+            'commits': self.commits,
+            'first': self.first_time,
+            'last': self.last_time,
+            'authors': authors,
+            'days': {_day_label(day): count for day, count in sorted(self.days.items())},
+            'weeks': {_day_label(monday): count for monday, count in sorted(self.weeks().items())},
+            'hour_of_week': {name: self.hour_of_week[i * 24:(i + 1) * 24] for i, name in enumerate(_WEEKDAYS)},
+        }
+
+
+def _day_label(day: int) -> str:
+    return (_EPOCH_DATE + timedelta(days=day)).isoformat()
+
+
+def collect_stats(repo_path: str, use_mailmap: bool = True) -> CommitStats:
+    """
+    Stream every commit of the repository once through CommitStats.
+
+    :param repo_path: Path to the Git repository
+    :param use_mailmap: Merge identities with the repository's mailmap
+    :return: Filled CommitStats
+    """
+    stats: CommitStats = CommitStats(load_mailmap(repo_path) if use_mailmap else None)
+    with profiler.span('stats.aggregate'):
+        for commit in CommitLoader(repo_path).iter_commits():
+            stats.add(commit)
+        stats.flush()
+    profiler.count('stats.commits', stats.commits)
+    return stats
+
+
+def format_stats(stats: CommitStats, top: int = TOP_AUTHORS) -> str:
+    """
+    Format the statistics as a text report: totals, top authors and an hour-of-week grid.
+    """
+    if not stats.commits:
+        return "No commits."
+    data: Dict[str, Any] = stats.to_dict()
+    first: str = _day_label(stats.first_time // _DAY)
+    last: str = _day_label(stats.last_time // _DAY)
+    lines: List[str] = [
+        f"Commits: {stats.commits} ({first} .. {last}), {len(stats.days)} active days, "
+        f"{len(data['authors'])} authors",
+        "",
+        "Top authors:",
+    ]
+    for author in data['authors'][:top]:
+        lines.append(f"  {author['commits']:>8}  {author['name']} <{author['email']}>  "
+                     f"({_day_label(author['first'] // _DAY)} .. {_day_label(author['last'] // _DAY)})")
+    if len(data['authors']) > top:
+        lines.append(f"  ... and {len(data['authors']) - top} more")
+    lines += ["", "Commits by hour of week (author local time):",
+              "     " + "".join(f"{hour:>5}" for hour in range(24))]
+    for name, counts in data['hour_of_week'].items():
+        lines.append(f"  {name}" + "".join(f"{count:>5}" for count in counts))
+    return "\n".join(lines)
+
+
+def stats_to_json(stats: CommitStats) -> str:
+    """
+    Return the statistics as a JSON string.
+    """
+    output: Dict[str, Any] = stats.to_dict()
+    with profiler.span('json.stats'):
+        return json.dumps(output, indent=2)
@@ -0,0 +1,242 @@
+# File: tree_diff.py
+# TreeDiffer: compare tree objects in-process, skipping unchanged subtrees and caching parsed trees
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .commit_loader import Commit
+from .object_reader import BatchObjectReader
+from .profiling import profiler
+
+EMPTY_TREE: str = '4b825dc642cb6eb9a060e54bf8d69288fbee4904'
+DEFAULT_TREE_CACHE_SIZE: int = 8192  # parsed trees kept; neighbouring commits share most of them
+
+_TREE_MODE: bytes = b'40000'
+
+# One parsed tree entry: (sort key, name, mode, SHA). The sort key is the name, with "/"
+# appended for subtrees, which is the order git stores entries in.
+TreeEntry = Tuple[bytes, bytes, bytes, str]
+
+
+class Change(NamedTuple):
+    status: str              # 'A' (added), 'M' (modified) or 'D' (deleted)
+    path: str
+    old_sha: Optional[str]   # blob SHA before the change; None when added
+    new_sha: Optional[str]   # blob SHA after the change; None when deleted
+
+
+class CommitChanges(NamedTuple):
+    sha: str
+    changes: List[Change]
+    added: int
+    modified: int
+    deleted: int
+
+
+def parse_tree(data: bytes) -> List[TreeEntry]:
+    """
+    Parse the raw content of a tree object.
+
+    :param data: Raw tree object content ("<mode> <name>\\0<20-byte SHA>" entries)
+    :return: Entries in git's stored order
+    """
+    entries: List[TreeEntry] = []
+    pos: int = 0
+    end: int = len(data)
+    while pos < end:
+        space: int = data.index(b' ', pos)
+        nul: int = data.index(b'\0', space)
+        mode: bytes = data[pos:space]
+        name: bytes = data[space + 1:nul]
+        sha: str = data[nul + 1:nul + 21].hex()
+        entries.append((name + b'/' if mode == _TREE_MODE else name, name, mode, sha))
+        pos = nul + 21
+    return entries
+
+
+def _commit_tree(data: bytes) -> str:
+    # The tree header is always the first line of a commit object
+    if not data.startswith(b'tree '):
+        raise ValueError("commit object without a tree header")
+    return data[5:45].decode('ascii')
+
+
+def _decode(path: bytes) -> str:
+    return path.decode('utf-8', errors='surrogateescape')
+
+
+class TreeDiffer:
+    """
+    Computes the changed paths between trees through a BatchObjectReader.
+
+    Both trees' entries are walked in their stored (sorted) order. Entries with equal SHAs
+    are skipped without reading them, so an unchanged subtree costs nothing however large
+    it is. Parsed trees are kept in a bounded LRU cache, which neighbouring commits mostly
+    hit because they share all but a few subtrees.
+    """
+
+    __slots__ = ("reader", "cache_size", "_trees", "hits", "misses")
+
+    def __init__(self, reader: BatchObjectReader, cache_size: int = DEFAULT_TREE_CACHE_SIZE) -> None:
+        """
+        :param reader: Reader used to fetch tree and commit objects
+        :param cache_size: Maximum number of parsed trees to keep
+        """
+        self.reader: BatchObjectReader = reader
+        self.cache_size: int = cache_size
+        self._trees: 'OrderedDict[str, List[TreeEntry]]' = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def read_tree(self, sha: str) -> List[TreeEntry]:
+        """
+        Return the parsed entries of a tree, from the cache when possible.
+
+        :param sha: Tree SHA
+        :return: Entries in git's stored order
+        :raises ValueError: If the object is not a tree
+        """
+        entries: Optional[List[TreeEntry]] = self._trees.get(sha)
+        if entries is not None:
+            self._trees.move_to_end(sha)
+            self.hits += 1
+            return entries
+        self.misses += 1
+        if sha == EMPTY_TREE:
+            entries = []
+        else:
+            obj_type, data = self.reader.read(sha)
+            if obj_type != 'tree':
+                raise ValueError(f"{sha} is a {obj_type}, not a tree")
+            entries = parse_tree(data)
+        self._trees[sha] = entries
+        if len(self._trees) > self.cache_size:
+            self._trees.popitem(last=False)
+        return entries
+
+    def diff_trees(self, old_tree: Optional[str], new_tree: Optional[str]) -> List[Change]:
+        """
+        Compare two trees recursively.
+
+        A path that changes between file and directory is reported as deleted and added.
+        Submodule entries are compared by their commit SHA and never descended into.
+
+        :param old_tree: SHA of the old tree, or None for an empty tree
+        :param new_tree: SHA of the new tree, or None for an empty tree
+        :return: Changes in path order
+        """
+        changes: List[Change] = []
+        self._diff(old_tree, new_tree, b'', changes)
+        return changes
+
+    def _diff(self, old_tree: Optional[str], new_tree: Optional[str], prefix: bytes, changes: List[Change]) -> None:
+        if old_tree == new_tree:
+            return
+        old: List[TreeEntry] = self.read_tree(old_tree) if old_tree else []
+        new: List[TreeEntry] = self.read_tree(new_tree) if new_tree else []
+        i: int = 0
+        j: int = 0
+        while i < len(old) or j < len(new):
+            if j >= len(new) or (i < len(old) and old[i][0] < new[j][0]):
+                key, name, mode, sha = old[i]
+                i += 1
+                if mode == _TREE_MODE:
+                    self._diff(sha, None, prefix + key, changes)
+                else:
+                    changes.append(Change('D', _decode(prefix + name), sha, None))
+            elif i >= len(old) or new[j][0] < old[i][0]:
+                key, name, mode, sha = new[j]
+                j += 1
+                if mode == _TREE_MODE:
+                    self._diff(None, sha, prefix + key, changes)
+                else:
+                    changes.append(Change('A', _decode(prefix + name), None, sha))
+            else:
+                key, name, old_mode, old_sha = old[i]
+                new_mode, new_sha = new[j][2], new[j][3]
+                i += 1
+                j += 1
+                if old_sha == new_sha and old_mode == new_mode:
+                    continue  # identical entry; for a subtree, nothing below it changed either
+                if old_mode == _TREE_MODE:
+                    self._diff(old_sha, new_sha, prefix + key, changes)
+                else:
+                    changes.append(Change('M', _decode(prefix + name), old_sha, new_sha))
+
+    def get_commit_tree(self, sha: str) -> str:
+        """
+        Read a commit object and return its tree SHA.
+        """
+        obj_type, data = self.reader.read(sha)
+        if obj_type != 'commit':
+            raise ValueError(f"{sha} is a {obj_type}, not a commit")
+        return _commit_tree(data)
+
+    def diff_commit(self, commit: Commit, parent_tree: Optional[str] = None) -> CommitChanges:
+        """
+        Compare a commit with its first parent (or with the empty tree for a root commit).
+
+        Merges are compared with their first parent only, i.e. they show what the merge
+        brought into the branch.
+
+        :param commit: Commit to describe
+        :param parent_tree: Tree SHA of the first parent, if already known
+        :return: CommitChanges with the changed paths and add/modify/delete counts
+        """
+        if parent_tree is None and commit.parents:
+            parent_tree = self.get_commit_tree(commit.parents[0])
+        changes: List[Change] = self.diff_trees(parent_tree, commit.tree)
+        counts: Dict[str, int] = {'A': 0, 'M': 0, 'D': 0}
+        for change in changes:
+            counts[change.status] += 1
+        return CommitChanges(commit.sha, changes, counts['A'], counts['M'], counts['D'])
+
+
+def iter_commit_changes(differ: TreeDiffer, commits: Iterable[Commit]) -> Iterator[CommitChanges]:
+    """
+    Describe the changes of many commits, reusing one reader and one tree cache.
+
+    Parent trees are taken from the given commits where possible, so only parents outside
+    the set are read from the repository.
+
+    :param differ: TreeDiffer to use
+    :param commits: Commits to describe (any order)
+    :return: Iterator of CommitChanges, in the order of `commits`
+    """
+    commits = list(commits)
+    trees: Dict[str, str] = {commit.sha: commit.tree for commit in commits}
+    with profiler.span('tree_diff.commits', commits=len(commits)):
+        for commit in commits:
+            parent_tree: Optional[str] = trees.get(commit.parents[0]) if commit.parents else None
+            yield differ.diff_commit(commit, parent_tree)
+    profiler.count('tree_diff.cache_hits', differ.hits)
+    profiler.count('tree_diff.cache_misses', differ.misses)
+
+
+def changes_to_dict(changes: CommitChanges) -> Dict[str, Any]:
+    """
+    Convert CommitChanges into a JSON-serializable dictionary (without the SHA).
+    """
+    return {
+        'added': changes.added,
+        'modified': changes.modified,
+        'deleted': changes.deleted,
+        'paths': [{'status': c.status, 'path': c.path} for c in changes.changes],
+    }
+
+
+def format_changes(changes: CommitChanges, limit: Optional[int] = None) -> List[str]:
+    """
+    Format the changed paths as "<status> <path>" lines, preceded by a counts line.
+
+    :param changes: Changes of one commit
+    :param limit: Maximum number of path lines (default: all)
+    :return: List of lines
+    """
+    lines: List[str] = [f"{len(changes.changes)} path(s) changed: "
+                        f"{changes.added} added, {changes.modified} modified, {changes.deleted} deleted"]
+    shown: List[Change] = changes.changes if limit is None else changes.changes[:limit]
+    lines.extend(f"{c.status} {c.path}" for c in shown)
+    if len(shown) < len(changes.changes):
+        lines.append(f"... and {len(changes.changes) - len(shown)} more")
+    return lines
@@ -1,14 +1,61 @@
 from pathlib import Path
 import os
-from datetime import datetime
-
+import subprocess
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+from rich.markup import escape
+from rich.text import Text
 from textual.app import App, ComposeResult
 from textual.containers import Horizontal, Vertical
-from textual.widgets import Header, Footer, Static, Input, Button, Label, DataTable
+from textual.widgets import Header, Footer, Static, Input, Button, Label, DataTable, Tree, Select
+from textual.widgets.data_table import CellDoesNotExist
 
 from .repo_dir import RepoDir
 from .branch_loader import BranchLoader
 from .commit_loader import CommitLoader
+from .profiling import profiler
+from .ref_watcher import RefWatcher, diff_branches
+from .worktrees import collect_worktree_status, format_worktree
+from .path_index import PathIndex
+from .sha_index import ShaIndex
+from .ref_trie import RefTrie
+from .sort_index import SortIndex, topological_ranks
+from .session_cache import SessionCache, estimate_commit_bytes, estimate_table_bytes
+from .object_reader import BatchObjectReader, read_object_prefix
+from .tree_diff import TreeDiffer, format_changes
+
+
+@lru_cache(maxsize=65536)
+def format_local_time(timestamp: int) -> str:
+    """Formats a Unix timestamp as local time; cached, as imported or rebased history repeats timestamps."""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+class CommitTable(DataTable):
+    """A DataTable whose rows can be put in a precomputed order without rebuilding them."""
+
+    def apply_order(self, row_keys, column) -> None:
+        """
+        Reorders the rows by a given key sequence instead of comparing cells.
+        Keys that are not in the table are skipped; rows that are not listed follow in their current order.
+        The cursor stays on the same row.
+
+        `column` must hold a different value in every row (the short SHAs here): DataTable.sort()
+        passes cell values, not row keys, to the key function.
+        """
+        cursor_key = None
+        if self.row_count:
+            cursor_key = self.coordinate_to_cell_key(self.cursor_coordinate).row_key
+        present = {row_key.value: row_key for row_key in self.rows}
+        ordered = [present.pop(key) for key in row_keys if key in present]
+        ordered.extend(sorted(present.values(), key=self.get_row_index))
+        rank = {self.get_cell(row_key, column): index for index, row_key in enumerate(ordered)}
+        self.sort(column, key=rank.__getitem__)
+        if cursor_key is not None:
+            self.move_cursor(row=self.get_row_index(cursor_key))
 
 
 class GitRepoInspectorTUI(App):
@@ -18,7 +65,22 @@ class GitRepoInspectorTUI(App):
     BINDINGS = [
         ("d", "toggle_dark", "Toggle dark mode"),
         ("q", "quit", "Quit"),
+        ("s", "cycle_commit_sort", "Sort commits"),
+        ("r", "switch_recent_repo", "Previous repo"),
     ]
+    REF_POLL_INTERVAL = 2.0  # seconds between checks for moved refs
+    DETAIL_MAX_PATHS = 200  # changed paths listed in the commit detail view
+    PREVIEW_MAX_BYTES = 64 * 1024  # blob bytes read for the preview pane
+    # Commit table columns: header label and the sort key column behind it
+    COMMIT_COLUMNS = (("SHA (short)", "topo"), ("Author", "author"), ("Date", "date"), ("Subject", "subject"))
+    SORT_DESCENDING_FIRST = {"date"}  # columns whose first click shows the largest values first
+    BRANCH_PAGE_SIZE = 200  # branch tree nodes added per expansion; the rest behind a "more" node
+    SESSION_CACHE_BYTES = 256 * 1024 * 1024  # estimated memory of the inactive repositories kept loaded
+    # State that makes up a loaded repository; kept per path when switching directories. Each
+    # session keeps its own (hidden) commit table, so switching back does not rebuild the rows.
+    SESSION_ATTRIBUTES = ("_repo_dir", "_branch_loader", "_commit_loader", "_ref_watcher", "_known_tips",
+                          "_commits_data_cache", "_commits_by_sha", "_path_index", "_sha_index", "_sort_index", "_ref_trie",
+                          "_path_filter", "_commit_sort", "commit_table", "_commit_columns", "_commit_sha_column")
 
     def __init__(self, repo_path: str = "."):
         super().__init__()
@@ -26,6 +88,22 @@ class GitRepoInspectorTUI(App):
         self._repo_dir: RepoDir | None = None
         self._branch_loader: BranchLoader | None = None
         self._commit_loader: CommitLoader | None = None
+        self._ref_watcher: RefWatcher | None = None
+        self._known_tips: list[str] = []  # ref tips at the time commits were loaded
+        self._commits_by_sha: dict = {}  # SHA -> loaded commit, for the detail view
+        self._path_index: PathIndex | None = None
+        self._path_filter: str | None = None  # path the commit table is filtered to
+        self._tree_differ: TreeDiffer | None = None  # created on first use, shared by detail views
+        self._tree_differ_lock = threading.Lock()
+        self._detail_sha: str | None = None  # commit shown in the detail view
+        self._sha_index: ShaIndex | None = None  # shortest unique abbreviations of the loaded commits
+        self._sort_index: SortIndex | None = None  # sort keys of _commits_data_cache, built on first sort
+        self._commit_sort: tuple[str, bool] | None = None  # (column, reverse); None is load order
+        self._ref_trie: RefTrie | None = None  # branches grouped by "/" segments
+        self._branch_filter = ""  # prefix typed into the branch filter
+        self._branch_nodes: dict = {}  # branch name -> rendered leaf, for in-place SHA updates
+        self._sessions = SessionCache(self.SESSION_CACHE_BYTES)  # recently used repositories, by path
+        self._ref_poll_pending = False  # a ref check is running in a worker thread
         self._load_repo_data()
 
     def _load_repo_data(self):
@@ -34,25 +112,28 @@ class GitRepoInspectorTUI(App):
             self._repo_dir = RepoDir(str(self._repo_path))
             self._branch_loader = BranchLoader(str(self._repo_path))
             self._commit_loader = CommitLoader(str(self._repo_path))
+            self._commits_data_cache = []
+            self._commits_by_sha = {}
+            self._path_index = None
+            self._path_filter = None
+            self._sha_index = None
+            self._sort_index = None
+            self._close_tree_differ()
+            try:
+                self._ref_watcher = RefWatcher(str(self._repo_path))
+            except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+                self._ref_watcher = None  # not a repository; nothing to watch
             # In a real app, you'd update widgets with this data
             # Update RepoDir info widget
             if hasattr(self, 'repo_info_widget'):
-                if self._repo_dir:
-                    repo_dir_info = (
-                        f"[b]RepoDir Information for:[/b] {self._repo_path}\n"
-                        f"  Absolute Git Dir: {self._repo_dir.absolute_git_dir}\n"
-                        f"  Is Bare Repository: {self._repo_dir._is_bare}"
-                    )
-                    if not self._repo_dir._is_bare and self._repo_dir.toplevel_dir:
-                        repo_dir_info += f"\n  Top-Level Directory: {self._repo_dir.toplevel_dir}"
-                    self.repo_info_widget.update(repo_dir_info)
-                else:
-                    # This case should ideally be caught by the exception below,
-                    # but as a fallback:
-                    self.repo_info_widget.update(f"RepoDir could not be initialized for: {self._repo_path}")
+                self._update_repo_info()
+
+            # Update Worktree panel (status is collected in the background)
+            if hasattr(self, 'worktree_widget'):
+                self._update_worktree_panel()
 
-            # Update Branch Table
-            self._update_branch_table()
+            # Update Branch Tree
+            self._update_branch_tree()
 
             # Update Commit Table
             self._update_commit_table()
@@ -61,15 +142,21 @@ class GitRepoInspectorTUI(App):
             self._repo_dir = None
             self._branch_loader = None
             self._commit_loader = None
+            self._ref_watcher = None
+            self._ref_trie = None
             self._commits_data_cache = [] # Clear cache on error
+            self._commits_by_sha = {}
             error_message = f"Error loading repository data for {self._repo_path}:\n[b]{type(e).__name__}:[/b] {e}"
 
             if hasattr(self, 'repo_info_widget'):
                 self.repo_info_widget.update(error_message)
 
-            if hasattr(self, 'branch_table'):
-                self.branch_table.clear()
-                self.branch_table.add_row("Error loading branches.", type(e).__name__)
+            if hasattr(self, 'worktree_widget'):
+                self.worktree_widget.update("Error loading worktrees.")
+
+            if hasattr(self, 'branch_tree'):
+                self.branch_tree.clear()
+                self.branch_tree.root.add_leaf(Text(f"Error loading branches: {type(e).__name__}"))
 
             if hasattr(self, 'commit_table'):
                 self.commit_table.clear()
@@ -79,22 +166,415 @@ class GitRepoInspectorTUI(App):
                 self.commit_detail_view.update("Error loading commit details.")
 
 
-    def _parse_commit_date(self, author_info: str) -> str:
-        """Parses the date from the author/committer string."""
-        try:
-            # Example: "Author Name <email> 1678886400 +0000"
-            parts = author_info.split(' ')
-            timestamp = int(parts[-2])
-            # Convert timestamp to a readable format, e.g., YYYY-MM-DD HH:MM:SS
-            return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-        except (IndexError, ValueError):
+    def _update_repo_info(self) -> None:
+        """Shows the RepoDir information of the current repository."""
+        if self._repo_dir:
+            repo_dir_info = (
+                f"[b]RepoDir Information for:[/b] {self._repo_path}\n"
+                f"  Absolute Git Dir: {self._repo_dir.absolute_git_dir}\n"
+                f"  Is Bare Repository: {self._repo_dir._is_bare}"
+            )
+            if not self._repo_dir._is_bare and self._repo_dir.toplevel_dir:
+                repo_dir_info += f"\n  Top-Level Directory: {self._repo_dir.toplevel_dir}"
+            self.repo_info_widget.update(repo_dir_info)
+        else:
+            # RepoDir() normally raises instead, but as a fallback:
+            self.repo_info_widget.update(f"RepoDir could not be initialized for: {self._repo_path}")
+
+    def _save_session(self) -> bool:
+        """Keeps the loaded state of the current repository for a later switch back."""
+        if self._commit_loader is None:
+            return False  # nothing loaded, or loading failed
+        session = {name: getattr(self, name) for name in self.SESSION_ATTRIBUTES}
+        size = estimate_commit_bytes(self._commits_data_cache) + estimate_table_bytes(self.commit_table.row_count)
+        evicted = self._sessions.put(str(self._repo_path), session, size)
+        for old in evicted:
+            old["commit_table"].remove()
+        return True
+
+    def _restore_session(self) -> bool:
+        """
+        Shows a kept repository without reloading it. Refs that moved in the meantime are
+        found by the session's RefWatcher snapshot and applied incrementally.
+        """
+        session = self._sessions.pop(str(self._repo_path))
+        if session is None:
+            return False
+        with profiler.span('tui.session_restore', commits=len(session["_commits_data_cache"])):
+            self._close_tree_differ()
+            for name, value in session.items():
+                setattr(self, name, value)
+            self._detail_sha = None
+            self.path_filter_input.value = self._path_filter or ""
+            self.commit_detail_view.update("Select a commit to see details.")
+            self.tree_browser.reset(Text("Select a commit to browse its tree."))
+            self.blob_preview.update("Select a file to preview it.")
+            self._update_repo_info()
+            if hasattr(self, 'worktree_widget'):
+                self._update_worktree_panel()
+            self._render_branch_tree()
+        self._poll_refs()  # revalidate against the current ref state
+        return True
+
+    def _create_commit_table(self) -> CommitTable:
+        """Creates an empty commit table and makes it the current one."""
+        self.commit_table = CommitTable(classes="commit_table")
+        self.commit_table.cursor_type = "row"
+        self._commit_columns = self.commit_table.add_columns(*(label for label, _ in self.COMMIT_COLUMNS))
+        self._commit_sha_column = self._commit_columns[0]
+        self._commit_sort = None
+        return self.commit_table
+
+    def _switch_repo(self, new_path: Path) -> None:
+        """Changes to another repository, reusing its session when it was loaded before."""
+        old_table = self.commit_table
+        kept = self._save_session()
+        self._repo_path = new_path
+        self.dir_input.value = str(self._repo_path)
+        if not self._restore_session():
+            # Clear old data and indicate loading
+            self.repo_info_widget.update(f"Attempting to load: {self._repo_path}...")
+            self.branch_tree.clear()
+            self.branch_tree.root.add_leaf(Text("Loading branches..."))
+            self.mount(self._create_commit_table(), after=old_table)
+            self._load_repo_data()
+        if self.commit_table is not old_table:
+            self.commit_table.display = True
+            if kept:
+                old_table.display = False
+            else:
+                old_table.remove()
+        self._update_recent_repos()
+
+    def _update_recent_repos(self) -> None:
+        """Lists the kept repositories in the quick-switch selector, most recent first."""
+        if hasattr(self, 'recent_repos_select'):
+            self.recent_repos_select.set_options((path, path) for path in self._sessions.keys())
+
+    def on_select_changed(self, event: Select.Changed) -> None:
+        """Switches to the repository picked in the quick-switch selector."""
+        if event.select.id == "recent_repos" and isinstance(event.value, str):
+            self._switch_repo(Path(event.value))
+
+    def action_switch_recent_repo(self) -> None:
+        """Switches to the most recently used other repository."""
+        recent = self._sessions.keys()
+        if recent:
+            self._switch_repo(Path(recent[0]))
+
+    def _format_commit_date(self, commit) -> str:
+        """Formats the author timestamp parsed by CommitLoader."""
+        if not commit.author_time:
             return "Unknown Date"
-
-    def _get_author_name(self, author_info: str) -> str:
-        """Extracts the author name from the full author string."""
-        if '<' in author_info:
-            return author_info.split('<', 1)[0].strip()
-        return "Unknown Author"
+        # YYYY-MM-DD HH:MM:SS from the integer timestamp, without a datetime object per row
+        return format_local_time(commit.author_time)
+
+    def _format_author_name(self, commit) -> str:
+        """Returns the author name parsed by CommitLoader."""
+        if commit.author_ident is None or not commit.author_ident.name:
+            return "Unknown Author"
+        return commit.author_ident.name
+
+    def _update_worktree_panel(self):
+        """Lists the worktrees right away and fills in their status from a worker thread."""
+        if self._repo_dir is None or self._repo_dir.absolute_git_dir is None:
+            self.worktree_widget.update("No worktrees (not a Git repository).")
+            return
+        try:
+            worktrees = self._repo_dir.list_worktrees()
+        except (OSError, RuntimeError) as e:
+            self.worktree_widget.update(f"Error listing worktrees: {e}")
+            return
+        self.worktree_widget.update(escape("\n".join(format_worktree(w) for w in worktrees)))
+        self.run_worker(lambda: self._collect_worktree_status(worktrees),
+                        thread=True, exclusive=True, group="worktrees")
+
+    def _collect_worktree_status(self, worktrees) -> None:
+        """Runs git status for all worktrees concurrently (worker thread)."""
+        with profiler.span('tui.worktree_panel', worktrees=len(worktrees)):
+            worktrees = collect_worktree_status(worktrees)
+        self.call_from_thread(self.worktree_widget.update, escape("\n".join(format_worktree(w) for w in worktrees)))
+
+    def _short_sha(self, sha: str) -> str:
+        """Abbreviates a SHA to the shortest prefix that is unique among the loaded commits."""
+        if self._sha_index is None:
+            return sha[:7]
+        return self._sha_index.abbreviate(sha)
+
+    def _commit_row(self, commit) -> tuple:
+        """Builds the commit table cells for one commit."""
+        short_sha = self._short_sha(commit.sha)
+        author_name = self._format_author_name(commit)
+        commit_date = self._format_commit_date(commit)
+        subject = commit.message.split('\n', 1)[0] # First line of message
+        return short_sha, author_name, commit_date, subject
+
+    def _add_commit_rows(self, commits) -> None:
+        """Appends one commit table row per commit."""
+        # Identities and timestamps are parsed once by CommitLoader, so rows are
+        # built from ready fields. Display in load order (often reverse chronological).
+        with profiler.span('tui.commit_table', rows=len(commits)):
+            for commit in commits:
+                self.commit_table.add_row(*self._commit_row(commit), key=commit.sha)
+        if self._commit_sort is not None:
+            self._sort_commit_table(*self._commit_sort)
+
+    def _get_sort_index(self) -> SortIndex:
+        """Extracts the sort keys of all loaded commits once; orderings are cached by the index."""
+        if self._sort_index is None:
+            commits = self._commits_data_cache
+            with profiler.span('tui.sort_index', commits=len(commits)):
+                self._sort_index = SortIndex({
+                    "topo": topological_ranks([c.sha for c in commits], [c.parents for c in commits]),
+                    "author": [self._format_author_name(c).casefold() for c in commits],
+                    "date": [c.author_time for c in commits],
+                    "subject": [c.message.split('\n', 1)[0].casefold() for c in commits],
+                })
+        return self._sort_index
+
+    def _sort_commit_table(self, column: str, reverse: bool) -> None:
+        """Shows the commit table rows ordered by a sort key column."""
+        self._commit_sort = (column, reverse)
+        commits = self._commits_data_cache
+        with profiler.span('tui.commit_table.sort', rows=len(commits)):
+            order = self._get_sort_index().order(column, reverse)
+            self.commit_table.apply_order((commits[i].sha for i in order), self._commit_sha_column)
+        for column_key, (label, sort_column) in zip(self._commit_columns, self.COMMIT_COLUMNS):
+            if sort_column == column:
+                label = f"{label} {'▼' if reverse else '▲'}"
+            self.commit_table.columns[column_key].label = Text(label)
+
+    def on_data_table_header_selected(self, event: DataTable.HeaderSelected) -> None:
+        """Sorts the commit table by the clicked column; clicking it again reverses the order."""
+        if event.data_table is not self.commit_table or not self._commits_data_cache:
+            return
+        column = self.COMMIT_COLUMNS[event.column_index][1]
+        if self._commit_sort is not None and self._commit_sort[0] == column:
+            reverse = not self._commit_sort[1]
+        else:
+            reverse = column in self.SORT_DESCENDING_FIRST
+        self._sort_commit_table(column, reverse)
+
+    def action_cycle_commit_sort(self) -> None:
+        """Sorts the commit table by the next column."""
+        if not self._commits_data_cache:
+            return
+        columns = [sort_column for _, sort_column in self.COMMIT_COLUMNS]
+        current = columns.index(self._commit_sort[0]) if self._commit_sort is not None else -1
+        column = columns[(current + 1) % len(columns)]
+        self._sort_commit_table(column, column in self.SORT_DESCENDING_FIRST)
+
+    def _apply_path_filter(self, path: str) -> None:
+        """Filters the commit table to the commits that changed `path`; an empty path shows all."""
+        if not path:
+            self._path_filter = None
+            self.commit_table.clear()
+            self._add_commit_rows(self._commits_data_cache)
+            return
+        self._path_filter = path
+        self.commit_detail_view.update(f"Looking up history of {path}...")
+        self.run_worker(lambda: self._filter_commits_by_path(path), thread=True, exclusive=True, group="path_filter")
+
+    def _filter_commits_by_path(self, path: str) -> None:
+        """Updates the path index and collects the matching commits (worker thread)."""
+        try:
+            if self._path_index is None:
+                self._path_index = PathIndex(str(self._repo_path))
+            self._path_index.update()
+            shas = set(self._path_index.history(path))
+        except (subprocess.CalledProcessError, OSError) as e:
+            self.call_from_thread(self.commit_detail_view.update, f"Path filter failed: {e}")
+            return
+        commits = [commit for commit in self._commits_data_cache if commit.sha in shas]
+        self.call_from_thread(self._show_path_history, path, commits)
+
+    def _show_path_history(self, path: str, commits) -> None:
+        """Replaces the commit table rows with the history of one path."""
+        if path != self._path_filter:
+            return  # the filter changed while the lookup was running
+        self.commit_table.clear()
+        self.commit_detail_view.update(f"{len(commits)} commit(s) changed {path}.")
+        if commits:
+            self._add_commit_rows(commits)
+        else:
+            self.commit_table.add_row(f"No commits changed {path}.", "", "", "")
+
+    async def on_input_submitted(self, event: Input.Submitted) -> None:
+        """Event handler called when Enter is pressed in an input."""
+        if event.input.id == "path_filter":
+            self._apply_path_filter(event.value.strip())
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """Narrows the branch tree to the typed prefix on every keystroke."""
+        if event.input.id == "branch_filter":
+            self._branch_filter = event.value.strip()
+            self._render_branch_tree()
+
+    def _find_commit(self, sha: str):
+        """Returns the loaded commit with the given SHA, or None."""
+        return self._commits_by_sha.get(sha)
+
+    def _format_commit_details(self, commit, changes=None, error: Optional[str] = None) -> str:
+        """Builds the (unescaped) text of the commit detail view."""
+        lines = [
+            f"Commit:   {commit.sha}",
+            f"Author:   {commit.author_ident.name} <{commit.author_ident.email}>" if commit.author_ident
+            else f"Author:   {self._format_author_name(commit)}",
+            f"Date:     {self._format_commit_date(commit)}",
+            f"Parents:  {' '.join(self._short_sha(p) for p in commit.parents) or '(root commit)'}",
+        ]
+        if commit.branches:
+            lines.append(f"Branches: {', '.join(commit.branches)}")
+        lines += ["", commit.message.rstrip(), ""]
+        if error is not None:
+            lines.append(f"Changes unavailable: {error}")
+        elif changes is None:
+            lines.append("Loading changes...")
+        else:
+            lines += format_changes(changes, limit=self.DETAIL_MAX_PATHS)
+        return "\n".join(lines)
+
+    def on_data_table_row_highlighted(self, event: DataTable.RowHighlighted) -> None:
+        """Shows the highlighted commit and computes its changed paths in the background."""
+        if event.data_table is not self.commit_table or event.row_key is None:
+            return
+        commit = self._find_commit(event.row_key.value)
+        if commit is None:
+            return  # placeholder row such as "No commits found."
+        self._detail_sha = commit.sha
+        self.commit_detail_view.update(escape(self._format_commit_details(commit)))
+        self._open_commit_tree(commit)
+        parent = self._find_commit(commit.parents[0]) if commit.parents else None
+        parent_tree = parent.tree if parent is not None else None
+        self.run_worker(lambda: self._load_commit_changes(commit, parent_tree),
+                        thread=True, exclusive=True, group="commit_changes")
+
+    def _load_commit_changes(self, commit, parent_tree) -> None:
+        """Diffs a commit against its first parent (worker thread)."""
+        try:
+            with self._tree_differ_lock:
+                with profiler.span('tui.commit_changes'):
+                    changes = self._get_tree_differ().diff_commit(commit, parent_tree)
+        except (KeyError, ValueError, RuntimeError, OSError) as e:
+            self.call_from_thread(self._show_commit_details, commit, None, str(e) or type(e).__name__)
+            return
+        self.call_from_thread(self._show_commit_details, commit, changes)
+
+    def _show_commit_details(self, commit, changes, error: Optional[str] = None) -> None:
+        """Updates the detail view unless another commit was highlighted meanwhile."""
+        if commit.sha == self._detail_sha:
+            self.commit_detail_view.update(escape(self._format_commit_details(commit, changes, error)))
+
+    def _get_tree_differ(self) -> TreeDiffer:
+        """Returns the shared TreeDiffer, starting its cat-file process on first use. Hold the lock."""
+        if self._tree_differ is None:
+            self._tree_differ = TreeDiffer(BatchObjectReader(str(self._repo_path)))
+        return self._tree_differ
+
+    def _open_commit_tree(self, commit) -> None:
+        """Shows the root tree of a commit in the tree browser; subtrees load on expansion."""
+        self.tree_browser.reset(Text(f"{self._short_sha(commit.sha)} /"), (commit.tree, "40000", ""))
+        self.blob_preview.update("Select a file to preview it.")
+        self._expand_tree_node(self.tree_browser.root)
+        self.tree_browser.root.expand()
+
+    def _expand_tree_node(self, node) -> None:
+        """Reads the entries of a directory node's tree object in the background, once."""
+        if node.children:
+            return  # loaded or loading; git trees are never empty
+        node.add_leaf(Text("Loading...", style="dim"))
+        # A worker thread: the reader may be busy with a long diff of the highlighted commit
+        self.run_worker(lambda: self._load_tree_entries(node), thread=True, group="tree_expand")
+
+    def _load_tree_entries(self, node) -> None:
+        """Reads a directory node's tree object (worker thread)."""
+        try:
+            with self._tree_differ_lock:
+                with profiler.span('tui.tree_expand'):
+                    entries = self._get_tree_differ().read_tree(node.data[0])
+        except (KeyError, ValueError, RuntimeError, OSError) as e:
+            self.call_from_thread(self._add_tree_entries, node, None, str(e) or type(e).__name__)
+            return
+        self.call_from_thread(self._add_tree_entries, node, entries)
+
+    def _add_tree_entries(self, node, entries, error: Optional[str] = None) -> None:
+        """Replaces the placeholder of a directory node with its entries, unless another commit is shown now."""
+        root = node
+        while root.parent is not None:
+            root = root.parent
+        if root is not self.tree_browser.root:
+            return  # the tree browser was reset meanwhile
+        _, _, path = node.data
+        node.remove_children()
+        if error is not None:
+            node.add_leaf(Text(f"Error reading tree: {error}"))
+            return
+        # Directories first, then files, each in git's order
+        for _, name, entry_mode, entry_sha in sorted(entries, key=lambda e: e[2] != b"40000"):
+            label = name.decode('utf-8', errors='replace')
+            entry_path = f"{path}{label}"
+            entry_mode = entry_mode.decode('ascii')
+            if entry_mode == "40000":
+                node.add(Text(f"{label}/"), (entry_sha, entry_mode, f"{entry_path}/"))
+            elif entry_mode == "160000":
+                node.add_leaf(Text(f"{label} @ {entry_sha[:7]} (submodule)"), (entry_sha, entry_mode, entry_path))
+            else:
+                node.add_leaf(Text(label), (entry_sha, entry_mode, entry_path))
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        """Loads a directory's entries, or a branch group's children, the first time it is expanded."""
+        data = event.node.data
+        if event.control is self.branch_tree:
+            if data is not None and data[0] == "group" and not event.node.children:
+                self._add_branch_nodes(event.node, data[1])
+        elif data is not None and data[1] == "40000":
+            self._expand_tree_node(event.node)
+
+    def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
+        """Previews the selected file in the background, or shows the next page of branches."""
+        data = event.node.data
+        if event.control is self.branch_tree:
+            if data is not None and data[0] == "more":
+                parent = event.node.parent
+                event.node.remove()
+                self._add_branch_nodes(parent, data[1], data[2])
+            return
+        if data is None or data[1] in ("40000", "160000"):
+            return
+        sha, _, path = data
+        self.blob_preview.update(escape(f"Loading {path}..."))
+        self.run_worker(lambda: self._load_blob_preview(sha, path),
+                        thread=True, exclusive=True, group="blob_preview")
+
+    def _load_blob_preview(self, sha: str, path: str) -> None:
+        """Reads the start of a blob, never more than PREVIEW_MAX_BYTES (worker thread)."""
+        try:
+            with profiler.span('tui.blob_preview'):
+                _, size, data = read_object_prefix(str(self._repo_path), sha, self.PREVIEW_MAX_BYTES)
+        except (KeyError, OSError) as e:
+            self.call_from_thread(self.blob_preview.update, escape(f"Cannot read {path}: {e}"))
+            return
+        self.call_from_thread(self.blob_preview.update, escape(self._format_blob_preview(path, size, data)))
+
+    def _format_blob_preview(self, path: str, size: int, data: bytes) -> str:
+        """Builds the (unescaped) preview text of a blob from its first bytes."""
+        header = f"{path} ({size} bytes)"
+        if b"\0" in data[:8000]:
+            return f"{header}\nBinary file, not shown."
+        text = data.decode('utf-8', errors='replace')
+        if len(data) < size:
+            text += f"\n... truncated, showing the first {len(data)} bytes"
+        return f"{header}\n\n{text}"
+
+    def _close_tree_differ(self) -> None:
+        """Stops the cat-file process behind the detail view, if any."""
+        differ, self._tree_differ = getattr(self, '_tree_differ', None), None
+        if differ is not None:
+            differ.reader.close()
+
+    def on_unmount(self) -> None:
+        """Called when the app is shutting down."""
+        self._close_tree_differ()
 
     def _update_commit_table(self):
         """Updates the commit table with data from CommitLoader."""
@@ -105,28 +585,19 @@ class GitRepoInspectorTUI(App):
                 # Cache commits if not already loaded to avoid reloading on every UI update
                 # that doesn't change the repo path.
                 if not self._commits_data_cache: # Simple caching strategy
-                    self._commits_data_cache = self._commit_loader.load_commits()
+                    self._known_tips = self._commit_loader.get_ref_tips()
+                    self._commits_data_cache = self._commit_loader.load_commits(with_raw=False)
+                    self._commits_by_sha = {commit.sha: commit for commit in self._commits_data_cache}
+                    with profiler.span('tui.sha_index', commits=len(self._commits_data_cache)):
+                        self._sha_index = ShaIndex(commit.sha for commit in self._commits_data_cache)
 
                 if self._commits_data_cache:
-                    # Sort commits by date (most recent first) - assuming date is parseable from author string
-                    # This might be slow for very large repos if done every time.
-                    # For simplicity, we'll sort here.
-                    # A more robust way would be to parse and store date objects.
-
-                    # For now, let's display in the order they are loaded, often reverse chronological.
-                    for commit in self._commits_data_cache:
-                        short_sha = commit.sha[:7]
-                        author_name = self._get_author_name(commit.author)
-                        # Assuming author string contains date info that can be parsed
-                        # Example: "User Name <user@example.com> 1625078400 -0700"
-                        # We need to extract and format the date.
-                        commit_date = self._parse_commit_date(commit.author) # Or commit.committer
-                        subject = commit.message.split('\n', 1)[0] # First line of message
-                        self.commit_table.add_row(short_sha, author_name, commit_date, subject, key=commit.sha)
+                    self._add_commit_rows(self._commits_data_cache)
                 else:
                     self.commit_table.add_row("No commits found.", "", "", "")
             except Exception as e:
                 self._commits_data_cache = [] # Clear cache on error
+                self._commits_by_sha = {}
                 self.commit_table.add_row(f"Error: {type(e).__name__}", str(e), "", "")
         else:
             self.commit_table.add_row("CommitLoader not available.", "", "", "")
@@ -136,8 +607,101 @@ class GitRepoInspectorTUI(App):
         # Populate tables on initial load
         self._load_repo_data()
         # Set cursor type for tables to 'row' to enable row selection
-        self.branch_table.cursor_type = "row"
-        self.commit_table.cursor_type = "row"
+        # Pick up new commits and moved branches without a full reload
+        self.set_interval(self.REF_POLL_INTERVAL, self._poll_refs)
+
+    def _poll_refs(self) -> None:
+        """Checks for ref changes in a worker thread, so the git commands never block the event loop."""
+        if self._ref_watcher is None or self._commit_loader is None or self._branch_loader is None:
+            return
+        if self._ref_poll_pending:
+            return  # the previous check is still running
+        self._ref_poll_pending = True
+        watcher, commit_loader, branch_loader = self._ref_watcher, self._commit_loader, self._branch_loader
+        known_tips, known = self._known_tips, self._commits_by_sha
+        self.run_worker(lambda: self._load_ref_changes(watcher, commit_loader, branch_loader, known_tips, known),
+                        thread=True, group="ref_poll")
+
+    def _load_ref_changes(self, watcher, commit_loader, branch_loader, known_tips, known) -> None:
+        """Reads the new ref tips, commits and branch events when the watcher reports a change (worker thread)."""
+        try:
+            if not watcher.poll():
+                self.call_from_thread(self._apply_ref_changes, watcher, None)
+                return
+            new_tips = commit_loader.get_ref_tips()
+            new_commits = [c for c in commit_loader.load_commits_since(known_tips) if c.sha not in known]
+            old_branches = branch_loader.get_branches()
+            branch_loader.branch_map = None
+            branch_events = diff_branches(old_branches, branch_loader.get_branches())
+        except (subprocess.CalledProcessError, OSError) as e:
+            self.call_from_thread(self._apply_ref_changes, watcher, None, str(e))
+            return
+        self.call_from_thread(self._apply_ref_changes, watcher, (new_tips, new_commits, branch_events))
+
+    def _apply_ref_changes(self, watcher, changes, error: Optional[str] = None) -> None:
+        """
+        Patches the branch tree and commit table with the result of _load_ref_changes().
+
+        :param watcher: RefWatcher of the repository the changes were read from
+        :param changes: (new ref tips, new commits newest first, branch events), or None if nothing changed
+        :param error: Why reading the changes failed
+        """
+        self._ref_poll_pending = False
+        if watcher is not self._ref_watcher:
+            # Another repository is shown now; its kept session finds the changes again when restored
+            if changes is not None or error is not None:
+                watcher.invalidate()
+            self._poll_refs()
+            return
+        if error is not None:
+            self.notify(f"Failed to refresh refs: {error}", severity="error")
+            return
+        if changes is None:
+            return
+        new_tips, new_commits, branch_events = changes
+        self._known_tips = new_tips
+        self._patch_branch_tree(branch_events)
+        if new_commits:
+            self._commits_data_cache = new_commits + self._commits_data_cache
+            self._commits_by_sha.update((commit.sha, commit) for commit in new_commits)
+            self._sort_index = None  # rebuilt with the new commits on the next sort
+            lengthened = self._sha_index.add(c.sha for c in new_commits) if self._sha_index is not None else []
+            for sha in lengthened:
+                # A new commit made an abbreviation shown in the table ambiguous
+                try:
+                    self.commit_table.update_cell(sha, self._commit_sha_column, self._short_sha(sha))
+                except CellDoesNotExist:
+                    pass  # not in the table (path filter active)
+            if self._path_filter is None:
+                with profiler.span('tui.commit_table.patch', rows=len(new_commits)):
+                    for commit in new_commits:
+                        self.commit_table.add_row(*self._commit_row(commit), key=commit.sha)
+                    # Rows can only be appended; move them to where the cache and sort put them
+                    if self._commit_sort is not None:
+                        self._sort_commit_table(*self._commit_sort)
+                    else:
+                        self.commit_table.apply_order((c.sha for c in self._commits_data_cache),
+                                                      self._commit_sha_column)
+            self.notify(f"{len(new_commits)} new commit(s) loaded")
+
+    def _patch_branch_tree(self, events) -> None:
+        """Applies ref changes to the branch trie; moved branches are relabelled in place."""
+        if self._ref_trie is None or not events:
+            return
+        with profiler.span('tui.branch_tree.patch', refs=len(events)):
+            regroup = False
+            for event in events:
+                name = event['branch']
+                if event['action'] == 'deleted':
+                    self._ref_trie.remove(name)
+                    regroup = True
+                elif self._ref_trie.insert(name, event['sha']):
+                    regroup = True  # group counts and children changed
+                elif name in self._branch_nodes:
+                    leaf = self._branch_nodes[name]
+                    leaf.set_label(self._branch_label(leaf.data[2], event['sha']))
+            if regroup:
+                self._render_branch_tree()
 
 
     def compose(self) -> ComposeResult:
@@ -147,58 +711,121 @@ class GitRepoInspectorTUI(App):
         # Directory Input Area
         self.dir_input = Input(value=str(self._repo_path), placeholder="Enter repository path")
         self.change_dir_button = Button("Change Directory", id="change_dir")
+        self.recent_repos_select = Select([], prompt="Recent repositories", id="recent_repos")
         yield Horizontal(
             Label("Repo Path:"),
             self.dir_input,
             self.change_dir_button,
+            self.recent_repos_select,
             id="dir_input_bar"
         )
 
         # Main content area
         self.repo_info_widget = Static("RepoDir Info Will Appear Here", id="repo_info")
+        self.worktree_widget = Static("Worktrees Will Appear Here", id="worktree_info")
 
-        self.branch_table = DataTable(id="branch_table")
-        self.branch_table.add_columns("Branch Name", "Commit SHA")
+        self.branch_filter_input = Input(placeholder="Filter branches by prefix", id="branch_filter")
+        self.branch_tree = Tree(Text("Branches"), id="branch_tree")
+        self.branch_tree.show_root = False
 
-        self.commit_table = DataTable(id="commit_table")
-        self.commit_table.add_columns("SHA (short)", "Author", "Date", "Subject")
+        self.path_filter_input = Input(placeholder="Filter commits by path (Enter to apply, empty to clear)",
+                                       id="path_filter")
+        self._create_commit_table()
 
         self.commit_detail_view = Static("Select a commit to see details.", id="commit_detail")
 
+        self.tree_browser = Tree(Text("Select a commit to browse its tree."), id="tree_browser")
+        self.blob_preview = Static("Select a file to preview it.", id="blob_preview")
+
         yield Vertical(
             self.repo_info_widget,
+            Label("[b]Worktrees:[/b]"),
+            self.worktree_widget,
             Label("[b]Branches:[/b]"),
-            self.branch_table,
+            self.branch_filter_input,
+            self.branch_tree,
             Label("[b]Commits:[/b]"),
+            self.path_filter_input,
             self.commit_table,
             Label("[b]Commit Details:[/b]"),
             self.commit_detail_view,
+            Label("[b]Tree:[/b]"),
+            Horizontal(self.tree_browser, self.blob_preview, id="tree_pane"),
             id="main_content"
         )
         yield Footer()
 
-    def _update_branch_table(self):
-        """Updates the branch table with data from BranchLoader."""
-        self.branch_table.clear()
+    def _update_branch_tree(self):
+        """Rebuilds the branch trie from BranchLoader and shows its top level."""
+        self._ref_trie = None
         if self._branch_loader:
             try:
                 branches = self._branch_loader.get_branches()
-                if branches:
-                    sorted_branches = []
-                    for sha, names in branches.items():
-                        for name in names:
-                            sorted_branches.append((name, sha))
-                    sorted_branches.sort(key=lambda x: x[0])
-
-                    for name, sha in sorted_branches:
-                        self.branch_table.add_row(name, sha)
-                else:
-                    self.branch_table.add_row("No branches found.", "")
+                with profiler.span('tui.ref_trie', shas=len(branches)):
+                    self._ref_trie = RefTrie.from_branch_map(branches)
             except Exception as e:
-                self.branch_table.add_row(f"Error loading branches: {type(e).__name__}", str(e))
-        else:
-            self.branch_table.add_row("BranchLoader not available.", "")
-
+                self.branch_tree.clear()
+                self.branch_tree.root.add_leaf(Text(f"Error loading branches: {type(e).__name__}: {e}"))
+                return
+        self._render_branch_tree()
+
+    def _branch_label(self, name: str, sha: str) -> Text:
+        """Builds the label of a branch leaf."""
+        return Text(f"{name}  {self._short_sha(sha)}")
+
+    def _branch_entries(self, path: Optional[str]) -> list:
+        """Lists (path, label, trie node) below a group, or the filter matches for the top level (None)."""
+        if path is None:
+            return [(match_path, match_path, node) for match_path, node in self._ref_trie.match(self._branch_filter)]
+        group = self._ref_trie.node(path)
+        if group is None:
+            return []
+        return [(f"{path}/{name}", name, group.children[name]) for name in group.sorted_names()]
+
+    def _add_branch_nodes(self, parent, path: Optional[str], offset: int = 0) -> None:
+        """Adds one page of branch tree children; groups only show their size until expanded."""
+        entries = self._branch_entries(path)
+        page = entries[offset:offset + self.BRANCH_PAGE_SIZE]
+        with profiler.span('tui.branch_tree', nodes=len(page)):
+            for entry_path, label, node in page:
+                if node.children:
+                    parent.add(Text(f"{label}/ ({node.count})"), ("group", entry_path))
+                else:
+                    self._branch_nodes[entry_path] = parent.add_leaf(
+                        self._branch_label(label, node.sha), ("branch", entry_path, label))
+        rest = len(entries) - offset - len(page)
+        if rest > 0:
+            parent.add_leaf(Text(f"... {rest} more"), ("more", path, offset + len(page)))
+
+    def _render_branch_tree(self) -> None:
+        """Redraws the branch tree for the current filter, keeping expanded groups expanded."""
+        expanded = set()
+        pending = list(self.branch_tree.root.children)
+        while pending:
+            node = pending.pop()
+            if node.data is not None and node.data[0] == "group" and node.is_expanded:
+                expanded.add(node.data[1])
+                pending.extend(node.children)
+        self.branch_tree.clear()
+        self._branch_nodes = {}
+        root = self.branch_tree.root
+        if self._ref_trie is None:
+            root.add_leaf(Text("BranchLoader not available."))
+            return
+        if not len(self._ref_trie):
+            root.add_leaf(Text("No branches found."))
+            return
+        self._add_branch_nodes(root, None)
+        if not root.children:
+            root.add_leaf(Text(f"No branches start with {self._branch_filter}."))
+        pending = list(root.children)
+        while pending:
+            node = pending.pop()
+            if node.data is not None and node.data[0] == "group" and node.data[1] in expanded:
+                self._add_branch_nodes(node, node.data[1])
+                node.expand()
+                pending.extend(node.children)
+        root.expand()
 
     async def on_button_pressed(self, event: Button.Pressed) -> None:
         """Event handler called when a button is pressed."""
@@ -206,16 +833,10 @@ class GitRepoInspectorTUI(App):
             new_path_str = self.dir_input.value
             new_path = Path(new_path_str).resolve()
             if new_path.is_dir():
-                self._repo_path = new_path
-                self.dir_input.value = str(self._repo_path)
-
-                # Clear old data and indicate loading
-                self.repo_info_widget.update(f"Attempting to load: {self._repo_path}...")
-                self.branch_table.clear()
-                self.branch_table.add_row("Loading branches...", "")
-                # self.commit_info_widget.update("...") # For commit loader later
-
-                self._load_repo_data() # This will call _update_branch_table via _load_repo_data
+                if new_path != self._repo_path:
+                    self._switch_repo(new_path)
+                else:
+                    self._load_repo_data()  # same path: reload
             else:
                 self.repo_info_widget.update(f"Error: Path '{new_path_str}' is not a valid directory.")
 
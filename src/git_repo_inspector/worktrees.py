@@ -0,0 +1,208 @@
+# File: worktrees.py
+# Enumerate the worktrees of a repository from its common dir and collect their status in parallel
+
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .governor import governor
+from .profiling import profiler
+
+# git status is mostly I/O bound; more workers than cores still pays off, within reason
+DEFAULT_STATUS_WORKERS: int = min(16, (os.cpu_count() or 1) * 2)
+
+
+class Worktree(NamedTuple):
+    name: str                     # admin directory name under <common dir>/worktrees; '' for the main worktree
+    path: str                     # working tree path recorded by git (the repository itself if bare)
+    admin_dir: str                # per-worktree git dir
+    branch: Optional[str]         # checked-out ref, e.g. refs/heads/main; None if detached
+    head: Optional[str]           # commit SHA when detached or once status has been collected
+    is_main: bool
+    bare: bool
+    locked: Optional[str]         # lock reason ('' if locked without one); None if not locked
+    prunable: bool                # recorded path no longer exists (removed or moved away)
+    moved_to: Optional[str]       # where a prunable worktree actually lives, when known
+    dirty: Optional[bool] = None  # None until status is collected, or when it cannot be
+    changes: int = 0              # number of changed, staged or untracked entries
+    status_error: Optional[str] = None
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _parse_head(content: Optional[str]) -> Dict[str, Optional[str]]:
+    if content and content.startswith('ref: '):
+        return {'branch': content[5:].strip(), 'head': None}
+    return {'branch': None, 'head': content or None}
+
+
+def _same_path(a: Optional[str], b: Optional[str]) -> bool:
+    if not a or not b:
+        return False
+    return os.path.normcase(os.path.realpath(a)) == os.path.normcase(os.path.realpath(b))
+
+
+def get_common_dir(git_dir: str) -> str:
+    """
+    Return the common dir shared by all worktrees of the repository owning `git_dir`.
+
+    Linked worktrees record it in their "commondir" file; otherwise git_dir is the common dir.
+
+    :param git_dir: Absolute path of a (per-worktree) git dir
+    :return: Absolute path of the common dir
+    """
+    common: Optional[str] = _read_text(os.path.join(git_dir, 'commondir'))
+    if common:
+        return os.path.normpath(os.path.join(git_dir, common))
+    return git_dir
+
+
+def list_worktrees(common_dir: str, current_git_dir: Optional[str] = None,
+                   current_toplevel: Optional[str] = None) -> List[Worktree]:
+    """
+    Enumerate the main worktree and every linked worktree registered under `common_dir`.
+
+    This reads git's administrative files directly instead of spawning `git worktree list`.
+    A linked worktree is prunable when its recorded ".git" file no longer exists. If the
+    caller runs inside a worktree whose directory was renamed (its admin dir is
+    `current_git_dir`, but the recorded path differs from `current_toplevel`), the new
+    location is reported in `moved_to`.
+
+    :param common_dir: Absolute path of the repository's common dir
+    :param current_git_dir: Git dir of the worktree the caller is running in, if any
+    :param current_toplevel: Top-level directory of the worktree the caller is running in, if any
+    :return: List of Worktree tuples, main worktree first, linked ones sorted by name
+    """
+    with profiler.span('worktrees.list'):
+        bare_result: subprocess.CompletedProcess = governor.run(
+            ['git', 'config', '--file', os.path.join(common_dir, 'config'), '--bool', 'core.bare'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        bare: bool = bare_result.stdout.strip() == 'true'
+
+        worktrees: List[Worktree] = [Worktree(
+            name='',
+            path=common_dir if bare else os.path.dirname(common_dir),
+            admin_dir=common_dir,
+            is_main=True,
+            bare=bare,
+            locked=None,
+            prunable=False,
+            moved_to=None,
+            **_parse_head(_read_text(os.path.join(common_dir, 'HEAD'))),
+        )]
+
+        admin_root: str = os.path.join(common_dir, 'worktrees')
+        try:
+            names: List[str] = sorted(os.listdir(admin_root))
+        except OSError:
+            names = []
+        for name in names:
+            admin_dir: str = os.path.join(admin_root, name)
+            gitdir_file: Optional[str] = _read_text(os.path.join(admin_dir, 'gitdir'))
+            if gitdir_file is None:
+                continue  # not a worktree admin dir
+            dot_git: str = os.path.normpath(os.path.join(admin_dir, gitdir_file))
+            prunable: bool = not os.path.exists(dot_git)
+            moved_to: Optional[str] = None
+            if current_toplevel and _same_path(admin_dir, current_git_dir) \
+                    and not _same_path(os.path.dirname(dot_git), current_toplevel):
+                moved_to = current_toplevel
+            worktrees.append(Worktree(
+                name=name,
+                path=os.path.dirname(dot_git),
+                admin_dir=admin_dir,
+                is_main=False,
+                bare=False,
+                locked=_read_text(os.path.join(admin_dir, 'locked')),
+                prunable=prunable,
+                moved_to=moved_to,
+                **_parse_head(_read_text(os.path.join(admin_dir, 'HEAD'))),
+            ))
+    profiler.count('worktrees.count', len(worktrees))
+    return worktrees
+
+
+def _collect_one(worktree: Worktree) -> Worktree:
+    if worktree.bare:
+        return worktree
+    path: Optional[str] = worktree.moved_to or (None if worktree.prunable else worktree.path)
+    if path is None:
+        return worktree  # prunable: nothing left to inspect
+    # --no-optional-locks keeps status from refreshing the index, so it never races a user's git
+    cmd: List[str] = ['git', '--no-optional-locks', '-C', path, 'status', '--porcelain=v2', '--branch']
+    result: subprocess.CompletedProcess = governor.run(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        return worktree._replace(status_error=result.stderr.strip() or f"git status exited with {result.returncode}")
+    head: Optional[str] = worktree.head
+    changes: int = 0
+    for line in result.stdout.splitlines():
+        if line.startswith('# branch.oid '):
+            oid: str = line[len('# branch.oid '):]
+            head = None if oid == '(initial)' else oid
+        elif line and not line.startswith('#'):
+            changes += 1
+    return worktree._replace(head=head, dirty=changes > 0, changes=changes)
+
+
+def collect_worktree_status(worktrees: List[Worktree], max_workers: int = DEFAULT_STATUS_WORKERS) -> List[Worktree]:
+    """
+    Run `git status` for all worktrees concurrently over a bounded thread pool.
+
+    :param worktrees: Worktrees from list_worktrees()
+    :param max_workers: Maximum number of concurrent git processes
+    :return: Worktrees in the same order, with dirty/changes/head (or status_error) filled in
+    """
+    if not worktrees:
+        return []
+    with profiler.span('worktrees.status', worktrees=len(worktrees)):
+        with ThreadPoolExecutor(max_workers=governor.workers(max(1, min(max_workers, len(worktrees))))) as pool:
+            return list(pool.map(_collect_one, worktrees))
+
+
+def format_worktree(worktree: Worktree) -> str:
+    """
+    Format one worktree as a single line for the CLI and the TUI panel.
+    """
+    if worktree.bare:
+        state: str = 'bare'
+    elif worktree.status_error:
+        state = f'error: {worktree.status_error}'
+    elif worktree.dirty is None:
+        state = 'missing' if worktree.prunable else 'unknown'
+    else:
+        state = f'dirty ({worktree.changes})' if worktree.dirty else 'clean'
+    if worktree.branch:
+        ref: str = worktree.branch[len('refs/heads/'):] if worktree.branch.startswith('refs/heads/') else worktree.branch
+    elif worktree.head:
+        ref = f'{worktree.head[:7]} (detached)'
+    else:
+        ref = '-'
+    flags: List[str] = []
+    if worktree.is_main:
+        flags.append('main')
+    if worktree.locked is not None:
+        flags.append(f'locked: {worktree.locked}' if worktree.locked else 'locked')
+    if worktree.prunable:
+        flags.append(f'moved to {worktree.moved_to}' if worktree.moved_to else 'prunable')
+    suffix: str = f" [{', '.join(flags)}]" if flags else ''
+    return f"{worktree.path}  {ref}  {state}{suffix}"
+
+
+def worktrees_to_json(worktrees: List[Worktree]) -> str:
+    """
+    Return the worktrees as a JSON string.
+    """
+    output: List[Dict[str, Any]] = [w._asdict() for w in worktrees]
+    with profiler.span('json.worktrees', rows=len(output)):
+        return json.dumps(output, indent=2)
@@ -0,0 +1,34 @@
+# File: git_fixtures.py
+# Throwaway Git repositories for the tests
+
+import subprocess
+from typing import Iterable
+
+USER_NAME: str = 'Tester'
+USER_EMAIL: str = 'tester@example.com'
+
+
+def git(repo_path: str, *args: str) -> str:
+    """
+    Run a git command in a repository.
+
+    :param repo_path: Repository to run in (git -C)
+    :param args: git arguments
+    :return: Standard output without surrounding whitespace
+    :raises subprocess.CalledProcessError: If git fails
+    """
+    return subprocess.run(['git', '-C', repo_path, *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def init_repo(repo_path: str, messages: Iterable[str] = ()) -> None:
+    """
+    Create a repository on branch main that commits as USER_NAME <USER_EMAIL>.
+
+    :param repo_path: Directory to create the repository in (created if missing)
+    :param messages: Messages of empty commits to make on main, oldest first
+    """
+    subprocess.run(['git', 'init', '-q', '-b', 'main', repo_path], check=True)
+    git(repo_path, 'config', 'user.name', USER_NAME)
+    git(repo_path, 'config', 'user.email', USER_EMAIL)
+    for message in messages:
+        git(repo_path, 'commit', '-q', '--allow-empty', '-m', message)
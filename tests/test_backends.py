@@ -0,0 +1,157 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from git_repo_inspector.backends import (BACKENDS, REQUEST_COMMITS, REQUEST_RAW, REQUEST_REFS, BackendError,
+                                         DiskBackend, apply_delta, select_backends)
+from git_repo_inspector.branch_loader import BranchLoader
+from git_repo_inspector.commit_loader import CommitLoader, benchmark_backends
+
+from git_fixtures import git, init_repo
+
+
+class TestBackends(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = self.tmp.name
+        init_repo(self.repo_path)
+        for i in range(5):
+            with open(os.path.join(self.repo_path, 'file.txt'), 'a', encoding='utf-8') as f:
+                f.write(f"line {i}\n" * 50)
+            git(self.repo_path, 'add', 'file.txt')
+            git(self.repo_path, 'commit', '-q', '-m', f"Commit {i}\n\nBody of commit {i}.")
+            if i == 2:
+                git(self.repo_path, 'branch', 'feature/one')
+        git(self.repo_path, 'checkout', '-q', '-b', 'topic', 'feature/one')
+        git(self.repo_path, 'commit', '-q', '--allow-empty', '-m', 'Topic')
+        git(self.repo_path, 'checkout', '-q', 'main')
+        git(self.repo_path, 'merge', '-q', '--no-ff', '-m', 'Merge topic', 'topic')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def load(self, backend, with_raw):
+        return CommitLoader(self.repo_path, backend=backend).load_commits(with_raw=with_raw)
+
+    def assert_backends_agree(self):
+        expected = self.load('cat-file', True)
+        self.assertEqual(len(expected), 7)
+        self.assertEqual(self.load('disk', True), expected)
+        # Without raw objects every backend yields the same commits apart from `raw`
+        for backend in ('cat-file', 'log', 'disk'):
+            self.assertEqual([c._replace(raw='') for c in self.load(backend, False)],
+                             [c._replace(raw='') for c in expected], backend)
+        self.assertEqual(self.load('log', False)[0].raw, '')
+        self.assertEqual(BranchLoader(self.repo_path, backend='disk').get_branches(),
+                         BranchLoader(self.repo_path, backend='cat-file').get_branches())
+
+    def test_loose_objects(self):
+        self.assert_backends_agree()
+
+    def test_packed_objects_and_refs(self):
+        git(self.repo_path, 'gc', '-q', '--aggressive')
+        self.assertFalse(os.listdir(os.path.join(self.repo_path, '.git', 'refs', 'heads', 'feature')))
+        self.assert_backends_agree()
+        # A branch updated after packing overrides its packed-refs entry
+        git(self.repo_path, 'branch', '-f', 'feature/one', 'main')
+        head = git(self.repo_path, 'rev-parse', 'HEAD')
+        self.assertIn('feature/one', DiskBackend(self.repo_path).list_branches()[head])
+
+    def test_disk_reads_deltified_objects(self):
+        git(self.repo_path, 'repack', '-adfq', '--depth=10', '--window=10')
+        disk = DiskBackend(self.repo_path)
+        for line in git(self.repo_path, 'cat-file', '--batch-all-objects', '--batch-check').splitlines():
+            sha, obj_type, _ = line.split()
+            content = subprocess.run(['git', '-C', self.repo_path, 'cat-file', obj_type, sha],
+                                     check=True, capture_output=True).stdout
+            self.assertEqual(disk.read_object(sha), (obj_type, content))
+        with self.assertRaises(BackendError):
+            disk.read_object('0' * 40)
+        disk.close()
+
+    def test_disk_survives_concurrent_repack(self):
+        git(self.repo_path, 'repack', '-adq')
+        head = git(self.repo_path, 'rev-parse', 'HEAD')
+        pack_dir = os.path.join(self.repo_path, '.git', 'objects', 'pack')
+
+        def repack():
+            # git repack -a -d: write a new pack, then delete the old ones
+            old_packs = [os.path.join(pack_dir, name) for name in os.listdir(pack_dir)]
+            git(self.repo_path, 'commit', '-q', '--allow-empty', '-m', 'Repacked')
+            git(self.repo_path, 'repack', '-adq')
+            for path in old_packs:
+                if os.path.exists(path):
+                    os.unlink(path)
+
+        disk = DiskBackend(self.repo_path)
+        disk._packs = disk._load_packs()  # indexes loaded, packs not opened yet
+        repack()
+        self.assertEqual(disk.read_object(head)[0], 'commit')  # found again after a rescan
+
+        disk = DiskBackend(self.repo_path)
+        disk._packs = disk._load_packs()
+        repack()
+        with self.assertRaises(BackendError):
+            disk._read_binary(bytes.fromhex(head))  # without rescanning
+        self.assertIsNone(disk._packs)  # dropped, so the next read rescans
+        self.assertEqual(disk.read_object(head)[0], 'commit')
+        disk.close()
+
+        with patch('git_repo_inspector.backends.os.stat', side_effect=FileNotFoundError('gone')):
+            with self.assertRaises(BackendError):
+                DiskBackend(self.repo_path)._load_packs()
+        # The loaders fall back to git
+        expected = BranchLoader(self.repo_path, backend='cat-file').get_branches()
+        with patch('git_repo_inspector.backends._read_packed_refs', side_effect=PermissionError('denied')):
+            self.assertEqual(BranchLoader(self.repo_path).get_branches(), expected)
+
+    def test_apply_delta(self):
+        base = b"hello world"
+        # sizes 11 -> 9, copy base[0:6], insert "git"
+        delta = bytes([11, 9, 0x80 | 0x10, 6, 3]) + b"git"
+        self.assertEqual(apply_delta(base, delta), b"hello git")
+        with self.assertRaises(BackendError):
+            apply_delta(b"short", delta)
+
+    def test_selection_by_capability(self):
+        self.assertEqual([b.name for b in select_backends(self.repo_path, REQUEST_RAW)], ['cat-file', 'disk'])
+        self.assertEqual(select_backends(self.repo_path, REQUEST_COMMITS)[0].name, 'log')
+        self.assertEqual(select_backends(self.repo_path, REQUEST_REFS)[0].name, 'disk')
+        with self.assertRaises(BackendError):
+            select_backends(self.repo_path, REQUEST_RAW, 'log')
+        with self.assertRaises(BackendError):
+            select_backends(self.repo_path, REQUEST_RAW, 'missing')
+
+        # Alternates are not followed by the disk backend, so it steps aside
+        with open(os.path.join(self.repo_path, '.git', 'objects', 'info', 'alternates'), 'w') as f:
+            f.write('/nonexistent\n')
+        self.assertEqual([b.name for b in select_backends(self.repo_path, REQUEST_REFS)], ['cat-file'])
+        self.assertFalse(DiskBackend.available('/nonexistent/repo'))
+
+    def test_falls_back_when_a_backend_fails(self):
+        expected = self.load('cat-file', True)
+        with patch.object(BACKENDS['cat-file'], 'iter_raw_commits', side_effect=BackendError("boom")):
+            self.assertEqual(CommitLoader(self.repo_path).load_commits(), expected)  # read by the disk backend
+            with self.assertRaises(BackendError):
+                self.load('cat-file', True)
+
+    def test_benchmark_backends(self):
+        git(self.repo_path, 'commit', '-q', '--allow-empty', '-m', 'Überarbeitung — 日本語')
+        commit_bytes = sum(int(line.split()[2]) for line in subprocess.run(
+            ['git', '-C', self.repo_path, 'cat-file', '--batch-check'], input=git(self.repo_path, 'rev-list', '--all'),
+            check=True, capture_output=True, text=True).stdout.splitlines())
+        results = benchmark_backends(self.repo_path, repeat=1)
+        self.assertEqual({(r.backend, r.request) for r in results},
+                         {(name, request) for name, backend in BACKENDS.items() for request in backend.capabilities})
+        for result in results:
+            self.assertIsNone(result.error)
+            self.assertEqual(result.items, 3 if result.request == REQUEST_REFS else 8)
+            self.assertEqual(result.bytes, 0 if result.request == REQUEST_REFS else commit_bytes)  # not characters
+            self.assertGreater(result.seconds, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import subprocess
+import tempfile
+import os
+
+from benchmarks.repo_generator import RepoSpec, generate_repo, cached_repo
+from benchmarks.import_budget import parse_importtime
+from benchmarks.run import compare, summarize
+
+
+class TestRepoGenerator(unittest.TestCase):
+
+    def test_generate_repo(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            spec = RepoSpec(commits=60, branches=4, merge_density=0.3, message_size=40, files=10)
+            path = generate_repo(os.path.join(tmp, "repo"), spec)
+            count = subprocess.run(["git", "-C", path, "rev-list", "--all", "--count"],
+                                   check=True, capture_output=True, text=True).stdout.strip()
+            self.assertEqual(int(count), 60)
+            merges = subprocess.run(["git", "-C", path, "rev-list", "--all", "--merges", "--count"],
+                                    check=True, capture_output=True, text=True).stdout.strip()
+            self.assertGreater(int(merges), 0)
+            branches = subprocess.run(["git", "-C", path, "for-each-ref", "--format=%(refname:short)", "refs/heads/"],
+                                      check=True, capture_output=True, text=True).stdout.split()
+            self.assertIn("main", branches)
+            self.assertLessEqual(len(branches), 4)
+
+    def test_cached_repo_reused(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            spec = RepoSpec(commits=5, branches=1)
+            first = cached_repo(tmp, spec)
+            mtime = os.path.getmtime(os.path.join(first, "generated-by-benchmarks"))
+            second = cached_repo(tmp, spec)
+            self.assertEqual(first, second)
+            self.assertEqual(mtime, os.path.getmtime(os.path.join(second, "generated-by-benchmarks")))
+
+
+class TestCompare(unittest.TestCase):
+
+    def test_compare_flags_regressions(self):
+        baseline = {'repositories': {'repo': {'fast': summarize([1.0]), 'slow': summarize([1.0])}}}
+        current = {'repositories': {'repo': {'fast': summarize([1.1]), 'slow': summarize([2.0]),
+                                             'new': summarize([5.0])}}}
+        regressions = compare(current, baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("slow", regressions[0])
+
+
+class TestImportBudget(unittest.TestCase):
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |   _io\n"
+            "import time:       200 |       1500 | json\n"
+            "import time:       300 |       2500 | git_repo_inspector\n"
+            "import time:       400 |        400 |     git_repo_inspector.profiling\n"
+        )
+        total_ms, modules = parse_importtime(stderr)
+        self.assertEqual(total_ms, 4.0)
+        self.assertEqual(modules, {'_io', 'json', 'git_repo_inspector', 'git_repo_inspector.profiling'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from git_repo_inspector.change_feed import (RefSnapshot, iter_changes, read_snapshot, take_snapshot,
+                                            write_snapshot)
+from git_repo_inspector.commit_loader import CommitLoader
+
+from git_fixtures import git, init_repo
+
+
+class TestChangeFeed(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = os.path.join(self.tmp.name, 'repo')
+        self.snapshot_path = os.path.join(self.tmp.name, 'state', 'snapshot.json')
+        init_repo(self.repo_path)
+        for i in range(4):
+            self.commit(f"Commit {i}")
+        git(self.repo_path, 'branch', 'feature')
+        git(self.repo_path, 'branch', 'old')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def commit(self, message):
+        git(self.repo_path, 'commit', '-q', '--allow-empty', '-m', message)
+        return git(self.repo_path, 'rev-parse', 'HEAD')
+
+    def run_feed(self):
+        previous = read_snapshot(self.snapshot_path)
+        loader = CommitLoader(self.repo_path)
+        current = take_snapshot(loader)
+        events = list(iter_changes(loader, previous, current))
+        write_snapshot(self.snapshot_path, current)
+        return events
+
+    def test_first_run_reports_everything(self):
+        events = self.run_feed()
+        self.assertEqual([(e['action'], e['branch']) for e in events if e['event'] == 'branch'],
+                         [('created', 'feature'), ('created', 'main'), ('created', 'old')])
+        self.assertEqual(len([e for e in events if e['event'] == 'commit']), 4)
+        self.assertEqual(self.run_feed(), [])  # nothing changed since
+
+    def test_branch_and_commit_events(self):
+        self.run_feed()
+        old_main = git(self.repo_path, 'rev-parse', 'main')
+        base = git(self.repo_path, 'rev-parse', 'main~2')
+        new_main = self.commit('Fast-forward')
+        git(self.repo_path, 'checkout', '-q', 'feature')
+        git(self.repo_path, 'reset', '-q', '--hard', base)
+        rewritten = self.commit('Rewritten')
+        git(self.repo_path, 'branch', '-D', 'old')
+        git(self.repo_path, 'branch', 'added', base)
+
+        events = self.run_feed()
+        self.assertEqual([e for e in events if e['event'] == 'branch'], [
+            {'event': 'branch', 'action': 'created', 'branch': 'added', 'sha': base},
+            {'event': 'branch', 'action': 'force-pushed', 'branch': 'feature', 'sha': rewritten, 'old_sha': old_main},
+            {'event': 'branch', 'action': 'moved', 'branch': 'main', 'sha': new_main, 'old_sha': old_main},
+            {'event': 'branch', 'action': 'deleted', 'branch': 'old', 'old_sha': old_main},
+        ])
+        # Only the newly reachable commits are walked
+        self.assertEqual(sorted(e['sha'] for e in events if e['event'] == 'commit'), sorted([new_main, rewritten]))
+
+    def test_fast_forward_through_old_history(self):
+        self.run_feed()
+        git(self.repo_path, 'checkout', '-q', '-b', 'topic', 'main~1')
+        self.commit('Topic')
+        git(self.repo_path, 'checkout', '-q', 'main')
+        git(self.repo_path, 'merge', '-q', '--no-edit', 'topic')
+        git(self.repo_path, 'branch', '-f', 'old', 'main~3')  # moved back: drops commits
+        actions = {e['branch']: e['action'] for e in self.run_feed() if e['event'] == 'branch'}
+        self.assertEqual(actions, {'main': 'moved', 'topic': 'created', 'old': 'force-pushed'})
+
+    def test_invalid_snapshot(self):
+        self.assertIsNone(read_snapshot(self.snapshot_path))
+        write_snapshot(self.snapshot_path, RefSnapshot({'main': 'a' * 40}, ['a' * 40]))
+        self.assertEqual(read_snapshot(self.snapshot_path), RefSnapshot({'main': 'a' * 40}, ['a' * 40]))
+        with open(self.snapshot_path, 'w') as f:
+            f.write('[1, 2')
+        with self.assertRaises(RuntimeError):
+            read_snapshot(self.snapshot_path)
+
+    def test_cli(self):
+        src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+        def changes():
+            result = subprocess.run([sys.executable, '-m', 'git_repo_inspector', 'changes', self.repo_path,
+                                     '--since-snapshot', self.snapshot_path],
+                                    capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=src))
+            self.assertEqual(result.returncode, 0, result.stderr)
+            return [json.loads(line) for line in result.stdout.splitlines()]
+
+        self.assertEqual(len(changes()), 3 + 4)
+        sha = self.commit('New')
+        self.assertEqual([(e['event'], e['sha']) for e in changes()], [('branch', sha), ('commit', sha)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from git_repo_inspector.commit_cache import CommitCache, record_size
+from git_repo_inspector.commit_loader import CommitLoader
+
+from git_fixtures import git, init_repo
+
+
+class TestCommitCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = os.path.join(self.tmp.name, 'origin')
+        self.cache_path = os.path.join(self.tmp.name, 'cache', 'commits.sqlite3')
+        init_repo(self.repo_path, (f"Commit {i}\n\nBody {i}." for i in range(6)))
+        git(self.repo_path, 'branch', 'feature')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fork(self, name, commits=1):
+        path = os.path.join(self.tmp.name, name)
+        subprocess.run(['git', 'clone', '-q', '--no-local', self.repo_path, path], check=True)
+        for i in range(commits):
+            subprocess.run(['git', '-C', path, '-c', 'user.name=Forker', '-c', 'user.email=fork@example.com',
+                            'commit', '-q', '--allow-empty', '-m', f"{name} {i}"], check=True)
+        return path
+
+    def test_cached_loads_match_direct_loads(self):
+        expected = CommitLoader(self.repo_path).load_commits()
+        with CommitCache(self.cache_path) as cache:
+            self.assertEqual(CommitLoader(self.repo_path, cache=cache).load_commits(with_raw=False),
+                             CommitLoader(self.repo_path).load_commits(with_raw=False))
+            self.assertEqual((cache.hits, cache.misses), (0, 6))
+            # Records stored without raw objects are completed by the first load that needs them
+            self.assertEqual(CommitLoader(self.repo_path, cache=cache).load_commits(), expected)
+            self.assertEqual((cache.hits, cache.misses), (0, 12))
+            self.assertEqual(CommitLoader(self.repo_path, cache=cache).load_commits(), expected)
+            self.assertEqual((cache.hits, cache.misses), (6, 12))
+            self.assertEqual(len(cache), 6)
+            self.assertEqual(cache.total_bytes(), sum(record_size(c) for c in expected))
+
+    def test_forks_read_their_union_once(self):
+        forks = [self.fork('fork-a', 2), self.fork('fork-b', 3)]
+        with CommitCache(self.cache_path) as cache:
+            CommitLoader(self.repo_path, cache=cache).load_commits(with_raw=False)
+            for path in forks:
+                commits = CommitLoader(path, cache=cache).load_commits(with_raw=False)
+                # Shared commits come from the cache but carry this repository's branches
+                self.assertEqual(commits[-1].branches, [])
+                self.assertEqual(commits[0].branches, ['main'])
+            self.assertEqual(cache.misses, 6 + 2 + 3)
+            self.assertEqual(cache.hits, 6 + 6)
+            self.assertEqual(len(cache), 11)
+
+    def test_shared_between_processes(self):
+        fork = self.fork('fork')
+        src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+        def scan(*paths):
+            result = subprocess.run([sys.executable, '-m', 'git_repo_inspector', 'scan', '--json',
+                                     '--commit-cache', self.cache_path, *paths],
+                                    capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=src))
+            self.assertEqual(result.returncode, 0, result.stderr)
+            return json.loads(result.stdout)
+
+        first = scan(self.repo_path)
+        self.assertEqual(first['totals']['read'], 6)
+        second = scan(fork, self.repo_path)
+        self.assertEqual([(r['read'], r['cached']) for r in second['repositories']], [(1, 6), (0, 6)])
+        self.assertEqual(second['cache']['records'], 7)
+        with CommitCache(self.cache_path) as cache:
+            self.assertEqual(len(cache.get_many(CommitLoader(fork).get_commit_shas())), 7)
+
+    def test_evicts_least_recently_used(self):
+        commits = CommitLoader(self.repo_path).load_commits()
+        limit = sum(record_size(c) for c in commits[:4])
+        with CommitCache(self.cache_path, max_bytes=limit) as cache:
+            for now, commit in enumerate(reversed(commits)):  # the oldest commit is used first
+                with patch('git_repo_inspector.commit_cache.time.time', return_value=1000.0 + now):
+                    cache.put_many([commit])
+            self.assertLessEqual(cache.total_bytes(), limit)
+            kept = cache.get_many(c.sha for c in commits)
+            self.assertIn(commits[0].sha, kept)
+            self.assertNotIn(commits[-1].sha, kept)
+
+    def test_unusable_cache_is_skipped(self):
+        os.makedirs(self.cache_path)  # a directory where the database file should be
+        cache = CommitCache(self.cache_path)
+        self.assertEqual(CommitLoader(self.repo_path, cache=cache).load_commits(),
+                         CommitLoader(self.repo_path).load_commits())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,7 @@ import json
 import hashlib
 from typing import List, Dict, Optional, Tuple, Any
 
-from git_repo_inspector.commit_loader import CommitLoader, Commit
+from git_repo_inspector.commit_loader import CommitLoader, Commit, Identity, parse_identity
 from git_repo_inspector.branch_loader import BranchLoader
 import subprocess
 
@@ -91,6 +91,13 @@ class TestCommitLoader(unittest.TestCase):
         self.assertEqual(commits[1].branches, ["feature"])
         self.assertEqual(commits[1].raw, commit_raw_2.decode('utf-8'))
 
+        # Identities and timestamps are parsed at load time and interned across commits
+        self.assertEqual(commits[0].author_ident, Identity("Author Name", "author@example.com"))
+        self.assertEqual(commits[0].committer_ident, Identity("Committer Name", "committer@example.com"))
+        self.assertEqual(commits[0].author_time, 1234567890)
+        self.assertEqual(commits[0].author_tz, 0)
+        self.assertIs(commits[0].author_ident, commits[1].author_ident)
+
         mock_popen.assert_called_once_with(
             ['git', '-C', self.mock_repo_path, 'cat-file', '--batch'],
             stdin=subprocess.PIPE, stdout=subprocess.PIPE
@@ -99,6 +106,32 @@ class TestCommitLoader(unittest.TestCase):
         mock_proc.stdin.write.assert_any_call(b"commit_sha_2\n")
         mock_proc.stdin.close.assert_called_once()
 
+    def test_parse_identity(self):
+        identity, epoch, tz = parse_identity(b"Jane Doe <jane@example.com> 1678886400 +0900")
+        self.assertEqual(identity, Identity("Jane Doe", "jane@example.com"))
+        self.assertEqual(epoch, 1678886400)
+        self.assertEqual(tz, 540)
+
+        _, _, tz = parse_identity(b"Jane Doe <jane@example.com> 1678886400 -0130")
+        self.assertEqual(tz, -90)
+
+        # Names may contain angle brackets; the email is the last <...> group
+        identity, _, _ = parse_identity(b"A <b> C <c@example.com> 1 +0000")
+        self.assertEqual(identity, Identity("A <b> C", "c@example.com"))
+
+    def test_parse_identity_interning(self):
+        cache = {}
+        first, _, _ = parse_identity(b"Jane <jane@example.com> 1 +0000", cache)
+        second, _, _ = parse_identity(b"Jane <jane@example.com> 2 +0100", cache)
+        self.assertIs(first, second)
+        self.assertEqual(len(cache), 1)
+
+    def test_parse_identity_malformed(self):
+        self.assertEqual(parse_identity(b"no email here"), (None, 0, 0))
+        identity, epoch, tz = parse_identity(b"Jane <jane@example.com> notanumber")
+        self.assertEqual(identity, Identity("Jane", "jane@example.com"))
+        self.assertEqual((epoch, tz), (0, 0))
+
     def test_verify_commit_valid(self):
         # Create a dummy commit with known raw content and SHA
         raw_content = "tree 4b825dc642cb6eb9a060e54bf8d69288fbee4904\nauthor Test User <test@example.com> 1678886400 +0000\ncommitter Test User <test@example.com> 1678886400 +0000\n\nInitial commit\n"
@@ -3,8 +3,9 @@ import subprocess
 import tempfile
 import os
 import json
+from unittest.mock import patch
 
-from git_repo_inspector.commit_loader import CommitLoader
+from git_repo_inspector.commit_loader import CommitLoader, split_shards
 
 class TestCommitLoaderIntegration(unittest.TestCase):
     def setUp(self):
@@ -65,6 +66,40 @@ class TestCommitLoaderIntegration(unittest.TestCase):
         finally:
             repo_dir.cleanup()
 
+    def test_parallel_load_matches_serial(self):
+        repo_dir, repo_path, *_ = self._create_repo()
+        try:
+            for i in range(5):
+                subprocess.run(["git", "-C", repo_path, "commit", "--allow-empty", "-m", f"more {i}"],
+                               check=True, capture_output=True)
+            serial = CommitLoader(repo_path=repo_path).load_commits()
+            with patch('git_repo_inspector.commit_loader.PARALLEL_MIN_COMMITS', 1), \
+                    patch('git_repo_inspector.commit_loader.MIN_SHARD_SIZE', 2):
+                parallel = CommitLoader(repo_path=repo_path, jobs=2).load_commits()
+            self.assertEqual(parallel, serial)
+            self.assertIs(parallel[0].author_ident, parallel[1].author_ident)
+        finally:
+            repo_dir.cleanup()
+
+    def test_split_shards(self):
+        items = [str(i) for i in range(10)]
+        shards = split_shards(items, workers=2, min_size=3)
+        self.assertEqual(len(shards), 3)
+        self.assertEqual(sum(shards, []), items)
+        self.assertEqual(split_shards(items, workers=8, min_size=100), [items])
+
+    def test_iter_commits(self):
+        repo_dir, repo_path, sha_main, sha_feature = self._create_repo()
+        try:
+            loader = CommitLoader(repo_path=repo_path)
+            self.assertEqual([c.sha for c in loader.iter_commits()], [sha_feature, sha_main])
+            # Stopping early must not leave processes behind or raise
+            commits = loader.iter_commits()
+            self.assertEqual(next(commits).sha, sha_feature)
+            commits.close()
+        finally:
+            repo_dir.cleanup()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import tempfile
+import threading
+import os
+
+from git_repo_inspector.daemon import (
+    NOT_FOUND, QueryDaemon, QueryError, RepoState, execute, query, query_or_load, unix_sockets_supported
+)
+
+from git_fixtures import git, init_repo
+
+
+class TestRepoState(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.TemporaryDirectory()
+        self.repo_path = self.repo_dir.name
+        init_repo(self.repo_path, ["initial", "second"])
+
+    def tearDown(self):
+        self.repo_dir.cleanup()
+
+    def test_queries(self):
+        state = RepoState(self.repo_path)
+        head = git(self.repo_path, "rev-parse", "HEAD")
+        self.assertEqual(execute(state, 'branches', {}), [{'branch': 'main', 'sha': head}])
+        commit = execute(state, 'commit', {'sha': head[:7]})
+        self.assertEqual(commit['sha'], head)
+        self.assertEqual(commit['branches'], ['main'])
+        page = execute(state, 'commits', {'grep': 'INITIAL', 'limit': 10})
+        self.assertEqual(page['total'], 1)
+        self.assertEqual(page['commits'][0]['message'].strip(), 'initial')
+        self.assertEqual(execute(state, 'stats', {})['commits'], 2)
+        with self.assertRaises(QueryError) as cm:
+            execute(state, 'commit', {'sha': '0000000'})
+        self.assertEqual(cm.exception.code, NOT_FOUND)
+
+    def test_refresh_is_incremental_and_updates_branches(self):
+        state = RepoState(self.repo_path)
+        old_head = git(self.repo_path, "rev-parse", "HEAD")
+        self.assertEqual(len(state.commits), 2)
+        self.assertFalse(state.refresh())
+        git(self.repo_path, "commit", "--allow-empty", "-m", "third")
+        self.assertTrue(state.refresh())
+        self.assertEqual(len(state.commits), 3)
+        self.assertEqual(state.commits[0].message.strip(), 'third')
+        self.assertEqual(execute(state, 'commit', {'sha': old_head})['branches'], [])
+        self.assertEqual(execute(state, 'stats', {})['commits'], 3)
+
+    def test_refresh_reloads_after_rewind(self):
+        state = RepoState(self.repo_path)
+        self.assertEqual(len(state.commits), 2)
+        git(self.repo_path, "reset", "-q", "--hard", "HEAD~1")
+        self.assertTrue(state.refresh())
+        self.assertEqual([c.message.strip() for c in state.commits], ['initial'])
+
+    @unittest.skipUnless(unix_sockets_supported(), "requires Unix domain sockets")
+    def test_daemon_round_trip_and_fallback(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            socket_path = os.path.join(tmp, "d.sock")
+            result, served = query_or_load(self.repo_path, 'commits', {'limit': 1}, socket_path)
+            self.assertFalse(served)
+            self.assertEqual(result['total'], 2)
+
+            daemon = QueryDaemon(socket_path)
+            thread = threading.Thread(target=daemon.serve_forever)
+            thread.start()
+            try:
+                for _ in range(100):
+                    if os.path.exists(socket_path):
+                        break
+                    threading.Event().wait(0.05)
+                result, served = query_or_load(self.repo_path, 'commits', {'limit': 1}, socket_path)
+                self.assertTrue(served)
+                self.assertEqual(result['total'], 2)
+                self.assertEqual(len(result['commits']), 1)
+                self.assertEqual(query('ping', socket_path=socket_path)['repositories'],
+                                 [os.path.realpath(self.repo_path)])
+                with self.assertRaises(QueryError):
+                    query('nonsense', {'repo': self.repo_path}, socket_path)
+            finally:
+                query('shutdown', socket_path=socket_path)
+                thread.join(5)
+            self.assertFalse(thread.is_alive())
+            self.assertFalse(os.path.exists(socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from git_repo_inspector.commit_loader import CommitLoader
+from git_repo_inspector.deadline import Deadline, PartialLoad, make_cursor, resume_index
+from git_repo_inspector.profiling import Profiler
+
+from git_fixtures import git, init_repo
+
+
+class CountdownDeadline(Deadline):
+    """A deadline that passes after a number of checks, for reproducible partial loads."""
+
+    __slots__ = ('checks',)
+
+    def __init__(self, checks):
+        super().__init__(60.0)
+        self.checks = checks
+
+    def expired(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+class TestCursor(unittest.TestCase):
+
+    def test_resume_index(self):
+        shas = ['c', 'b', 'a']
+        self.assertEqual(resume_index(shas, None), 0)
+        self.assertEqual(resume_index(shas, make_cursor(shas, 0)), 0)
+        self.assertEqual(resume_index(shas, make_cursor(shas, 2)), 2)
+        # New commits on top shift the positions; the last commit loaded is found again
+        self.assertEqual(resume_index(['e', 'd'] + shas, make_cursor(shas, 2)), 4)
+        self.assertEqual(resume_index(['x', 'y'], make_cursor(shas, 2)), 0)  # rewritten: start over
+        with self.assertRaises(ValueError):
+            resume_index(shas, 'abc')
+
+    def test_watch_kills_process(self):
+        proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        Deadline(0.1).watch(proc)
+        self.assertNotEqual(proc.wait(10), 0)
+
+
+class TestDeadlineLoading(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = self.tmp.name
+        # Large enough that git blocks on a full pipe when the reader stops early
+        init_repo(self.repo_path, (f"Commit {i}\n\n{'x' * 8000}" for i in range(20)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_complete_within_budget(self):
+        loader = CommitLoader(self.repo_path)
+        self.assertEqual(loader.load_commits_until(Deadline(60)), PartialLoad(loader.load_commits(), True))
+        self.assertEqual(loader.get_branches_until(Deadline(60)), PartialLoad(loader.get_branches(), True))
+
+    def test_partial_loads_resume(self):
+        expected = CommitLoader(self.repo_path).load_commits()
+        for backend in ('cat-file', 'disk', 'log'):
+            with_raw = backend != 'log'
+            loaded = []
+            cursor = None
+            for _ in range(len(expected)):
+                loader = CommitLoader(self.repo_path, backend=backend)
+                result = loader.load_commits_until(CountdownDeadline(6), with_raw=with_raw, cursor=cursor)
+                loaded += result.items
+                cursor = result.cursor
+                if result.complete:
+                    break
+                # The cat-file backend also checks the deadline once per branch it lists (one here)
+                self.assertEqual(len(result.items), 6 if backend == 'cat-file' else 7)
+            self.assertIsNone(cursor)
+            self.assertEqual([c.sha for c in loaded], [c.sha for c in expected], backend)
+            if with_raw:
+                self.assertEqual(loaded, expected)
+
+    def test_objects_counted_once(self):
+        for backend in ('cat-file', 'disk', 'log'):
+            prof = Profiler(enabled=True)
+            with patch('git_repo_inspector.commit_loader.profiler', prof):
+                result = CommitLoader(self.repo_path, backend=backend).load_commits_until(
+                    CountdownDeadline(6), with_raw=backend != 'log')
+            self.assertEqual(prof.counters['commit_loader.objects'], len(result.items), backend)
+
+    def test_partial_branch_listing(self):
+        for i in range(4):
+            git(self.repo_path, 'branch', f"b{i}", f"HEAD~{i}")
+        loader = CommitLoader(self.repo_path, backend='cat-file')
+        branches, complete, cursor = loader.get_branches_until(CountdownDeadline(2))
+        self.assertFalse(complete)
+        self.assertIsNone(cursor)
+        self.assertEqual(sorted(name for names in branches.values() for name in names), ['b0', 'b1'])
+        # The partial map is not kept
+        self.assertEqual(len(loader.get_branches_until(Deadline(60)).items), 4)  # b0 and main share a commit
+
+    def test_expired_deadline(self):
+        result = CommitLoader(self.repo_path, backend='cat-file').load_commits_until(Deadline(0))
+        self.assertEqual(result, PartialLoad([], False, '0:'))
+        self.assertFalse(CommitLoader(self.repo_path, backend='cat-file').get_branches_until(Deadline(0)).complete)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from git_repo_inspector.commit_loader import CommitLoader
+from git_repo_inspector.governor import Governor, GovernedPopen, RequestWindow, governor
+
+from git_fixtures import init_repo
+
+SLEEPER = [sys.executable, '-c', 'import sys; sys.stdin.read()']  # runs until its stdin is closed
+
+
+class TestGovernor(unittest.TestCase):
+
+    def test_unconfigured_governor_spawns_directly(self):
+        g = Governor()
+        self.assertFalse(g.active)
+        proc = g.popen([sys.executable, '-c', 'pass'])
+        self.assertIs(type(proc), subprocess.Popen)
+        proc.wait()
+        self.assertEqual(g.workers(8), 8)
+
+    def test_process_slots(self):
+        g = Governor()
+        g.configure(max_processes=1)
+        first = g.popen(SLEEPER, stdin=subprocess.PIPE)
+        self.assertIsInstance(first, GovernedPopen)
+        # The thread holding the slot may start a second process, e.g. the other half of a pipeline
+        second = g.popen([sys.executable, '-c', 'pass'])
+        second.wait()
+
+        started = threading.Event()
+
+        def spawn():
+            g.popen([sys.executable, '-c', 'pass']).wait()
+            started.set()
+
+        thread = threading.Thread(target=spawn)
+        thread.start()
+        self.assertFalse(started.wait(0.3))  # another thread waits for the slot
+        first.stdin.close()
+        first.wait()
+        self.assertTrue(started.wait(5))
+        thread.join()
+        self.assertEqual(g._running, 0)
+
+    @unittest.skipUnless(hasattr(os, 'getpriority'), "process priorities are POSIX only")
+    def test_nice_lowers_child_priority(self):
+        g = Governor()
+        g.configure(nice=3)
+        proc = g.popen(SLEEPER, stdin=subprocess.PIPE)
+        try:
+            self.assertEqual(os.getpriority(os.PRIO_PROCESS, proc.pid), min(os.getpriority(os.PRIO_PROCESS, 0) + 3, 19))
+        finally:
+            proc.stdin.close()
+            proc.wait()
+
+    def test_concurrency_follows_load(self):
+        # create=True: os.getloadavg does not exist on Windows
+        g = Governor()
+        g.configure(max_workers=6, max_load=4.0)
+        with patch('git_repo_inspector.governor.os.getloadavg', create=True, return_value=(3.0, 3.0, 3.0)):
+            self.assertEqual(g.workers(8), 6)
+        g.configure(max_workers=6, max_load=4.0)  # forget the cached load average
+        with patch('git_repo_inspector.governor.os.getloadavg', create=True, return_value=(6.5, 6.0, 6.0)):
+            self.assertEqual(g.workers(8), 3)  # 3 above the limit
+            self.assertEqual(g._limit(None), max((os.cpu_count() or 1) - 3, 1))
+        g.configure(max_load=4.0)
+        with patch('git_repo_inspector.governor.os.getloadavg', create=True, return_value=(40.0, 40.0, 40.0)):
+            self.assertEqual(g.workers(8), 1)  # never below one
+        self.assertEqual(g.settings(2)['max_load'], 4.0)
+
+    def test_throttle(self):
+        g = Governor()
+        g.configure(read_rate=1000.0)
+        slept = []
+        with patch('git_repo_inspector.governor.time.sleep', side_effect=slept.append):
+            g.throttle(250)  # within the burst
+            self.assertEqual(slept, [])
+            g.throttle(1000)
+        self.assertAlmostEqual(sum(slept), 1.0, delta=0.05)
+        self.assertEqual(g.settings(4)['read_rate'], 250.0)
+
+    def test_request_window(self):
+        window = RequestWindow(3000)
+        for _ in range(2):
+            self.assertTrue(window.request())  # 1 KiB assumed per object until sizes are known
+        blocked = threading.Event()
+        result = []
+
+        def request():
+            blocked.set()
+            result.append(window.request())
+
+        thread = threading.Thread(target=request)
+        thread.start()
+        blocked.wait()
+        time.sleep(0.1)
+        self.assertEqual(result, [])
+        window.received(1000)
+        thread.join(5)
+        self.assertEqual(result, [True])
+        window.close()
+        self.assertFalse(window.request())
+
+
+class TestGovernedLoading(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = self.tmp.name
+        init_repo(self.repo_path, (f"Commit {i}" for i in range(20)))
+
+    def tearDown(self):
+        governor.configure()
+        self.tmp.cleanup()
+
+    def test_loads_are_unchanged(self):
+        expected = CommitLoader(self.repo_path).load_commits()
+        expected_meta = CommitLoader(self.repo_path).load_commits(with_raw=False)
+        governor.configure(max_processes=1, max_workers=1, read_rate=1e9, max_in_flight=600, nice=1)
+        for backend in ('cat-file', 'disk'):
+            self.assertEqual(CommitLoader(self.repo_path, backend=backend).load_commits(), expected)
+        self.assertEqual(CommitLoader(self.repo_path, backend='log').load_commits(with_raw=False), expected_meta)
+        # rev-list | cat-file holds two processes from one thread
+        self.assertEqual([c.sha for c in CommitLoader(self.repo_path).iter_commits()], [c.sha for c in expected])
+        self.assertEqual(governor._running, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
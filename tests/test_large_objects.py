@@ -0,0 +1,67 @@
+import unittest
+import subprocess
+import tempfile
+import os
+
+from git_repo_inspector.large_objects import (
+    LargeObject, find_largest_blobs, find_largest_objects, format_large_object, format_size
+)
+
+from git_fixtures import git, init_repo
+
+
+class TestFormatting(unittest.TestCase):
+
+    def test_format_size(self):
+        self.assertEqual(format_size(512), "512 B")
+        self.assertEqual(format_size(1536), "1.5 KiB")
+        self.assertEqual(format_size(3 * 1024 ** 3), "3.0 GiB")
+
+    def test_format_unreachable(self):
+        line = format_large_object(LargeObject("a" * 40, 10, 5))
+        self.assertTrue(line.endswith("(unreachable)"))
+
+
+class TestLargeObjectsIntegration(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.TemporaryDirectory()
+        self.repo_path = self.repo_dir.name
+        init_repo(self.repo_path)
+        self.first = self._commit("small.txt", b"x" * 10, "small")
+        self.second = self._commit("build/artifact.bin", b"\0" * 5000, "oops")
+        self.third = self._commit("copy/artifact.bin", b"\0" * 5000, "same content elsewhere")
+        self.fourth = self._commit("medium.txt", b"y" * 1000, "medium")
+
+    def tearDown(self):
+        self.repo_dir.cleanup()
+
+    def _commit(self, path, content, message):
+        full_path = os.path.join(self.repo_path, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            f.write(content)
+        git(self.repo_path, "add", path)
+        git(self.repo_path, "commit", "-q", "-m", message)
+        return git(self.repo_path, "rev-parse", "HEAD")
+
+    def test_top_k_keeps_only_largest(self):
+        blobs = find_largest_blobs(self.repo_path, 2)
+        self.assertEqual([b.size for b in blobs], [5000, 1000])
+        self.assertEqual(find_largest_blobs(self.repo_path, 0), [])
+        self.assertEqual(len(find_largest_blobs(self.repo_path, 100)), 3)
+
+    def test_attribution_to_introducing_commit(self):
+        objects = find_largest_objects(self.repo_path, 2)
+        self.assertEqual((objects[0].path, objects[0].commit), ("build/artifact.bin", self.second))
+        self.assertEqual((objects[1].path, objects[1].commit), ("medium.txt", self.fourth))
+
+    def test_unreachable_blob(self):
+        sha = subprocess.run(["git", "-C", self.repo_path, "hash-object", "-w", "--stdin"],
+                             input=b"z" * 9000, check=True, capture_output=True).stdout.decode().strip()
+        objects = find_largest_objects(self.repo_path, 1)
+        self.assertEqual(objects[0], LargeObject(sha, 9000, objects[0].disk_size))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import os
+import subprocess
+import sys
+import tempfile
+import contextlib
+import io
+import unittest
+
+from git_repo_inspector.__main__ import BACKEND_NAMES, cmd_scan, main, parse_args, select_command
+from git_repo_inspector.backends import BACKENDS
+
+from git_fixtures import git, init_repo
+
+
+class TestParseArgs(unittest.TestCase):
+
+    def test_legacy_flags(self):
+        args = parse_args(['--list-branches', '--json', '/repo'])
+        self.assertTrue(args.list_branches)
+        self.assertTrue(args.json)
+        self.assertEqual(args.repo_path, '/repo')
+
+    def test_subcommand_maps_to_legacy_attributes(self):
+        args = parse_args(['branches', '--json', '/repo'])
+        self.assertTrue(args.list_branches)
+        self.assertTrue(args.json)
+        self.assertFalse(args.list_commits)
+        self.assertEqual(args.repo_path, '/repo')
+
+    def test_repository_named_like_a_subcommand(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.mkdir(os.path.join(tmp, 'stats'))
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                self.assertTrue(parse_args(['stats']).stats)  # a plain directory does not matter
+                subprocess.run(['git', 'init', '-q', 'stats'], check=True)
+                stderr = io.StringIO()
+                with contextlib.redirect_stderr(stderr):
+                    args = parse_args(['stats', '--list-branches'])
+            finally:
+                os.chdir(cwd)
+        self.assertEqual((args.repo_path, args.stats, args.list_branches), ('stats', False, True))
+        self.assertIn('./stats', stderr.getvalue())
+
+    def test_subcommand_positional_arguments(self):
+        args = parse_args(['largest-objects', '5', '/repo'])
+        self.assertEqual(args.largest_objects, 5)
+        self.assertEqual(args.repo_path, '/repo')
+        args = parse_args(['path-history', 'src/app.py'])
+        self.assertEqual(args.path_history, 'src/app.py')
+
+    def test_watch_options(self):
+        args = parse_args(['watch', '--interval', '0.5', '--branches-only', '/repo'])
+        self.assertTrue(args.watch)
+        self.assertTrue(args.list_branches)
+        self.assertEqual(args.watch_interval, 0.5)
+
+    def test_query_options(self):
+        args = parse_args(['query', 'commits', '/repo', '--limit', '5', '--author', 'alice'])
+        self.assertEqual(args.query, 'commits')
+        self.assertEqual(args.limit, 5)
+        self.assertEqual(args.author, 'alice')
+        self.assertEqual(args.repo_path, '/repo')
+
+    def test_backend_options(self):
+        self.assertEqual(BACKEND_NAMES, tuple(BACKENDS))
+        self.assertEqual(parse_args(['commits', '--backend', 'log', '/repo']).backend, 'log')
+        self.assertEqual(parse_args(['--list-commits', '--backend', 'disk']).backend, 'disk')
+        args = parse_args(['backends', '--benchmark', '--repeat', '5', '/repo'])
+        self.assertTrue(args.backends)
+        self.assertTrue(args.benchmark)
+        self.assertEqual(args.repeat, 5)
+
+    def test_resource_limits(self):
+        from git_repo_inspector.__main__ import configure_governor
+        from git_repo_inspector.governor import BACKGROUND_NICE, governor
+
+        self.assertFalse(configure_governor(parse_args(['commits', '/repo'])))
+        self.assertFalse(governor.active)
+        args = parse_args(['commits', '--max-processes', '2', '--max-read-rate', '1.5', '--max-in-flight', '64',
+                           '--background', '--nice', '3', '/repo'])
+        try:
+            self.assertTrue(configure_governor(args))
+            self.assertEqual(governor.max_processes, 2)
+            self.assertEqual(governor.read_rate, 1.5 * 1024 * 1024)
+            self.assertEqual(governor.max_in_flight, 64 * 1024)
+            self.assertEqual(governor.nice, 3)  # explicit options win over --background
+            self.assertTrue(governor.idle_io)
+            self.assertEqual(governor.max_load, float(os.cpu_count() or 1))
+            self.assertNotEqual(BACKGROUND_NICE, 3)
+        finally:
+            governor.configure()
+        self.assertTrue(parse_args(['--list-branches', '--idle-io']).idle_io)
+
+    def test_scan_options(self):
+        args = parse_args(['scan', '/a', '/b', '--commit-cache-size', '64'])
+        self.assertEqual(select_command(args), cmd_scan)
+        self.assertEqual(args.scan_paths, ['/a', '/b'])
+        self.assertEqual(args.commit_cache_size, 64)
+        self.assertFalse(args.no_commit_cache)
+        self.assertTrue(parse_args(['serve', '--no-commit-cache']).no_commit_cache)
+
+
+    def test_time_budget(self):
+        args = parse_args(['commits', '/repo', '--time-budget', '0.5', '--resume', '12:abc'])
+        self.assertEqual((args.time_budget, args.resume), (0.5, '12:abc'))
+        self.assertIsNone(parse_args(['branches', '/repo']).time_budget)
+        self.assertEqual(parse_args(['--list-commits', '--time-budget', '2', '/repo']).time_budget, 2.0)
+
+    def test_changes_options(self):
+        from git_repo_inspector.__main__ import cmd_changes
+
+        args = parse_args(['changes', '/repo', '--since-snapshot', '/state/snapshot.json'])
+        self.assertEqual(select_command(args), cmd_changes)
+        self.assertEqual(args.since_snapshot, '/state/snapshot.json')
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            parse_args(['changes', '/repo'])  # the snapshot file is required
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_cli_path_does_not_import_textual(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            subprocess.run(['git', 'init', '-q', tmp], check=True)
+            src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+            code = ("import sys; from git_repo_inspector.__main__ import main; main(['branches', '--json', sys.argv[1]]); "
+                    "print('textual' in sys.modules, file=sys.stderr)")
+            result = subprocess.run([sys.executable, '-c', code, tmp], capture_output=True, text=True,
+                                    env=dict(os.environ, PYTHONPATH=src))
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(result.stderr.strip().splitlines()[-1], 'False')
+
+
+class TestOutputCacheIntegration(unittest.TestCase):
+
+    def _run(self, *argv):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            main(list(argv))
+        return out.getvalue()
+
+    def test_branches_output_is_cached_until_refs_change(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            init_repo(tmp, ['initial'])
+            first = self._run('branches', tmp)
+            self.assertTrue(first.startswith('main: '))
+            self.assertEqual(len(os.listdir(os.path.join(tmp, '.git', 'git-repo-inspector', 'output-cache'))), 1)
+            self.assertEqual(self._run('branches', tmp), first)
+            git(tmp, 'branch', 'feature')
+            self.assertIn('feature: ', self._run('branches', tmp))
+            self.assertIn('feature: ', self._run('--list-branches', '--no-cache', tmp))
+
+    def test_show_resolves_prefixes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            init_repo(tmp, ['initial'])
+            head = git(tmp, 'rev-parse', 'HEAD')
+            self.assertEqual(self._run('show', head[:5], '-C', tmp), f"{head[:5]} {head}\n")
+            with self.assertRaises(SystemExit):
+                self._run(tmp, '--show', head[:5], 'zz')
+
+    def test_metrics_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            init_repo(tmp, ['initial'])
+            metrics_path = os.path.join(tmp, 'inspector.prom')
+            self._run('verify', '--metrics-file', metrics_path, tmp)
+            with open(metrics_path, encoding='utf-8') as f:
+                text = f.read()
+            labels = f'repo="{os.path.abspath(tmp)}",command="verify"'
+            self.assertIn(f'git_repo_inspector_commits{{{labels}}} 1\n', text)
+            self.assertIn(f'git_repo_inspector_branches{{{labels}}} 1\n', text)
+            self.assertIn(f'git_repo_inspector_verify_mismatches{{{labels}}} 0\n', text)
+            self.assertIn(f'git_repo_inspector_run_success{{{labels}}} 1\n', text)
+            self.assertIn('phase="commit_loader.rev_list"', text)
+            self.assertTrue(text.endswith('# EOF\n'))
+            self.assertEqual([name for name in os.listdir(tmp) if name.endswith('.tmp')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import stat
+import tempfile
+import unittest
+
+from git_repo_inspector.metrics import (MetricSet, build_metrics, escape_label, repository_counts, run_commit_count,
+                                        write_metrics_file)
+from git_repo_inspector.profiling import Profiler
+
+from git_fixtures import git, init_repo
+
+
+class TestMetricSet(unittest.TestCase):
+
+    def test_render(self):
+        metrics = MetricSet(repo='/srv/a "b"')
+        metrics.add('commits', 'Commits', 12)
+        metrics.add('objects', 'Objects', 3, state='loose')
+        metrics.add('objects', 'Objects', 0.5, state='packed')
+        self.assertEqual(metrics.render(), (
+            '# HELP git_repo_inspector_commits Commits\n'
+            '# TYPE git_repo_inspector_commits gauge\n'
+            'git_repo_inspector_commits{repo="/srv/a \\"b\\""} 12\n'
+            '# HELP git_repo_inspector_objects Objects\n'
+            '# TYPE git_repo_inspector_objects gauge\n'
+            'git_repo_inspector_objects{repo="/srv/a \\"b\\"",state="loose"} 3\n'
+            'git_repo_inspector_objects{repo="/srv/a \\"b\\"",state="packed"} 0.5\n'
+            '# EOF\n'
+        ))
+        self.assertEqual(MetricSet().render(), '# EOF\n')
+
+    def test_escape_label(self):
+        self.assertEqual(escape_label('a\\b\n"c"'), 'a\\\\b\\n\\"c\\"')
+
+    def test_build_metrics_from_profiler(self):
+        profile = Profiler(enabled=True)
+        profile.add_time('commit_loader.parse', 0.5, calls=10)
+        profile.count('commit_loader.bytes', 2048)
+        profile.count('backends.cat_file.bytes', 1024)
+        profile.count('backends.disk.bytes', 512)
+        profile.count('output_cache.hits', 3)
+        profile.count('output_cache.misses', 1)
+        profile.count('stats.commits', 5)
+        text = build_metrics('/r', 'commits', profile, 1.5, True, 1000.0).render()
+        self.assertIn('git_repo_inspector_phase_duration_seconds{repo="/r",command="commits",'
+                      'phase="commit_loader.parse"} 0.5\n', text)
+        self.assertIn('git_repo_inspector_phase_calls{repo="/r",command="commits",phase="commit_loader.parse"} 10\n',
+                      text)
+        self.assertIn('git_repo_inspector_git_read_bytes{repo="/r",command="commits",'
+                      'source="backends.cat_file.bytes"} 1024\n', text)
+        self.assertIn('git_repo_inspector_disk_read_bytes{repo="/r",command="commits",'
+                      'source="backends.disk.bytes"} 512\n', text)
+        self.assertNotIn('commit_loader.bytes', text)  # parsed bytes, whatever the source
+        self.assertIn('git_repo_inspector_cache_hit_ratio{repo="/r",command="commits",cache="output_cache"} 0.75\n',
+                      text)
+        self.assertNotIn('cache="tree_diff"', text)  # never looked up
+        self.assertNotIn('verify_mismatches', text)  # verification did not run
+        self.assertNotIn('git_repo_inspector_commits{', text)  # no repository counts given
+
+
+class TestRepositoryMetrics(unittest.TestCase):
+
+    def test_repository_counts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            init_repo(tmp, ['one', 'two'])
+            git(tmp, 'branch', 'topic')
+            counts = repository_counts(tmp)
+            self.assertEqual(counts['commits'], 2)
+            self.assertEqual(repository_counts(tmp, commits=7)['commits'], 7)  # known from the run
+            self.assertEqual(counts['branches'], 2)
+            self.assertEqual(counts['loose_objects'], 3)  # two commits, one empty tree
+            self.assertEqual(counts['packed_objects'], 0)
+
+    def test_run_commit_count(self):
+        profile = Profiler(enabled=True)
+        self.assertIsNone(run_commit_count(profile))
+        profile.add_time('commit_loader.rev_list', 0.1)
+        profile.count('commit_loader.commits', 12)
+        self.assertEqual(run_commit_count(profile), 12)
+        profile.add_time('commit_loader.rev_list', 0.1)  # several repositories: counts do not add up
+        profile.count('commit_loader.commits', 3)
+        self.assertIsNone(run_commit_count(profile))
+
+    def test_write_metrics_file_replaces_atomically(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'inspector.prom')
+            write_metrics_file(path, 'old\n')
+            write_metrics_file(path, '# EOF\n')
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), '# EOF\n')
+            self.assertEqual(os.listdir(tmp), ['inspector.prom'])
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o644)
+            with self.assertRaises(OSError):
+                write_metrics_file(os.path.join(tmp, 'missing', 'x.prom'), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
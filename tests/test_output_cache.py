@@ -0,0 +1,86 @@
+import unittest
+import tempfile
+import time
+import os
+
+from git_repo_inspector.output_cache import OutputCache, find_git_dirs, ref_fingerprint
+from git_repo_inspector.repo_dir import resolve_git_dirs
+
+from git_fixtures import git, init_repo
+
+
+class TestOutputCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = OutputCache(self.tmp.name, max_bytes=100, max_age=60)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_put(self):
+        key = OutputCache.key("fingerprint", "branches:json")
+        self.assertNotEqual(key, OutputCache.key("fingerprint", "branches:text"))
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "output")
+        self.assertEqual(self.cache.get(key), "output")
+
+    def test_evicts_least_recently_used_beyond_size(self):
+        self.cache.max_bytes = 130
+        for i, name in enumerate(("a", "b", "c")):
+            self.cache.put(name, "x" * 40)
+            os.utime(os.path.join(self.tmp.name, name + ".out"), (1000 + i, time.time() - 10 + i))
+        self.cache.get("a")  # refreshes a
+        self.cache.put("d", "x" * 40)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["a.out", "c.out", "d.out"])
+
+    def test_evicts_expired_and_skips_oversized(self):
+        self.cache.put("old", "x")
+        old_time = time.time() - 120
+        os.utime(os.path.join(self.tmp.name, "old.out"), (old_time, old_time))
+        self.assertIsNone(self.cache.get("old"))
+        self.cache.put("big", "x" * 101)
+        self.cache.put("new", "y")
+        self.assertEqual(os.listdir(self.tmp.name), ["new.out"])
+
+
+class TestRefFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.TemporaryDirectory()
+        self.repo_path = self.repo_dir.name
+        init_repo(self.repo_path, ["initial"])
+
+    def tearDown(self):
+        self.repo_dir.cleanup()
+
+    def test_find_git_dirs_matches_git(self):
+        subdir = os.path.join(self.repo_path, "sub")
+        os.mkdir(subdir)
+        worktree = os.path.join(self.repo_path, "wt")
+        git(self.repo_path, "worktree", "add", "-q", "-b", "side", worktree)
+        for path in (self.repo_path, subdir, worktree):
+            expected = tuple(os.path.realpath(p) for p in resolve_git_dirs(path))
+            self.assertEqual(tuple(os.path.realpath(p) for p in find_git_dirs(path)), expected)
+
+    def test_fingerprint_follows_refs(self):
+        first = ref_fingerprint(self.repo_path)
+        self.assertEqual(ref_fingerprint(self.repo_path), first)
+        with open(os.path.join(self.repo_path, "file.txt"), "w") as f:
+            f.write("not a ref change")
+        self.assertEqual(ref_fingerprint(self.repo_path), first)
+        git(self.repo_path, "commit", "--allow-empty", "-m", "second")
+        second = ref_fingerprint(self.repo_path)
+        self.assertNotEqual(second, first)
+        git(self.repo_path, "branch", "feature")
+        third = ref_fingerprint(self.repo_path)
+        self.assertNotEqual(third, second)
+        git(self.repo_path, "pack-refs", "--all")
+        self.assertNotEqual(ref_fingerprint(self.repo_path), third)
+        packed = ref_fingerprint(self.repo_path)
+        git(self.repo_path, "checkout", "-q", "feature")
+        self.assertNotEqual(ref_fingerprint(self.repo_path), packed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import tempfile
+import os
+
+from git_repo_inspector.path_index import PathIndex
+
+from git_fixtures import git, init_repo
+
+
+class TestPathIndexIntegration(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.TemporaryDirectory()
+        self.repo_path = self.repo_dir.name
+        init_repo(self.repo_path)
+        self.first = self._commit("a.txt", "one", "add a")
+        self.second = self._commit("docs/b.txt", "two", "add b")
+        self.third = self._commit("a.txt", "three", "change a")
+
+    def tearDown(self):
+        self.repo_dir.cleanup()
+
+    def _commit(self, path, content, message):
+        full_path = os.path.join(self.repo_path, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(content)
+        git(self.repo_path, "add", path)
+        git(self.repo_path, "commit", "-q", "-m", message)
+        return git(self.repo_path, "rev-parse", "HEAD")
+
+    def test_history_for_file_and_directory(self):
+        index = PathIndex(self.repo_path)
+        self.assertEqual(index.update(), 3)
+        self.assertEqual(index.history("a.txt"), [self.third, self.first])
+        self.assertEqual(index.history("docs"), [self.second])
+        self.assertEqual(index.history("docs/"), [self.second])
+        self.assertEqual(index.history("missing.txt"), [])
+
+    def test_incremental_update_and_persistence(self):
+        index = PathIndex(self.repo_path)
+        index.update()
+        self.assertTrue(os.path.exists(index.index_path))
+        fourth = self._commit("docs/b.txt", "four", "change b")
+
+        reloaded = PathIndex(self.repo_path)
+        self.assertEqual(len(reloaded.commits), 3)
+        self.assertEqual(reloaded.update(), 1)
+        self.assertEqual(reloaded.history("docs/b.txt"), [fourth, self.second])
+        self.assertEqual(reloaded.update(), 0)
+
+    def test_merge_counts_only_paths_differing_from_every_parent(self):
+        git(self.repo_path, "checkout", "-q", "-b", "feature", self.first)
+        side = self._commit("c.txt", "side", "add c")
+        git(self.repo_path, "checkout", "-q", "main")
+        git(self.repo_path, "merge", "-q", "--no-edit", "feature")
+        merge = git(self.repo_path, "rev-parse", "HEAD")
+
+        index = PathIndex(self.repo_path)
+        self.assertEqual(index.update(), 5)
+        self.assertEqual(index.history("c.txt"), [side])
+        self.assertNotIn(merge, index.history("a.txt"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest.mock import patch, MagicMock
+
+from git_repo_inspector.profiling import Profiler, _NULL_SPAN
+from git_repo_inspector.branch_loader import BranchLoader
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_disabled_records_nothing(self):
+        prof = Profiler()
+        self.assertIs(prof.span("phase"), _NULL_SPAN)
+        with prof.span("phase"):
+            pass
+        prof.count("bytes", 10)
+        prof.add_time("parse", 1.0, 5)
+        self.assertEqual(prof.timings, {})
+        self.assertEqual(prof.counters, {})
+        self.assertEqual(prof.events, [])
+
+    def test_span_and_counters(self):
+        prof = Profiler(enabled=True)
+        with prof.span("load", rows=3):
+            pass
+        with prof.span("load"):
+            pass
+        prof.count("bytes", 10)
+        prof.count("bytes", 5)
+        prof.add_time("parse", 0.5, 10)
+
+        self.assertEqual(prof.timings["load"][0], 2)
+        self.assertEqual(prof.timings["parse"][0], 10)
+        self.assertAlmostEqual(prof.timings["parse"][1], 0.5)
+        self.assertEqual(prof.counters, {"bytes": 15})
+        self.assertEqual(len(prof.events), 2)
+        self.assertEqual(prof.events[0]["args"], {"rows": 3})
+        self.assertEqual(prof.events[0]["ph"], "X")
+
+        summary = prof.format_summary()
+        self.assertIn("load", summary)
+        self.assertIn("parse", summary)
+        self.assertIn("bytes", summary)
+
+    def test_enable_resets(self):
+        prof = Profiler(enabled=True)
+        prof.count("objects")
+        prof.enable()
+        self.assertEqual(prof.counters, {})
+        self.assertEqual(Profiler().format_summary(), "No profiling data recorded.")
+
+    def test_write_chrome_trace(self):
+        prof = Profiler(enabled=True)
+        with prof.span("phase"):
+            pass
+        prof.count("objects", 2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            prof.write_chrome_trace(path)
+            with open(path, encoding="utf-8") as f:
+                trace = json.load(f)
+        names = [e["name"] for e in trace["traceEvents"]]
+        self.assertEqual(names, ["phase", "counters"])
+        self.assertEqual(trace["traceEvents"][-1]["args"], {"objects": 2})
+
+    @patch('subprocess.run')
+    def test_branch_loader_instrumented(self, mock_run):
+        mock_run.return_value = MagicMock(stdout="main a1b2\nfeature a1b2\n")
+        prof = Profiler(enabled=True)
+        with patch('git_repo_inspector.branch_loader.profiler', prof), patch('git_repo_inspector.backends.profiler', prof):
+            BranchLoader('/fake/repo').get_branches()
+        self.assertIn('branch_loader.for_each_ref', prof.timings)
+        self.assertEqual(prof.counters['branch_loader.refs'], 2)
+        self.assertEqual(prof.counters['branch_loader.bytes'], len("main a1b2\nfeature a1b2\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from git_repo_inspector.ref_trie import RefTrie
+
+
+class TestRefTrie(unittest.TestCase):
+
+    def setUp(self):
+        self.trie = RefTrie.from_branch_map({
+            "sha1": ["main", "feature/login", "feature/logout"],
+            "sha2": ["feature/ui/dark", "fix"],
+        })
+
+    def test_counts(self):
+        self.assertEqual(len(self.trie), 5)
+        self.assertEqual(self.trie.node("feature").count, 3)
+        self.assertEqual(self.trie.node("feature/ui").count, 1)
+        self.assertIsNone(self.trie.node("nope"))
+        self.assertEqual(self.trie.get("feature/ui/dark"), "sha2")
+        self.assertIsNone(self.trie.get("feature"))  # a group, not a ref
+
+    def test_match(self):
+        paths = lambda prefix: [path for path, _ in self.trie.match(prefix)]
+        self.assertEqual(paths(""), ["feature", "fix", "main"])
+        self.assertEqual(paths("f"), ["feature", "fix"])
+        self.assertEqual(paths("feature/"), ["feature/login", "feature/logout", "feature/ui"])
+        self.assertEqual(paths("feature/logo"), ["feature/logout"])
+        self.assertEqual(paths("feature/x"), [])
+        self.assertEqual(paths("nope/a"), [])
+
+    def test_insert_and_remove(self):
+        self.assertFalse(self.trie.insert("main", "sha3"))  # moved
+        self.assertEqual(self.trie.get("main"), "sha3")
+        self.assertTrue(self.trie.insert("feature/api", "sha3"))
+        self.assertEqual(self.trie.node("feature").count, 4)
+        self.assertEqual([path for path, _ in self.trie.match("feature/")][0], "feature/api")
+
+        self.assertTrue(self.trie.remove("feature/ui/dark"))
+        self.assertIsNone(self.trie.node("feature/ui"))  # empty group pruned
+        self.assertFalse(self.trie.remove("feature/ui/dark"))
+        self.assertFalse(self.trie.remove("feature"))
+        self.assertEqual(len(self.trie), 5)
+        self.assertEqual(self.trie.node("feature").count, 3)
+
+    def test_iter_refs(self):
+        self.assertEqual(list(self.trie.iter_refs()), [
+            ("feature/login", "sha1"), ("feature/logout", "sha1"), ("feature/ui/dark", "sha2"),
+            ("fix", "sha2"), ("main", "sha1"),
+        ])
+        self.assertEqual(list(self.trie.iter_refs(self.trie.node("feature/ui"), "feature/ui")),
+                         [("feature/ui/dark", "sha2")])
+
+
+if __name__ == '__main__':
+    unittest.main()
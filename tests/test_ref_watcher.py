@@ -0,0 +1,90 @@
+import unittest
+import tempfile
+import threading
+import os
+
+from git_repo_inspector.ref_watcher import RefWatcher, diff_branches, watch_events
+from git_repo_inspector.commit_loader import CommitLoader
+
+from git_fixtures import git, init_repo
+
+
+class TestDiffBranches(unittest.TestCase):
+
+    def test_diff_branches(self):
+        old = {"sha1": ["main", "gone"], "sha2": ["feature"]}
+        new = {"sha1": ["main"], "sha3": ["feature", "added"]}
+        events = diff_branches(old, new)
+        self.assertEqual(events, [
+            {'event': 'branch', 'action': 'created', 'branch': 'added', 'sha': 'sha3'},
+            {'event': 'branch', 'action': 'moved', 'branch': 'feature', 'sha': 'sha3', 'old_sha': 'sha2'},
+            {'event': 'branch', 'action': 'deleted', 'branch': 'gone', 'old_sha': 'sha1'},
+        ])
+        self.assertEqual(diff_branches(new, new), [])
+
+
+class TestRefWatcherIntegration(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.TemporaryDirectory()
+        self.repo_path = self.repo_dir.name
+        init_repo(self.repo_path, ["initial"])
+
+    def tearDown(self):
+        self.repo_dir.cleanup()
+
+    def test_poll_detects_ref_changes(self):
+        watcher = RefWatcher(self.repo_path)
+        self.assertFalse(watcher.poll())
+        git(self.repo_path, "branch", "feature")
+        self.assertTrue(watcher.poll())
+        self.assertFalse(watcher.poll())
+        git(self.repo_path, "pack-refs", "--all")
+        self.assertTrue(watcher.poll())
+        watcher.invalidate()  # the change was not applied; report it again
+        self.assertTrue(watcher.poll())
+        self.assertFalse(watcher.poll())
+
+    def test_watcher_in_linked_worktree(self):
+        worktree = os.path.join(self.repo_path, "wt")
+        git(self.repo_path, "worktree", "add", "-q", "-b", "side", worktree)
+        watcher = RefWatcher(worktree)
+        self.assertEqual(os.path.realpath(watcher.common_dir), os.path.realpath(os.path.join(self.repo_path, ".git")))
+        git(worktree, "commit", "--allow-empty", "-m", "in worktree")
+        self.assertTrue(watcher.poll())
+
+    def test_load_commits_since(self):
+        loader = CommitLoader(self.repo_path)
+        tips = loader.get_ref_tips()
+        self.assertEqual(len(loader.load_commits()), 1)
+        git(self.repo_path, "commit", "--allow-empty", "-m", "second")
+        git(self.repo_path, "checkout", "-q", "-b", "feature")
+        git(self.repo_path, "commit", "--allow-empty", "-m", "third")
+        new_commits = loader.load_commits_since(tips)
+        self.assertEqual([c.message for c in new_commits], ["third", "second"])
+        self.assertEqual(new_commits[0].branches, ["feature"])
+        self.assertEqual(loader.load_commits_since(loader.get_ref_tips()), [])
+
+    def test_watch_events(self):
+        stop = threading.Event()
+        events = watch_events(self.repo_path, interval=0.01, stop=stop)
+        first = [next(events), next(events)]
+        self.assertEqual(first[0]['event'], 'branch')
+        self.assertEqual(first[0]['action'], 'existing')
+        self.assertEqual(first[1]['event'], 'commit')
+        self.assertEqual(first[1]['message'], 'initial')
+
+        git(self.repo_path, "commit", "--allow-empty", "-m", "next")
+        moved = next(events)
+        self.assertEqual(moved['action'], 'moved')
+        self.assertEqual(moved['branch'], 'main')
+        commit = next(events)
+        self.assertEqual(commit['message'], 'next')
+        self.assertEqual(commit['sha'], moved['sha'])
+
+        stop.set()
+        self.assertEqual(list(events), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import subprocess
+import tempfile
+import random
+
+from git_repo_inspector.sampling import (
+    collect_sampled_stats, estimate, format_estimates, reservoir_sample, sample_commit_shas
+)
+from git_repo_inspector.stats import collect_stats
+
+
+class TestReservoirSample(unittest.TestCase):
+
+    def test_small_population_is_returned_whole(self):
+        self.assertEqual(reservoir_sample(range(5), 10, random.Random(1)), ([0, 1, 2, 3, 4], 5))
+        self.assertEqual(reservoir_sample(range(5), 0), ([], 5))
+
+    def test_sample_is_ordered_and_distinct(self):
+        sample, seen = reservoir_sample(range(100_000), 50, random.Random(2))
+        self.assertEqual(seen, 100_000)
+        self.assertEqual(len(sample), 50)
+        self.assertEqual(sample, sorted(set(sample)))
+
+    def test_sample_is_uniform(self):
+        rng = random.Random(3)
+        counts = [0] * 10
+        for _ in range(20_000):
+            for item in reservoir_sample(range(10), 2, rng)[0]:
+                counts[item] += 1
+        # Each item is expected 4000 times
+        for count in counts:
+            self.assertLess(abs(count - 4000), 300)
+
+
+class TestEstimate(unittest.TestCase):
+
+    def test_estimate(self):
+        value, margin = estimate(25, 100, 10_000)
+        self.assertAlmostEqual(value, 2500.0)
+        self.assertAlmostEqual(margin, 1.959964 * 10_000 * (0.25 * 0.75 / 100 * 9900 / 9999) ** 0.5)
+        self.assertEqual(estimate(7, 10, 10), (7.0, 0.0))
+        self.assertEqual(estimate(0, 0, 10), (0.0, 0.0))
+
+
+class TestSamplingIntegration(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.TemporaryDirectory()
+        self.repo_path = self.repo_dir.name
+        subprocess.run(["git", "init", "-b", "main", self.repo_path], check=True, capture_output=True)
+        for i in range(6):
+            subprocess.run(["git", "-C", self.repo_path, "-c", "user.name=Dev", "-c", f"user.email=dev{i % 2}@x",
+                            "commit", "--allow-empty", "-q", "-m", f"commit {i}"], check=True)
+
+    def tearDown(self):
+        self.repo_dir.cleanup()
+
+    def test_sample_commit_shas(self):
+        all_shas = subprocess.run(["git", "-C", self.repo_path, "rev-list", "--all"],
+                                  check=True, capture_output=True, text=True).stdout.split()
+        shas, population = sample_commit_shas(self.repo_path, 3, seed=4)
+        self.assertEqual(population, 6)
+        self.assertEqual(len(shas), 3)
+        self.assertEqual(shas, [sha for sha in all_shas if sha in shas])
+
+    def test_full_sample_matches_exact_stats(self):
+        estimates = collect_sampled_stats(self.repo_path, 100)
+        exact = collect_stats(self.repo_path).to_dict()
+        self.assertEqual(estimates['sample_size'], 6)
+        self.assertEqual([(a['email'], a['estimate'], a['margin']) for a in estimates['authors']],
+                         [(a['email'], float(a['commits']), 0.0) for a in exact['authors']])
+        self.assertIn("uniform sample of 6 of 6 commits", format_estimates(estimates))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from collections import namedtuple
+
+from git_repo_inspector.session_cache import (COMMIT_OVERHEAD, TABLE_ROW_OVERHEAD, SessionCache, estimate_commit_bytes,
+                                              estimate_table_bytes)
+
+FakeCommit = namedtuple('FakeCommit', 'raw message')
+
+
+class TestSessionCache(unittest.TestCase):
+
+    def test_estimate_commit_bytes(self):
+        commits = [FakeCommit("x" * 100, "subject"), FakeCommit("y" * 10, "")]
+        self.assertEqual(estimate_commit_bytes(commits), 2 * COMMIT_OVERHEAD + 100 + 7 + 10)
+        self.assertEqual(estimate_commit_bytes([]), 0)
+
+    def test_estimate_table_bytes(self):
+        self.assertEqual(estimate_table_bytes(3), 3 * TABLE_ROW_OVERHEAD)
+        self.assertEqual(estimate_table_bytes(0), 0)
+
+    def test_tables_count_towards_eviction(self):
+        commits = [FakeCommit("", "subject")] * 100
+        cache = SessionCache(max_bytes=2 * estimate_commit_bytes(commits) + 1)
+        cache.put("/a", "A", estimate_commit_bytes(commits))
+        self.assertEqual(cache.put("/b", "B", estimate_commit_bytes(commits)), [])  # the commits alone fit
+        # Each session also keeps a table with one row per commit
+        cache = SessionCache(max_bytes=2 * estimate_commit_bytes(commits) + 1)
+        cache.put("/a", "A", estimate_commit_bytes(commits) + estimate_table_bytes(len(commits)))
+        self.assertEqual(cache.put("/b", "B", estimate_commit_bytes(commits) + estimate_table_bytes(len(commits))),
+                         ["A"])
+
+    def test_lru_order_and_pop(self):
+        cache = SessionCache(max_bytes=1000)
+        cache.put("/a", "A", 10)
+        cache.put("/b", "B", 10)
+        cache.put("/a", "A2", 20)  # re-storing moves it to the front
+        self.assertEqual(cache.keys(), ["/a", "/b"])
+        self.assertEqual(cache.total_bytes, 30)
+        self.assertEqual(cache.pop("/a"), "A2")
+        self.assertNotIn("/a", cache)
+        self.assertIsNone(cache.pop("/a"))
+        self.assertEqual(len(cache), 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = SessionCache(max_bytes=100)
+        cache.put("/a", "A", 40)
+        cache.put("/b", "B", 40)
+        self.assertEqual(cache.put("/c", "C", 40), ["A"])
+        self.assertEqual(cache.keys(), ["/c", "/b"])
+        # A session larger than the limit evicts everything else but is kept itself
+        self.assertEqual(cache.put("/d", "D", 500), ["B", "C"])
+        self.assertEqual(cache.keys(), ["/d"])
+
+
+if __name__ == '__main__':
+    unittest.main()
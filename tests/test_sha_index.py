@@ -0,0 +1,50 @@
+import unittest
+
+from git_repo_inspector.sha_index import ShaIndex, common_prefix_length
+
+
+class TestShaIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.shas = [
+            "a1b2c3d4" + "0" * 32,
+            "a1b2c3d5" + "0" * 32,
+            "a1b9" + "0" * 36,
+            "ffff" + "1" * 36,
+        ]
+        self.index = ShaIndex(reversed(self.shas), min_length=4)
+
+    def test_common_prefix_length(self):
+        self.assertEqual(common_prefix_length(self.shas[0], self.shas[1]), 7)
+        self.assertEqual(common_prefix_length(self.shas[0], self.shas[0]), 40)
+        self.assertEqual(common_prefix_length("abc", "abd"), 2)
+        self.assertEqual(common_prefix_length("abc", "ab"), 2)
+
+    def test_abbreviations_are_shortest_unique(self):
+        self.assertEqual(self.index.shas, sorted(self.shas))
+        self.assertEqual([self.index.unique_length(sha) for sha in self.shas], [8, 8, 4, 1])
+        self.assertEqual(self.index.abbreviate(self.shas[0]), "a1b2c3d4")
+        self.assertEqual(self.index.abbreviate(self.shas[3]), "ffff")  # min_length
+        self.assertEqual(self.index.abbreviate("1234567890"), "1234")  # not indexed
+        for sha in self.shas:
+            self.assertEqual(self.index.lookup(self.index.abbreviate(sha)), [sha])
+        self.assertEqual(ShaIndex(self.shas).abbreviate(self.shas[2]), "a1b9000")
+
+    def test_lookup(self):
+        self.assertEqual(self.index.lookup("A1B2"), self.shas[:2])
+        self.assertEqual(self.index.lookup("a1", limit=2), self.shas[:2])
+        self.assertEqual(self.index.lookup("a1b9"), [self.shas[2]])
+        self.assertEqual(self.index.lookup("b"), [])
+        self.assertIn(self.shas[3], self.index)
+        with self.assertRaises(KeyError):
+            self.index.unique_length("b" * 40)
+
+    def test_add_reports_lengthened_abbreviations(self):
+        new = "a1b9c" + "0" * 35
+        self.assertEqual(self.index.add([new, self.shas[0]]), [self.shas[2]])
+        self.assertEqual(self.index.abbreviate(self.shas[2]), "a1b90")
+        self.assertEqual(list(self.index.lengths), list(ShaIndex(self.shas + [new]).lengths))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from git_repo_inspector.sort_index import SortIndex, compact_keys, topological_ranks
+
+
+class TestSortIndex(unittest.TestCase):
+
+    def test_compact_keys(self):
+        self.assertEqual(compact_keys([30, -5, 7]).typecode, 'q')
+        keys = compact_keys(["pear", "apple", "pear", "fig"])
+        self.assertEqual(keys.typecode, 'I')
+        self.assertEqual(list(keys), [2, 0, 2, 1])
+
+    def test_order_is_stable_and_cached(self):
+        index = SortIndex({"name": ["b", "a", "b", "c"], "size": [3, 1, 2, 1]})
+        self.assertEqual(len(index), 4)
+        self.assertEqual(list(index.order("name")), [1, 0, 2, 3])
+        self.assertEqual(list(index.order("name", reverse=True)), [3, 0, 2, 1])  # ties keep their order
+        self.assertEqual(list(index.order("size")), [1, 3, 2, 0])
+        self.assertIs(index.order("size"), index.order("size"))
+        with self.assertRaises(KeyError):
+            index.order("missing")
+
+    def test_columns_must_match(self):
+        with self.assertRaises(ValueError):
+            SortIndex({"a": [1, 2], "b": [1]})
+
+    def test_topological_ranks(self):
+        # main: m2 -> m1 -> base, topic: t1 -> base, merge: x -> (m2, t1); listed by date, interleaved
+        shas = ["x", "m2", "t1", "m1", "base"]
+        parents = [["m2", "t1"], ["m1"], ["base"], ["base"], ["outside"]]
+        ranks = topological_ranks(shas, parents)
+        order = sorted(shas, key=lambda sha: ranks[shas.index(sha)])
+        self.assertEqual(order, ["x", "m2", "m1", "t1", "base"])
+
+        # Disconnected tips keep their given order
+        self.assertEqual(list(topological_ranks(["b", "a"], [[], []])), [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import subprocess
+import tempfile
+import os
+import json
+from unittest.mock import patch
+
+from git_repo_inspector import stats as stats_module
+from git_repo_inspector.commit_loader import Commit, Identity
+from git_repo_inspector.stats import CommitStats, Mailmap, collect_stats, format_stats, stats_to_json
+
+
+def _commit(name, email, when, tz=0):
+    return Commit("sha", "tree", [], "", "", "", [], "",
+                  author_ident=Identity(name, email), author_time=when, author_tz=tz)
+
+
+class TestMailmap(unittest.TestCase):
+
+    def test_line_forms(self):
+        mailmap = Mailmap(
+            "# comment\n"
+            "Proper Name <old@example.com>\n"
+            "<new@example.com> <Other@Example.com>\n"
+            "Joe <joe@example.com> <joe@old.example.com>\n"
+            "Jane <jane@example.com> Jane Typo <shared@example.com>\n"
+        )
+        self.assertEqual(mailmap.resolve(Identity("old", "OLD@example.com")), Identity("Proper Name", "OLD@example.com"))
+        self.assertEqual(mailmap.resolve(Identity("Other", "other@example.com")), Identity("Other", "new@example.com"))
+        self.assertEqual(mailmap.resolve(Identity("joe", "joe@old.example.com")), Identity("Joe", "joe@example.com"))
+        self.assertEqual(mailmap.resolve(Identity("jane typo", "shared@example.com")), Identity("Jane", "jane@example.com"))
+        self.assertEqual(mailmap.resolve(Identity("Someone", "shared@example.com")), Identity("Someone", "shared@example.com"))
+        self.assertFalse(Mailmap(""))
+
+
+class TestCommitStats(unittest.TestCase):
+
+    def _fill(self, stats):
+        # 1970-01-05 was a Monday; the second commit is on Monday 10:00 local time (+09:00)
+        stats.add(_commit("A", "a@x", 4 * 86400 + 3600))
+        stats.add(_commit("A", "a@x", 4 * 86400 + 3600, tz=9 * 60))
+        stats.add(_commit("B", "b@x", 11 * 86400))
+        return stats
+
+    def test_buckets(self):
+        stats = self._fill(CommitStats())
+        data = stats.to_dict()
+        self.assertEqual(data['commits'], 3)
+        self.assertEqual(data['authors'][0], {'name': 'A', 'email': 'a@x', 'commits': 2,
+                                              'first': 4 * 86400 + 3600, 'last': 4 * 86400 + 3600})
+        self.assertEqual(data['days'], {'1970-01-05': 2, '1970-01-12': 1})
+        self.assertEqual(data['weeks'], {'1970-01-05': 2, '1970-01-12': 1})
+        self.assertEqual(data['hour_of_week']['Mon'][1], 1)
+        self.assertEqual(data['hour_of_week']['Mon'][10], 1)
+        self.assertEqual(data['hour_of_week']['Mon'][0], 1)
+        self.assertEqual(sum(sum(hours) for hours in data['hour_of_week'].values()), 3)
+
+    def test_small_chunks_give_same_result(self):
+        expected = self._fill(CommitStats()).to_dict()
+        with patch.object(stats_module, 'CHUNK_SIZE', 1):
+            self.assertEqual(self._fill(CommitStats()).to_dict(), expected)
+
+    def test_pure_python_fallback(self):
+        expected = self._fill(CommitStats()).to_dict()
+        with patch.object(stats_module, '_np', None):
+            self.assertEqual(self._fill(CommitStats()).to_dict(), expected)
+
+    def test_mailmap_merges_authors(self):
+        stats = CommitStats(Mailmap("A <a@x>\nA <a@x> <a@old>\n"))
+        stats.add(_commit("A", "a@x", 100))
+        stats.add(_commit("a", "a@old", 50))
+        self.assertEqual(stats.to_dict()['authors'], [{'name': 'A', 'email': 'a@x', 'commits': 2, 'first': 50, 'last': 100}])
+
+    def test_format_empty(self):
+        self.assertEqual(format_stats(CommitStats()), "No commits.")
+
+
+class TestStatsIntegration(unittest.TestCase):
+
+    def test_collect_stats_with_mailmap(self):
+        with tempfile.TemporaryDirectory() as repo_path:
+            subprocess.run(["git", "init", "-b", "main", repo_path], check=True, capture_output=True)
+            with open(os.path.join(repo_path, ".mailmap"), "w") as f:
+                f.write("Real Name <real@example.com> <alias@example.com>\n")
+            for email in ("real@example.com", "alias@example.com"):
+                subprocess.run(["git", "-C", repo_path, "-c", "user.name=Someone", "-c", f"user.email={email}",
+                                "commit", "--allow-empty", "-q", "-m", "msg"], check=True)
+            stats = collect_stats(repo_path)
+            data = json.loads(stats_to_json(stats))
+            self.assertEqual(data['commits'], 2)
+            self.assertEqual([(a['name'], a['email'], a['commits']) for a in data['authors']],
+                             [("Real Name", "real@example.com", 1), ("Someone", "real@example.com", 1)])
+            self.assertIn("Top authors:", format_stats(stats))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import tempfile
+import os
+
+from git_repo_inspector.commit_loader import CommitLoader
+from git_repo_inspector.object_reader import BatchObjectReader, read_object_prefix
+from git_repo_inspector.tree_diff import (
+    Change, TreeDiffer, changes_to_dict, format_changes, iter_commit_changes, parse_tree
+)
+
+from git_fixtures import git, init_repo
+
+
+class TestParseTree(unittest.TestCase):
+
+    def test_parse_tree(self):
+        blob = bytes.fromhex("aa" * 20)
+        tree = bytes.fromhex("bb" * 20)
+        data = b"100644 a.txt\0" + blob + b"40000 dir\0" + tree
+        self.assertEqual(parse_tree(data), [
+            (b"a.txt", b"a.txt", b"100644", "aa" * 20),
+            (b"dir/", b"dir", b"40000", "bb" * 20),
+        ])
+        self.assertEqual(parse_tree(b""), [])
+
+
+class TestTreeDifferIntegration(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.TemporaryDirectory()
+        self.repo_path = self.repo_dir.name
+        init_repo(self.repo_path)
+        self._write("keep/deep/file.txt", "unchanged")
+        self._write("src/a.py", "a")
+        self._write("src/b.py", "b")
+        self._write("thing", "file for now")
+        git(self.repo_path, "add", "-A")
+        git(self.repo_path, "commit", "-q", "-m", "initial")
+
+        self._write("src/a.py", "a2")
+        os.remove(os.path.join(self.repo_path, "src", "b.py"))
+        os.remove(os.path.join(self.repo_path, "thing"))
+        self._write("thing/inside.txt", "now a directory")
+        self._write("new/c.py", "c")
+        git(self.repo_path, "add", "-A")
+        git(self.repo_path, "commit", "-q", "-m", "second")
+
+        self.reader = BatchObjectReader(self.repo_path)
+        self.differ = TreeDiffer(self.reader)
+        self.commits = CommitLoader(self.repo_path).load_commits()
+
+    def tearDown(self):
+        self.reader.close()
+        self.repo_dir.cleanup()
+
+    def _write(self, path, content):
+        full_path = os.path.join(self.repo_path, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(content)
+
+    def test_diff_commit(self):
+        second = self.commits[0]
+        changes = self.differ.diff_commit(second)
+        self.assertEqual([(c.status, c.path) for c in changes.changes], [
+            ("A", "new/c.py"),
+            ("M", "src/a.py"),
+            ("D", "src/b.py"),
+            ("D", "thing"),
+            ("A", "thing/inside.txt"),
+        ])
+        self.assertEqual((changes.added, changes.modified, changes.deleted), (2, 1, 2))
+        blob = git(self.repo_path, "rev-parse", "HEAD:src/a.py")
+        self.assertEqual(changes.changes[1], Change("M", "src/a.py", git(self.repo_path, "rev-parse", "HEAD~1:src/a.py"), blob))
+
+    def test_unchanged_subtree_is_not_read(self):
+        second = self.commits[0]
+        self.differ.diff_commit(second)
+        keep_tree = git(self.repo_path, "rev-parse", "HEAD:keep")
+        self.assertNotIn(keep_tree, self.differ._trees)
+
+    def test_root_commit_and_bulk(self):
+        results = list(iter_commit_changes(self.differ, self.commits))
+        self.assertEqual([r.sha for r in results], [c.sha for c in self.commits])
+        root = results[1]
+        self.assertEqual(root.added, 4)
+        self.assertEqual((root.modified, root.deleted), (0, 0))
+        self.assertIn({"status": "A", "path": "keep/deep/file.txt"}, changes_to_dict(root)["paths"])
+        self.assertEqual(format_changes(root, limit=1)[-1], "... and 3 more")
+
+    def test_cache_is_bounded(self):
+        differ = TreeDiffer(self.reader, cache_size=2)
+        list(iter_commit_changes(differ, self.commits))
+        self.assertLessEqual(len(differ._trees), 2)
+
+    def test_reader_missing_object(self):
+        with self.assertRaises(KeyError):
+            self.reader.read("0" * 40)
+        obj_type, data = self.reader.read(self.commits[0].sha)
+        self.assertEqual(obj_type, "commit")
+        self.assertTrue(data.startswith(b"tree "))
+
+    def test_read_object_prefix(self):
+        blob = git(self.repo_path, "rev-parse", "HEAD:thing/inside.txt")
+        self.assertEqual(read_object_prefix(self.repo_path, blob, 3), ("blob", 15, b"now"))
+        self.assertEqual(read_object_prefix(self.repo_path, blob, 100), ("blob", 15, b"now a directory"))
+        with self.assertRaises(KeyError):
+            read_object_prefix(self.repo_path, "0" * 40, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, patch, call
+from datetime import datetime
 from pathlib import Path
 
 # TUIの実行や実際のGit操作を避けるため、依存関係をモック化します
@@ -7,17 +8,23 @@ with patch('src.git_repo_inspector.tui.RepoDir'), \
      patch('src.git_repo_inspector.tui.BranchLoader'), \
      patch('src.git_repo_inspector.tui.CommitLoader'), \
      patch('textual.app.App.run'):
-    from src.git_repo_inspector.tui import GitRepoInspectorTUI, datetime
-    from textual.widgets import Static, DataTable, Input, Button
+    from src.git_repo_inspector.tui import GitRepoInspectorTUI, CommitTable, format_local_time
+    from textual.app import App
+    from textual.widgets import Static, DataTable, Input, Button, Tree
+    from src.git_repo_inspector.commit_loader import Identity
+    from src.git_repo_inspector.session_cache import estimate_commit_bytes
 
 
 # テスト用のモックコミットオブジェクト
 class MockCommit:
-    def __init__(self, sha, author, message):
+    def __init__(self, sha, author, message, author_time=0, parents=()):
         self.sha = sha
+        self.parents = list(parents)
         self.author = author
         self.message = message
         self.committer = ""
+        self.author_ident = Identity(author.split('<', 1)[0].strip(), "") if '<' in author else None
+        self.author_time = author_time
 
 
 @pytest.fixture
@@ -32,8 +39,10 @@ def app():
 
         # UIウィジェットをモック化
         app_instance.repo_info_widget = MagicMock(spec=Static)
-        app_instance.branch_table = MagicMock(spec=DataTable)
-        app_instance.commit_table = MagicMock(spec=DataTable)
+        app_instance.branch_tree = Tree("Branches")
+        app_instance.commit_table = MagicMock(spec=CommitTable, row_count=0)
+        app_instance._commit_columns = ["sha", "author", "date", "subject"]
+        app_instance._commit_sha_column = "sha"
         app_instance.commit_detail_view = MagicMock(spec=Static)
         app_instance.dir_input = MagicMock(spec=Input)
 
@@ -51,57 +60,87 @@ def app():
 
 # --- ヘルパー関数のテスト ---
 
-def test_get_author_name(app):
-    assert app._get_author_name("John Doe <john.doe@example.com>") == "John Doe"
-    assert app._get_author_name(" Some Name  <name@mail.com> 123 +0900") == "Some Name"
-    assert app._get_author_name("InvalidName") == "Unknown Author"
-    assert app._get_author_name("") == "Unknown Author"
+def test_format_author_name(app):
+    assert app._format_author_name(MockCommit("sha1", "John Doe <john.doe@example.com>", "")) == "John Doe"
+    assert app._format_author_name(MockCommit("sha1", " Some Name  <name@mail.com> 123 +0900", "")) == "Some Name"
+    assert app._format_author_name(MockCommit("sha1", "InvalidName", "")) == "Unknown Author"
+    assert app._format_author_name(MockCommit("sha1", "", "")) == "Unknown Author"
 
 
-def test_parse_commit_date(app):
-    date_str = "Author Name <email> 1678886400 +0000"
-    with patch('src.git_repo_inspector.tui.datetime') as mock_dt:
-        mock_datetime_instance = MagicMock()
-        mock_datetime_instance.strftime.return_value = "2023-03-15 13:20:00"
-        mock_dt.fromtimestamp.return_value = mock_datetime_instance
+def test_format_commit_date(app):
+    commit = MockCommit("sha1", "Author Name <email> 1678886400 +0000", "", author_time=1678886400)
+    expected = datetime.fromtimestamp(1678886400).strftime('%Y-%m-%d %H:%M:%S')
+    format_local_time.cache_clear()
+    assert app._format_commit_date(commit) == expected
+    assert app._format_commit_date(MockCommit("sha2", "", "", author_time=1678886400)) == expected
+    assert format_local_time.cache_info().hits == 1  # 同じ時刻は整形し直さない
 
-        result = app._parse_commit_date(date_str)
+    assert app._format_commit_date(MockCommit("sha1", "Invalid String", "")) == "Unknown Date"
 
-        assert result == "2023-03-15 13:20:00"
-        mock_dt.fromtimestamp.assert_called_once_with(1678886400)
-        mock_datetime_instance.strftime.assert_called_once_with('%Y-%m-%d %H:%M:%S')
 
-    assert app._parse_commit_date("Invalid String") == "Unknown Date"
+# --- データ更新ロジックのテスト ---
 
+def branch_labels(node):
+    return [str(child.label) for child in node.children]
 
-# --- データ更新ロジックのテスト ---
 
-def test_update_branch_table_success(app):
-    mock_branches = {'sha1': ['main', 'feature/a'], 'sha2': ['develop']}
+def test_update_branch_tree_groups_by_segment(app):
+    mock_branches = {'sha1000': ['main', 'feature/a', 'feature/b/c'], 'sha2000': ['develop']}
     app._branch_loader.get_branches.return_value = mock_branches
 
-    app._update_branch_table()
+    app._update_branch_tree()
 
-    app.branch_table.clear.assert_called_once()
-    # ブランチ名でソートされることを確認
-    expected_calls = [
-        call('develop', 'sha2'),
-        call('feature/a', 'sha1'),
-        call('main', 'sha1'),
-    ]
-    app.branch_table.add_row.assert_has_calls(expected_calls, any_order=False)
+    # トップレベルだけを描画し、グループには配下のブランチ数を表示
+    assert branch_labels(app.branch_tree.root) == ['develop  sha2000', 'feature/ (2)', 'main  sha1000']
+    feature = app.branch_tree.root.children[1]
+    assert not feature.children
+
+    app.on_tree_node_expanded(Tree.NodeExpanded(feature))
+    assert branch_labels(feature) == ['a  sha1000', 'b/ (1)']
 
 
-def test_update_branch_table_no_branches(app):
+def test_update_branch_tree_no_branches(app):
     app._branch_loader.get_branches.return_value = {}
-    app._update_branch_table()
-    app.branch_table.add_row.assert_called_once_with("No branches found.", "")
+    app._update_branch_tree()
+    assert branch_labels(app.branch_tree.root) == ["No branches found."]
 
 
-def test_update_branch_table_exception(app):
+def test_update_branch_tree_exception(app):
     app._branch_loader.get_branches.side_effect = Exception("Git error")
-    app._update_branch_table()
-    app.branch_table.add_row.assert_called_with(f"Error loading branches: Exception", "Git error")
+    app._update_branch_tree()
+    assert branch_labels(app.branch_tree.root) == ["Error loading branches: Exception: Git error"]
+
+
+def test_branch_tree_pages_large_groups(app):
+    app.BRANCH_PAGE_SIZE = 2
+    app._branch_loader.get_branches.return_value = {'sha1000': [f"b{i}" for i in range(5)]}
+    app._update_branch_tree()
+    assert branch_labels(app.branch_tree.root) == ['b0  sha1000', 'b1  sha1000', '... 3 more']
+
+    # 「more」ノードを選択すると次のページを追加
+    more = app.branch_tree.root.children[-1]
+    app.on_tree_node_selected(Tree.NodeSelected(more))
+    assert branch_labels(app.branch_tree.root) == ['b0  sha1000', 'b1  sha1000', 'b2  sha1000', 'b3  sha1000',
+                                                   '... 1 more']
+
+
+def test_branch_filter_matches_prefix(app):
+    app._branch_loader.get_branches.return_value = {'sha1000': ['feature/login', 'feature/logout', 'feature/ui', 'fix']}
+    app._update_branch_tree()
+
+    event = MagicMock()
+    event.input.id = "branch_filter"
+    event.value = "feature/lo"
+    app.on_input_changed(event)
+    assert branch_labels(app.branch_tree.root) == ['feature/login  sha1000', 'feature/logout  sha1000']
+
+    event.value = "f"
+    app.on_input_changed(event)
+    assert branch_labels(app.branch_tree.root) == ['feature/ (3)', 'fix  sha1000']
+
+    event.value = "zzz"
+    app.on_input_changed(event)
+    assert branch_labels(app.branch_tree.root) == ["No branches start with zzz."]
 
 
 def test_update_commit_table_success(app):
@@ -112,13 +151,15 @@ def test_update_commit_table_success(app):
     app._commit_loader.load_commits.return_value = mock_commits
     app._commits_data_cache = []  # キャッシュをクリア
 
-    with patch.object(app, '_get_author_name', side_effect=["Author 1", "Author 2"]), \
-         patch.object(app, '_parse_commit_date', side_effect=["Date 1", "Date 2"]):
+    with patch.object(app, '_format_author_name', side_effect=["Author 1", "Author 2"]), \
+         patch.object(app, '_format_commit_date', side_effect=["Date 1", "Date 2"]):
         app._update_commit_table()
 
         app.commit_table.clear.assert_called_once()
         app.commit_detail_view.update.assert_called_once_with("Select a commit to see details.")
         assert app._commits_data_cache == mock_commits  # キャッシュが更新されたか
+        assert app._find_commit("sha2") is mock_commits[1]
+        assert app._find_commit("sha3") is None
         expected_calls = [
             call('sha1', 'Author 1', 'Date 1', 'feat: one', key='sha1'),
             call('sha2', 'Author 2', 'Date 2', 'fix: two', key='sha2'),
@@ -154,12 +195,21 @@ async def test_on_button_pressed_change_dir_success(app):
         mock_path.return_value.resolve.return_value = mock_path.return_value
         mock_path.return_value.is_dir.return_value = True
         app._load_repo_data = MagicMock() # _load_repo_dataの呼び出しを監視
+        app.mount = MagicMock()
+        old_table = app.commit_table
+        new_table = MagicMock(spec=CommitTable)
+        app._create_commit_table = MagicMock(side_effect=lambda: setattr(app, 'commit_table', new_table) or new_table)
 
         await app.on_button_pressed(event)
 
         assert app._repo_path == mock_path.return_value
+        # 前のリポジトリはセッションとして保持し、新しいコミット表を表示
+        assert app._sessions.keys() == ["/fake/repo"]
+        app.mount.assert_called_once_with(new_table, after=old_table)
+        assert app.commit_table is new_table
+        assert old_table.display is False
         app.repo_info_widget.update.assert_called_once()
-        app.branch_table.clear.assert_called_once()
+        assert branch_labels(app.branch_tree.root) == ["Loading branches..."]
         app._load_repo_data.assert_called_once()
 
 
@@ -194,7 +244,7 @@ def test_load_repo_data_success(MockRepoDir, MockBranchLoader, MockCommitLoader)
     # 必要な属性とモックを手動で設定
     app._repo_path = Path("/fake/repo")
     app.repo_info_widget = MagicMock(spec=Static)
-    app._update_branch_table = MagicMock()
+    app._update_branch_tree = MagicMock()
     app._update_commit_table = MagicMock()
     MockRepoDir.return_value._is_bare = False
     MockRepoDir.return_value.toplevel_dir = "/fake/repo"
@@ -206,7 +256,7 @@ def test_load_repo_data_success(MockRepoDir, MockBranchLoader, MockCommitLoader)
     MockBranchLoader.assert_called_once_with(str(app._repo_path))
     MockCommitLoader.assert_called_once_with(str(app._repo_path))
     app.repo_info_widget.update.assert_called_once()
-    app._update_branch_table.assert_called_once()
+    app._update_branch_tree.assert_called_once()
     app._update_commit_table.assert_called_once()
 
 
@@ -218,7 +268,7 @@ def test_load_repo_data_failure(MockRepoDir):
     app._repo_path = Path("/invalid/path")
     app._commits_data_cache = ["old data"]
     app.repo_info_widget = MagicMock(spec=Static)
-    app.branch_table = MagicMock(spec=DataTable)
+    app.branch_tree = Tree("Branches")
     app.commit_table = MagicMock(spec=DataTable)
     app.commit_detail_view = MagicMock(spec=Static)
 
@@ -230,6 +280,328 @@ def test_load_repo_data_failure(MockRepoDir):
     assert app._commits_data_cache == []
     app.repo_info_widget.update.assert_called_once()
     assert "Error loading repository data" in app.repo_info_widget.update.call_args[0][0]
-    app.branch_table.add_row.assert_called_once_with("Error loading branches.", "ValueError")
+    assert branch_labels(app.branch_tree.root) == ["Error loading branches: ValueError"]
     app.commit_table.add_row.assert_called_once_with("Error loading commits.", "ValueError", "", "")
     app.commit_detail_view.update.assert_called_once_with("Error loading commit details.")
+
+
+# --- 参照の監視による差分更新のテスト ---
+
+def run_poll(app):
+    """_poll_refs のワーカーをその場で実行し、結果をメインスレッド側の処理に渡す"""
+    app.run_worker = MagicMock(side_effect=lambda work, **kwargs: work())
+    app.call_from_thread = MagicMock(side_effect=lambda callback, *args: callback(*args))
+    app._poll_refs()
+
+
+def test_poll_refs_patches_tables(app):
+    old_commit = MockCommit("sha1", "Author 1 <a1@x.c>", "old")
+    new_commit = MockCommit("sha2", "Author 2 <a2@x.c>", "new")
+    app._commits_data_cache = [old_commit]
+    app._commits_by_sha = {"sha1": old_commit}
+    app._known_tips = ["sha1"]
+    app._ref_watcher = MagicMock()
+    app._ref_watcher.poll.return_value = True
+    app._commit_loader.get_ref_tips.return_value = ["sha2", "sha3"]
+    app._commit_loader.load_commits_since.return_value = [new_commit, old_commit]
+    app._branch_loader.get_branches.side_effect = [
+        {"sha1": ["main", "old"]},
+        {"sha1": ["main", "old"]},
+        {"sha2": ["main"], "sha3": ["topic"]},
+    ]
+    app._update_branch_tree()
+    app.notify = MagicMock()
+
+    with patch.object(app, '_format_commit_date', return_value="Date"):
+        run_poll(app)
+
+    assert app.run_worker.call_args.kwargs["thread"] is True  # git はワーカースレッドで実行
+    app._commit_loader.load_commits_since.assert_called_once_with(["sha1"])
+    assert app._known_tips == ["sha2", "sha3"]
+    assert app._commits_data_cache == [new_commit, old_commit]
+    assert app._find_commit("sha2") is new_commit
+    app.commit_table.clear.assert_not_called()
+    app.commit_table.add_row.assert_called_once_with("sha2", "Author 2", "Date", "new", key="sha2")
+    # 追加した行はセッションやコミット一覧と同じく先頭へ
+    args = app.commit_table.apply_order.call_args[0]
+    assert list(args[0]) == ["sha2", "sha1"] and args[1] == "sha"
+    assert list(app._ref_trie.iter_refs()) == [("main", "sha2"), ("topic", "sha3")]
+    assert branch_labels(app.branch_tree.root) == ["main  sha2", "topic  sha3"]
+    assert not app._ref_poll_pending
+
+
+def test_poll_refs_reapplies_sort(app):
+    app._commits_data_cache = [MockCommit("sha1", "A <a@x.c>", "old")]
+    app._ref_watcher = MagicMock()
+    app._commit_loader.get_ref_tips.return_value = ["sha2"]
+    app._commit_loader.load_commits_since.return_value = [MockCommit("sha2", "B <b@x.c>", "new")]
+    app._branch_loader.get_branches.return_value = {}
+    app._commit_sort = ("date", True)
+    app._sort_commit_table = MagicMock()
+    app.notify = MagicMock()
+    run_poll(app)
+    app._sort_commit_table.assert_called_once_with("date", True)
+    app.commit_table.apply_order.assert_not_called()
+
+
+def test_poll_refs_runs_one_check_at_a_time(app):
+    app._ref_watcher = MagicMock()
+    app.run_worker = MagicMock()
+    app._poll_refs()
+    app._poll_refs()  # 前回の確認がまだ終わっていない
+    app.run_worker.assert_called_once()
+
+
+def test_ref_changes_of_previous_repo_are_dropped(app):
+    old_watcher = MagicMock()
+    app._ref_watcher = MagicMock()
+    app._ref_watcher.poll.return_value = False
+    app._ref_poll_pending = True
+    app.run_worker = MagicMock()
+    app._apply_ref_changes(old_watcher, (["sha9"], [MockCommit("sha9", "A <a@x.c>", "s")], []))
+    old_watcher.invalidate.assert_called_once()  # 戻ったときに再検出させる
+    assert app._known_tips == []
+    app.commit_table.add_row.assert_not_called()
+    app.run_worker.assert_called_once()  # 表示中のリポジトリを確認し直す
+
+
+def test_poll_refs_reports_errors(app):
+    app._ref_watcher = MagicMock()
+    app._commit_loader.get_ref_tips.side_effect = OSError("gone")
+    app.notify = MagicMock()
+    run_poll(app)
+    app.notify.assert_called_once_with("Failed to refresh refs: gone", severity="error")
+    assert not app._ref_poll_pending
+
+
+def test_patch_branch_tree_relabels_moved_branch(app):
+    app._branch_loader.get_branches.return_value = {"sha1000": ["main", "feature/a"]}
+    app._update_branch_tree()
+    feature = app.branch_tree.root.children[0]
+    app.on_tree_node_expanded(Tree.NodeExpanded(feature))
+    feature.expand()
+    leaf = feature.children[0]
+
+    # 移動だけならノードを作り直さずラベルを更新
+    app._patch_branch_tree([{"branch": "feature/a", "action": "moved", "sha": "sha2000"}])
+    assert app.branch_tree.root.children[0] is feature
+    assert str(leaf.label) == "a  sha2000"
+
+    # 追加時は再描画し、展開済みのグループは展開したまま
+    app._patch_branch_tree([{"branch": "feature/b", "action": "created", "sha": "sha3000"}])
+    feature = app.branch_tree.root.children[0]
+    assert str(feature.label) == "feature/ (2)"
+    assert feature.is_expanded
+    assert branch_labels(feature) == ["a  sha2000", "b  sha3000"]
+
+
+def test_poll_refs_no_change(app):
+    app._ref_watcher = MagicMock()
+    app._ref_watcher.poll.return_value = False
+    run_poll(app)
+    app._commit_loader.load_commits_since.assert_not_called()
+
+
+def test_show_path_history(app):
+    commit = MockCommit("sha1", "Author 1 <a1@x.c>", "touches path")
+    app._path_filter = "src/a.py"
+    with patch.object(app, '_format_commit_date', return_value="Date"):
+        app._show_path_history("src/a.py", [commit])
+    app.commit_table.clear.assert_called_once()
+    app.commit_table.add_row.assert_called_once_with("sha1", "Author 1", "Date", "touches path", key="sha1")
+
+    # 別のパスに切り替わった後の古い結果は無視される
+    app.commit_table.reset_mock()
+    app._show_path_history("other.py", [commit])
+    app.commit_table.clear.assert_not_called()
+
+
+def test_apply_empty_path_filter_restores_commits(app):
+    commit = MockCommit("sha1", "Author 1 <a1@x.c>", "msg")
+    app._commits_data_cache = [commit]
+    app._path_filter = "src/a.py"
+    with patch.object(app, '_format_commit_date', return_value="Date"):
+        app._apply_path_filter("")
+    assert app._path_filter is None
+    app.commit_table.clear.assert_called_once()
+    app.commit_table.add_row.assert_called_once_with("sha1", "Author 1", "Date", "msg", key="sha1")
+
+
+def test_format_commit_details(app):
+    commit = MockCommit("sha1", "Author 1 <a1@x.c>", "subject\n\nbody")
+    commit.parents = []
+    commit.branches = ["main"]
+    with patch.object(app, '_format_commit_date', return_value="Date"):
+        loading = app._format_commit_details(commit)
+        failed = app._format_commit_details(commit, error="boom")
+    assert "Parents:  (root commit)" in loading
+    assert "Branches: main" in loading
+    assert loading.endswith("Loading changes...")
+    assert failed.endswith("Changes unavailable: boom")
+
+
+def test_short_sha_uses_unique_abbreviation(app):
+    from src.git_repo_inspector.sha_index import ShaIndex
+    assert app._short_sha("abcdef0123") == "abcdef0"
+    app._sha_index = ShaIndex(["abcdef01" + "0" * 32, "abcdef02" + "0" * 32])
+    assert app._short_sha("abcdef01" + "0" * 32) == "abcdef01"
+
+
+def test_format_blob_preview(app):
+    assert app._format_blob_preview("a.txt", 5, b"hello") == "a.txt (5 bytes)\n\nhello"
+    assert app._format_blob_preview("big.txt", 100, b"abc").endswith("truncated, showing the first 3 bytes")
+    assert app._format_blob_preview("img.png", 10, b"\x89PNG\0\0").endswith("Binary file, not shown.")
+
+
+def test_expand_tree_node_loads_once(app):
+    # ツリーの読み込みはワーカースレッドで行い、UIスレッドをブロックしない
+    app.tree_browser = Tree("Files")
+    app.tree_browser.reset("sha1 /", ("tree1", "40000", ""))
+    root = app.tree_browser.root
+    app._tree_differ = MagicMock()
+    app._tree_differ.read_tree.return_value = [
+        (b"a.txt", b"a.txt", b"100644", "blob1"),
+        (b"lib/", b"lib", b"40000", "tree2"),
+    ]
+    with patch.object(app, 'run_worker') as run_worker, \
+            patch.object(app, 'call_from_thread', side_effect=lambda f, *args: f(*args)):
+        app._expand_tree_node(root)
+        app._tree_differ.read_tree.assert_not_called()
+        assert [str(n.label) for n in root.children] == ["Loading..."]
+        app._expand_tree_node(root)  # 読み込み中は再度要求しない
+        run_worker.assert_called_once()
+        run_worker.call_args[0][0]()  # ワーカーの処理を実行
+    app._tree_differ.read_tree.assert_called_once_with("tree1")
+    # ディレクトリを先に、その後ファイルを並べる
+    assert [n.data for n in root.children] == [("tree2", "40000", "lib/"), ("blob1", "100644", "a.txt")]
+
+
+def test_tree_entries_of_previous_commit_are_dropped(app):
+    app.tree_browser = Tree("Files")
+    app.tree_browser.reset("sha1 /", ("tree1", "40000", ""))
+    old_root = app.tree_browser.root
+    app.tree_browser.reset("sha2 /", ("tree2", "40000", ""))
+    app._add_tree_entries(old_root, [(b"a.txt", b"a.txt", b"100644", "blob1")])
+    assert not old_root.children
+    app._add_tree_entries(app.tree_browser.root, None, "boom")
+    assert str(app.tree_browser.root.children[0].label) == "Error reading tree: boom"
+
+
+# --- コミット表のソートのテスト ---
+
+def test_sort_commit_table_applies_cached_permutation(app):
+    app._commits_data_cache = [
+        MockCommit("c3", "Bob <b@x.c>", "b subject", author_time=30, parents=["c2"]),
+        MockCommit("c2", "alice <a@x.c>", "C subject", author_time=10, parents=["c1"]),
+        MockCommit("c1", "Carol <c@x.c>", "a subject", author_time=20),
+    ]
+    app._commit_columns = ["sha", "author", "date", "subject"]
+    app.commit_table.columns = {key: MagicMock() for key in app._commit_columns}
+
+    app._sort_commit_table("date", True)
+    assert list(app.commit_table.apply_order.call_args[0][0]) == ["c3", "c1", "c2"]
+    assert str(app.commit_table.columns["date"].label) == "Date ▼"
+    assert str(app.commit_table.columns["author"].label) == "Author"
+
+    app._sort_commit_table("author", False)
+    assert list(app.commit_table.apply_order.call_args[0][0]) == ["c2", "c3", "c1"]
+    app._sort_commit_table("subject", False)
+    assert list(app.commit_table.apply_order.call_args[0][0]) == ["c1", "c3", "c2"]
+
+    # 2回目以降はキャッシュした順列を再利用
+    index = app._sort_index
+    cached = index.order("date", True)
+    app._sort_commit_table("date", True)
+    assert app._sort_index is index
+    assert index.order("date", True) is cached
+    assert list(app.commit_table.apply_order.call_args[0][0]) == ["c3", "c1", "c2"]
+
+
+def test_header_selected_toggles_direction(app):
+    app._commits_data_cache = [MockCommit("c1", "A <a@x.c>", "s")]
+    app._sort_commit_table = MagicMock()
+    event = MagicMock()
+    event.data_table = app.commit_table
+    event.column_index = 2
+
+    app.on_data_table_header_selected(event)
+    app._sort_commit_table.assert_called_once_with("date", True)
+
+    app._commit_sort = ("date", True)
+    app.on_data_table_header_selected(event)
+    app._sort_commit_table.assert_called_with("date", False)
+
+    event.column_index = 1
+    app.on_data_table_header_selected(event)
+    app._sort_commit_table.assert_called_with("author", False)
+
+
+@pytest.mark.asyncio
+async def test_commit_table_apply_order_keeps_cursor_row():
+    class TableApp(App):
+        def compose(self):
+            self.table = CommitTable()
+            self.sha_column, = self.table.add_columns("SHA")
+            for key in ("a", "b", "c", "d"):
+                self.table.add_row(key, key=key)
+            yield self.table
+
+    table_app = TableApp()
+    async with table_app.run_test():
+        table = table_app.table
+        table.move_cursor(row=1)
+        table.apply_order(["d", "x", "a"], table_app.sha_column)  # 表にない x は無視、並べていない b, c は末尾
+        assert [table.get_row_at(i)[0] for i in range(4)] == ["d", "a", "b", "c"]
+        assert table.cursor_row == 2
+        # 並べていない行は現在の表示順を保つ
+        table.apply_order(["c", "d", "a", "b"], table_app.sha_column)
+        table.apply_order(["a"], table_app.sha_column)
+        assert [table.get_row_at(i)[0] for i in range(4)] == ["a", "c", "d", "b"]
+        assert table.get_row_index("b") == 3
+
+
+# --- リポジトリセッションの切り替えのテスト ---
+
+def test_save_session_counts_commit_table(app):
+    # コミット自体は上限に収まるが、保持する表の行数も数えると古いセッションを追い出す
+    commits = [MockCommit(f"sha{i}", "A <a@x.c>", "s") for i in range(100)]
+    for commit in commits:
+        commit.raw = ""
+    app._sessions.max_bytes = 2 * estimate_commit_bytes(commits) + 1
+    old_table = MagicMock(spec=CommitTable)
+    app._sessions.put("/other/repo", {"commit_table": old_table}, estimate_commit_bytes(commits))
+    app._commits_data_cache = commits
+    app.commit_table.row_count = len(commits)
+    assert app._save_session()
+    old_table.remove.assert_called_once()
+    assert app._sessions.keys() == ["/fake/repo"]
+
+
+def test_switch_repo_restores_kept_session(app):
+    for name in ("path_filter_input", "tree_browser", "blob_preview", "recent_repos_select"):
+        setattr(app, name, MagicMock())
+    app._commits_data_cache = [MockCommit("sha1", "A <a@x.c>", "s")]
+    app._commits_data_cache[0].raw = "raw"
+    loader = app._commit_loader
+    table = app.commit_table
+    app._sessions.put("/other/repo", {"_commit_loader": MagicMock(), "_commits_data_cache": [],
+                                      "commit_table": MagicMock(spec=CommitTable)}, 0)
+    app._load_repo_data = MagicMock()
+    app._poll_refs = MagicMock()
+    app.mount = MagicMock()
+    app._create_commit_table = MagicMock(side_effect=lambda: setattr(app, 'commit_table', MagicMock(row_count=0)))
+
+    app._switch_repo(Path("/fake/repo2"))  # 未読み込み: 新しい表を作って読み込む
+    app._load_repo_data.assert_called_once()
+    assert table.display is False
+    app._load_repo_data.reset_mock()
+    app._commit_loader = MagicMock()
+    app._commits_data_cache = []
+    app._switch_repo(Path("/fake/repo"))   # 保持していたセッションは読み込み直さない
+
+    app._load_repo_data.assert_not_called()
+    app._poll_refs.assert_called_once()  # 参照の変化を確認して差分だけ反映
+    assert app._commit_loader is loader
+    assert app.commit_table is table and table.display is True
+    assert [str(p) for p in app._sessions.keys()] == ["/fake/repo2", "/other/repo"]
+    app.recent_repos_select.set_options.assert_called()
@@ -0,0 +1,98 @@
+import unittest
+import tempfile
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from git_repo_inspector.repo_dir import RepoDir
+from git_repo_inspector.worktrees import (
+    collect_worktree_status, format_worktree, get_common_dir, list_worktrees, worktrees_to_json,
+)
+
+from git_fixtures import USER_EMAIL, USER_NAME, git
+
+
+class TestWorktreesIntegration(unittest.TestCase):
+    """Same layout as hello-git-worktree/main.py: a bare repository with linked worktrees."""
+
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.sandbox_dir = tempfile.TemporaryDirectory()
+        self.sandbox = os.path.realpath(self.sandbox_dir.name)
+        self.bare = os.path.join(self.sandbox, "bare.git")
+        git(self.sandbox, "init", "-q", "--bare", "-b", "master", self.bare)
+        seed = os.path.join(self.sandbox, "seed")
+        git(self.sandbox, "clone", "-q", self.bare, seed)
+        git(seed, "-c", f"user.name={USER_NAME}", "-c", f"user.email={USER_EMAIL}",
+            "commit", "-q", "--allow-empty", "-m", "initial")
+        git(seed, "push", "-q", "origin", "HEAD:master", "HEAD:branch1", "HEAD:branch2", "HEAD:branch3")
+        for i in range(1, 4):
+            git(self.sandbox, "--git-dir", self.bare, "worktree", "add", "-q", os.path.join(self.sandbox, f"branch{i}"),
+                f"branch{i}")
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        self.sandbox_dir.cleanup()
+
+    def test_list_worktrees(self):
+        worktrees = list_worktrees(self.bare)
+        self.assertEqual([w.name for w in worktrees], ["", "branch1", "branch2", "branch3"])
+        main = worktrees[0]
+        self.assertTrue(main.is_main)
+        self.assertTrue(main.bare)
+        self.assertEqual(main.branch, "refs/heads/master")
+        self.assertEqual(worktrees[1].path, os.path.join(self.sandbox, "branch1"))
+        self.assertEqual(worktrees[1].branch, "refs/heads/branch1")
+        self.assertFalse(any(w.prunable for w in worktrees))
+
+    def test_collect_status(self):
+        with open(os.path.join(self.sandbox, "branch2", "new.txt"), "w") as f:
+            f.write("untracked\n")
+        worktrees = collect_worktree_status(list_worktrees(self.bare), max_workers=2)
+        by_name = {w.name: w for w in worktrees}
+        self.assertIsNone(by_name[""].dirty)
+        self.assertFalse(by_name["branch1"].dirty)
+        self.assertTrue(by_name["branch2"].dirty)
+        self.assertEqual(by_name["branch2"].changes, 1)
+        self.assertEqual(len(by_name["branch3"].head), 40)
+        self.assertIn("dirty (1)", format_worktree(by_name["branch2"]))
+
+        data = json.loads(worktrees_to_json(worktrees))
+        self.assertEqual([d["name"] for d in data], ["", "branch1", "branch2", "branch3"])
+
+    def test_moved_worktree(self):
+        # Experiment 1: rename a worktree directory and keep working inside it
+        moved = os.path.join(self.sandbox, "branch1_moved")
+        os.rename(os.path.join(self.sandbox, "branch1"), moved)
+
+        worktrees = {w.name: w for w in list_worktrees(self.bare)}
+        self.assertTrue(worktrees["branch1"].prunable)
+        self.assertIsNone(worktrees["branch1"].moved_to)
+
+        repo_dir = RepoDir(moved)
+        self.assertEqual(os.path.realpath(repo_dir.get_common_dir()), self.bare)
+        worktrees = {w.name: w for w in collect_worktree_status(repo_dir.list_worktrees())}
+        self.assertTrue(worktrees["branch1"].prunable)
+        self.assertEqual(os.path.realpath(worktrees["branch1"].moved_to), moved)
+        self.assertFalse(worktrees["branch1"].dirty)
+        self.assertIn("moved to", format_worktree(worktrees["branch1"]))
+
+    def test_removed_worktree_is_missing(self):
+        os.rename(os.path.join(self.sandbox, "branch3"), os.path.join(self.sandbox, "elsewhere"))
+        worktrees = {w.name: w for w in collect_worktree_status(list_worktrees(self.bare))}
+        self.assertTrue(worktrees["branch3"].prunable)
+        self.assertIsNone(worktrees["branch3"].dirty)
+        self.assertIn("missing [prunable]", format_worktree(worktrees["branch3"]))
+
+    def test_pool_is_bounded(self):
+        with patch('git_repo_inspector.worktrees.ThreadPoolExecutor', wraps=ThreadPoolExecutor) as pool:
+            collect_worktree_status(list_worktrees(self.bare), max_workers=2)
+        pool.assert_called_once_with(max_workers=2)
+
+    def test_get_common_dir_non_linked(self):
+        self.assertEqual(get_common_dir(self.bare), self.bare)
+
+
+if __name__ == '__main__':
+    unittest.main()